@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+⏱️ Micro-benchmark da classificação de intenções do JARVIS 3.0
+
+Compara a varredura antiga de analyze_command (nove buscas de substring em
+sequência) com o IntentClassifier compilado, mensagem a mensagem e em lote,
+e mostra os casos em que a busca por substring erra.
+
+Uso:
+    python benchmark_intents.py
+    python benchmark_intents.py --messages 20000 --repeat 10
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.intents import IntentClassifier
+
+# Varredura anterior de AIEngine.analyze_command, na mesma ordem
+LEGACY_SCANS = [
+    ('cpu_info', ['cpu', 'processador', 'performance']),
+    ('memory_info', ['memoria', 'ram', 'memória']),
+    ('add_note', ['anotar', 'nota', 'anotação']),
+    ('add_reminder', ['lembrar', 'lembrete', 'alarme']),
+    ('add_task', ['tarefa', 'task', 'fazer']),
+    ('disk_info', ['disco', 'armazenamento', 'hd', 'ssd']),
+    ('battery_info', ['bateria', 'energia']),
+    ('temperature_info', ['temperatura', 'temp']),
+    ('open_app', ['abrir', 'executar', 'rodar']),
+]
+
+SAMPLES = [
+    "Qual o uso de CPU agora?",
+    "Quanta memória RAM está livre?",
+    "Anote que a reunião mudou para quinta",
+    "Me lembre de ligar para o médico amanhã",
+    "Adicione uma tarefa: revisar o relatório",
+    "Quanto espaço sobra no disco?",
+    "Como está a bateria do notebook?",
+    "Qual a temperatura do processador?",
+    "Abra o navegador, por favor",
+    "Como vai o tempo em São Paulo hoje?",
+    "Conte uma piada sobre programadores",
+    "Explique a diferença entre TCP e UDP em poucas palavras",
+]
+
+# Casos em que a busca por substring casa a palavra errada
+PITFALLS = [
+    "Como vai o tempo hoje?",        # "temp" dentro de "tempo"
+    "Preciso de um programa novo",   # "ram" dentro de "programa"
+    "Recomende um drama coreano",    # "ram" dentro de "drama"
+    "Vou fazer um café",             # "fazer" sozinho ainda é tarefa
+]
+
+def legacy_classify(text: str) -> str:
+    text_lower = text.lower()
+    for action, words in LEGACY_SCANS:
+        if any(word in text_lower for word in words):
+            return action
+    return 'general_chat'
+
+def legacy_classify_all(text: str) -> list:
+    """Todas as intenções pela varredura antiga (o que classify entrega)"""
+    text_lower = text.lower()
+    return [action for action, words in LEGACY_SCANS if any(word in text_lower for word in words)]
+
+def per_message_us(run, messages, repeat: int) -> float:
+    """Melhor de `repeat` medições, em µs por mensagem"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(messages)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark da classificação de intenções")
+    parser.add_argument("--messages", type=int, default=50000, help="Mensagens classificadas por medição")
+    parser.add_argument("--repeat", type=int, default=5, help="Medições por variante (vale a melhor)")
+    args = parser.parse_args()
+    
+    classifier = IntentClassifier()
+    rng = random.Random(42)
+    messages = [rng.choice(SAMPLES) for _ in range(args.messages)]
+    
+    # Aquecimento
+    for message in SAMPLES:
+        legacy_classify(message)
+        classifier.classify(message)
+    
+    legacy = per_message_us(lambda texts: [legacy_classify(t) for t in texts], messages, args.repeat)
+    legacy_all = per_message_us(lambda texts: [legacy_classify_all(t) for t in texts], messages, args.repeat)
+    compiled = per_message_us(lambda texts: [classifier.classify(t) for t in texts], messages, args.repeat)
+    batch = per_message_us(classifier.classify_batch, messages, args.repeat)
+    
+    print(f"⏱️ {len(messages)} mensagens")
+    print(f"   Varredura antiga (primeira intenção):  {legacy:6.2f} µs/mensagem")
+    print(f"   Varredura antiga (todas as intenções): {legacy_all:6.2f} µs/mensagem")
+    print(f"   IntentClassifier.classify (todas):     {compiled:6.2f} µs/mensagem")
+    print(f"   IntentClassifier.classify_batch:       {batch:6.2f} µs/mensagem")
+    
+    print("\n🎯 Casos problemáticos da busca por substring:")
+    for text in PITFALLS:
+        matches = classifier.classify(text)
+        new = ", ".join(f"{m.action} ({m.score})" for m in matches) or "general_chat"
+        print(f"   {text!r}: antes {legacy_classify(text)} -> agora {new}")
+    
+    print("\n🔀 Todas as intenções de uma mensagem:")
+    text = "Anote a temperatura da CPU e me lembre amanhã"
+    for match in classifier.classify(text):
+        print(f"   {match.action:<18} {match.score:.2f}  {', '.join(match.keywords)}")
+
+if __name__ == "__main__":
+    main()
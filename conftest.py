@@ -0,0 +1,130 @@
+"""
+Utilitários compartilhados pelos testes do JARVIS 3.0
+Relógio controlado, espera pelo event loop e um motor de IA sem backends
+"""
+
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+
+from core.config import AIConfig
+
+class Clock:
+    """Relógio controlado pelo teste no lugar de time.time/time.monotonic"""
+    
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+async def settle(rounds: int = 5):
+    """Deixa as tarefas prontas do loop avançarem"""
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+def eventually(condition, timeout: float = 5.0) -> bool:
+    """Espera (em outra thread) até a condição valer ou o prazo acabar"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Troca o módulo `time` de um módulo por um Clock (time() e monotonic())"""
+    def install(module, now: float = 1_700_000_000.0) -> Clock:
+        clock = Clock(now)
+        monkeypatch.setattr(module, "time", types.SimpleNamespace(time=clock, monotonic=clock))
+        return clock
+    return install
+
+@pytest.fixture
+def make_engine(tmp_path, monkeypatch):
+    """Cria AIEngines sem Ollama nem OpenAI alcançáveis, com o cache em tmp_path"""
+    from core.ai_engine import AIEngine
+    
+    monkeypatch.chdir(tmp_path)
+    engines = []
+    
+    def make(**overrides) -> "AIEngine":
+        options = dict(
+            ollama_urls=["http://127.0.0.1:9"],
+            preload_models=False,
+            history_compaction_enabled=False,
+            semantic_router_enabled=False,
+            retrieval_enabled=False
+        )
+        options.update(overrides)
+        engines.append(AIEngine(AIConfig(**options)))
+        return engines[-1]
+    
+    yield make
+    for engine in engines:
+        engine.shutdown()
+
+@pytest.fixture
+def make_app(tmp_path, make_engine, monkeypatch):
+    """Cria JarvisApps (Flask + Socket.IO em modo threading) com o motor dos testes"""
+    from core.app import JarvisApp
+    from core.config import Config
+    
+    apps = []
+    
+    def make(**ai_overrides) -> "JarvisApp":
+        engine = make_engine(**ai_overrides)
+        monkeypatch.setattr("core.app.AIEngine", lambda ai_config: engine)
+        config = Config(str(tmp_path / "config.json"))
+        config.web.async_mode = "threading"
+        apps.append(JarvisApp(config))
+        return apps[-1]
+    
+    yield make
+    for app in apps:
+        app.stop_monitoring()
+
+@pytest.fixture
+def engine(make_engine):
+    """AIEngine com a configuração padrão dos testes"""
+    return make_engine()
+
+@pytest.fixture
+def ollama_stub():
+    """Sobe servidores Ollama simulados (ollama_stub_servers) em portas livres; devolve (servidor, url)"""
+    from ollama_stub_servers import DEFAULT_MODELS, StubOllamaServer
+    
+    servers = []
+    
+    def start(latency: float = 0.0, failing: bool = False, models=DEFAULT_MODELS):
+        server = StubOllamaServer(0, latency, models, failing=failing)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def openai_stub():
+    """Sobe a API OpenAI simulada (openai_stub_server) numa porta livre; devolve (servidor, base_url)"""
+    from openai_stub_server import StubOpenAIServer
+    
+    servers = []
+    
+    def start(latency: float = 0.0, failing: bool = False):
+        server = StubOpenAIServer(0, latency, failing=failing)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -3,40 +3,228 @@ Sistema de IA do JARVIS 3.0
 Suporte para OpenAI e Ollama Local
 """
 
-import openai
-import json
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
+from collections import deque
+from contextlib import asynccontextmanager
 import asyncio
+import heapq
+import itertools
+import threading
+import time
+from pathlib import Path
 from utils.logger_fixed import setup_logger
 from core.plugins import plugin_manager
-from core.ollama_integration import OllamaLocalAI
+from core.ollama_integration import (OllamaLocalAI, AsyncOllamaLocalAI, OllamaBackend,
+                                     OllamaConnectionError, OllamaEmptyResponseError, OllamaHTTPError)
+from core.response_cache import ResponseCache
+from core.prompt_builder import PromptBuilder
+from core.sessions import ChatSession, OllamaContext, SessionStore, DEFAULT_SESSION_ID
+from core.single_flight import SingleFlight
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from core.hedging import HedgePolicy, hedged_stream
+from core.model_residency import ModelResidencyManager
+from core.openai_integration import AsyncOpenAIChat
+from core.context_budget import ContextBudgeter, TokenCounter
+from core.history_compaction import HistoryCompactor
+from core.intents import IntentClassifier, IntentMatch
+from core.semantic_router import SemanticIntentRouter
+from core.fast_path import FastPathExecutor
+from core.retrieval_memory import SOURCE_LABELS, RetrievalMemory
+from core.cancellation import CancelToken, RequestCancelledError
+from core.runtime import EngineRuntime
+
+# Prioridades do agendador (menor valor é atendido primeiro)
+PRIORITY_INTERACTIVE = 0  # Chat do usuário (web, WebSocket, CLI)
+PRIORITY_BATCH = 10  # Avaliações, tarefas em lote e pré-geração
+
+BUSY_MESSAGE = "Estou atendendo muitas solicitações agora. Tente novamente em alguns segundos."
+
+class GenerationBusyError(Exception):
+    """Fila de geração cheia ou espera máxima excedida"""
+    
+    def __init__(self, message: str = BUSY_MESSAGE, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class GenerationScheduler:
+    """
+    Limita as gerações simultâneas no backend local
+    
+    No máximo `max_concurrent` gerações rodam ao mesmo tempo; as demais
+    esperam numa fila por prioridade (chat interativo antes de lotes). Com
+    a fila cheia, ou após `queue_timeout` segundos de espera, a requisição
+    é recusada com GenerationBusyError em vez de esperar até o timeout do
+    backend. Funciona entre event loops de threads diferentes.
+    """
+    
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 16, queue_timeout: float = 20.0):
+        """
+        Args:
+            max_concurrent: Gerações simultâneas (de acordo com o backend)
+            max_queue: Requisições aguardando antes de recusar novas
+            queue_timeout: Espera máxima na fila em segundos
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: List[list] = []  # heap de [prioridade, ordem, loop, future, concedida]
+        self._order = itertools.count()
+        self._waits = deque(maxlen=256)  # últimas esperas na fila (segundos)
+        self._stats = {'admitted': 0, 'rejected': 0, 'timeouts': 0}
+    
+    def is_saturated(self) -> bool:
+        """Indica se uma nova requisição seria recusada agora"""
+        with self._lock:
+            return self._active >= self.max_concurrent and len(self._waiters) >= self.max_queue
+    
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """Aguarda uma vaga de geração (GenerationBusyError se a fila estiver cheia)"""
+        loop = asyncio.get_running_loop()
+        
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                self._stats['admitted'] += 1
+                self._waits.append(0.0)
+                return
+            
+            if len(self._waiters) >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise GenerationBusyError()
+            
+            waiter = [priority, next(self._order), loop, loop.create_future(), False]
+            heapq.heappush(self._waiters, waiter)
+        
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter[3], self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                granted = waiter[4]
+                if not granted:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                if isinstance(e, asyncio.TimeoutError):
+                    self._stats['timeouts'] += 1
+            
+            # Vaga concedida no limite: se o resultado já chegou, devolve aqui;
+            # se o future foi cancelado, _grant devolve ao executar
+            if granted and waiter[3].done() and not waiter[3].cancelled():
+                self.release()
+            
+            if isinstance(e, asyncio.TimeoutError):
+                raise GenerationBusyError() from None
+            raise
+        
+        with self._lock:
+            self._stats['admitted'] += 1
+            self._waits.append(time.monotonic() - started)
+    
+    def release(self):
+        """Libera a vaga para o próximo da fila"""
+        with self._lock:
+            while self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                waiter[4] = True
+                try:
+                    waiter[2].call_soon_threadsafe(self._grant, waiter)
+                    return
+                except RuntimeError:
+                    continue  # Loop do solicitante já foi fechado
+            self._active -= 1
+    
+    def _grant(self, waiter: list):
+        """Entrega a vaga no loop do solicitante"""
+        if waiter[3].done():
+            self.release()  # Desistiu enquanto a vaga era entregue
+        else:
+            waiter[3].set_result(True)
+    
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        """Mantém uma vaga de geração durante o bloco"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def stats(self) -> Dict:
+        """Ocupação, recusas e tempo de espera na fila"""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                **self._stats,
+                'active': self._active,
+                'queued': len(self._waiters),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_wait_avg_ms': round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                'queue_wait_p95_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                'queue_wait_max_ms': round(waits[-1] * 1000, 1) if waits else 0.0
+            }
 
 class AIEngine:
     """Motor de IA principal do JARVIS"""
     
     DEFAULT_OLLAMA_MODEL = "llama3.2:1b"
     
+    # Com mais trocas pendentes (ou sem espaço na janela) o contexto do Ollama
+    # é reconstruído a partir do histórico
+    OLLAMA_CONTEXT_MAX_PENDING = 8
+    
     def __init__(self, ai_config):
         self.config = ai_config
         from utils.logger_fixed import default_logger
         self.logger = default_logger
         
-        # Configuração da API OpenAI
+        # Event loop persistente onde rodam todas as conversas (ver EngineRuntime);
+        # threads síncronas (Flask, Socket.IO, CLI) usam runtime.run/submit/iterate
+        self.runtime = EngineRuntime("ai-engine")
+        
+        # Cliente da API OpenAI (assíncrono, pool HTTP reutilizado)
+        self.openai = None
         if self.config.api_key:
-            openai.api_key = self.config.api_key
+            self.openai = AsyncOpenAIChat(
+                self.config.api_key,
+                base_url=self.config.openai_base_url,
+                timeout=self.config.openai_timeout,
+                connect_timeout=self.config.openai_connect_timeout,
+                max_retries=self.config.openai_max_retries
+            )
         
-        # Inicializar Ollama Local
-        self.ollama = OllamaLocalAI()
+        # Inicializar Ollama Local (cliente síncrono para administração,
+        # cliente assíncrono com pool keep-alive para as conversas)
+        self.ollama = OllamaLocalAI(
+            registry_ttl=self.config.ollama_registry_ttl,
+            base_urls=self.config.ollama_urls,
+            eject_after=self.config.ollama_eject_after,
+            eject_seconds=self.config.ollama_eject_seconds
+        )
+        self.async_ollama = AsyncOllamaLocalAI(pool=self.ollama.pool)
+        self.runtime.on_shutdown(self.async_ollama.aclose)
+        if self.openai is not None:
+            self.runtime.on_shutdown(self.openai.aclose)
+        for client in (self.ollama, self.async_ollama):
+            client.num_ctx = self.config.ollama_num_ctx
+            client.num_predict = self.config.ollama_num_predict
         self.use_local_ai = False
         
+        # Orçamento da janela de contexto (tokens por modelo)
+        self.context_budget = ContextBudgeter(
+            TokenCounter(self.config.tokenizers),
+            num_ctx=self.config.ollama_num_ctx,
+            num_predict=self.config.ollama_num_predict
+        )
+        
         # Verificar se Ollama está disponível
         if self.ollama.check_connection():
             self.use_local_ai = True
             self.logger.info("🧠 Ollama Local AI detectado e ativo!")
-            
-            # Tentar criar modelo personalizado Jarvis
-            self._setup_jarvis_model()
         else:
             self.logger.info("Ollama não detectado. Usando modo API ou fallback.")
         
@@ -46,62 +234,233 @@ class AIEngine:
                 "name": "Assistente Profissional",
                 "description": "Assistente formal e direto",
                 "system_prompt": "Você é JARVIS, um assistente virtual profissional e eficiente. Seja direto, claro e útil.",
-                "ollama_model": "jarvis-personal"  # Modelo personalizado
+                "ollama_model": "jarvis-personal",  # Modelo personalizado
+                "cache_responses": True
             },
             "amigavel": {
                 "name": "Amigável",
                 "description": "Assistente descontraído e amigável",
                 "system_prompt": "Você é JARVIS, um assistente virtual amigável e descontraído. Use um tom casual e seja prestativo.",
-                "ollama_model": self.DEFAULT_OLLAMA_MODEL
+                "ollama_model": self.DEFAULT_OLLAMA_MODEL,
+                "cache_responses": False  # Conversa casual deve variar
             },
             "tecnico": {
                 "name": "Técnico",
                 "description": "Especialista em tecnologia",
                 "system_prompt": "Você é JARVIS, um assistente técnico especializado. Forneça informações detalhadas e precisas sobre tecnologia.",
-                "ollama_model": self.DEFAULT_OLLAMA_MODEL
+                "ollama_model": self.DEFAULT_OLLAMA_MODEL,
+                "cache_responses": True
             }
         }
         
-        self.current_personality = "assistente"
-        self.conversation_history = []
+        # Residência dos modelos: pré-carga em segundo plano, keep_alive nos quentes
+        self.residency = ModelResidencyManager(
+            self.ollama,
+            keep_alive=self.config.model_keep_alive,
+            hot_seconds=self.config.model_hot_seconds,
+            max_resident=self.config.max_resident_models,
+            memory_budget_mb=self.config.model_memory_budget_mb,
+            refresh_interval=self.config.residency_refresh_interval
+        )
+        self.ollama.keep_alive_for = self.residency.keep_alive_for
+        self.async_ollama.keep_alive_for = self.residency.keep_alive_for
+        if self.use_local_ai:
+            self._start_residency()
         
-    def set_personality(self, personality: str):
-        """Define a personalidade da IA"""
+        # Estado de conversa por cliente (sid do Socket.IO / sessão HTTP).
+        # A sessão padrão atende o CLI e chamadas sem identificador.
+        self.default_personality = "assistente"
+        self.default_session = ChatSession(DEFAULT_SESSION_ID, self.default_personality)
+        self.sessions = SessionStore(
+            self.default_personality,
+            max_sessions=self.config.max_sessions,
+            idle_timeout=self.config.session_idle_timeout,
+            cold_after=self.config.session_cold_after
+        )
+        
+        # Resumo das mensagens antigas em segundo plano (prompt de tamanho constante)
+        self.compactor = None
+        if self.config.history_compaction_enabled:
+            self.compactor = HistoryCompactor(
+                self._summarize_history,
+                trigger_messages=self.config.history_compaction_trigger,
+                keep_recent=self.config.history_compaction_keep_recent,
+                on_compacted=self._forget_messages,
+                runtime=self.runtime
+            )
+        
+        # Intenções de comando (tabela compilada uma vez); com o sentence-transformers
+        # instalado, paráfrases são roteadas por embeddings carregados em segundo plano
+        self.intents = IntentClassifier()
+        self.semantic_router = None
+        if self.config.semantic_router_enabled:
+            self.semantic_router = SemanticIntentRouter(
+                self.config.semantic_router_model,
+                threshold=self.config.semantic_router_threshold,
+                device=self.config.semantic_router_device,
+                allow_download=self.config.embedding_allow_download
+            )
+            self.semantic_router.start()
+        
+        # Comandos de sistema e de plugins respondidos sem o LLM
+        self.fast_path = None
+        if self.config.fast_path_enabled:
+            self.fast_path = FastPathExecutor(plugin_manager, min_confidence=self.config.fast_path_min_confidence)
+        
+        # Notas, tarefas e conversas antigas relevantes entram no prompt (índice em segundo plano)
+        self.memory = None
+        if self.config.retrieval_enabled:
+            self.memory = RetrievalMemory(
+                plugin_manager,
+                training_file=self.config.retrieval_training_file,
+                embedding_model=self.config.retrieval_embedding_model,
+                device=self.config.semantic_router_device,
+                top_k=self.config.retrieval_top_k,
+                min_score=self.config.retrieval_min_score,
+                sync_interval=self.config.retrieval_sync_interval,
+                exact_below=self.config.retrieval_exact_below,
+                allow_download=self.config.embedding_allow_download
+            )
+            self.memory.start()
+        
+        # Prompts com prefixo estável por personalidade (cache de prompt do backend)
+        self.prompt_builder = PromptBuilder(self.personalities)
+        
+        # Gerações idênticas em andamento são compartilhadas (rajadas custam uma só)
+        self.single_flight = SingleFlight()
+        
+        # Requisições interrompidas por motivo (ver core.cancellation)
+        self._cancel_lock = threading.Lock()
+        self._cancellations: Dict[str, int] = {}
+        
+        # Vagas de geração no Ollama local, com fila por prioridade
+        self.scheduler = GenerationScheduler(
+            max_concurrent=self.config.generation_max_concurrent * len(self.ollama.pool.backends),
+            max_queue=self.config.generation_max_queue,
+            queue_timeout=self.config.generation_queue_timeout
+        )
+        
+        # Circuit breaker por backend (um por servidor Ollama, pela URL, e um
+        # para a OpenAI): com um servidor instável o pedido vai para outro, e
+        # sem nenhum disponível o fallback é imediato
+        self.breakers = {
+            key: CircuitBreaker(
+                key,
+                failure_rate=self.config.breaker_failure_rate,
+                min_calls=self.config.breaker_min_calls,
+                window=self.config.breaker_window,
+                slow_call_seconds=self.config.breaker_slow_call_seconds,
+                open_seconds=self.config.breaker_open_seconds
+            )
+            for key in [backend.url for backend in self.ollama.pool.backends] + ["openai"]
+        }
+        
+        # Hedge opcional: segundo backend quando o primeiro trecho passa do p95
+        self.hedge_policy = HedgePolicy(
+            percentile=self.config.hedge_percentile,
+            min_samples=self.config.hedge_min_samples,
+            default_delay=self.config.hedge_default_delay,
+            min_delay=self.config.hedge_min_delay
+        )
+        
+        # Cache de respostas (memória + SQLite em data/)
+        self.response_cache = None
+        if self.config.response_cache_enabled:
+            self.response_cache = ResponseCache(
+                Path("data") / "response_cache.db",
+                max_memory_entries=self.config.response_cache_memory_entries,
+                max_disk_entries=self.config.response_cache_disk_entries,
+                ttl=self.config.response_cache_ttl
+            )
+    
+    @property
+    def current_personality(self) -> str:
+        """Personalidade da sessão padrão"""
+        return self.default_session.personality
+    
+    @current_personality.setter
+    def current_personality(self, personality: str):
+        self.default_session.personality = personality
+    
+    @property
+    def conversation_history(self) -> List[Dict]:
+        """Histórico da sessão padrão"""
+        return self.default_session.history
+    
+    @conversation_history.setter
+    def conversation_history(self, history: List[Dict]):
+        self.default_session.history = history
+    
+    def get_session(self, session_id: Optional[str] = None) -> ChatSession:
+        """Retorna a sessão de conversa (a padrão se session_id for None)"""
+        if not session_id or session_id == DEFAULT_SESSION_ID:
+            return self.default_session
+        return self.sessions.get(session_id)
+    
+    def set_personality(self, personality: str, session_id: Optional[str] = None):
+        """Define a personalidade da IA na sessão"""
         if personality in self.personalities:
-            self.current_personality = personality
+            session = self.get_session(session_id)
+            session.personality = personality
             self.logger.info(f"Personalidade alterada para: {self.personalities[personality]['name']}")
+            if self.use_local_ai:
+                self.residency.prefetch(self._session_model(session))
         else:
             self.logger.warning(f"Personalidade '{personality}' não encontrada")
     
-    def get_system_prompt(self) -> str:
-        """Retorna o prompt do sistema baseado na personalidade atual"""
-        base_prompt = self.personalities[self.current_personality]["system_prompt"]
-        
-        # Adiciona informações do sistema
-        system_info = f"""
-        
-Informações do sistema:
-- Data/Hora atual: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-- Sistema: Windows
-- Você pode executar comandos do sistema e monitorar recursos
-- Você tem acesso a funcionalidades de automação e controle
-
-Responda sempre em português brasileiro.
-"""
+    def set_model(self, model: Optional[str], session_id: Optional[str] = None):
+        """Define o modelo Ollama da sessão (None volta ao modelo da personalidade)"""
+        session = self.get_session(session_id)
+        session.model = model
+        if self.use_local_ai:
+            self.residency.prefetch(self._session_model(session))
+    
+    def get_system_prompt(self, personality: Optional[str] = None) -> str:
+        """
+        Retorna o prompt do sistema baseado na personalidade
         
-        return base_prompt + system_info
+        O texto é idêntico em todas as chamadas; data/hora e dados do sistema
+        vão no sufixo volátil (ver PromptBuilder.volatile_suffix).
+        """
+        return self.prompt_builder.prefix(personality or self.current_personality)
     
-    async def chat(self, message: str, context: Optional[Dict] = None) -> str:
+    async def chat(self, message: str, context: Optional[Dict] = None,
+                   session_id: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE,
+                   cancel: Optional[CancelToken] = None) -> str:
         """
         Processa uma mensagem de chat
         
         Args:
             message: Mensagem do usuário
             context: Contexto adicional (dados do sistema, etc.)
+            session_id: Sessão de conversa do cliente (padrão: sessão global)
+            priority: Prioridade na fila de geração (PRIORITY_INTERACTIVE/PRIORITY_BATCH)
+            cancel: Prazo e cancelamento da requisição (interrompe a espera pelo backend)
         
         Returns:
             Resposta da IA
+        
+        Raises:
+            GenerationBusyError: Fila de geração do Ollama cheia
+            RequestCancelledError: Requisição cancelada ou prazo esgotado (nada vai para o histórico)
         """
+        if cancel is None:
+            return await self._chat(message, context, session_id, priority)
+        try:
+            async with cancel.bind():
+                return await self._chat(message, context, session_id, priority)
+        except RequestCancelledError as e:
+            self._record_cancel(e)
+            raise
+    
+    def _record_cancel(self, error: RequestCancelledError):
+        with self._cancel_lock:
+            self._cancellations[error.reason] = self._cancellations.get(error.reason, 0) + 1
+        self.logger.info(f"🛑 Requisição interrompida ({error.reason}), backend liberado")
+    
+    async def _chat(self, message: str, context: Optional[Dict], session_id: Optional[str],
+                    priority: int) -> str:
+        """Corpo de chat() (sem o vínculo com o cancelamento)"""
         try:
             self.logger.info(f"💬 Processando mensagem: {message[:50]}...")
             
@@ -109,265 +468,864 @@ Responda sempre em português brasileiro.
             if not message or not message.strip():
                 return "Por favor, digite uma mensagem válida."
             
+            session = self.get_session(session_id)
+            
+            # 0. Comandos de sistema e de plugins, sem modelo de linguagem
+            # (embeddings e tokenização rodam fora do loop compartilhado do runtime)
+            fast = await asyncio.to_thread(self._fast_path_response, session, message, context)
+            if fast:
+                self._remember(session, message, fast)
+                return fast
+            
+            # Trechos da memória desta sessão; com eles a resposta é pessoal e não vai para o cache
+            memory = await asyncio.to_thread(self._retrieve, session, message)
+            
+            # Respostas já geradas para a mesma pergunta (SQLite e a verificação
+            # do Ollama rodam em threads, fora do loop compartilhado do runtime)
+            cache_key = None if memory else self._cache_key(session, message, context)
+            if cache_key:
+                cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+                if cached:
+                    self.logger.info("⚡ Resposta servida do cache")
+                    self._remember(session, message, cached)
+                    return cached
+            
             # CORREÇÃO: Prioridade melhorada e fallback garantido
             response = None
+            generated = False
             
-            # 1. Tentar Ollama Local primeiro
-            if self.use_local_ai and self.ollama.check_connection():
+            ollama_context = None
+            
+            # 1. Tentar Ollama Local primeiro (pulado na hora com o circuito aberto)
+            if await asyncio.to_thread(self._tier_available, "ollama"):
                 self.logger.info("🧠 Usando Ollama Local")
                 try:
-                    response = await self._call_ollama_local(message, context)
+                    response, ollama_context = await self._call_ollama_local(session, message, context,
+                                                                             priority, memory)
+                    generated = True
+                except (GenerationBusyError, RequestCancelledError):
+                    raise
                 except Exception as e:
                     self.logger.error(f"Falha no Ollama: {e}")
                     response = None
             
-            # 2. Fallback para OpenAI se disponível
-            if not response and self.config.api_key:
-                self.logger.info("🌐 Fallback para OpenAI API")
-                try:
-                    response = await self._call_openai_api_with_context(message, context)
-                except Exception as e:
-                    self.logger.error(f"Falha na OpenAI: {e}")
-                    response = None
-            
-            # 3. Fallback local se tudo falhar
+            # 2 e 3. OpenAI e resposta local
             if not response:
-                self.logger.warning("⚠️ Usando resposta local (fallback)")
-                response = self._local_response(message, context)
+                response, generated = await self._fallback_chain(session, message, context, memory)
             
-            # CORREÇÃO: Validar resposta final
-            if not response or not response.strip():
-                response = "Desculpe, não consegui processar sua mensagem no momento. Tente novamente."
+            if cache_key and generated:
+                await asyncio.to_thread(self.response_cache.put, cache_key, response)
             
-            # Salva no histórico
-            self.conversation_history.append({"role": "user", "content": message})
-            self.conversation_history.append({"role": "assistant", "content": response})
-            
-            # Limita o histórico a 20 mensagens para melhor performance
-            if len(self.conversation_history) > 20:
-                self.conversation_history = self.conversation_history[-20:]
+            self._remember(session, message, response, ollama_context)
             
             self.logger.info("Resposta gerada com sucesso")
             return response
-            
+        
+        except GenerationBusyError:
+            self.logger.warning("⏳ Fila de geração cheia, requisição recusada")
+            raise
+        except RequestCancelledError:
+            raise
         except Exception as e:
             self.logger.error(f"❌ Erro crítico no chat: {e}")
             return "Desculpe, ocorreu um erro crítico. O sistema está se recuperando. Tente novamente em alguns segundos."
     
-    async def _call_ollama_local(self, message: str, context: Optional[Dict] = None) -> str:
-        """Chama Ollama Local AI de forma assíncrona"""
+    async def chat_stream(self, message: str, context: Optional[Dict] = None,
+                          session_id: Optional[str] = None,
+                          priority: int = PRIORITY_INTERACTIVE,
+                          cancel: Optional[CancelToken] = None) -> AsyncIterator[str]:
+        """
+        Processa uma mensagem de chat entregando a resposta em partes
+        
+        Os tokens do Ollama são repassados assim que chegam. Quando o Ollama
+        não está disponível, a resposta das demais camadas (OpenAI ou local)
+        é entregue como uma única parte.
+        
+        Args:
+            message: Mensagem do usuário
+            context: Contexto adicional (dados do sistema, etc.)
+            session_id: Sessão de conversa do cliente (padrão: sessão global)
+            priority: Prioridade na fila de geração (PRIORITY_INTERACTIVE/PRIORITY_BATCH)
+            cancel: Prazo e cancelamento da requisição (interrompe a espera por cada trecho)
+        
+        Yields:
+            Trechos da resposta da IA
+        
+        Raises:
+            GenerationBusyError: Fila de geração do Ollama cheia (antes do primeiro trecho)
+            RequestCancelledError: Requisição cancelada ou prazo esgotado (nada vai para o histórico)
+        """
         try:
-            # Usar modelo específico da personalidade
-            current_model = self.personalities[self.current_personality].get("ollama_model", self.DEFAULT_OLLAMA_MODEL)
-            self.ollama.set_model(current_model)
-            
-            # Construir prompt com contexto
-            system_prompt = self.get_system_prompt()
-            
-            if context:
-                context_str = f"\n\nContexto do sistema: {json.dumps(context, ensure_ascii=False, indent=2)}"
-                system_prompt += context_str
-            
-            # Incluir histórico recente no prompt
-            conversation_context = ""
-            if self.conversation_history:
-                recent_history = self.conversation_history[-4:]  # CORREÇÃO: Reduzido para 4 mensagens
-                for msg in recent_history:
-                    role = "Usuário" if msg["role"] == "user" else "Jarvis"
-                    conversation_context += f"\n{role}: {msg['content'][:100]}"  # Limite de 100 chars
-            
-            # Prompt final mais compacto
-            full_prompt = f"{system_prompt}\n\nHistórico:{conversation_context}\n\nUsuário: {message}\nJarvis:"
-            
-            # CORREÇÃO: Executar em thread para não bloquear
-            import concurrent.futures
-            
-            loop = asyncio.get_event_loop()
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(
-                    executor, 
-                    self.ollama.chat,
-                    full_prompt
+            async for chunk in self._chat_stream(message, context, session_id, priority, cancel):
+                yield chunk
+        except RequestCancelledError as e:
+            self._record_cancel(e)
+            raise
+    
+    async def _chat_stream(self, message: str, context: Optional[Dict], session_id: Optional[str],
+                           priority: int, cancel: Optional[CancelToken]) -> AsyncIterator[str]:
+        """Corpo de chat_stream()"""
+        if not message or not message.strip():
+            yield "Por favor, digite uma mensagem válida."
+            return
+        
+        self.logger.info(f"💬 Processando mensagem (streaming): {message[:50]}...")
+        
+        session = self.get_session(session_id)
+        
+        # 0. Comandos de sistema e de plugins, sem modelo de linguagem
+        fast = await asyncio.to_thread(self._fast_path_response, session, message, context)
+        if fast:
+            yield fast
+            self._remember(session, message, fast)
+            return
+        
+        # Trechos da memória desta sessão; com eles a resposta não vai para o cache
+        memory = await asyncio.to_thread(self._retrieve, session, message)
+        
+        # Respostas já geradas são entregues de uma vez
+        cache_key = None if memory else self._cache_key(session, message, context)
+        if cache_key:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached:
+                self.logger.info("⚡ Resposta servida do cache")
+                yield cached
+                self._remember(session, message, cached)
+                return
+        
+        chunks = []
+        ollama_context = None
+        interrupted = False
+        
+        # 1. Tentar Ollama Local primeiro (pulado na hora com o circuito aberto)
+        if await asyncio.to_thread(self._tier_available, "ollama"):
+            self.logger.info("🧠 Usando Ollama Local (streaming)")
+            try:
+                model, full_prompt, kv_tokens = await asyncio.to_thread(
+                    self._build_ollama_prompt, session, message, context, memory
                 )
-            
-            # Limpar possíveis artefatos do prompt
-            if response.startswith("Jarvis:"):
-                response = response[7:].strip()
-            
+                final = {}
+                flight_key = SingleFlight.make_key("ollama-stream", model, full_prompt, kv_tokens)
+                stream = self.single_flight.stream(
+                    flight_key,
+                    lambda shared: self._ollama_stream(session, message, context, memory, model,
+                                                       full_prompt, kv_tokens, priority, shared),
+                    final=final
+                )
+                if cancel is not None:
+                    stream = cancel.guard(stream)
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+                self._observe_prompt_tokens(model, full_prompt, kv_tokens, final)
+                if final.get("context"):
+                    ollama_context = OllamaContext(model, session.personality, final["context"])
+            except GenerationBusyError:
+                self.logger.warning("⏳ Fila de geração cheia, requisição recusada")
+                raise
+            except RequestCancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Falha no Ollama: {e}")
+                interrupted = True
+        
+        # Resposta interrompida no meio já foi entregue, mas não vai para o cache
+        response = "".join(chunks).strip()
+        
+        # 2. Fallback para OpenAI, também em streaming
+        if not response and await asyncio.to_thread(self._tier_available, "openai"):
+            self.logger.info("🌐 Fallback para OpenAI API (streaming)")
+            chunks = []
+            interrupted = False
+            stream = self._openai_stream(session, message, context, memory)
+            if cancel is not None:
+                stream = cancel.guard(stream)
+            try:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            except RequestCancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Falha na OpenAI: {e}")
+                interrupted = True
+            response = "".join(chunks).strip()
+        
+        generated = bool(response) and not interrupted
+        
+        # 3. Resposta local, entregue de uma vez
+        if not response:
+            response = self._local_fallback(session, message, context)
+            generated = False
+            yield response
+        
+        if cache_key and generated:
+            await asyncio.to_thread(self.response_cache.put, cache_key, response)
+        
+        self._remember(session, message, response, ollama_context)
+        self.logger.info("Resposta transmitida com sucesso")
+    
+    async def _fallback_chain(self, session: ChatSession, message: str, context: Optional[Dict] = None,
+                              memory: Optional[List[str]] = None) -> Tuple[str, bool]:
+        """
+        Camadas de fallback após o Ollama: OpenAI e depois resposta local
+        
+        Returns:
+            Tupla (resposta, gerada por um modelo de linguagem)
+        """
+        response = None
+        generated = False
+        
+        # 2. Fallback para OpenAI se disponível
+        if await asyncio.to_thread(self._tier_available, "openai"):
+            self.logger.info("🌐 Fallback para OpenAI API")
+            try:
+                response = await self._call_openai_api_with_context(session, message, context, memory)
+                generated = True
+            except Exception as e:
+                self.logger.error(f"Falha na OpenAI: {e}")
+                response = None
+        
+        # 3. Fallback local se tudo falhar
+        if not response:
+            response = self._local_fallback(session, message, context)
+            generated = False
+        
+        return response, generated
+    
+    def _fast_path_response(self, session: ChatSession, message: str,
+                            context: Optional[Dict] = None) -> Optional[str]:
+        """Resposta direta para intenções de sistema e de plugins (None = usar o LLM)"""
+        if self.fast_path is None:
+            return None
+        try:
+            matches = self._classify_intents([message])[0]
+            if not matches:
+                return None
+            response = self.fast_path.execute(matches[0], message, context, session.personality)
+            if response is not None and matches[0].plugin and self.memory is not None:
+                self.memory.request_sync()
             return response
-            
         except Exception as e:
-            self.logger.error(f"Erro no Ollama: {e}")
-            return self._fallback_response()
+            self.logger.error(f"Falha no caminho rápido: {e}")
+            return None
+    
+    def _local_fallback(self, session: ChatSession, message: str, context: Optional[Dict] = None) -> str:
+        """Última camada: resposta local sem modelo de linguagem"""
+        self.logger.warning("⚠️ Usando resposta local (fallback)")
+        response = self._local_response(message, context, session.personality)
+        
+        # CORREÇÃO: Validar resposta final
+        if not response or not response.strip():
+            response = "Desculpe, não consegui processar sua mensagem no momento. Tente novamente."
+        return response
     
-    async def _call_openai_api_with_context(self, message: str, context: Optional[Dict] = None) -> str:
-        """Chama a API da OpenAI com contexto"""
+    def _tier_breakers(self, tier: str) -> List[CircuitBreaker]:
+        """Circuit breakers do nível: um por servidor Ollama, ou o da OpenAI"""
+        if tier == "ollama":
+            return [self.breakers[backend.url] for backend in self.ollama.pool.backends]
+        return [self.breakers[tier]]
+    
+    def _tier_available(self, tier: str) -> bool:
+        """
+        Indica se o nível está configurado e com algum circuito fechado (ou livre para teste)
+        
+        Só consulta: a vaga do circuito (inclusive o teste do meio-aberto) é
+        concedida em _guarded/_guarded_stream, onde o resultado é registrado.
+        """
+        if tier == "ollama":
+            configured = self.use_local_ai and self.ollama.check_connection()
+        else:
+            configured = self.openai is not None
+        
+        if not configured:
+            return False
+        
+        if not any(breaker.available() for breaker in self._tier_breakers(tier)):
+            self.logger.warning(f"⚡ Circuito '{tier}' aberto, pulando para o próximo nível")
+            return False
+        return True
+    
+    def _pick_ollama(self, model: Optional[str],
+                     exclude: Tuple[OllamaBackend, ...] = ()) -> Optional[OllamaBackend]:
+        """Servidor Ollama escolhido pelo pool entre os de circuito disponível (None se nenhum)"""
+        while True:
+            backend = self.ollama.pool.pick(model, exclude=exclude)
+            if backend is None or self.breakers[backend.url].available():
+                return backend
+            exclude += (backend,)
+    
+    async def _guarded(self, key: str, factory: Callable, final: Optional[Dict] = None):
+        """
+        Executa a chamada ao backend registrando o resultado no circuit breaker
+        
+        A lentidão é julgada pela latência até o primeiro token: sem streaming,
+        o tempo de geração informado pelo Ollama (final["eval_duration"]) é
+        descontado; sem essa informação a chamada não é julgada lenta.
+        
+        Raises:
+            CircuitOpenError: Circuito aberto (ou teste do meio-aberto já em andamento)
+        """
+        breaker = self.breakers[key]
+        if not breaker.allow():
+            raise CircuitOpenError(key)
+        started = time.monotonic()
+        
         try:
-            # Constrói o histórico da conversa
-            messages = [
-                {"role": "system", "content": self.get_system_prompt()}
-            ]
-            
-            # Adiciona contexto se fornecido
-            if context:
-                context_str = f"Contexto do sistema: {json.dumps(context, ensure_ascii=False, indent=2)}"
-                messages.append({"role": "system", "content": context_str})
-            
-            # Adiciona histórico recente
-            messages.extend(self.conversation_history[-10:])  # Últimas 10 mensagens
-            
-            # Adiciona mensagem atual
-            messages.append({"role": "user", "content": message})
-            
-            response = await openai.ChatCompletion.acreate(
-                model=self.config.ai.model_name,
-                messages=messages,
-                max_tokens=self.config.ai.max_tokens,
-                temperature=self.config.ai.temperature,
-                stream=False
-            )
-            
-            return response.choices[0].message.content.strip()
-            
+            result = await factory()
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
         except Exception as e:
-            self.logger.error(f"Erro na API OpenAI: {e}")
-            return self._fallback_response()
+            # Resposta vazia ou HTTP 4xx não indicam backend doente
+            if getattr(e, "health_failure", True):
+                breaker.record_failure()
+            else:
+                breaker.record_success(None)
+            raise
+        
+        first_token = None
+        if final and final.get("eval_duration"):
+            first_token = max(0.0, time.monotonic() - started - final["eval_duration"] / 1e9)
+        breaker.record_success(first_token)
+        return result
     
-    def _fallback_response(self) -> str:
-        """Resposta de fallback quando a API falha"""
-        responses = [
-            "Estou com dificuldades para processar sua solicitação no momento. Pode tentar novamente?",
-            "Desculpe, não consigo acessar minha IA principal agora. Posso ajudar com comandos básicos do sistema.",
-            "Parece que há um problema temporário com minha conexão. Que tal verificar o status do sistema?",
+    async def _guarded_stream(self, key: str, factory: Callable) -> AsyncIterator[str]:
+        """
+        Repassa o stream registrando no circuit breaker (latência até o primeiro trecho)
+        
+        Raises:
+            CircuitOpenError: Circuito aberto (ou teste do meio-aberto já em andamento)
+        """
+        breaker = self.breakers[key]
+        if not breaker.allow():
+            raise CircuitOpenError(key)
+        started = time.monotonic()
+        first_chunk_at = None
+        
+        try:
+            async for chunk in factory():
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # Interrompido pelo consumidor: só o primeiro trecho diz algo do backend
+            if first_chunk_at is None:
+                breaker.abandon()
+            else:
+                breaker.record_success(first_chunk_at - started)
+            raise
+        except Exception as e:
+            if getattr(e, "health_failure", True):
+                breaker.record_failure()
+            else:
+                breaker.record_success(None)
+            raise
+        
+        breaker.record_success((first_chunk_at or time.monotonic()) - started)
+    
+    async def _guarded_ollama(self, model: str, factory: Callable, final: Optional[Dict] = None):
+        """
+        Executa factory(backend) num servidor Ollama com o circuit breaker dele
+        
+        Circuito aberto, falha de conexão e HTTP 503 (nada foi processado)
+        passam para o próximo servidor; timeouts e outros erros não, para não
+        duplicar geração.
+        """
+        tried: Tuple[OllamaBackend, ...] = ()
+        error: Optional[Exception] = None
+        
+        while True:
+            backend = self._pick_ollama(model, exclude=tried)
+            if backend is None:
+                raise error or CircuitOpenError("ollama")
+            tried += (backend,)
+            
+            try:
+                return await self._guarded(backend.url, lambda: factory(backend), final)
+            except (CircuitOpenError, OllamaConnectionError) as e:
+                error = e
+            except OllamaHTTPError as e:
+                if e.status_code != 503:
+                    raise
+                error = e
+            self.logger.warning(f"🔌 Ollama {backend.url} indisponível, tentando outro servidor")
+    
+    def _cache_key(self, session: ChatSession, message: str,
+                   context: Optional[Dict] = None) -> Optional[str]:
+        """
+        Chave do cache de respostas, ou None se a resposta não deve ser reaproveitada
+        
+        Fica fora do cache a personalidade sem cache e a pergunta que depende
+        da data/hora. O histórico e o resumo da sessão fazem parte da chave
+        (o contexto KV do Ollama é derivado deles).
+        """
+        if not self.response_cache:
+            return None
+        
+        if not self.personalities[session.personality].get("cache_responses", True):
+            return None
+        
+        if not ResponseCache.is_cacheable(message):
+            return None
+        
+        model = self._session_model(session) if self.use_local_ai else self.config.model_name
+        return self.response_cache.make_key(model, session.personality, message, context,
+                                            session.history, session.summary)
+    
+    def _session_model(self, session: ChatSession) -> str:
+        """Modelo Ollama da sessão, resolvido pelo registro em cache"""
+        model = session.model or self.personalities[session.personality].get("ollama_model", self.DEFAULT_OLLAMA_MODEL)
+        return self.ollama.resolve_model(model)
+    
+    def _remember(self, session: ChatSession, message: str, response: str,
+                  ollama_context: Optional[OllamaContext] = None):
+        """
+        Salva a troca no histórico
+        
+        Args:
+            ollama_context: Contexto devolvido pelo Ollama que já contém esta troca.
+                Sem ele, a troca fica pendente e é enviada como texto no próximo turno.
+        """
+        exchange = [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": response}
         ]
+        session.history.extend(exchange)
         
-        import random
-        return random.choice(responses)
+        if ollama_context is not None:
+            session.ollama_context = ollama_context
+        elif session.ollama_context is not None:
+            session.ollama_context.pending.extend(exchange)
+        
+        # Limita o histórico a 20 mensagens para melhor performance
+        # (normalmente o resumo em segundo plano o mantém bem abaixo disso)
+        if len(session.history) > 20:
+            self._forget_messages(session, session.history[:-20])
+            del session.history[:-20]
+        
+        if self.compactor is not None:
+            self.compactor.maybe_schedule(session)
     
-    def analyze_command(self, text: str) -> Dict[str, Any]:
+    def _forget_messages(self, session: ChatSession, messages: List[Dict]):
+        """Mensagens que saíram do histórico continuam acessíveis pela memória de recuperação"""
+        if self.memory is not None and messages:
+            self.memory.add_messages(session.session_id, messages)
+    
+    def _retrieve(self, session: ChatSession, message: str) -> List[str]:
         """
-        Analisa um texto para identificar comandos
+        Trechos da memória relevantes para a mensagem, um por linha
+        
+        Conversas antigas só voltam para a própria sessão; notas, tarefas e
+        exemplos de treino valem para todas.
+        """
+        if self.memory is None:
+            return []
+        try:
+            snippets = self.memory.search(message, session_id=session.session_id)
+        except Exception as e:
+            self.logger.error(f"Falha na memória de recuperação: {e}")
+            return []
+        
+        return [f"- [{SOURCE_LABELS.get(snippet.source, snippet.source)}] {' '.join(snippet.text.split())}"
+                for snippet in snippets]
+    
+    def _memory_block(self, memory: Optional[List[str]], model: str) -> str:
+        """
+        Trechos de _retrieve() que cabem no prompt do modelo
+        
+        Limitado a retrieval_max_tokens (e a 1/4 da janela): os trechos mais
+        relevantes entram primeiro e o que passar do limite fica de fora.
+        """
+        if not memory:
+            return ""
+        limit = min(self.config.retrieval_max_tokens, self.context_budget.available // 4)
+        return "\n".join(self.context_budget.fit_lines(model, memory, limit))
+    
+    async def _summarize_history(self, previous: str, messages: List[Dict]) -> Optional[str]:
+        """Resume mensagens antigas com o modelo pequeno (prioridade de lote)"""
+        if not await asyncio.to_thread(self._tier_available, "ollama"):
+            return None
+        
+        model = self.ollama.resolve_model(self.config.history_compaction_model)
+        prompt = self.prompt_builder.build_summary_request(previous, messages)
+        final = {}
+        summary, _ = await self._scheduled(
+            PRIORITY_BATCH, model,
+            lambda backend: self.async_ollama.generate(prompt, model=model, final=final, backend=backend,
+                                                       num_predict=self.config.history_compaction_max_tokens),
+            final
+        )
+        return summary
+    
+    def _build_ollama_prompt(self, session: ChatSession, message: str, context: Optional[Dict] = None,
+                             memory: Optional[List[str]] = None) -> Tuple[str, str, Optional[List[int]]]:
+        """
+        Monta o prompt do Ollama para a personalidade da sessão
+        
+        Se a conversa já tem contexto (KV) do Ollama para o mesmo modelo e
+        personalidade, o prompt traz apenas o turno novo (e trocas pendentes);
+        o prompt de sistema e o histórico já estão nos tokens do contexto.
         
         Args:
-            text: Texto a ser analisado
-            
+            memory: Trechos da memória (ver _retrieve), cortados ao orçamento do modelo
+        
         Returns:
-            Dicionário com informações do comando
+            Tupla (modelo, prompt, contexto do Ollama ou None)
         """
-        text_lower = text.lower()
+        # Usar modelo específico da sessão/personalidade
+        # Resolvido pelo registro em cache: nenhuma requisição de metadados aqui
+        current_model = self._session_model(session)
+        self.residency.touch(current_model)
+        memory_text = self._memory_block(memory, current_model)
         
-        # Comandos de sistema
-        if any(word in text_lower for word in ['cpu', 'processador', 'performance']):
-            return {
-                'type': 'system_info',
-                'action': 'cpu_info',
-                'confidence': 0.8
-            }
+        state = session.ollama_context
+        if (state is not None
+                and state.model == current_model
+                and state.personality == session.personality
+                and len(state.pending) <= self.OLLAMA_CONTEXT_MAX_PENDING):
+            prompt = self.prompt_builder.build_turn(state.pending, message, context, memory_text)
+            if self.context_budget.fits(current_model, len(state.tokens), prompt):
+                tokens_in = self.context_budget.counter.count(current_model, prompt)
+                self.context_budget.record(tokens_in)
+                self.logger.info(f"📏 Prompt: {tokens_in} tokens novos sobre {len(state.tokens)} em contexto")
+                return current_model, prompt, state.tokens
         
-        if any(word in text_lower for word in ['memoria', 'ram', 'memória']):
-            return {
-                'type': 'system_info',
-                'action': 'memory_info',
-                'confidence': 0.8
-            }
+        # Prefixo estável + histórico que couber na janela + sufixo volátil
+        budget = self.context_budget.fit(
+            current_model, self.prompt_builder.prefix(session.personality),
+            session.history, message, context, session.summary, memory_text
+        )
+        full_prompt = self.prompt_builder.build(
+            session.personality, current_model,
+            budget.history, budget.message, budget.context, session.summary, memory_text
+        )
         
-        # Comandos de plugins
-        if any(word in text_lower for word in ['anotar', 'nota', 'anotação']):
-            return {
-                'type': 'plugin',
-                'action': 'add_note',
-                'plugin': 'notes',
-                'confidence': 0.9
-            }
+        tokens = budget.tokens
+        self.context_budget.record(tokens['total'], budget.dropped_messages, budget.truncated)
+        self.logger.info(
+            f"📏 Prompt: {tokens['total']} tokens (sistema {tokens['system']}, resumo {tokens['summary']}, "
+            f"memória {tokens['memory']}, contexto {tokens['context']}, "
+            f"histórico {tokens['history']} em {len(budget.history)} msgs, mensagem {tokens['message']})"
+            + (f", {budget.dropped_messages} msgs antigas fora" if budget.dropped_messages else "")
+            + (", cortado" if budget.truncated else "")
+        )
         
-        if any(word in text_lower for word in ['lembrar', 'lembrete', 'alarme']):
-            return {
-                'type': 'plugin',
-                'action': 'add_reminder',
-                'plugin': 'reminders',
-                'confidence': 0.9
-            }
+        return current_model, full_prompt, None
+    
+    def _observe_prompt_tokens(self, model: str, prompt: str, kv_tokens: Optional[List[int]], final: Dict):
+        """Registra os tokens de entrada informados pelo Ollama e corrige a estimativa"""
+        evaluated = final.get("prompt_eval_count")
+        if not evaluated:
+            return
+        self.context_budget.record_server(evaluated)
+        if kv_tokens is None:
+            counter = self.context_budget.counter
+            counter.calibrate(model, counter.count(model, prompt), evaluated)
+    
+    async def _scheduled(self, priority: int, model: str, factory: Callable, final: Optional[Dict] = None):
+        """Executa a chamada ao Ollama criada por factory(backend) dentro de uma vaga do agendador"""
+        async with self.scheduler.slot(priority):
+            return await self._guarded_ollama(model, factory, final)
+    
+    async def _scheduled_stream(self, priority: int, model: str, factory: Callable,
+                                backend: Optional[OllamaBackend] = None) -> AsyncIterator[str]:
+        """Repassa o stream do Ollama criado por factory(backend) dentro de uma vaga do agendador"""
+        async with self.scheduler.slot(priority):
+            backend = backend or self._pick_ollama(model)
+            if backend is None:
+                raise CircuitOpenError("ollama")
+            async for chunk in self._guarded_stream(backend.url, lambda: factory(backend)):
+                yield chunk
+    
+    def _ollama_stream(self, session: ChatSession, message: str, context: Optional[Dict],
+                       memory: Optional[List[str]], model: str, prompt: str, kv_tokens: Optional[List[int]],
+                       priority: int, final: Dict) -> AsyncIterator[str]:
+        """Stream do Ollama para o prompt (com hedge, se habilitado)"""
+        if self.config.hedging_enabled:
+            return self._hedged_ollama_stream(session, message, context, memory, model, prompt,
+                                              kv_tokens, priority, final)
         
-        if any(word in text_lower for word in ['tarefa', 'task', 'fazer']):
-            return {
-                'type': 'plugin',
-                'action': 'add_task',
-                'plugin': 'tasks',
-                'confidence': 0.8
-            }
+        return self._scheduled_stream(
+            priority, model,
+            lambda backend: self.async_ollama.generate_stream(prompt, model=model, context=kv_tokens,
+                                                              final=final, backend=backend)
+        )
+    
+    async def _hedged_ollama_stream(self, session: ChatSession, message: str, context: Optional[Dict],
+                                    memory: Optional[List[str]], model: str, prompt: str,
+                                    kv_tokens: Optional[List[int]], priority: int,
+                                    final: Dict) -> AsyncIterator[str]:
+        """
+        Stream do Ollama com hedge
         
-        if any(word in text_lower for word in ['disco', 'armazenamento', 'hd', 'ssd']):
-            return {
-                'type': 'system_info',
-                'action': 'disk_info',
-                'confidence': 0.8
-            }
+        Se o primeiro trecho não chegar dentro do limiar adaptativo (p95
+        observado), a mesma pergunta vai para o próximo backend (outro
+        servidor Ollama ou a OpenAI); vence quem responder primeiro e o
+        outro é cancelado.
+        """
+        primary_backend = self._pick_ollama(model)
+        if primary_backend is None:
+            raise CircuitOpenError("ollama")
+        finals = {"primary": {}, "secondary": {}}
         
-        if any(word in text_lower for word in ['bateria', 'energia']):
-            return {
-                'type': 'system_info',
-                'action': 'battery_info',
-                'confidence': 0.8
-            }
+        def primary() -> AsyncIterator[str]:
+            return self._scheduled_stream(
+                priority, model,
+                lambda backend: self.async_ollama.generate_stream(prompt, model=model, context=kv_tokens,
+                                                                  final=finals["primary"], backend=backend),
+                backend=primary_backend
+            )
         
-        if any(word in text_lower for word in ['temperatura', 'temp']):
-            return {
-                'type': 'system_info',
-                'action': 'temperature_info',
-                'confidence': 0.8
-            }
+        def secondary() -> Optional[AsyncIterator[str]]:
+            return self._hedge_secondary(session, message, context, memory, model, prompt, kv_tokens,
+                                         priority, primary_backend, finals["secondary"])
         
-        # Comandos de aplicação
-        if any(word in text_lower for word in ['abrir', 'executar', 'rodar']):
-            return {
-                'type': 'app_control',
-                'action': 'open_app',
-                'confidence': 0.7
-            }
+        outcome = {}
+        try:
+            async for chunk in hedged_stream(primary, secondary, self.hedge_policy.delay(), outcome):
+                yield chunk
+        finally:
+            self.hedge_policy.record(outcome)
         
-        # Comando de chat geral
-        return {
-            'type': 'chat',
-            'action': 'general_chat',
-            'confidence': 0.5
-        }
+        if outcome["hedged"]:
+            self.logger.info(f"🏁 Hedge concluído: venceu o backend {outcome['winner']}")
+        final.update(finals[outcome["winner"]])
+    
+    def _hedge_secondary(self, session: ChatSession, message: str, context: Optional[Dict],
+                         memory: Optional[List[str]], model: str, prompt: str, kv_tokens: Optional[List[int]],
+                         priority: int, primary_backend: OllamaBackend,
+                         final: Dict) -> Optional[AsyncIterator[str]]:
+        """Stream alternativo do hedge: outro servidor Ollama, senão a OpenAI (None se não houver)"""
+        backend = self._pick_ollama(model, exclude=(primary_backend,))
+        if (backend is not None and not backend.is_ejected(time.monotonic())
+                and not self.scheduler.is_saturated()):
+            self.logger.info(f"🏁 Primeiro trecho atrasado, hedge para {backend.url}")
+            return self._scheduled_stream(
+                priority, model,
+                lambda backend: self.async_ollama.generate_stream(prompt, model=model, context=kv_tokens,
+                                                                  final=final, backend=backend),
+                backend=backend
+            )
+        
+        if self._tier_available("openai"):
+            self.logger.info("🏁 Primeiro trecho atrasado, hedge para a OpenAI")
+            return self._openai_stream(session, message, context, memory)
+        
+        return None
+    
+    async def _openai_stream(self, session: ChatSession, message: str, context: Optional[Dict] = None,
+                             memory: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """
+        Resposta da OpenAI em trechos
+        
+        Raises:
+            Exception: Erros da API ou resposta vazia (a cadeia de fallback segue adiante)
+        """
+        messages = await asyncio.to_thread(self._openai_messages, session, message, context, memory)
+        flight_key = SingleFlight.make_key(
+            "openai-stream", self.config.model_name, messages, self.config.max_tokens, self.config.temperature
+        )
+        stream = self.single_flight.stream(
+            flight_key,
+            lambda shared: self._guarded_stream("openai", lambda: self.openai.stream(
+                messages,
+                model=self.config.model_name,
+                max_tokens=self.config.max_tokens,
+                temperature=self.config.temperature,
+                final=shared
+            ))
+        )
+        async for chunk in stream:
+            yield chunk
+    
+    async def _hedged_generate(self, session: ChatSession, message: str, context: Optional[Dict],
+                               memory: Optional[List[str]], model: str, prompt: str,
+                               kv_tokens: Optional[List[int]], priority: int,
+                               final: Dict) -> Tuple[str, Optional[List[int]]]:
+        """Geração completa com hedge (mesmo retorno e final de AsyncOllamaLocalAI.generate)"""
+        chunks = [chunk async for chunk in self._hedged_ollama_stream(
+            session, message, context, memory, model, prompt, kv_tokens, priority, final
+        )]
+        
+        response = "".join(chunks).strip()
+        if not response:
+            raise OllamaEmptyResponseError("Resposta vazia do Ollama")
+        return response, final.get("context")
+    
+    async def _call_ollama_local(self, session: ChatSession, message: str, context: Optional[Dict] = None,
+                                 priority: int = PRIORITY_INTERACTIVE,
+                                 memory: Optional[List[str]] = None) -> Tuple[str, Optional[OllamaContext]]:
+        """
+        Chama Ollama Local AI de forma assíncrona
+        
+        Returns:
+            Tupla (resposta, novo contexto do Ollama ou None)
+        
+        Raises:
+            OllamaError: Falha no Ollama (a cadeia de fallback segue adiante)
+            GenerationBusyError: Fila de geração cheia
+        """
+        current_model, full_prompt, kv_tokens = await asyncio.to_thread(
+            self._build_ollama_prompt, session, message, context, memory
+        )
+        
+        # Requisição HTTP aguardada diretamente no loop (pool compartilhado);
+        # pedidos idênticos simultâneos aguardam a mesma geração
+        flight_key = SingleFlight.make_key("ollama", current_model, full_prompt, kv_tokens)
+        final = {}
+        if self.config.hedging_enabled:
+            factory = lambda: self._hedged_generate(session, message, context, memory, current_model,
+                                                    full_prompt, kv_tokens, priority, final)
+        else:
+            factory = lambda: self._scheduled(
+                priority, current_model,
+                lambda backend: self.async_ollama.generate(full_prompt, context=kv_tokens, model=current_model,
+                                                           final=final, backend=backend),
+                final
+            )
+        response, tokens = await self.single_flight.do(flight_key, factory)
+        self._observe_prompt_tokens(current_model, full_prompt, kv_tokens, final)
+        
+        # Limpar possíveis artefatos do prompt
+        if response.startswith("Jarvis:"):
+            response = response[7:].strip()
+        
+        if not tokens:
+            return response, None
+        return response, OllamaContext(current_model, session.personality, tokens)
+    
+    async def _call_openai_api_with_context(self, session: ChatSession, message: str,
+                                            context: Optional[Dict] = None,
+                                            memory: Optional[List[str]] = None) -> str:
+        """
+        Chama a API da OpenAI com contexto
+        
+        Raises:
+            Exception: Erros da API ou resposta vazia (a cadeia de fallback segue adiante)
+        """
+        messages = await asyncio.to_thread(self._openai_messages, session, message, context, memory)
+        flight_key = SingleFlight.make_key(
+            "openai", self.config.model_name, messages, self.config.max_tokens, self.config.temperature
+        )
+        return await self.single_flight.do(
+            flight_key,
+            lambda: self._guarded("openai", lambda: self.openai.complete(
+                messages,
+                model=self.config.model_name,
+                max_tokens=self.config.max_tokens,
+                temperature=self.config.temperature
+            ))
+        )
+    
+    def _openai_messages(self, session: ChatSession, message: str, context: Optional[Dict] = None,
+                         memory: Optional[List[str]] = None) -> List[Dict]:
+        """Mensagens da Chat Completions com o histórico da sessão"""
+        # Constrói o histórico da conversa
+        messages = [
+            {"role": "system", "content": self.get_system_prompt(session.personality)}
+        ]
+        
+        # Resumo das mensagens antigas e histórico recente
+        if session.summary:
+            messages.append({"role": "system", "content": f"Resumo da conversa até aqui: {session.summary}"})
+        memory_text = self._memory_block(memory, self.config.model_name)
+        if memory_text:
+            messages.append({"role": "system", "content": f"Memória relevante:\n{memory_text}"})
+        messages.extend(session.history[-10:])  # Últimas 10 mensagens
+        
+        # Dados voláteis depois do histórico, preservando o prefixo
+        messages.append({"role": "system", "content": self.prompt_builder.volatile_suffix(context)})
+        
+        # Adiciona mensagem atual
+        messages.append({"role": "user", "content": message})
+        return messages
+    
+    def analyze_command(self, text: str) -> Dict[str, Any]:
+        """
+        Analisa um texto para identificar comandos
+        
+        Usa a intenção de maior pontuação (ver _classify_intents).
+        
+        Args:
+            text: Texto a ser analisado
+        
+        Returns:
+            Dicionário com informações do comando
+        """
+        return self.analyze_commands([text])[0]
+    
+    def analyze_commands(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analisa vários textos de uma vez (um lote no roteador semântico)"""
+        commands = []
+        for matches in self._classify_intents(texts):
+            if not matches:
+                # Comando de chat geral
+                commands.append({
+                    'type': 'chat',
+                    'action': 'general_chat',
+                    'confidence': 0.5
+                })
+            else:
+                commands.append(matches[0].to_command())
+        return commands
+    
+    def _classify_intents(self, texts: List[str]) -> List[List[IntentMatch]]:
+        """
+        Intenções de cada texto, da maior para a menor pontuação
+        
+        Com o roteador semântico pronto, vale o veredito dele, inclusive o
+        de conversa comum (lista vazia); as palavras-chave só decidem quando
+        ele não está disponível (desativado, não instalado ou carregando).
+        """
+        routed = self.semantic_router.route_batch(texts) if self.semantic_router else None
+        if routed is None:
+            return self.intents.classify_batch(texts)
+        return routed
     
-    def clear_history(self):
+    def clear_history(self, session_id: Optional[str] = None):
         """Limpa o histórico da conversa"""
-        self.conversation_history = []
+        session = self.get_session(session_id)
+        session.history = []
+        session.summary = ""
+        session.ollama_context = None
         self.logger.info("Histórico de conversa limpo")
     
-    def get_conversation_summary(self) -> Dict:
+    def get_conversation_summary(self, session_id: Optional[str] = None) -> Dict:
         """Retorna um resumo da conversa"""
+        session = self.get_session(session_id)
         return {
-            'total_messages': len(self.conversation_history),
-            'current_personality': self.personalities[self.current_personality]['name'],
-            'last_message_time': datetime.now().isoformat() if self.conversation_history else None
+            'total_messages': len(session.history),
+            'summary': session.summary or None,
+            'current_personality': self.personalities[session.personality]['name'],
+            'last_message_time': datetime.now().isoformat() if session.history else None
         }
     
-    def _local_response(self, message: str, context: Dict = None) -> str:
+    def _local_response(self, message: str, context: Dict = None, personality: Optional[str] = None) -> str:
         """Sistema de resposta local quando não há API key"""
-        return self._get_system_response(message, context) or self._get_greeting_response() or self._get_default_response()
+        return (self._get_system_response(message, context)
+                or self._get_greeting_response(personality)
+                or self._get_default_response())
     
     def _get_system_response(self, message: str, context: Dict = None) -> Optional[str]:
         """Respostas relacionadas ao sistema"""
-        message_lower = message.lower()
+        actions = {match.action for match in self._classify_intents([message])[0]}
         
-        if any(word in message_lower for word in ['cpu', 'processador']):
+        if 'cpu_info' in actions:
             if context and 'cpu_percent' in context:
                 cpu_val = context['cpu_percent']
                 status = "alto" if cpu_val > 80 else "normal"
                 return f"CPU: {cpu_val:.1f}% - Status: {status}"
             return "Monitoramento de CPU disponível no dashboard."
         
-        if any(word in message_lower for word in ['memoria', 'ram']):
+        if 'memory_info' in actions:
             if context and 'memory_percent' in context:
                 mem_val = context['memory_percent']
                 status = "alto" if mem_val > 80 else "normal"
                 return f"Memória: {mem_val:.1f}% - Status: {status}"
             return "Monitoramento de memória disponível no dashboard."
         
-        if any(word in message_lower for word in ['sistema', 'status']):
+        if 'system_status' in actions:
             if context:
                 cpu = context.get('cpu_percent', 0)
                 mem = context.get('memory_percent', 0)
@@ -377,9 +1335,9 @@ Responda sempre em português brasileiro.
         
         return None
     
-    def _get_greeting_response(self) -> Optional[str]:
+    def _get_greeting_response(self, personality: Optional[str] = None) -> Optional[str]:
         """Respostas de saudação baseadas na personalidade"""
-        personality = self.current_personality
+        personality = personality or self.current_personality
         
         greetings = {
             "assistente": "Olá! Como posso ajudá-lo hoje?",
@@ -399,14 +1357,26 @@ Responda sempre em português brasileiro.
         
         import random
         return random.choice(responses)
+    
+    def _start_residency(self):
+        """Cria o modelo personalizado e pré-carrega os modelos das personalidades em segundo plano"""
+        models = []
+        if self.config.preload_models:
+            models = [p["ollama_model"] for p in self.personalities.values() if p.get("ollama_model")]
+        self.residency.start(models, setup=self._setup_jarvis_model)
+    
+    def shutdown(self):
+        """Encerra as tarefas de fundo e o runtime (fecha os clientes HTTP)"""
+        self.residency.stop()
+        if self.memory is not None:
+            self.memory.stop()
+        self.runtime.stop()
+    
     def _setup_jarvis_model(self):
         """Configura o modelo personalizado do Jarvis"""
         try:
-            # Verificar se modelo jarvis-personal já existe
-            models = self.ollama.list_models()
-            model_names = [m["name"] for m in models]
-            
-            if "jarvis-personal" not in model_names:
+            # Verificar se modelo jarvis-personal já existe (também como jarvis-personal:latest)
+            if self.ollama.registry.resolve("jarvis-personal") is None:
                 # Criar modelo personalizado
                 modelfile_path = "training_data/Modelfile"
                 if self.ollama.create_custom_model("jarvis-personal", modelfile_path):
@@ -415,7 +1385,7 @@ Responda sempre em português brasileiro.
                     self.logger.warning("⚠️ Erro criando modelo personalizado. Usando modelo padrão.")
             else:
                 self.logger.info("✅ Modelo Jarvis personalizado já existe!")
-                
+        
         except Exception as e:
             self.logger.error(f"Erro configurando modelo Jarvis: {e}")
     
@@ -426,18 +1396,22 @@ Responda sempre em português brasileiro.
         Args:
             mode: 'local', 'api', 'auto'
         """
-        if mode == "local" and self.ollama.check_connection():
+        if mode == "local" and self.ollama.check_connection(force=True):
             self.use_local_ai = True
+            for breaker in self._tier_breakers("ollama"):
+                breaker.reset()
+            self._start_residency()
             self.logger.info("🧠 Modo: IA Local (Ollama)")
-        elif mode == "api" and self.config.api_key:
+        elif mode == "api" and self.openai is not None:
             self.use_local_ai = False
             self.logger.info("🌐 Modo: API OpenAI")
         elif mode == "auto":
             # Auto: prefere local se disponível, senão API
-            if self.ollama.check_connection():
+            if self.ollama.check_connection(force=True):
                 self.use_local_ai = True
+                self._start_residency()
                 self.logger.info("🧠 Modo: Auto -> IA Local")
-            elif self.config.api_key:
+            elif self.openai is not None:
                 self.use_local_ai = False
                 self.logger.info("🌐 Modo: Auto -> API OpenAI")
             else:
@@ -445,10 +1419,30 @@ Responda sempre em português brasileiro.
     
     def get_ai_status(self) -> Dict:
         """Retorna status das IAs disponíveis"""
+        ollama_available = self.ollama.check_connection()
+        with self._cancel_lock:
+            cancellations = dict(self._cancellations)
+        
         return {
-            "ollama_available": self.ollama.check_connection(),
-            "openai_available": bool(self.config.api_key),
+            "ollama_available": ollama_available,
+            "openai_available": self.openai is not None,
             "current_mode": "local" if self.use_local_ai else "api",
-            "ollama_models": self.ollama.list_models() if self.ollama.check_connection() else [],
-            "current_model": self.personalities[self.current_personality].get("ollama_model", "N/A")
+            "ollama_models": self.ollama.list_models() if ollama_available else [],
+            "current_model": self.personalities[self.current_personality].get("ollama_model", "N/A"),
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "prompt_prefix": self.prompt_builder.stats(),
+            "sessions": self.sessions.stats(),
+            "single_flight": self.single_flight.stats(),
+            "scheduler": self.scheduler.stats(),
+            "ollama_backends": self.ollama.pool.stats(),
+            "model_residency": self.residency.stats(),
+            "context_budget": self.context_budget.stats(),
+            "history_compaction": self.compactor.stats() if self.compactor else None,
+            "semantic_router": self.semantic_router.stats() if self.semantic_router else None,
+            "fast_path": self.fast_path.stats() if self.fast_path else None,
+            "cancellations": cancellations,
+            "runtime": self.runtime.stats(),
+            "retrieval_memory": self.memory.stats() if self.memory else None,
+            "circuit_breakers": {tier: breaker.stats() for tier, breaker in self.breakers.items()},
+            "hedging": {"enabled": self.config.hedging_enabled, **self.hedge_policy.stats()}
         }
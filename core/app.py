@@ -2,19 +2,26 @@
 Aplicação principal do JARVIS 3.0
 """
 
-import asyncio
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+import uuid
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import threading
 import time
-from typing import Optional
+from typing import Dict, Optional
 
 from core.config import Config
 from core.system_monitor import SystemMonitor
-from core.ai_engine import AIEngine
+from core.ai_engine import AIEngine, GenerationBusyError
+from core.cancellation import CANCEL_CLIENT, CANCEL_DEADLINE, CancelToken, RequestCancelledError
+from core.metrics_sampler import MetricsSampler
+from core.server_mode import ServerBridge, raise_fd_limit, resolve_async_mode
+from core.streaming import iterate_sync, sse_event, SSE_HEADERS
 from utils.logger_fixed import default_logger, setup_logger
 
+# Prefixo das salas do monitoramento (system_update), uma por intervalo pedido
+METRICS_ROOM = "metrics"
+
 class JarvisApp:
     """Aplicação principal do JARVIS 3.0"""
     
@@ -42,17 +49,97 @@ class JarvisApp:
         if config.web.enable_cors:
             CORS(self.app)
         
-        # SocketIO para comunicação em tempo real
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        # SocketIO para comunicação em tempo real (eventlet: green thread por conexão)
+        self.async_mode = resolve_async_mode(config.web.async_mode)
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*",
+                                 async_mode=self.async_mode,
+                                 ping_interval=config.web.socket_ping_interval,
+                                 ping_timeout=config.web.socket_ping_timeout,
+                                 max_http_buffer_size=config.web.socket_max_message_bytes)
+        
+        # Emits e esperas entre o runtime do motor (thread real) e o servidor
+        self.bridge = ServerBridge(self.async_mode)
+        self.ai_engine.runtime.set_waiter(self.bridge.wait)
         
-        # Variáveis de controle
-        self.monitoring_active = False
-        self.monitoring_thread = None
+        # Uma leitura do sistema para todos os painéis, no intervalo do mais rápido
+        # CORREÇÃO: Intervalo mínimo rigoroso de 3 segundos para evitar sobrecarga
+        self.metrics = MetricsSampler(
+            sample=self._system_update,
+            publish=lambda interval, data: self.socketio.emit('system_update', data,
+                                                               to=self._metrics_room(interval)),
+            start_background_task=self.socketio.start_background_task,
+            sleep=self.socketio.sleep,
+            min_interval=max(config.system.monitoring_interval, 3),
+            max_interval=config.system.monitoring_max_interval
+        )
+        
+        # Conversas em andamento por conexão WebSocket (sid -> request_id -> token)
+        self._chats: Dict[str, Dict[str, CancelToken]] = {}
+        self._chats_lock = threading.Lock()
         
         # Registra rotas
         self._register_routes()
         self._register_socket_events()
-        
+    
+    @staticmethod
+    def _chat_session_id() -> str:
+        """Identificador da sessão de conversa do cliente (cookie da sessão Flask)"""
+        if 'chat_session' not in session:
+            session['chat_session'] = uuid.uuid4().hex
+        return session['chat_session']
+    
+    @staticmethod
+    def _socket_session_id() -> str:
+        """Sessão de conversa do cliente WebSocket (cookie ou sid da conexão)"""
+        return session.get('chat_session') or request.sid
+    
+    @staticmethod
+    def _metrics_room(interval: int) -> str:
+        """Sala dos clientes que recebem o monitoramento a cada `interval` segundos"""
+        return f"{METRICS_ROOM}:{interval}"
+    
+    @staticmethod
+    def _session_room(session_id: str) -> str:
+        """Sala das conexões da sessão de conversa (abas com o mesmo cookie recebem as mesmas respostas)"""
+        return f"chat:{session_id}"
+    
+    def _cancel_token(self, data: Dict) -> CancelToken:
+        """Token da requisição com o prazo pedido pelo cliente (limitado por request_timeout)"""
+        timeout = self.config.ai.request_timeout
+        try:
+            requested = float(data.get('timeout') or 0)
+        except (TypeError, ValueError):
+            requested = 0
+        if requested > 0:
+            timeout = min(requested, timeout) if timeout else requested
+        return CancelToken(timeout or None, str(data.get('request_id') or uuid.uuid4().hex))
+    
+    def _track_chat(self, sid: str, token: CancelToken):
+        with self._chats_lock:
+            self._chats.setdefault(sid, {})[token.request_id] = token
+    
+    def _untrack_chat(self, sid: str, token: CancelToken):
+        with self._chats_lock:
+            chats = self._chats.get(sid, {})
+            if chats.get(token.request_id) is token:
+                del chats[token.request_id]
+            if not chats:
+                self._chats.pop(sid, None)
+    
+    def _cancel_chats(self, sid: str, request_id: Optional[str] = None) -> int:
+        """Cancela as conversas da conexão (todas ou só `request_id`)"""
+        with self._chats_lock:
+            tokens = list(self._chats.get(sid, {}).values())
+        cancelled = 0
+        for token in tokens:
+            if request_id is None or token.request_id == request_id:
+                cancelled += token.cancel(CANCEL_CLIENT)
+        return cancelled
+    
+    def _emit(self, event: str, data: Dict, to: str):
+        """Emite para a sala `to` a partir do runtime do motor (entregue pelo hub no modo eventlet)"""
+        self.bridge.call(self.socketio.emit, event, data, to=to)
+    
     def _register_routes(self):
         """Registra as rotas da aplicação"""
         
@@ -69,6 +156,9 @@ class JarvisApp:
         @self.app.route('/chat')
         def chat():
             """Interface de chat"""
+            # O cookie sai com a página, antes do WebSocket conectar: o socket
+            # entra na sala da mesma sessão usada pelas rotas HTTP
+            self._chat_session_id()
             return render_template('chat.html')
         
         @self.app.route('/ai-control')
@@ -80,7 +170,7 @@ class JarvisApp:
         def api_system_info():
             """API: Informações do sistema"""
             try:
-                info = self.system_monitor.get_system_info()
+                info = self.bridge.offload(self.system_monitor.get_system_info)
                 return jsonify({
                     'success': True,
                     'data': {
@@ -120,33 +210,62 @@ class JarvisApp:
             try:
                 data = request.get_json()
                 message = data.get('message', '')
+                session_id = self._chat_session_id()
                 
                 if not message:
                     return jsonify({'success': False, 'error': 'Mensagem vazia'}), 400
                 
-                # Processa mensagem de forma assíncrona
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+                # Prazo da requisição: {"timeout": segundos}, limitado por request_timeout
+                cancel = self._cancel_token(data)
                 
-                # Adiciona contexto do sistema
-                system_info = self.system_monitor.get_system_info()
-                context = {
-                    'cpu_percent': system_info.cpu_percent,
-                    'memory_percent': system_info.memory_percent,
-                    'battery_percent': system_info.battery_percent
-                }
+                # Adiciona contexto do sistema (leitura rápida, sem esperar a CPU)
+                context = self.system_monitor.get_load_snapshot()
+                
+                # Streaming via SSE: {"stream": true} ou Accept: text/event-stream
+                if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+                    if self.ai_engine.scheduler.is_saturated():
+                        raise GenerationBusyError()
+                    
+                    def generate():
+                        chunks = []
+                        try:
+                            stream = self.ai_engine.chat_stream(message, context, session_id, cancel=cancel)
+                            for chunk in iterate_sync(stream, self.ai_engine.runtime):
+                                chunks.append(chunk)
+                                yield sse_event({'chunk': chunk})
+                        except GenerationBusyError as e:
+                            yield sse_event({'success': False, 'error': str(e), 'busy': True}, event='error')
+                            return
+                        except RequestCancelledError as e:
+                            yield sse_event({'success': False, 'error': str(e), 'timeout': True}, event='error')
+                            return
+                        
+                        yield sse_event({
+                            'success': True,
+                            'response': ''.join(chunks).strip(),
+                            'personality': self.ai_engine.get_session(session_id).personality
+                        }, event='done')
+                    
+                    return Response(stream_with_context(generate()),
+                                    mimetype='text/event-stream',
+                                    headers=SSE_HEADERS)
                 
-                response = loop.run_until_complete(
-                    self.ai_engine.chat(message, context)
+                # Processa no loop persistente do motor de IA
+                response = self.ai_engine.runtime.run(
+                    self.ai_engine.chat(message, context, session_id, cancel=cancel)
                 )
-                loop.close()
                 
                 return jsonify({
                     'success': True,
                     'response': response,
-                    'personality': self.ai_engine.current_personality
+                    'personality': self.ai_engine.get_session(session_id).personality
                 })
-                
+            
+            except GenerationBusyError as e:
+                response = jsonify({'success': False, 'error': str(e), 'busy': True})
+                return response, 429, {'Retry-After': str(int(e.retry_after))}
+            except RequestCancelledError as e:
+                return jsonify({'success': False, 'error': str(e), 'timeout': True}), 504
             except Exception as e:
                 self.logger.error(f"Erro no chat: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -157,14 +276,15 @@ class JarvisApp:
             try:
                 data = request.get_json()
                 personality = data.get('personality', '')
+                session_id = self._chat_session_id()
                 
-                self.ai_engine.set_personality(personality)
+                self.ai_engine.set_personality(personality, session_id)
                 
                 return jsonify({
                     'success': True,
-                    'current_personality': self.ai_engine.current_personality
+                    'current_personality': self.ai_engine.get_session(session_id).personality
                 })
-                
+            
             except Exception as e:
                 self.logger.error(f"Erro ao definir personalidade: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -184,7 +304,7 @@ class JarvisApp:
             return jsonify({
                 'success': True,
                 'personalities': personalities,
-                'current': self.ai_engine.current_personality
+                'current': self.ai_engine.get_session(self._chat_session_id()).personality
             })
     
     def _register_socket_events(self):
@@ -193,140 +313,180 @@ class JarvisApp:
         @self.socketio.on('connect')
         def handle_connect():
             self.logger.info("Cliente conectado via WebSocket")
+            join_room(self._session_room(self._socket_session_id()))
             emit('connected', {'status': 'connected'})
         
         @self.socketio.on('disconnect')
         def handle_disconnect():
             self.logger.info("Cliente desconectado via WebSocket")
+            
+            # Ninguém vai ler as respostas em andamento: libera o backend
+            cancelled = self._cancel_chats(request.sid)
+            if cancelled:
+                self.logger.info(f"🛑 {cancelled} conversa(s) cancelada(s) na desconexão")
+            
+            # Sessões atreladas só à conexão não têm como ser retomadas
+            if 'chat_session' not in session:
+                self.ai_engine.sessions.drop(request.sid)
+            
+            # Último painel a sair encerra a amostragem
+            self.metrics.unsubscribe(request.sid)
         
         @self.socketio.on('start_monitoring')
-        def handle_start_monitoring():
-            """Inicia monitoramento em tempo real"""
-            if not self.monitoring_active:
-                self.start_monitoring()
-                emit('monitoring_started', {'status': 'started'})
+        def handle_start_monitoring(data=None):
+            """Inscreve o cliente no monitoramento ({"interval": segundos}, padrão: o mais rápido)"""
+            previous = self.metrics.subscription(request.sid)
+            interval = self.metrics.subscribe(request.sid, (data or {}).get('interval'))
+            if previous is not None and previous != interval:
+                leave_room(self._metrics_room(previous))
+            join_room(self._metrics_room(interval))
+            emit('monitoring_started', {'status': 'started', 'interval': interval})
         
         @self.socketio.on('stop_monitoring')
-        def handle_stop_monitoring():
-            """Para monitoramento em tempo real"""
-            if self.monitoring_active:
-                self.stop_monitoring()
-                emit('monitoring_stopped', {'status': 'stopped'})
+        def handle_stop_monitoring(data=None):
+            """Cancela a inscrição do cliente (os outros painéis continuam recebendo)"""
+            interval = self.metrics.unsubscribe(request.sid)
+            if interval is not None:
+                leave_room(self._metrics_room(interval))
+            emit('monitoring_stopped', {'status': 'stopped'})
+        
+        @self.socketio.on('cancel_chat')
+        def handle_cancel_chat(data=None):
+            """Cancela a conversa `request_id` da conexão (ou todas, sem request_id)"""
+            request_id = (data or {}).get('request_id')
+            cancelled = self._cancel_chats(request.sid, str(request_id) if request_id else None)
+            self.logger.info(f"🛑 cancel_chat: {cancelled} conversa(s) cancelada(s)")
         
         @self.socketio.on('chat_message')
         def handle_chat_message(data):
             """Processa mensagem de chat via WebSocket"""
             try:
                 message = data.get('message', '').strip()
+                stream = bool(data.get('stream', False))
+                session_id = self._socket_session_id()
+                room = self._session_room(session_id)
+                sid = request.sid
+                cancel = self._cancel_token(data)
+                request_id = cancel.request_id
                 
                 if not message:
-                    emit('chat_error', {'error': 'Mensagem vazia'})
+                    emit('chat_error', {'error': 'Mensagem vazia', 'request_id': request_id})
+                    return
+                
+                # Fila de geração cheia: recusa antes de abrir outra thread
+                if self.ai_engine.scheduler.is_saturated():
+                    emit('chat_error', {'error': str(GenerationBusyError()), 'busy': True,
+                                        'request_id': request_id})
                     return
                 
                 self.logger.info(f"💬 Processando mensagem: {message[:50]}...")
                 
                 # CORREÇÃO: Processar de forma mais robusta
                 try:
-                    # Coleta contexto do sistema
-                    system_info = self.system_monitor.get_system_info()
+                    # Coleta contexto do sistema (leitura rápida, sem esperar a CPU)
+                    load = self.system_monitor.get_load_snapshot()
                     context = {
-                        'cpu_percent': round(system_info.cpu_percent, 1),
-                        'memory_percent': round(system_info.memory_percent, 1),
+                        'cpu_percent': round(load['cpu_percent'], 1),
+                        'memory_percent': round(load['memory_percent'], 1),
                         'timestamp': time.time()
                     }
                     
-                    # Usar thread para não bloquear o WebSocket
-                    import threading
-                    
-                    def process_ai_message():
+                    # Roda no loop do motor de IA sem bloquear o WebSocket
+                    async def process_ai_message():
                         try:
-                            # Criar novo loop para a thread
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            
-                            response = loop.run_until_complete(
-                                self.ai_engine.chat(message, context)
-                            )
-                            loop.close()
+                            if stream:
+                                # Emite cada token assim que chega do backend
+                                chunks = []
+                                async for chunk in self.ai_engine.chat_stream(message, context, session_id,
+                                                                              cancel=cancel):
+                                    self._emit('chat_response_chunk', {
+                                        'chunk': chunk,
+                                        'index': len(chunks),
+                                        'request_id': request_id
+                                    }, room)
+                                    chunks.append(chunk)
+                                response = ''.join(chunks).strip()
+                            else:
+                                response = await self.ai_engine.chat(message, context, session_id, cancel=cancel)
                             
                             # Enviar resposta
-                            self.socketio.emit('chat_response', {
+                            self._emit('chat_response', {
                                 'message': message,
                                 'response': response,
-                                'timestamp': time.time()
-                            })
+                                'timestamp': time.time(),
+                                'request_id': request_id
+                            }, room)
                             
                             self.logger.info("✅ Resposta enviada via WebSocket")
-                            
+                        
+                        except GenerationBusyError as e:
+                            self._emit('chat_error', {'error': str(e), 'busy': True,
+                                                      'request_id': request_id}, room)
+                        except RequestCancelledError as e:
+                            if e.reason == CANCEL_DEADLINE:
+                                self._emit('chat_error', {'error': str(e), 'timeout': True,
+                                                          'request_id': request_id}, room)
+                            else:
+                                self._emit('chat_cancelled', {'request_id': request_id}, room)
                         except Exception as e:
                             self.logger.error(f"Erro processando IA: {e}")
-                            self.socketio.emit('chat_error', {
-                                'error': 'Erro processando sua mensagem. Tente novamente.'
-                            })
-                    
-                    # Executar em thread separada
-                    thread = threading.Thread(target=process_ai_message)
-                    thread.daemon = True
-                    thread.start()
+                            self._emit('chat_error', {
+                                'error': 'Erro processando sua mensagem. Tente novamente.',
+                                'request_id': request_id
+                            }, room)
+                        finally:
+                            self._untrack_chat(sid, cancel)
                     
+                    # Registrada antes de agendar: cancel_chat logo após o envio já a encontra
+                    self._track_chat(sid, cancel)
+                    self.ai_engine.runtime.submit(process_ai_message())
+                
                 except Exception as e:
                     self.logger.error(f"Erro preparando contexto: {e}")
                     emit('chat_error', {'error': 'Erro interno do sistema'})
-                
+            
             except Exception as e:
                 self.logger.error(f"Erro crítico no WebSocket chat: {e}")
                 emit('chat_error', {'error': 'Erro crítico no sistema'})
     
-    def start_monitoring(self):
-        """Inicia monitoramento de sistema em tempo real"""
-        if self.monitoring_active:
-            return
-        
-        self.monitoring_active = True
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop)
-        self.monitoring_thread.daemon = True
-        self.monitoring_thread.start()
-        
-        self.logger.info("Monitoramento de sistema iniciado")
-    
     def stop_monitoring(self):
-        """Para monitoramento de sistema"""
-        self.monitoring_active = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join(timeout=2)
+        """Encerra o monitoramento de todos os clientes"""
+        self.metrics.stop()
+    
+    def _system_update(self) -> Dict:
+        """Leitura enviada no system_update (medição da CPU fora do hub no modo eventlet)"""
+        system_info = self.bridge.offload(self.system_monitor.get_system_info)
         
-        self.logger.info("Monitoramento de sistema parado")
+        # DADOS LIMITADOS E ARREDONDADOS
+        return {
+            'timestamp': time.time(),
+            'cpu_percent': min(round(system_info.cpu_percent, 1), 100),  # Limita a 100%
+            'memory_percent': min(round(system_info.memory_percent, 1), 100),  # Limita a 100%
+            'memory_used': round(system_info.memory_used, 1),
+            'memory_total': round(system_info.memory_total, 1),
+            'disk_percent': min(round(system_info.disk_percent, 1), 100),  # Limita a 100%
+            'network_sent': max(0, min(round(system_info.network_sent, 3), 100)),  # Limita entre 0-100 MB/s
+            'network_recv': max(0, min(round(system_info.network_recv, 3), 100)),  # Limita entre 0-100 MB/s
+            'temperature': round(system_info.temperature, 1) if system_info.temperature else None,
+            'battery_percent': system_info.battery_percent,
+            'battery_plugged': system_info.battery_plugged,
+            'uptime': round(system_info.uptime, 2) if hasattr(system_info, 'uptime') else None
+        }
     
-    def _monitoring_loop(self):
-        """Loop de monitoramento que envia dados via WebSocket"""
-        while self.monitoring_active:
-            try:
-                # Coleta dados do sistema
-                system_info = self.system_monitor.get_system_info()
-                
-                # Envia via WebSocket apenas para clientes conectados - DADOS LIMITADOS E ARREDONDADOS
-                self.socketio.emit('system_update', {
-                    'timestamp': time.time(),
-                    'cpu_percent': min(round(system_info.cpu_percent, 1), 100),  # Limita a 100%
-                    'memory_percent': min(round(system_info.memory_percent, 1), 100),  # Limita a 100%
-                    'memory_used': round(system_info.memory_used, 1),
-                    'memory_total': round(system_info.memory_total, 1),
-                    'disk_percent': min(round(system_info.disk_percent, 1), 100),  # Limita a 100%
-                    'network_sent': max(0, min(round(system_info.network_sent, 3), 100)),  # Limita entre 0-100 MB/s
-                    'network_recv': max(0, min(round(system_info.network_recv, 3), 100)),  # Limita entre 0-100 MB/s
-                    'temperature': round(system_info.temperature, 1) if system_info.temperature else None,
-                    'battery_percent': system_info.battery_percent,
-                    'battery_plugged': system_info.battery_plugged,
-                    'uptime': round(system_info.uptime, 2) if hasattr(system_info, 'uptime') else None
-                })
-                
-                # CORREÇÃO: Intervalo mínimo rigoroso de 3 segundos para evitar sobrecarga
-                sleep_time = max(self.config.system.monitoring_interval, 3)
-                time.sleep(sleep_time)
-                
-            except Exception as e:
-                self.logger.error(f"Erro no loop de monitoramento: {e}")
-                time.sleep(5)  # Aguarda mais tempo em caso de erro
+    def _server_options(self) -> Dict:
+        """Opções do servidor do modo escolhido (eventlet: limite de conexões e de arquivos abertos)"""
+        if self.async_mode != "eventlet":
+            return {}
+        
+        # Um descritor por conexão, mais folga para logs, modelos e clientes HTTP
+        max_connections = self.config.web.max_connections
+        limit = raise_fd_limit(max_connections + 256)
+        if limit is not None and limit < max_connections:
+            self.logger.warning(f"⚠️ Limite de arquivos abertos ({limit}) abaixo de max_connections ({max_connections})")
+        
+        # Emits do runtime passam pelo hub desta thread
+        self.bridge.start(self.socketio.start_background_task)
+        return {'max_size': max_connections}
     
     def run_web_server(self, host: str = None, port: int = None, debug: bool = None):
         """Executa o servidor web"""
@@ -334,30 +494,33 @@ class JarvisApp:
         port = port or self.config.web.port
         debug = debug if debug is not None else self.config.web.debug
         
-        self.logger.info(f"🌐 Servidor web iniciando em http://{host}:{port}")
+        self.logger.info(f"🌐 Servidor web iniciando em http://{host}:{port} (modo {self.async_mode})")
         
         # CORREÇÃO: Não inicia monitoramento automaticamente
         # Usuário deve clicar em "Iniciar" no dashboard
         self.logger.info("💡 Clique em 'Iniciar' no dashboard para ativar monitoramento em tempo real")
         
+        options = self._server_options()
+        
         try:
             # Correção para Python 3.13+ - desabilita reloader se houver erro
             import sys
             if sys.version_info >= (3, 13) and debug:
                 self.logger.warning("⚠️ Modo debug desabilitado no Python 3.13+ devido a incompatibilidade do watchdog")
-                self.socketio.run(self.app, host=host, port=port, debug=False, use_reloader=False)
+                self.socketio.run(self.app, host=host, port=port, debug=False, use_reloader=False, **options)
             else:
-                self.socketio.run(self.app, host=host, port=port, debug=debug)
+                self.socketio.run(self.app, host=host, port=port, debug=debug, **options)
         except TypeError as e:
             if "'handle' must be a _ThreadHandle" in str(e):
                 self.logger.warning("⚠️ Executando sem reloader devido a incompatibilidade do watchdog")
-                self.socketio.run(self.app, host=host, port=port, debug=False, use_reloader=False)
+                self.socketio.run(self.app, host=host, port=port, debug=False, use_reloader=False, **options)
             else:
                 raise
         except KeyboardInterrupt:
             self.logger.info("Servidor interrompido pelo usuário")
         finally:
             self.stop_monitoring()
+            self.ai_engine.shutdown()
     
     def run_cli(self):
         """Executa em modo CLI"""
@@ -380,25 +543,24 @@ class JarvisApp:
                 # Processa comando
                 print("🤔 Processando...")
                 
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
                 system_info = self.system_monitor.get_system_info()
                 context = {
                     'cpu_percent': system_info.cpu_percent,
                     'memory_percent': system_info.memory_percent
                 }
                 
-                response = loop.run_until_complete(
+                # Ctrl+C durante a espera cancela a geração no runtime
+                response = self.ai_engine.runtime.run(
                     self.ai_engine.chat(user_input, context)
                 )
-                loop.close()
                 
                 print(f"JARVIS: {response}\n")
-                
+            
             except KeyboardInterrupt:
                 print("\n👋 Sistema encerrado pelo usuário")
                 break
             except Exception as e:
                 self.logger.error(f"Erro no CLI: {e}")
                 print(f"❌ Erro: {e}\n")
+        
+        self.ai_engine.shutdown()
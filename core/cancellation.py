@@ -0,0 +1,142 @@
+"""
+Cancelamento de requisições do JARVIS 3.0
+Prazo e cancelamento pedidos pelo cliente interrompem a chamada ao backend
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Set, Tuple
+
+CANCEL_CLIENT = "client"  # cancel_chat, cliente desconectado ou que desistiu
+CANCEL_DEADLINE = "deadline"  # prazo da requisição esgotado
+
+CANCEL_MESSAGES = {
+    CANCEL_CLIENT: "Requisição cancelada.",
+    CANCEL_DEADLINE: "Tempo limite da requisição esgotado."
+}
+
+class RequestCancelledError(Exception):
+    """Requisição cancelada pelo cliente ou com o prazo esgotado"""
+    
+    def __init__(self, reason: str = CANCEL_CLIENT):
+        super().__init__(CANCEL_MESSAGES.get(reason, CANCEL_MESSAGES[CANCEL_CLIENT]))
+        self.reason = reason
+
+class CancelToken:
+    """
+    Prazo e cancelamento de uma requisição, acionáveis de qualquer thread
+    
+    A requisição roda num event loop de outra thread (a do Socket.IO ou do
+    Flask). Os trechos que aguardam o backend entram em bind(): cancel()
+    ou o fim do prazo cancelam a tarefa asyncio que está dentro dele, o
+    que fecha a requisição HTTP em andamento - e o Ollama para de gerar
+    quando a conexão cai. A interrupção sai de bind() como
+    RequestCancelledError; depois de cancelado, entrar em bind() de novo
+    falha na hora.
+    """
+    
+    def __init__(self, timeout: Optional[float] = None, request_id: Optional[str] = None):
+        """
+        Args:
+            timeout: Prazo em segundos a partir de agora (None = sem prazo)
+            request_id: Identificador dado pelo cliente (para cancel_chat)
+        """
+        self.request_id = request_id
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason: Optional[str] = None
+        
+        self._lock = threading.Lock()
+        self._tasks: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = set()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Indica se a requisição foi cancelada (ou o prazo acabou)"""
+        return self.reason is not None
+    
+    def remaining(self) -> Optional[float]:
+        """Segundos até o prazo (None = sem prazo)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+    
+    def cancel(self, reason: str = CANCEL_CLIENT) -> bool:
+        """
+        Cancela a requisição (seguro entre threads)
+        
+        Returns:
+            False se já estava cancelada
+        """
+        with self._lock:
+            if self.reason is not None:
+                return False
+            self.reason = reason
+            tasks = list(self._tasks)
+        
+        for entry in tasks:
+            try:
+                entry[0].call_soon_threadsafe(self._interrupt, entry)
+            except RuntimeError:
+                pass  # Loop já foi fechado
+        return True
+    
+    def _interrupt(self, entry: Tuple[asyncio.AbstractEventLoop, asyncio.Task]):
+        """Cancela a tarefa no próprio loop, se ela ainda estiver em bind()"""
+        with self._lock:
+            bound = entry in self._tasks
+        if bound:
+            entry[1].cancel()
+    
+    def check(self):
+        """Levanta RequestCancelledError se a requisição já foi cancelada ou o prazo acabou"""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.cancel(CANCEL_DEADLINE)
+        if self.reason is not None:
+            raise RequestCancelledError(self.reason)
+    
+    @asynccontextmanager
+    async def bind(self):
+        """Trecho interrompível pelo cancelamento e pelo prazo"""
+        self.check()
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        entry = (loop, task)
+        with self._lock:
+            self._tasks.add(entry)
+        
+        remaining = self.remaining()
+        timer = loop.call_later(remaining, self.cancel, CANCEL_DEADLINE) if remaining is not None else None
+        try:
+            yield self
+        except asyncio.CancelledError:
+            if self.reason is None:
+                raise  # Cancelamento de fora (loop encerrando), não desta requisição
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            raise RequestCancelledError(self.reason) from None
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                self._tasks.discard(entry)
+    
+    async def guard(self, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Repassa o stream interrompendo a espera de cada trecho
+        
+        Cada trecho é aguardado dentro de bind(), na tarefa de quem está
+        consumindo naquele momento (iterate_sync usa uma tarefa por trecho).
+        O stream original é fechado ao sair, mesmo no cancelamento.
+        """
+        try:
+            while True:
+                async with self.bind():
+                    try:
+                        chunk = await stream.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield chunk
+        finally:
+            await stream.aclose()
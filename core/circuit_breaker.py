@@ -0,0 +1,187 @@
+"""
+Circuit breaker do JARVIS 3.0
+Isola um backend com falhas para que o fallback seja imediato
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Circuito aberto: a chamada nem chegou ao backend"""
+    health_failure = False  # Não é resultado do backend
+    
+    def __init__(self, name: str):
+        super().__init__(f"Circuito '{name}' aberto")
+        self.name = name
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela móvel de chamadas
+    
+    Fechado: as chamadas passam e cada resultado entra na janela. Falhas e
+    chamadas lentas (acima de `slow_call_seconds`) contam como ruins; com
+    pelo menos `min_calls` na janela e taxa de ruins >= `failure_rate`, o
+    circuito abre. Aberto: tudo é recusado na hora por `open_seconds`.
+    Meio-aberto: uma chamada de teste por vez; sucesso fecha o circuito,
+    falha abre de novo.
+    
+    available() só consulta o estado; a vaga (inclusive o teste do
+    meio-aberto) é concedida por allow(), que deve ser chamado apenas por
+    quem vai fazer a chamada e registrar o resultado.
+    """
+    
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 4,
+                 window: int = 20, slow_call_seconds: float = 15.0, open_seconds: float = 30.0):
+        """
+        Args:
+            name: Nome do backend (logs e status)
+            failure_rate: Fração de chamadas ruins que abre o circuito
+            min_calls: Chamadas mínimas na janela antes de avaliar a taxa
+            window: Tamanho da janela móvel de resultados
+            slow_call_seconds: Chamadas mais lentas que isso contam como ruins
+            open_seconds: Tempo aberto antes de testar o backend de novo
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._outcomes = deque(maxlen=window)  # True = chamada ruim
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._stats = {'successes': 0, 'failures': 0, 'slow_calls': 0,
+                       'short_circuited': 0, 'opened': 0}
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+    
+    def _current_state(self, now: float) -> str:
+        if self._state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probe_started = None
+        return self._state
+    
+    def _probe_free(self, now: float) -> bool:
+        # Um teste sem resultado expira após open_seconds
+        return self._probe_started is None or now - self._probe_started >= self.open_seconds
+    
+    def available(self) -> bool:
+        """Indica se allow() concederia uma chamada agora (só consulta, não reserva o teste)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            return state == STATE_CLOSED or (state == STATE_HALF_OPEN and self._probe_free(now))
+    
+    def allow(self) -> bool:
+        """Concede uma chamada agora (no meio-aberto, a de teste); conta as recusas"""
+        now = time.monotonic()
+        
+        with self._lock:
+            state = self._current_state(now)
+            
+            if state == STATE_CLOSED:
+                return True
+            
+            if state == STATE_HALF_OPEN and self._probe_free(now):
+                self._probe_started = now  # Uma chamada de teste por vez
+                return True
+            
+            self._stats['short_circuited'] += 1
+            return False
+    
+    def abandon(self):
+        """Chamada concedida terminou sem resultado (cancelada): libera o teste do meio-aberto"""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probe_started = None
+    
+    def record_success(self, elapsed: Optional[float] = 0.0):
+        """
+        Registra uma chamada bem-sucedida (lenta conta como ruim)
+        
+        Args:
+            elapsed: Latência até o primeiro token em segundos (None = não medida)
+        """
+        slow = elapsed is not None and elapsed >= self.slow_call_seconds
+        
+        with self._lock:
+            self._stats['successes'] += 1
+            if slow:
+                self._stats['slow_calls'] += 1
+            
+            if self._state == STATE_HALF_OPEN:
+                if slow:
+                    self._open(time.monotonic())
+                else:
+                    self._close()
+                return
+            
+            self._outcomes.append(slow)
+            self._evaluate()
+    
+    def record_failure(self):
+        """Registra uma chamada que falhou"""
+        with self._lock:
+            self._stats['failures'] += 1
+            
+            if self._state == STATE_HALF_OPEN:
+                self._open(time.monotonic())
+                return
+            
+            self._outcomes.append(True)
+            self._evaluate()
+    
+    def reset(self):
+        """Fecha o circuito e limpa a janela"""
+        with self._lock:
+            self._close()
+    
+    def _evaluate(self):
+        if self._state != STATE_CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        bad = sum(self._outcomes)
+        if bad / len(self._outcomes) >= self.failure_rate:
+            self._open(time.monotonic())
+    
+    def _open(self, now: float):
+        if self._state != STATE_OPEN:
+            self.logger.warning(f"🔌 Circuito '{self.name}' aberto por {self.open_seconds:.0f}s")
+            self._stats['opened'] += 1
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._probe_started = None
+    
+    def _close(self):
+        if self._state != STATE_CLOSED:
+            self.logger.info(f"✅ Circuito '{self.name}' fechado")
+        self._state = STATE_CLOSED
+        self._outcomes.clear()
+        self._probe_started = None
+    
+    def stats(self) -> Dict:
+        """Estado e contadores do circuito"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            calls = len(self._outcomes)
+            return {
+                **self._stats,
+                'state': state,
+                'window_calls': calls,
+                'window_failure_rate': round(sum(self._outcomes) / calls, 3) if calls else 0.0,
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+                                    if state == STATE_OPEN else 0.0
+            }
@@ -6,8 +6,8 @@ import os
 import json
 import yaml
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional
 
 @dataclass
 class AIConfig:
@@ -16,13 +16,72 @@ class AIConfig:
     api_key: Optional[str] = None
     max_tokens: int = 2000
     temperature: float = 0.7
+    openai_base_url: Optional[str] = None  # servidor compatível com a OpenAI (padrão: api.openai.com)
+    openai_timeout: float = 30.0  # timeout por requisição em segundos
+    openai_connect_timeout: float = 5.0  # timeout de conexão em segundos
+    openai_max_retries: int = 0  # novas tentativas do SDK (o fallback já cobre a falha)
     local_model_path: Optional[str] = None
     use_local_model: bool = False
+    ollama_registry_ttl: float = 30.0  # segundos de cache de /api/tags e da conexão
+    ollama_urls: List[str] = field(default_factory=lambda: ["http://localhost:11434"])
+    ollama_eject_after: int = 3  # falhas seguidas até tirar um servidor da rotação
+    ollama_eject_seconds: float = 30.0  # tempo fora da rotação antes de tentar de novo
+    ollama_num_ctx: int = 2048  # janela de contexto em tokens (mudar recarrega o modelo)
+    ollama_num_predict: int = 512  # tokens máximos da resposta (reservados na janela)
+    tokenizers: Dict[str, str] = field(default_factory=dict)  # prefixo do modelo -> tokenizer local (transformers)
+    response_cache_enabled: bool = True
+    response_cache_ttl: float = 3600.0  # segundos
+    response_cache_memory_entries: int = 256
+    response_cache_disk_entries: int = 5000
+    max_sessions: int = 1000  # sessões de conversa em memória (ativas + compactadas)
+    session_idle_timeout: float = 3600.0  # segundos sem uso até descartar a sessão
+    session_cold_after: float = 300.0  # segundos sem uso até compactar a sessão
+    history_compaction_enabled: bool = True  # resume as mensagens antigas em segundo plano
+    history_compaction_trigger: int = 12  # mensagens no histórico que disparam o resumo
+    history_compaction_keep_recent: int = 6  # mensagens mais novas mantidas sem resumo
+    history_compaction_model: str = "llama3.2:1b"  # modelo pequeno usado nos resumos
+    history_compaction_max_tokens: int = 200  # tamanho máximo do resumo em tokens
+    fast_path_enabled: bool = True  # responde comandos de sistema e de plugins sem o LLM
+    fast_path_min_confidence: float = 0.8  # pontuação mínima da intenção para o caminho rápido
+    retrieval_enabled: bool = True  # notas, tarefas e conversas antigas relevantes entram no prompt
+    retrieval_embedding_model: Optional[str] = "paraphrase-multilingual-MiniLM-L12-v2"  # None = hashing de termos
+    retrieval_training_file: Optional[str] = "training_data/conversational_data.jsonl"  # pares indexados
+    retrieval_top_k: int = 4  # trechos recuperados por mensagem
+    retrieval_min_score: float = 0.4  # similaridade mínima de um trecho
+    retrieval_max_tokens: int = 256  # tokens máximos dos trechos no prompt
+    retrieval_sync_interval: float = 30.0  # segundos entre sincronizações de notas e tarefas
+    retrieval_exact_below: int = 20000  # registros a partir dos quais o índice usa IVF
+    semantic_router_enabled: bool = True  # intenções por embeddings se o sentence-transformers estiver instalado
+    semantic_router_model: str = "paraphrase-multilingual-MiniLM-L12-v2"  # nome ou caminho local
+    semantic_router_threshold: float = 0.6  # similaridade mínima para aceitar uma intenção
+    semantic_router_device: Optional[str] = None  # "cpu", "cuda" (padrão: automático)
+    embedding_allow_download: bool = False  # baixa os modelos de embeddings no primeiro uso (senão, só do disco)
+    generation_max_concurrent: int = 2  # gerações simultâneas por servidor Ollama
+    generation_max_queue: int = 16  # requisições na fila antes de responder "ocupado"
+    generation_queue_timeout: float = 20.0  # segundos de espera máxima na fila
+    request_timeout: float = 90.0  # prazo máximo de uma requisição de chat (o cliente pode pedir menos)
+    breaker_failure_rate: float = 0.5  # fração de chamadas ruins que abre o circuito
+    breaker_min_calls: int = 4  # chamadas na janela antes de avaliar a taxa
+    breaker_window: int = 20  # últimas chamadas consideradas
+    breaker_slow_call_seconds: float = 15.0  # primeiro token mais lento que isso conta como ruim
+    breaker_open_seconds: float = 30.0  # tempo com o circuito aberto antes de testar de novo
+    hedging_enabled: bool = False  # segunda requisição quando o primeiro trecho atrasa
+    hedge_percentile: float = 0.95  # percentil da latência do primeiro trecho usado como limiar
+    hedge_min_samples: int = 20  # medições antes de usar o percentil
+    hedge_default_delay: float = 3.0  # limiar em segundos enquanto faltam medições
+    hedge_min_delay: float = 0.5  # limiar mínimo em segundos
+    preload_models: bool = True  # pré-carrega os modelos das personalidades ao iniciar
+    model_keep_alive: str = "30m"  # tempo na memória dos modelos em uso ("-1m" = sempre)
+    model_hot_seconds: float = 900.0  # tempo desde o último uso em que o modelo segue fixado
+    max_resident_models: int = 3  # modelos carregados por servidor antes de descarregar
+    model_memory_budget_mb: float = 0.0  # memória máxima dos modelos por servidor (0 = sem limite)
+    residency_refresh_interval: float = 60.0  # intervalo de conferência do /api/ps
 
 @dataclass
 class SystemConfig:
     """Configurações do sistema"""
     monitoring_interval: int = 1  # segundos
+    monitoring_max_interval: int = 60  # intervalo mais lento que um painel pode pedir (segundos)
     auto_cleanup: bool = True
     max_memory_usage: float = 80.0  # porcentagem
     max_cpu_usage: float = 90.0  # porcentagem
@@ -36,6 +95,11 @@ class WebConfig:
     debug: bool = False
     secret_key: str = "jarvis-secret-key-change-me"
     enable_cors: bool = True
+    async_mode: str = "auto"  # servidor: "eventlet" (green threads), "threading" ou "auto" (eventlet se instalado)
+    max_connections: int = 10000  # conexões simultâneas no modo eventlet (uma green thread cada)
+    socket_ping_interval: int = 25  # segundos entre pings do Socket.IO
+    socket_ping_timeout: int = 20  # segundos sem resposta ao ping até derrubar a conexão
+    socket_max_message_bytes: int = 65536  # tamanho máximo de uma mensagem (limita o buffer por conexão)
 
 @dataclass
 class AudioConfig:
@@ -111,6 +175,16 @@ class Config:
         # OpenAI API Key
         if self.ai.api_key:
             os.environ['OPENAI_API_KEY'] = self.ai.api_key
+        elif os.environ.get('OPENAI_API_KEY'):
+            self.ai.api_key = os.environ['OPENAI_API_KEY']
+        
+        # Servidor compatível com a OpenAI (ex.: stub local para testes)
+        if os.environ.get('OPENAI_BASE_URL'):
+            self.ai.openai_base_url = os.environ['OPENAI_BASE_URL']
+        
+        # Servidores Ollama (OLLAMA_URLS=http://a:11434,http://b:11434)
+        if os.environ.get('OLLAMA_URLS'):
+            self.ai.ollama_urls = [url.strip() for url in os.environ['OLLAMA_URLS'].split(',') if url.strip()]
         
         # Log level
         os.environ['LOG_LEVEL'] = self.system.log_level
@@ -0,0 +1,323 @@
+"""
+Orçamento de contexto do JARVIS 3.0
+Conta tokens por modelo e distribui a janela de contexto entre as partes do prompt
+"""
+
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core.prompt_builder import PromptBuilder
+
+# Palavras e sinais isolados: base da estimativa sem tokenizer
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+class TokenCounter:
+    """
+    Contagem de tokens por modelo
+    
+    Usa o tokenizer local do transformers quando o modelo está mapeado em
+    `tokenizers` (ex.: {"llama3": "/modelos/llama3-tokenizer"}) e os
+    arquivos existem na máquina; caso contrário, uma estimativa por
+    palavras (~4 caracteres por token) corrigida pelo que o Ollama
+    informa em prompt_eval_count. A correção só aumenta a estimativa,
+    para que o prompt nunca passe da janela por contar tokens a menos.
+    """
+    
+    CHARS_PER_TOKEN = 4
+    MAX_CORRECTION = 3.0
+    
+    def __init__(self, tokenizers: Optional[Dict[str, str]] = None, cache_size: int = 4096):
+        """
+        Args:
+            tokenizers: Prefixo do nome do modelo -> caminho/nome do tokenizer local
+            cache_size: Contagens de texto guardadas (prefixos se repetem a cada chamada)
+        """
+        self.tokenizer_paths = tokenizers or {}
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._tokenizers: Dict[str, object] = {}  # modelo -> tokenizer (None = estimativa)
+        self._corrections: Dict[str, float] = {}
+        self._cache: "OrderedDict[tuple, int]" = OrderedDict()
+    
+    def _tokenizer(self, model: str):
+        with self._lock:
+            if model in self._tokenizers:
+                return self._tokenizers[model]
+        
+        tokenizer = None
+        path = next((p for prefix, p in self.tokenizer_paths.items() if model.startswith(prefix)), None)
+        if path:
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+                self.logger.info(f"🔤 Tokenizer de {model} carregado de {path}")
+            except Exception as e:
+                self.logger.warning(f"⚠️ Tokenizer de {model} indisponível ({e}), usando estimativa")
+        
+        with self._lock:
+            self._tokenizers[model] = tokenizer
+        return tokenizer
+    
+    def is_exact(self, model: str) -> bool:
+        """Indica se a contagem do modelo vem de um tokenizer real"""
+        return self._tokenizer(model) is not None
+    
+    @classmethod
+    def estimate(cls, text: str) -> int:
+        """Estimativa de tokens sem tokenizer"""
+        return sum(math.ceil(len(piece) / cls.CHARS_PER_TOKEN) for piece in _PIECE_RE.findall(text))
+    
+    def count(self, model: str, text: str) -> int:
+        """Tokens de `text` no tokenizer do modelo"""
+        if not text:
+            return 0
+        
+        key = (model, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        
+        tokenizer = self._tokenizer(model)
+        if tokenizer is not None:
+            tokens = len(tokenizer.encode(text, add_special_tokens=False))
+        else:
+            tokens = math.ceil(self.estimate(text) * self._corrections.get(model, 1.0))
+        
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+    
+    def calibrate(self, model: str, counted: int, actual: int):
+        """
+        Ajusta a estimativa do modelo com a contagem real do servidor
+        
+        Args:
+            counted: Tokens contados para o prompt enviado
+            actual: prompt_eval_count informado pelo Ollama
+        """
+        if counted <= 0 or actual <= counted or self._tokenizer(model) is not None:
+            return
+        
+        with self._lock:
+            current = self._corrections.get(model, 1.0)
+            corrected = min(self.MAX_CORRECTION, current * actual / counted)
+            if corrected > current:
+                self._corrections[model] = corrected
+                # Contagens antigas do modelo ficaram baixas
+                for key in [k for k in self._cache if k[0] == model]:
+                    del self._cache[key]
+    
+    def stats(self) -> Dict:
+        """Modo de contagem e correção por modelo"""
+        with self._lock:
+            return {
+                model: {
+                    'exact': tokenizer is not None,
+                    'correction': round(self._corrections.get(model, 1.0), 3)
+                }
+                for model, tokenizer in self._tokenizers.items()
+            }
+
+@dataclass
+class PromptBudget:
+    """Partes do prompt que cabem na janela e seus tokens"""
+    history: List[Dict]
+    message: str
+    context: Optional[Dict]
+    tokens: Dict[str, int] = field(default_factory=dict)  # system, summary, memory, context, history, message, total
+    dropped_messages: int = 0
+    truncated: bool = False  # mensagem ou contexto cortados
+
+class ContextBudgeter:
+    """
+    Distribui a janela de contexto (num_ctx) entre as partes do prompt
+    
+    Reserva `num_predict` tokens para a resposta e uma margem. O prompt de
+    sistema entra sempre inteiro. A mensagem do usuário pode ocupar até
+    `message_share` do restante (acima disso é cortada) e o contexto do
+    sistema até `context_share` (acima disso as maiores chaves saem). O
+    que sobra vai para o histórico, das mensagens mais novas para as mais
+    antigas; as que não cabem ficam de fora.
+    """
+    
+    MARGIN_TOKENS = 32  # rótulos ("Histórico:", "Jarvis:") e diferenças de contagem
+    
+    def __init__(self, counter: TokenCounter, num_ctx: int = 2048, num_predict: int = 512,
+                 message_share: float = 0.5, context_share: float = 0.15):
+        """
+        Args:
+            counter: Contador de tokens
+            num_ctx: Janela de contexto do modelo em tokens
+            num_predict: Tokens reservados para a resposta
+            message_share: Fração máxima do espaço livre para a mensagem do usuário
+            context_share: Fração máxima do espaço livre para o contexto do sistema
+        """
+        self.counter = counter
+        self.num_ctx = num_ctx
+        self.num_predict = num_predict
+        self.message_share = message_share
+        self.context_share = context_share
+        
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'tokens_in_total': 0, 'tokens_in_max': 0, 'tokens_in_last': 0,
+                       'server_tokens_in_total': 0, 'server_reports': 0,
+                       'dropped_messages': 0, 'truncated': 0}
+    
+    @property
+    def available(self) -> int:
+        """Tokens disponíveis para o prompt"""
+        return max(0, self.num_ctx - self.num_predict - self.MARGIN_TOKENS)
+    
+    def fits(self, model: str, used_tokens: int, text: str) -> bool:
+        """Indica se `text` cabe depois de `used_tokens` já ocupados (ex.: contexto KV)"""
+        return used_tokens + self.counter.count(model, text) <= self.available
+    
+    def fit(self, model: str, system: str, history: List[Dict], message: str,
+            context: Optional[Dict] = None, summary: str = "", memory: str = "") -> PromptBudget:
+        """
+        Escolhe o que entra no prompt
+        
+        Args:
+            model: Modelo de destino (tokenizer)
+            system: Prefixo de sistema (entra inteiro)
+            history: Histórico completo, do mais antigo ao mais novo
+            message: Mensagem do usuário
+            context: Dados do sistema (voláteis)
+            summary: Resumo das mensagens antigas (entra inteiro, como o sistema)
+            memory: Trechos recuperados (entram inteiros; quem chama limita o tamanho)
+        """
+        available = self.available
+        system_tokens = self.counter.count(model, system)
+        summary_tokens = self.counter.count(model, PromptBuilder.format_summary(summary))
+        memory_tokens = self.counter.count(model, PromptBuilder.format_memory(memory))
+        free = max(0, available - system_tokens - summary_tokens - memory_tokens)
+        truncated = False
+        
+        message_tokens = self.counter.count(model, message)
+        message_limit = int(free * self.message_share)
+        if message_tokens > message_limit:
+            message = self._truncate(model, message, message_limit)
+            message_tokens = self.counter.count(model, message)
+            truncated = True
+        
+        context, context_tokens, context_cut = self._fit_context(model, context, int(free * self.context_share))
+        truncated = truncated or context_cut
+        
+        remaining = free - message_tokens - context_tokens
+        kept: List[Dict] = []
+        history_tokens = 0
+        for msg in reversed(history):
+            tokens = self.counter.count(model, PromptBuilder.format_history([msg]))
+            if tokens > remaining - history_tokens:
+                break
+            history_tokens += tokens
+            kept.append(msg)
+        kept.reverse()
+        
+        return PromptBudget(
+            history=kept,
+            message=message,
+            context=context,
+            tokens={
+                'system': system_tokens,
+                'summary': summary_tokens,
+                'memory': memory_tokens,
+                'context': context_tokens,
+                'history': history_tokens,
+                'message': message_tokens,
+                'total': (system_tokens + summary_tokens + memory_tokens + context_tokens
+                          + history_tokens + message_tokens)
+            },
+            dropped_messages=len(history) - len(kept),
+            truncated=truncated
+        )
+    
+    def fit_lines(self, model: str, lines: List[str], limit: int) -> List[str]:
+        """Linhas, em ordem, até somar `limit` tokens (a que não cabe inteira é cortada e encerra)"""
+        kept: List[str] = []
+        for line in lines:
+            tokens = self.counter.count(model, line + "\n")
+            if tokens > limit:
+                line = self._truncate(model, line, limit - 1)
+                if line:
+                    kept.append(line)
+                break
+            kept.append(line)
+            limit -= tokens
+        return kept
+    
+    def _fit_context(self, model: str, context: Optional[Dict], limit: int):
+        """Remove as maiores chaves do contexto até caber em `limit` tokens"""
+        tokens = self.counter.count(model, PromptBuilder.volatile_suffix(context))
+        if tokens <= limit or not context:
+            return context, tokens, False
+        
+        context = dict(context)
+        by_size = sorted(context, key=lambda k: len(json.dumps(context[k], ensure_ascii=False, default=str)),
+                         reverse=True)
+        for key in by_size:
+            del context[key]
+            tokens = self.counter.count(model, PromptBuilder.volatile_suffix(context))
+            if tokens <= limit:
+                break
+        return context or None, tokens, True
+    
+    def _truncate(self, model: str, text: str, max_tokens: int) -> str:
+        """Corta o fim do texto até caber em `max_tokens`"""
+        if max_tokens <= 0:
+            return ""
+        for _ in range(8):
+            tokens = self.counter.count(model, text)
+            if tokens <= max_tokens:
+                break
+            text = text[:max(1, int(len(text) * max_tokens / tokens * 0.95))]
+        return text
+    
+    def record(self, budget_tokens: int, dropped_messages: int = 0, truncated: bool = False):
+        """Registra os tokens de entrada de uma requisição"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['tokens_in_total'] += budget_tokens
+            self._stats['tokens_in_last'] = budget_tokens
+            self._stats['tokens_in_max'] = max(self._stats['tokens_in_max'], budget_tokens)
+            self._stats['dropped_messages'] += dropped_messages
+            if truncated:
+                self._stats['truncated'] += 1
+    
+    def record_server(self, prompt_eval_count: int):
+        """Registra os tokens de entrada informados pelo servidor"""
+        with self._lock:
+            self._stats['server_tokens_in_total'] += prompt_eval_count
+            self._stats['server_reports'] += 1
+    
+    def stats(self) -> Dict:
+        """Tokens de entrada por requisição e cortes feitos"""
+        with self._lock:
+            requests = self._stats['requests']
+            reports = self._stats['server_reports']
+            return {
+                'num_ctx': self.num_ctx,
+                'num_predict': self.num_predict,
+                'prompt_budget': self.available,
+                'requests': requests,
+                'tokens_in_last': self._stats['tokens_in_last'],
+                'tokens_in_avg': round(self._stats['tokens_in_total'] / requests, 1) if requests else 0.0,
+                'tokens_in_max': self._stats['tokens_in_max'],
+                'server_tokens_in_avg': round(self._stats['server_tokens_in_total'] / reports, 1) if reports else None,
+                'dropped_messages': self._stats['dropped_messages'],
+                'truncated': self._stats['truncated'],
+                'tokenizers': self.counter.stats()
+            }
@@ -0,0 +1,128 @@
+"""
+Embeddings de texto do JARVIS 3.0
+Modelo do sentence-transformers compartilhado e alternativa por hashing sem dependências
+"""
+
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.intents import IntentClassifier
+
+_models: Dict[Tuple[str, Optional[str]], object] = {}
+_models_lock = threading.Lock()
+
+class ModelNotCachedError(Exception):
+    """Modelo de embeddings não está no disco e o download não foi permitido"""
+
+def local_model_path(name: str) -> Optional[str]:
+    """
+    Caminho do modelo no disco, sem acessar a rede (None se não estiver baixado)
+    
+    Aceita um diretório local ou um nome do Hugging Face Hub ("modelo" vira
+    "sentence-transformers/modelo"), procurado no cache do Hub e no cache
+    antigo do sentence-transformers (SENTENCE_TRANSFORMERS_HOME).
+    """
+    if os.path.isdir(name):
+        return name
+    
+    repo_id = name if "/" in name else f"sentence-transformers/{name}"
+    try:
+        from huggingface_hub import snapshot_download
+        return snapshot_download(repo_id, local_files_only=True)
+    except Exception:
+        pass
+    
+    legacy_home = os.environ.get("SENTENCE_TRANSFORMERS_HOME") or os.path.join(
+        os.environ.get("TORCH_HOME", os.path.join(Path.home(), ".cache", "torch")), "sentence_transformers")
+    legacy = os.path.join(legacy_home, repo_id.replace("/", "_"))
+    return legacy if os.path.isdir(legacy) else None
+
+def load_sentence_model(name: str, device: Optional[str] = None, allow_download: bool = False):
+    """
+    Modelo do sentence-transformers, carregado uma vez por processo
+    
+    Roteador de intenções e memória de recuperação usam o mesmo modelo sem
+    duplicar a memória. Quem chega enquanto o modelo carrega espera por ele.
+    Sem `allow_download`, só modelos já presentes no disco são carregados.
+    
+    Raises:
+        ImportError: sentence-transformers não instalado
+        ModelNotCachedError: Modelo fora do disco e download não permitido
+    """
+    with _models_lock:
+        model = _models.get((name, device))
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            path = name if allow_download else local_model_path(name)
+            if path is None:
+                raise ModelNotCachedError(f"modelo {name} não encontrado no disco (download desativado)")
+            model = SentenceTransformer(path, device=device)
+            _models[(name, device)] = model
+        return model
+
+class SentenceEmbedder:
+    """Embeddings normalizados de um modelo do sentence-transformers"""
+    
+    def __init__(self, model, name: str, batch_size: int = 32):
+        self.model = model
+        self.name = name
+        self.batch_size = batch_size
+        self.dim = int(model.get_sentence_embedding_dimension())
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Textos x dimensões, float32, linhas com norma 1"""
+        embeddings = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                       normalize_embeddings=True, show_progress_bar=False)
+        return np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(texts), self.dim)
+
+# Palavras frequentes demais para distinguir textos
+STOPWORDS = frozenset(
+    "a o as os um uma uns umas de do da dos das em no na nos nas por para pra com sem que e "
+    "ou se me te ele ela eu voce nos eles elas meu minha seu sua isso isto esse essa este esta "
+    "ao aos foi ser ter tem mais muito como qual quando onde ja nao sim".split()
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+class HashingEmbedder:
+    """
+    Embedding lexical sem modelo, para quando o sentence-transformers falta
+    
+    Palavras (sem acentos e sem as muito frequentes) e seus trigramas de
+    caracteres são espalhados por hashing em `dim` posições, com sinal, e
+    o vetor é normalizado. Não entende paráfrases, mas acha textos que
+    compartilham termos, inclusive com flexões ("reunião"/"reuniões").
+    """
+    
+    TRIGRAM_WEIGHT = 0.5
+    
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+    
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        features = []
+        for word in _WORD_RE.findall(IntentClassifier.normalize(text)):
+            if word in STOPWORDS:
+                continue
+            features.append((word, 1.0))
+            padded = f"#{word}#"
+            features.extend((padded[i:i + 3], self.TRIGRAM_WEIGHT) for i in range(len(padded) - 2))
+        return features
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Textos x dimensões, float32, linhas com norma 1 (ou zero, sem termos)"""
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = zlib.crc32(feature.encode("utf-8"))
+                embeddings[row, digest % self.dim] += weight if digest & 0x80000000 else -weight
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings
@@ -0,0 +1,300 @@
+"""
+Caminho rápido do JARVIS 3.0
+Responde comandos de sistema e de plugins sem passar pelo modelo de linguagem
+"""
+
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from core.intents import IntentClassifier, IntentMatch
+from core.plugins import PluginManager
+from core.system_monitor import SystemMonitor
+
+# Respostas por personalidade; a "assistente" cobre o que faltar nas outras
+RESPONSES: Dict[str, Dict[str, str]] = {
+    "assistente": {
+        "cpu_info": "Uso de CPU: {cpu:.1f}% ({status}).",
+        "memory_info": "Memória em uso: {memory:.1f}% ({status}).",
+        "disk_info": "Disco: {disk_used:.1f} GB de {disk_total:.1f} GB usados ({disk:.1f}%), {disk_free:.1f} GB livres.",
+        "battery_info": "Bateria em {battery:.0f}%, {plugged}.",
+        "battery_missing": "Não encontrei bateria neste computador.",
+        "temperature_info": "Temperatura da CPU: {temperature:.1f} °C ({status}).",
+        "temperature_missing": "Os sensores de temperatura não estão disponíveis neste computador.",
+        "system_status": "Sistema {status}. CPU em {cpu:.1f}% e memória em {memory:.1f}%.",
+        "add_note": "Anotado: \"{content}\".",
+        "add_reminder": "Lembrete criado para {when}: \"{content}\".",
+        "add_reminder_when": "Para quando devo criar o lembrete? Por exemplo: \"me lembre de {content} amanhã às 9h\".",
+        "add_task": "Tarefa adicionada: \"{content}\".",
+        "plugin_failed": "Não consegui salvar agora. Tente novamente em instantes.",
+    },
+    "amigavel": {
+        "cpu_info": "Sua CPU está em {cpu:.1f}%, {status}! 😉",
+        "memory_info": "A memória está em {memory:.1f}%, {status}.",
+        "system_status": "Tudo {status} por aqui: CPU em {cpu:.1f}% e memória em {memory:.1f}%. 👍",
+        "add_note": "Prontinho, anotei: \"{content}\" 📝",
+        "add_reminder": "Combinado! Te lembro em {when}: \"{content}\" ⏰",
+        "add_task": "Feito! \"{content}\" está na sua lista. ✅",
+    },
+    "tecnico": {
+        "cpu_info": "CPU: {cpu:.1f}% de utilização em {cpu_count} núcleos lógicos. Status: {status}.",
+        "memory_info": "RAM: {memory:.1f}% ({memory_used:.1f}/{memory_total:.1f} GB). Status: {status}.",
+        "system_status": "Status: {status}. CPU {cpu:.1f}% | RAM {memory:.1f}% | Disco {disk:.1f}%.",
+    },
+}
+
+# Pedidos de plugin precisam estar no formato de comando: as intenções
+# sozinhas ("qual a nota do filme?") não bastam para gravar algo
+_PREFIX = r"^\s*(?:jarvis[,:]?\s+)?(?:por\s+favor[,]?\s+)?"
+PLUGIN_COMMANDS: Dict[str, "re.Pattern"] = {
+    "add_note": re.compile(
+        _PREFIX + r"(?:anot[ae]r?|(?:crie|adicione|nova)\s+(?:uma\s+)?(?:nota|anota[cç][aã]o))\b"
+        r"[\s:,-]*(?:que\s+)?(?P<content>.*)$", re.IGNORECASE | re.DOTALL),
+    "add_reminder": re.compile(
+        _PREFIX + r"(?:(?:me\s+)?lembr[ae](?:-me)?|(?:crie|adicione|novo)\s+(?:um\s+)?lembrete)\b"
+        r"[\s:,-]*(?:(?:de|que|para)\s+)?(?P<content>.*)$", re.IGNORECASE | re.DOTALL),
+    "add_task": re.compile(
+        _PREFIX + r"(?:(?:crie|adicione|nova)\s+(?:uma\s+)?tarefa|tarefa:)"
+        r"[\s:,-]*(?:(?:de|para)\s+)?(?P<content>.*)$", re.IGNORECASE | re.DOTALL),
+}
+
+# Perguntas de sistema também: a mensagem inteira precisa ser a consulta sobre
+# a máquina ("qual o uso da cpu?", "temperatura do processador"). Conferidas
+# no texto em minúsculas e sem acentos (IntentClassifier.normalize)
+_ASK = (r"^\s*(?:jarvis[,:]?\s+)?(?:por\s+favor[,]?\s+)?"
+        r"(?:(?:me\s+)?(?:diga|mostre|mostra|informe|fale|de|da)\s+(?:sobre\s+)?"
+        r"|(?:qual|quanto|quanta|como)\s+(?:e\s+|esta\s+|anda\s+|ta\s+)?"
+        r"|(?:verifique|verificar|cheque|checar|ver)\s+)?"
+        r"(?:(?:o|a|os|as)\s+)?")
+_MACHINE = r"(?:sistema|computador|pc|maquina|notebook|servidor)"
+_ON_MACHINE = r"(?:\s+(?:d[oa]|n[oa]|dest[ea]|nest[ea])\s+(?:meu\s+|minha\s+)?" + _MACHINE + r")?"
+_USAGE = r"(?:(?:uso|carga|consumo|utilizacao|ocupacao|nivel|status|estado)\s+(?:d[aeo]s?\s+)?)?"
+_TAIL = r"(?:\s+(?:agora|atual|atualmente|por\s+favor))?\s*[?.!]*\s*$"
+SYSTEM_QUERIES: Dict[str, "re.Pattern"] = {
+    "cpu_info": re.compile(
+        _ASK + _USAGE + r"(?:cpu|processador)" + _ON_MACHINE
+        + r"(?:\s+(?:esta\s+)?(?:em\s+uso|usad[ao]))?" + _TAIL),
+    "memory_info": re.compile(
+        _ASK + _USAGE + r"(?:memoria(?:\s+ram)?|ram)" + _ON_MACHINE
+        + r"(?:\s+(?:esta\s+)?(?:sendo\s+)?(?:usada|livre|em\s+uso|disponivel|sobrando))?" + _TAIL),
+    "disk_info": re.compile(
+        _ASK + r"(?:(?:uso|espaco(?:\s+livre)?|ocupacao|capacidade)\s+(?:d[aeo]s?\s+|n[oa]s?\s+)?)?"
+        r"(?:disco|discos|armazenamento|hd|ssd)" + _ON_MACHINE
+        + r"(?:\s+(?:esta\s+)?(?:livre|cheio|usado|disponivel))?" + _TAIL),
+    "battery_info": re.compile(
+        _ASK + r"(?:(?:carga|nivel|status|estado)\s+(?:d[aeo]\s+)?)?bateria" + _ON_MACHINE + _TAIL),
+    "temperature_info": re.compile(
+        _ASK + r"(?:temperatura|temp)\s+(?:d[aeo]\s+|n[oa]\s+)?(?:meu\s+|minha\s+)?(?:cpu|processador|gpu|"
+        + _MACHINE + r")" + _TAIL),
+    "system_status": re.compile(
+        _ASK + r"(?:(?:status|estado|resumo|diagnostico|situacao)\s+(?:d[aeo]\s+)?)?" + _MACHINE + _TAIL),
+}
+
+_RELATIVE_RE = re.compile(r"\b(?:daqui\s+a|em)\s+(\d+)\s*(minutos?|min|horas?|h)\b", re.IGNORECASE)
+_CLOCK_RE = re.compile(
+    r"\b(?:(amanh[ãa]|hoje)\s+)?(?:[àa]s?\s+)(\d{1,2})(?:(?:h|:)(\d{2})?)?\s*(?:h(?:oras?)?)?(?!\w)"
+    r"(?:\s+(?:de\s+)?(amanh[ãa]|hoje))?",
+    re.IGNORECASE)
+
+def parse_when(text: str, now: datetime) -> Tuple[Optional[datetime], str]:
+    """
+    Extrai o horário de um lembrete ("em 10 minutos", "amanhã às 9h", "às 15:30")
+    
+    Returns:
+        (horário ou None, texto sem a expressão de horário)
+    """
+    match = _RELATIVE_RE.search(text)
+    if match:
+        amount = int(match.group(1))
+        unit = match.group(2).lower()
+        delta = timedelta(hours=amount) if unit.startswith("h") else timedelta(minutes=amount)
+        return now + delta, (text[:match.start()] + text[match.end():]).strip(" ,.")
+    
+    match = _CLOCK_RE.search(text)
+    if match:
+        hour, minute = int(match.group(2)), int(match.group(3) or 0)
+        if hour > 23 or minute > 59:
+            return None, text
+        day = (match.group(1) or match.group(4) or "").lower()
+        when = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if day.startswith("amanh") or (not day and when <= now):
+            when += timedelta(days=1)
+        return when, (text[:match.start()] + text[match.end():]).strip(" ,.")
+    
+    return None, text
+
+class FastPathExecutor:
+    """
+    Executa intenções de sistema e de plugins sem gerar texto com o LLM
+    
+    Intenções com pontuação a partir de `min_confidence` são respondidas
+    com dados do SystemMonitor (CPU, memória, disco, bateria, temperatura)
+    ou executadas no PluginManager (nota, lembrete, tarefa), com uma
+    resposta pronta no tom da personalidade. Os plugins só são acionados
+    quando a mensagem tem forma de comando (PLUGIN_COMMANDS) e as
+    intenções de sistema (do classificador ou do roteador semântico) só
+    quando a mensagem é a própria consulta sobre a máquina
+    (SYSTEM_QUERIES): "qual a
+    temperatura em São Paulo?" ou "como melhorar o desempenho do meu
+    código?" seguem para o LLM. O que não é reconhecido volta como None.
+    """
+    
+    SYSTEM_ACTIONS = ("cpu_info", "memory_info", "disk_info", "battery_info",
+                      "temperature_info", "system_status")
+    
+    def __init__(self, plugins: PluginManager, monitor: Optional[SystemMonitor] = None,
+                 min_confidence: float = 0.8):
+        """
+        Args:
+            plugins: Gerenciador dos plugins de notas, lembretes e tarefas
+            monitor: Fonte dos dados do sistema (padrão: novo SystemMonitor)
+            min_confidence: Pontuação mínima da intenção para responder direto
+        """
+        self.plugins = plugins
+        self.monitor = monitor or SystemMonitor()
+        self.min_confidence = min_confidence
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()  # plugins gravam em JSON sem trava própria
+        self._handled: Dict[str, int] = {}
+        self._durations: List[float] = []
+        
+        # A primeira leitura sem intervalo da CPU não tem referência: descarta
+        self.monitor.get_cpu_info(interval=None)
+    
+    def execute(self, match: IntentMatch, message: str, context: Optional[Dict] = None,
+                personality: str = "assistente") -> Optional[str]:
+        """
+        Responde a intenção sem o LLM
+        
+        Args:
+            match: Intenção de maior pontuação da mensagem
+            message: Mensagem original (conteúdo de notas, lembretes e tarefas)
+            context: Dados do sistema já coletados por quem chamou (cpu_percent, memory_percent)
+            personality: Personalidade da sessão (tom da resposta)
+        
+        Returns:
+            Resposta pronta, ou None se a mensagem deve ir para o LLM
+        """
+        if match.score < self.min_confidence:
+            return None
+        
+        started = time.perf_counter()
+        if match.action in self.SYSTEM_ACTIONS:
+            if not self.is_system_query(match, message):
+                return None
+            key, values = self._system(match.action, context or {})
+        elif match.action in PLUGIN_COMMANDS:
+            key, values = self._plugin(match, message)
+        else:
+            return None
+        if key is None:
+            return None
+        
+        response = self._render(personality, key, values)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._handled[match.action] = self._handled.get(match.action, 0) + 1
+            self._durations.append(elapsed)
+            del self._durations[:-100]
+        self.logger.info(f"⚡ Caminho rápido: {match.action} em {elapsed * 1000:.1f} ms")
+        return response
+    
+    @staticmethod
+    def is_system_query(match: IntentMatch, message: str) -> bool:
+        """
+        Indica se a mensagem é uma consulta direta sobre a máquina
+        
+        Vale também para o roteador semântico: a similaridade com os
+        exemplos não separa "temperatura da CPU" de "temperatura em São Paulo".
+        """
+        return SYSTEM_QUERIES[match.action].match(IntentClassifier.normalize(message)) is not None
+    
+    def _system(self, action: str, context: Dict) -> Tuple[Optional[str], Dict]:
+        """Dados do sistema para a resposta (leituras rápidas, sem esperar o intervalo da CPU)"""
+        values: Dict = {}
+        
+        if action in ("cpu_info", "system_status"):
+            cpu = self.monitor.get_cpu_info(interval=None)
+            values['cpu'] = float(context.get('cpu_percent', cpu['percent']))
+            values['cpu_count'] = cpu['count']
+        
+        if action in ("memory_info", "system_status"):
+            memory = self.monitor.get_memory_info()
+            values['memory'] = float(context.get('memory_percent', memory['percent']))
+            values['memory_used'], values['memory_total'] = memory['used'], memory['total']
+        
+        if action in ("disk_info", "system_status"):
+            disk = self.monitor.get_disk_info()
+            values.update(disk=disk['percent'], disk_used=disk['used'],
+                          disk_total=disk['total'], disk_free=disk['free'])
+        
+        if action == "battery_info":
+            battery = self.monitor.get_battery_info()
+            if not battery:
+                return "battery_missing", values
+            values['battery'] = battery['percent']
+            values['plugged'] = "carregando" if battery['plugged'] else "na bateria"
+        
+        if action == "temperature_info":
+            temperature = self.monitor.get_temperature_info()
+            if not temperature:
+                return "temperature_missing", values
+            values['temperature'] = temperature['cpu_temp']
+            values['status'] = "alta" if temperature['cpu_temp'] > 80 else "normal"
+        
+        if action == "system_status":
+            busy = values['cpu'] >= 70 or values['memory'] >= 70
+            values['status'] = "com alta utilização" if busy else "normal"
+        elif action in ("cpu_info", "memory_info"):
+            percent = values['cpu'] if action == "cpu_info" else values['memory']
+            values['status'] = "alto" if percent > 80 else "normal"
+        
+        return action, values
+    
+    def _plugin(self, match: IntentMatch, message: str) -> Tuple[Optional[str], Dict]:
+        """Executa a ação do plugin com o conteúdo extraído do comando"""
+        command = PLUGIN_COMMANDS[match.action].match(message)
+        if not command:
+            return None, {}
+        content = command.group("content").strip(" \t\n.,;:!")
+        if not content:
+            return None, {}
+        
+        plugin = self.plugins.get_plugin(match.plugin)
+        if plugin is None:
+            return None, {}
+        
+        with self._lock:
+            if match.action == "add_note":
+                saved = plugin.add_note(content)
+            elif match.action == "add_task":
+                saved = plugin.add_task(content)
+            else:
+                when, content = parse_when(content, datetime.now())
+                content = re.sub(r"^(?:de|que|para)\s+", "", content, flags=re.IGNORECASE)
+                if when is None:
+                    return "add_reminder_when", {'content': content}
+                saved = plugin.add_reminder(content, when.isoformat())
+                return ("add_reminder" if saved else "plugin_failed",
+                        {'content': content, 'when': when.strftime("%d/%m às %H:%M")})
+        
+        return (match.action if saved else "plugin_failed"), {'content': content}
+    
+    @staticmethod
+    def _render(personality: str, key: str, values: Dict) -> str:
+        template = RESPONSES.get(personality, {}).get(key) or RESPONSES["assistente"][key]
+        return template.format(**values)
+    
+    def stats(self) -> Dict:
+        """Respostas dadas sem o LLM, por intenção"""
+        with self._lock:
+            durations = self._durations
+            return {
+                'handled': sum(self._handled.values()),
+                'by_action': dict(self._handled),
+                'avg_ms': round(sum(durations) / len(durations) * 1000, 2) if durations else 0.0
+            }
@@ -0,0 +1,160 @@
+"""
+Requisições com hedge do JARVIS 3.0
+Uma segunda requisição é disparada quando o backend principal demora demais
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Optional
+
+class HedgePolicy:
+    """
+    Limiar adaptativo para o hedge e métricas de uso
+    
+    O limiar é o percentil `percentile` da latência até o primeiro trecho
+    observada no backend principal (mínimo `min_delay`). Até haver
+    `min_samples` medições, vale `default_delay`. Só entram medições do
+    principal: o tempo dele quando vence, ou o instante do hedge quando
+    perde (ainda não tinha respondido, é um limite inferior).
+    """
+    
+    def __init__(self, percentile: float = 0.95, min_samples: int = 20,
+                 default_delay: float = 3.0, min_delay: float = 0.5, max_samples: int = 200):
+        """
+        Args:
+            percentile: Percentil da latência usado como limiar
+            min_samples: Medições necessárias para usar o percentil
+            default_delay: Limiar em segundos enquanto faltam medições
+            min_delay: Limiar mínimo em segundos
+            max_samples: Medições recentes consideradas
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=max_samples)
+        self._stats = {'requests': 0, 'hedged': 0, 'primary_wins': 0, 'secondary_wins': 0}
+    
+    def _percentile_value(self) -> Optional[float]:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+    
+    def delay(self) -> float:
+        """Tempo de espera pelo primeiro trecho antes de disparar o hedge"""
+        with self._lock:
+            value = self._percentile_value()
+        return max(self.min_delay, value if value is not None else self.default_delay)
+    
+    def record(self, outcome: Dict):
+        """Registra o resultado de uma corrida (ver hedged_stream)"""
+        with self._lock:
+            self._stats['requests'] += 1
+            if outcome.get('hedged'):
+                self._stats['hedged'] += 1
+            if outcome.get('winner') == 'secondary':
+                self._stats['secondary_wins'] += 1
+            elif outcome.get('winner') == 'primary':
+                self._stats['primary_wins'] += 1
+            if outcome.get('winner') == 'primary':
+                sample = outcome.get('first_chunk')
+            else:
+                sample = outcome.get('hedged_at')
+            if sample is not None:
+                self._latencies.append(sample)
+    
+    def stats(self) -> Dict:
+        """Taxa de hedge, vitórias do secundário e limiar atual"""
+        with self._lock:
+            requests = self._stats['requests']
+            hedged = self._stats['hedged']
+            value = self._percentile_value()
+            return {
+                **self._stats,
+                'hedge_rate': round(hedged / requests, 3) if requests else 0.0,
+                'secondary_win_rate': round(self._stats['secondary_wins'] / hedged, 3) if hedged else 0.0,
+                'first_chunk_percentile_ms': round(value * 1000, 1) if value is not None else None,
+                'threshold_ms': round(max(self.min_delay, value if value is not None else self.default_delay) * 1000, 1)
+            }
+
+async def _first_chunk(stream: AsyncIterator[str]) -> Optional[str]:
+    """Primeiro trecho do stream (None se terminar vazio), sem fechá-lo"""
+    async for chunk in stream:
+        return chunk
+    return None
+
+async def hedged_stream(primary: Callable[[], AsyncIterator[str]],
+                        secondary: Callable[[], Optional[AsyncIterator[str]]],
+                        delay: float, outcome: Dict) -> AsyncIterator[str]:
+    """
+    Repassa o stream de quem entregar o primeiro trecho antes
+    
+    O principal começa sozinho; se não entregar nada em `delay` segundos,
+    secondary() é chamado (pode devolver None se não houver alternativa) e
+    os dois correm. O primeiro a produzir um trecho vence e o outro é
+    cancelado. Se um falhar, o outro continua; se os dois falharem, a
+    exceção do principal é propagada.
+    
+    Args:
+        primary: Cria o stream do backend principal
+        secondary: Cria o stream alternativo, ou None
+        delay: Espera pelo primeiro trecho antes do hedge
+        outcome: Preenchido com hedged, winner ('primary'/'secondary'),
+                 first_chunk (segundos até o primeiro trecho do vencedor) e
+                 hedged_at (segundos até o disparo do hedge)
+    """
+    started = time.monotonic()
+    outcome.update(hedged=False, winner=None, first_chunk=None, hedged_at=None)
+    
+    streams = {'primary': primary()}
+    tasks = {'primary': asyncio.ensure_future(_first_chunk(streams['primary']))}
+    errors: Dict[str, BaseException] = {}
+    winner = None
+    first = None
+    
+    try:
+        done, _ = await asyncio.wait(list(tasks.values()), timeout=delay)
+        if not done:
+            stream = secondary()
+            if stream is not None:
+                outcome.update(hedged=True, hedged_at=time.monotonic() - started)
+                streams['secondary'] = stream
+                tasks['secondary'] = asyncio.ensure_future(_first_chunk(stream))
+        
+        pending = set(tasks.values())
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for name in ('primary', 'secondary'):
+                task = tasks.get(name)
+                if task is None or task not in done or winner is not None:
+                    continue
+                if task.exception() is None:
+                    winner, first = name, task.result()
+                    outcome['winner'] = winner
+                    outcome['first_chunk'] = time.monotonic() - started
+                else:
+                    errors[name] = task.exception()
+    finally:
+        # Cancela o perdedor (ou todos, se quem consome desistiu)
+        losers = [name for name in tasks if name != winner]
+        for name in losers:
+            tasks[name].cancel()
+        await asyncio.gather(*(tasks[name] for name in losers), return_exceptions=True)
+        for name in losers:
+            await streams[name].aclose()
+    
+    if winner is None:
+        raise errors.get('primary') or errors['secondary']
+    
+    try:
+        if first is not None:
+            yield first
+            async for chunk in streams[winner]:
+                yield chunk
+    finally:
+        await streams[winner].aclose()
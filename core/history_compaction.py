@@ -0,0 +1,116 @@
+"""
+Compactação de histórico do JARVIS 3.0
+Resume em segundo plano as trocas antigas de cada sessão
+"""
+
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.runtime import EngineRuntime
+from core.sessions import ChatSession
+
+class HistoryCompactor:
+    """
+    Substitui as mensagens antigas de uma sessão por um resumo
+    
+    Quando o histórico chega a `trigger_messages`, as mensagens antes das
+    `keep_recent` mais novas são enviadas, com o resumo anterior, para
+    `summarize` - fora do caminho da requisição, no loop do runtime
+    assíncrono (o do motor de IA, ou um próprio). Ao terminar, o resumo é gravado na sessão e
+    as mensagens resumidas saem do histórico. Se o histórico mudou no
+    meio (limpo, por exemplo), o resultado é descartado. No máximo uma
+    compactação por sessão fica em andamento.
+    """
+    
+    def __init__(self, summarize: Callable[[str, List[Dict]], Awaitable[Optional[str]]],
+                 trigger_messages: int = 12, keep_recent: int = 6, max_pending: int = 64,
+                 on_compacted: Optional[Callable[[ChatSession, List[Dict]], None]] = None,
+                 runtime: Optional[EngineRuntime] = None):
+        """
+        Args:
+            summarize: Recebe (resumo anterior, mensagens) e devolve o novo resumo (None = desistir)
+            trigger_messages: Tamanho do histórico que dispara a compactação
+            keep_recent: Mensagens mais novas mantidas sem resumo
+            max_pending: Compactações na fila antes de ignorar novos pedidos
+            on_compacted: Recebe (sessão, mensagens) que saíram do histórico
+            runtime: Loop onde os resumos rodam (padrão: runtime próprio)
+        """
+        self.summarize = summarize
+        self.on_compacted = on_compacted
+        self.trigger_messages = trigger_messages
+        self.keep_recent = keep_recent
+        self.max_pending = max_pending
+        self.runtime = runtime or EngineRuntime("history-compaction")
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._pending: Dict[int, ChatSession] = {}  # id(sessão) -> sessão
+        self._durations: List[float] = []
+        self._stats = {'scheduled': 0, 'completed': 0, 'failed': 0, 'discarded': 0,
+                       'skipped': 0, 'messages_compacted': 0}
+    
+    def maybe_schedule(self, session: ChatSession) -> bool:
+        """Agenda a compactação da sessão se o histórico passou do limite"""
+        history = session.history
+        count = len(history) - self.keep_recent
+        if len(history) < self.trigger_messages or count <= 0:
+            return False
+        
+        with self._lock:
+            if id(session) in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._stats['skipped'] += 1
+                return False
+            self._pending[id(session)] = session
+            self._stats['scheduled'] += 1
+        
+        old_messages = [dict(msg) for msg in history[:count]]
+        self.runtime.submit(self._compact(session, history, old_messages, session.summary))
+        return True
+    
+    async def _compact(self, session: ChatSession, history: List[Dict],
+                       old_messages: List[Dict], previous: str):
+        started = time.monotonic()
+        try:
+            summary = await self.summarize(previous, old_messages)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha resumindo histórico da sessão {session.session_id}: {e}")
+            summary = None
+        
+        count = len(old_messages)
+        with self._lock:
+            self._pending.pop(id(session), None)
+            
+            if not summary:
+                self._stats['failed'] += 1
+                return
+            
+            # O histórico pode ter sido limpo ou trocado enquanto o resumo era gerado
+            if session.history is not history or history[:count] != old_messages or session.summary != previous:
+                self._stats['discarded'] += 1
+                return
+            
+            session.summary = summary
+            del history[:count]
+            self._stats['completed'] += 1
+            self._stats['messages_compacted'] += count
+            self._durations.append(time.monotonic() - started)
+            del self._durations[:-100]
+        
+        self.logger.info(f"🗜️ {count} mensagens da sessão {session.session_id} resumidas "
+                         f"({len(summary)} caracteres)")
+        if self.on_compacted is not None:
+            self.on_compacted(session, old_messages)
+    
+    def stats(self) -> Dict:
+        """Compactações feitas, descartadas e em andamento"""
+        with self._lock:
+            durations = self._durations
+            return {
+                **self._stats,
+                'pending': len(self._pending),
+                'avg_ms': round(sum(durations) / len(durations) * 1000, 1) if durations else 0.0
+            }
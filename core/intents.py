@@ -0,0 +1,273 @@
+"""
+Classificação de intenções do JARVIS 3.0
+Tabela declarativa compilada em uma única expressão regular em forma de trie
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Intenções reconhecidas. Palavras-chave casam palavras inteiras, sem
+# diferenciar maiúsculas nem acentos; podem ter várias palavras ("uso de
+# memoria") e terminar com "*" para casar prefixos ("lembr*"). A frase mais
+# longa vence ("temperatura da cpu" não conta como "cpu"), e em caso de
+# empate na pontuação vale a ordem da tabela. Palavras comuns demais fora
+# de comandos ("sistema", "memoria", "energia", "desempenho") só entram
+# como parte de frases. Os exemplos são paráfrases dos pedidos, usadas
+# pelo roteador semântico (core/semantic_router.py).
+INTENT_TABLE: List[Dict] = [
+    {"type": "system_info", "action": "cpu_info", "confidence": 0.8,
+     "keywords": ["cpu", "processador", "uso de cpu", "uso da cpu", "uso do processador"],
+     "examples": ["como está o processador",
+                  "o computador está lento, quanto da CPU está em uso",
+                  "qual a carga do processador agora"]},
+    {"type": "system_info", "action": "memory_info", "confidence": 0.8,
+     "keywords": ["ram", "memoria ram", "uso de memoria", "uso da memoria", "memoria livre",
+                  "memoria em uso", "memoria do sistema", "memoria do computador"],
+     "examples": ["quanta memória está sendo usada",
+                  "ainda tem memória livre",
+                  "quanto de RAM sobrou"]},
+    {"type": "plugin", "action": "add_note", "plugin": "notes", "confidence": 0.9,
+     "keywords": ["anotar", "anote", "nota", "notas", "anotacao", "anotacoes"],
+     "examples": ["guarde esta informação para mim",
+                  "escreva isso nas minhas notas",
+                  "registre que a senha do wifi mudou"]},
+    {"type": "plugin", "action": "add_reminder", "plugin": "reminders", "confidence": 0.9,
+     "keywords": ["lembr*", "alarme", "alarmes"],
+     "examples": ["me avise amanhã às nove",
+                  "não me deixe esquecer da reunião",
+                  "coloque um alarme para as sete"]},
+    {"type": "plugin", "action": "add_task", "plugin": "tasks", "confidence": 0.8,
+     "keywords": ["tarefa", "tarefas", "task", "tasks", "lista de tarefas", "a fazer"],
+     "examples": ["coloque na minha lista de pendências",
+                  "preciso terminar o relatório até sexta",
+                  "adicione comprar pão à lista"]},
+    {"type": "system_info", "action": "disk_info", "confidence": 0.8,
+     "keywords": ["disco", "discos", "armazenamento", "hd", "ssd"],
+     "examples": ["quanto espaço livre tem no computador",
+                  "o armazenamento está cheio",
+                  "quanto sobra no disco"]},
+    {"type": "system_info", "action": "battery_info", "confidence": 0.8,
+     "keywords": ["bateria", "carga da bateria", "nivel da bateria"],
+     "examples": ["quanto tempo de carga ainda tenho",
+                  "o notebook está carregando",
+                  "qual o nível da bateria"]},
+    {"type": "system_info", "action": "temperature_info", "confidence": 0.8,
+     "keywords": ["temperatura", "temp", "temperatura da cpu", "temperatura do cpu",
+                  "temperatura do processador", "temp da cpu", "temp do processador"],
+     "examples": ["o computador está esquentando",
+                  "a máquina está quente demais",
+                  "qual a temperatura do processador"]},
+    {"type": "system_info", "action": "system_status", "confidence": 0.8,
+     "keywords": ["status do sistema", "estado do sistema", "resumo do sistema", "status do computador",
+                  "como esta o sistema", "como esta o computador"],
+     "examples": ["como está o computador",
+                  "está tudo bem com a máquina",
+                  "me dê um resumo do sistema"]},
+    {"type": "app_control", "action": "open_app", "confidence": 0.7,
+     "keywords": ["abrir", "abra", "executar", "execute", "rodar", "rode"],
+     "examples": ["inicie o navegador",
+                  "quero usar o editor de texto",
+                  "abra a calculadora"]},
+]
+
+# Cada palavra-chave distinta a mais soma isto à pontuação
+KEYWORD_BONUS = 0.05
+MAX_SCORE = 0.99
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def _build_accent_table() -> Dict[int, str]:
+    """Letras latinas acentuadas -> letra base (á -> a, ç -> c)"""
+    table = {}
+    for code in range(0xC0, 0x250):
+        char = chr(code)
+        base = "".join(ch for ch in unicodedata.normalize("NFKD", char) if not unicodedata.combining(ch))
+        if base and base != char:
+            table[code] = base
+    return table
+
+_ACCENTS = _build_accent_table()
+
+# Letra base -> classe de regex com as variantes acentuadas ("a" -> "[aáàâãä...]")
+_VARIANTS: Dict[str, str] = {}
+for _code, _base in _ACCENTS.items():
+    if len(_base) == 1 and chr(_code) == chr(_code).lower():
+        _VARIANTS[_base] = _VARIANTS.get(_base, _base) + chr(_code)
+
+@dataclass
+class IntentMatch:
+    """Intenção encontrada no texto"""
+    type: str
+    action: str
+    score: float
+    plugin: Optional[str] = None
+    keywords: List[str] = field(default_factory=list)
+    
+    def to_command(self) -> Dict:
+        """Formato devolvido por AIEngine.analyze_command"""
+        command = {'type': self.type, 'action': self.action, 'confidence': self.score}
+        if self.plugin:
+            command['plugin'] = self.plugin
+        return command
+
+class IntentClassifier:
+    """
+    Classificador de intenções por palavras-chave
+    
+    As palavras-chave da tabela são montadas uma vez numa trie de
+    caracteres e convertidas numa única expressão regular com os prefixos
+    comuns fatorados ("t(?:emp(?:eratura)?|arefa...)"), delimitada por
+    fronteiras de palavra e tolerante a acentos. Cada texto é só posto em
+    minúsculas e percorrido uma vez pelo motor de regex; apenas os trechos
+    encontrados são normalizados para achar a intenção.
+    Casa palavras inteiras ("temp" não casa dentro de "tempo") e frases
+    de várias palavras, preferindo a mais longa ("uso de memoria").
+    """
+    
+    LOOKUP_CACHE_SIZE = 4096
+    
+    def __init__(self, table: Optional[List[Dict]] = None):
+        """
+        Args:
+            table: Tabela de intenções (padrão: INTENT_TABLE)
+        """
+        self.table = table if table is not None else INTENT_TABLE
+        self._exact: Dict[str, List[Tuple[int, str]]] = {}  # frase -> (índice na tabela, palavra-chave)
+        self._prefixes: List[Tuple[str, int, str]] = []  # (prefixo, índice, palavra-chave)
+        self._found: Dict[str, List[Tuple[int, str]]] = {}  # trecho encontrado -> intenções
+        self._pattern = self._compile()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Minúsculas e sem acentos"""
+        text = text.lower()
+        return text if text.isascii() else text.translate(_ACCENTS)
+    
+    def _compile(self) -> "re.Pattern":
+        exact_trie: Dict = {}
+        prefix_trie: Dict = {}
+        for index, intent in enumerate(self.table):
+            for keyword in intent["keywords"]:
+                phrase = " ".join(_WORD_RE.findall(self.normalize(keyword)))
+                if keyword.endswith("*"):
+                    self._prefixes.append((phrase, index, keyword))
+                    self._insert(prefix_trie, phrase)
+                else:
+                    self._exact.setdefault(phrase, []).append((index, keyword))
+                    self._insert(exact_trie, phrase)
+        
+        branches = []
+        if prefix_trie:
+            branches.append(self._trie_regex(prefix_trie) + r"\w*")
+        if exact_trie:
+            branches.append(self._trie_regex(exact_trie))
+        if not branches:
+            return re.compile(r"(?!)")
+        # Prefixos primeiro: "lembr*" vence "lembrete" se os dois existirem. As
+        # fronteiras de palavra são lookarounds, mais baratos que \b no sre
+        return re.compile(r"(?<!\w)(?:" + "|".join(f"(?:{b})" for b in branches) + r")(?!\w)")
+    
+    @staticmethod
+    def _insert(trie: Dict, phrase: str):
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    @classmethod
+    def _trie_regex(cls, node: Dict) -> str:
+        """Converte a trie em regex; filhos mais longos são tentados antes do fim da palavra"""
+        alternatives = []
+        for char, child in sorted((k, v) for k, v in node.items() if k):
+            if char == " ":
+                atom = r"[^\w\x00]+"  # \0 separa os textos em classify_batch
+            elif char in _VARIANTS:
+                atom = "[" + re.escape(_VARIANTS[char]) + "]"
+            else:
+                atom = re.escape(char)
+            alternatives.append(atom + cls._trie_regex(child))
+        
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if "" in node else body
+    
+    def _lookup(self, found: str) -> List[Tuple[int, str]]:
+        """Intenções de um trecho encontrado pela regex"""
+        hits = self._found.get(found)
+        if hits is not None:
+            return hits
+        
+        phrase = " ".join(_WORD_RE.findall(self.normalize(found)))
+        hits = self._exact.get(phrase)
+        if hits is None:
+            hits = [(index, keyword) for prefix, index, keyword in self._prefixes if phrase.startswith(prefix)]
+        
+        # Os trechos se repetem muito ("cpu", "memória"); o limite só cresce com prefixos
+        if len(self._found) >= self.LOOKUP_CACHE_SIZE:
+            self._found.clear()
+        self._found[found] = hits
+        return hits
+    
+    def _matches(self, hits: Dict[int, set]) -> List[IntentMatch]:
+        """Pontua as intenções encontradas, da maior para a menor"""
+        if not hits:
+            return []
+        
+        matches = []
+        for index, keywords in hits.items():
+            intent = self.table[index]
+            score = min(MAX_SCORE, intent["confidence"] + KEYWORD_BONUS * (len(keywords) - 1))
+            matches.append((-score, index, IntentMatch(
+                intent["type"], intent["action"], round(score, 3), intent.get("plugin"), sorted(keywords)
+            )))
+        if len(matches) > 1:
+            matches.sort(key=lambda item: item[:2])
+        return [match for _, _, match in matches]
+    
+    def classify(self, text: str) -> List[IntentMatch]:
+        """Todas as intenções do texto, da maior para a menor pontuação"""
+        hits: Dict[int, set] = {}
+        for found in self._pattern.findall(text.lower()):
+            for index, keyword in self._lookup(found):
+                hits.setdefault(index, set()).add(keyword)
+        return self._matches(hits)
+    
+    def classify_batch(self, texts: Iterable[str]) -> List[List[IntentMatch]]:
+        """
+        Classifica vários textos de uma vez
+        
+        Os textos são unidos e percorridos numa única passada da regex; cada
+        trecho encontrado volta ao seu texto pela posição. O separador
+        (\\0) não é aceito entre as palavras de uma frase, então nenhuma
+        palavra-chave atravessa dois textos.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        
+        # Fim de cada texto no texto unido; os trechos saem em ordem de posição
+        ends = []
+        offset = 0
+        for text in texts:
+            offset += len(text) + 1
+            ends.append(offset)
+        
+        results: List[List[IntentMatch]] = [[] for _ in texts]
+        current, hits = 0, {}
+        for found in self._pattern.finditer("\0".join(texts).lower()):
+            if found.start() >= ends[current]:
+                results[current] = self._matches(hits)
+                current, hits = bisect_right(ends, found.start()), {}
+            for index, keyword in self._lookup(found.group()):
+                hits.setdefault(index, set()).add(keyword)
+        results[current] = self._matches(hits)
+        return results
+    
+    def best(self, text: str) -> Optional[IntentMatch]:
+        """Intenção de maior pontuação, ou None"""
+        matches = self.classify(text)
+        return matches[0] if matches else None
@@ -0,0 +1,180 @@
+"""
+Amostragem de métricas do JARVIS 3.0
+Uma leitura do sistema por intervalo, repartida entre os clientes inscritos
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+class MetricsSampler:
+    """
+    Amostrador do monitoramento compartilhado pelos clientes inscritos
+    
+    Cada cliente se inscreve com o intervalo que quer receber (limitado
+    a [min_interval, max_interval], em segundos inteiros). Enquanto houver
+    inscritos, uma única tarefa de fundo lê o sistema no intervalo do
+    cliente mais rápido e publica a mesma leitura para cada grupo de
+    intervalo quando ele vence: clientes de 10 s recebem uma a cada ~10 s
+    das leituras feitas a cada 3 s. N painéis custam uma leitura por
+    intervalo, não N. A tarefa nasce com o primeiro inscrito e termina
+    quando o último sai.
+    """
+    
+    def __init__(self, sample: Callable[[], Dict], publish: Callable[[int, Dict], None],
+                 start_background_task: Callable, sleep: Callable[[float], None],
+                 min_interval: int = 3, max_interval: int = 60):
+        """
+        Args:
+            sample: Lê o sistema (chamada uma vez por intervalo mais rápido)
+            publish: Entrega a leitura ao grupo de um intervalo (intervalo, dados)
+            start_background_task: Inicia a tarefa de fundo (SocketIO.start_background_task)
+            sleep: Espera compatível com o servidor (SocketIO.sleep)
+            min_interval: Intervalo mais rápido aceito (segundos)
+            max_interval: Intervalo mais lento aceito (segundos)
+        """
+        self.sample = sample
+        self.publish = publish
+        self.start_background_task = start_background_task
+        self.sleep = sleep
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, int] = {}  # cliente -> intervalo
+        self._next_due: Dict[int, float] = {}  # intervalo -> próxima entrega
+        self._running = False
+        self._generation = 0
+        self._stats = {'samples': 0, 'published': 0, 'errors': 0}
+    
+    def normalize(self, interval: Optional[float] = None) -> int:
+        """Intervalo aceito mais próximo do pedido (None = o mais rápido)"""
+        try:
+            interval = round(float(interval)) if interval else self.min_interval
+        except (TypeError, ValueError):
+            interval = self.min_interval
+        return min(max(interval, self.min_interval), self.max_interval)
+    
+    def subscription(self, subscriber: str) -> Optional[int]:
+        """Intervalo do cliente (None se não estiver inscrito)"""
+        with self._lock:
+            return self._subscribers.get(subscriber)
+    
+    def subscribe(self, subscriber: str, interval: Optional[float] = None) -> int:
+        """
+        Inscreve o cliente (ou troca o intervalo dele) e inicia a amostragem se preciso
+        
+        Returns:
+            Intervalo efetivo em segundos
+        """
+        interval = self.normalize(interval)
+        with self._lock:
+            self._subscribers[subscriber] = interval
+            self._next_due.setdefault(interval, time.monotonic())
+            self._drop_empty_groups()
+            start = not self._running
+            if start:
+                self._running = True
+                self._generation += 1
+                generation = self._generation
+        
+        if start:
+            self.start_background_task(self._run, generation)
+            self.logger.info("Monitoramento de sistema iniciado")
+        return interval
+    
+    def unsubscribe(self, subscriber: str) -> Optional[int]:
+        """
+        Remove o cliente; a amostragem para quando não sobra ninguém
+        
+        Returns:
+            Intervalo que o cliente tinha (None se não estava inscrito)
+        """
+        with self._lock:
+            interval = self._subscribers.pop(subscriber, None)
+            self._drop_empty_groups()
+        return interval
+    
+    def stop(self):
+        """Remove todos os inscritos (a tarefa sai ao acordar)"""
+        with self._lock:
+            self._subscribers.clear()
+            self._next_due.clear()
+    
+    def _drop_empty_groups(self):
+        intervals = set(self._subscribers.values())
+        for interval in list(self._next_due):
+            if interval not in intervals:
+                del self._next_due[interval]
+    
+    def _tick(self, generation: int) -> Optional[int]:
+        """Intervalo mais rápido pedido, ou None se a tarefa deve terminar"""
+        with self._lock:
+            if generation != self._generation:
+                return None
+            if not self._next_due:
+                self._running = False
+                self.logger.info("Monitoramento de sistema parado")
+                return None
+            return min(self._next_due)
+    
+    def _run(self, generation: int):
+        """Lê no intervalo mais rápido e entrega a cada grupo que venceu"""
+        while True:
+            tick = self._tick(generation)
+            if tick is None:
+                return
+            
+            started = time.monotonic()
+            try:
+                data = self.sample()
+            except Exception as e:
+                self.logger.error(f"Erro no loop de monitoramento: {e}")
+                with self._lock:
+                    self._stats['errors'] += 1
+                self.sleep(5)  # Aguarda mais tempo em caso de erro
+                continue
+            
+            # Tolerância de meio intervalo: grupo de 10 s com leituras a cada 3 s recebe a de 9 s
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                self._stats['samples'] += 1
+                for interval, next_due in self._next_due.items():
+                    if now >= next_due - tick / 2:
+                        due.append(interval)
+                        next_due += interval
+                        self._next_due[interval] = next_due if next_due > now else now + interval
+            
+            for interval in due:
+                try:
+                    self.publish(interval, data)
+                    with self._lock:
+                        self._stats['published'] += 1
+                except Exception as e:
+                    self.logger.error(f"Erro publicando monitoramento: {e}")
+            
+            # Dorme até a próxima leitura em fatias: um inscrito mais rápido ou a saída do último é notado logo
+            while True:
+                tick = self._tick(generation)
+                if tick is None:
+                    return
+                remaining = started + tick - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.sleep(min(remaining, self.min_interval))
+    
+    def stats(self) -> Dict:
+        """Inscritos por intervalo e leituras feitas"""
+        with self._lock:
+            groups: Dict[int, int] = {}
+            for interval in self._subscribers.values():
+                groups[interval] = groups.get(interval, 0) + 1
+            return {
+                'running': self._running,
+                'subscribers': len(self._subscribers),
+                'intervals': dict(sorted(groups.items())),
+                **self._stats
+            }
@@ -0,0 +1,255 @@
+"""
+Residência de modelos do JARVIS 3.0
+Pré-carrega os modelos usados, mantém os quentes na memória e libera os frios
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from core.ollama_integration import OllamaBackend, OllamaLocalAI
+
+class ModelResidencyManager:
+    """
+    Mantém na memória do Ollama os modelos que o JARVIS usa
+    
+    Tudo roda em uma thread de fundo: primeiro a preparação (ex.: criar o
+    modelo personalizado), depois o pré-carregamento dos modelos fixados
+    (os das personalidades) em cada servidor que os tem instalados. A cada
+    `refresh_interval` segundos o /api/ps de cada servidor é conferido:
+    
+    - Modelos quentes (fixados ou usados há menos de `hot_seconds`) vão com
+      keep_alive longo em toda geração (ver keep_alive_for).
+    - Sob pressão de memória (mais de `max_resident` modelos ou mais de
+      `memory_budget_mb` ocupados em um servidor) os modelos são
+      descarregados com keep_alive=0: frios primeiro, depois os usados há mais tempo.
+    - Modelos fixados que saíram da memória são recarregados se couberem.
+    """
+    
+    def __init__(self, ollama: OllamaLocalAI, keep_alive: Any = "30m", hot_seconds: float = 900.0,
+                 max_resident: int = 3, memory_budget_mb: float = 0.0,
+                 refresh_interval: float = 60.0):
+        """
+        Args:
+            ollama: Cliente síncrono (registro de modelos e pool de servidores)
+            keep_alive: Tempo na memória dos modelos quentes ("30m", -1 = sempre)
+            hot_seconds: Tempo desde o último uso em que um modelo segue quente
+            max_resident: Modelos carregados por servidor antes de descarregar
+            memory_budget_mb: Memória máxima dos modelos por servidor (0 = sem limite)
+            refresh_interval: Segundos entre conferências do /api/ps
+        """
+        self.ollama = ollama
+        self.keep_alive = keep_alive
+        self.hot_seconds = hot_seconds
+        self.max_resident = max_resident
+        self.memory_budget_mb = memory_budget_mb
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        
+        # Pré-carregamento concluído (os modelos fixados já foram carregados)
+        self.ready = threading.Event()
+        
+        self._lock = threading.Lock()
+        self._pinned: List[str] = []
+        self._last_used: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}  # bytes por modelo, visto no /api/ps
+        self._requests: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load_ms: Dict[str, float] = {}
+        self._stats = {'loads': 0, 'load_failures': 0, 'reloads': 0, 'evictions': 0}
+    
+    def start(self, models: Iterable[str], setup: Optional[Callable[[], None]] = None):
+        """
+        Inicia a thread de residência (chamadas repetidas são ignoradas)
+        
+        Args:
+            models: Modelos a pré-carregar e fixar (nomes como nas personalidades)
+            setup: Executado antes do pré-carregamento
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(list(models), setup),
+            name="model-residency", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self):
+        """Encerra a thread de residência"""
+        self._stop.set()
+        self._requests.put(None)
+    
+    def touch(self, model: str):
+        """Registra o uso de um modelo (mantém ele quente)"""
+        with self._lock:
+            self._last_used[model] = time.monotonic()
+    
+    def prefetch(self, model: str):
+        """Carrega o modelo em segundo plano antes da primeira conversa (ex.: troca de personalidade)"""
+        self.touch(model)
+        if self._thread is not None and self._thread.is_alive():
+            self._requests.put(model)
+    
+    def is_hot(self, model: str, now: Optional[float] = None) -> bool:
+        """Modelo fixado ou usado recentemente"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if model in self._pinned:
+                return True
+            last_used = self._last_used.get(model)
+        return last_used is not None and now - last_used < self.hot_seconds
+    
+    def keep_alive_for(self, model: str) -> Optional[Any]:
+        """keep_alive a enviar nas gerações do modelo (None = padrão do servidor)"""
+        return self.keep_alive if self.is_hot(model) else None
+    
+    def _run(self, models: List[str], setup: Optional[Callable[[], None]]):
+        if setup is not None:
+            try:
+                setup()
+            except Exception as e:
+                self.logger.error(f"Erro na preparação dos modelos: {e}")
+        
+        pinned = []
+        for name in models:
+            resolved = self.ollama.registry.resolve(name)
+            if resolved is None:
+                self.logger.warning(f"⚠️ Modelo {name} não instalado, sem pré-carregamento")
+            elif resolved not in pinned:
+                pinned.append(resolved)
+        
+        with self._lock:
+            self._pinned = pinned
+        
+        for model in pinned:
+            self._load(model)
+        self.ready.set()
+        if pinned:
+            self.logger.info(f"🔥 Modelos pré-carregados: {', '.join(pinned)}")
+        
+        last_refresh = time.monotonic()
+        while not self._stop.is_set():
+            timeout = max(0.0, last_refresh + self.refresh_interval - time.monotonic())
+            try:
+                model = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                model = None
+            
+            if self._stop.is_set():
+                break
+            
+            if model:
+                resolved = self.ollama.registry.resolve(model)
+                if resolved is not None:
+                    self._load(resolved, only_missing=True)
+            
+            if time.monotonic() - last_refresh >= self.refresh_interval:
+                self._refresh()
+                last_refresh = time.monotonic()
+    
+    def _load(self, model: str, only_missing: bool = False,
+              backends: Optional[List[OllamaBackend]] = None):
+        """Carrega o modelo nos servidores que o têm instalado"""
+        now = time.monotonic()
+        if backends is None:
+            backends = [b for b in self.ollama.pool.backends
+                        if model in b.models and not b.is_ejected(now)]
+        
+        for backend in backends:
+            if only_missing and model in backend.resident:
+                continue
+            
+            started = time.monotonic()
+            if self.ollama.load_model(model, self.keep_alive, backend):
+                elapsed_ms = (time.monotonic() - started) * 1000
+                with self._lock:
+                    self._stats['loads'] += 1
+                    self._load_ms[model] = round(elapsed_ms, 1)
+                self.logger.info(f"🔥 {model} carregado em {backend.url} ({elapsed_ms:.0f} ms)")
+            else:
+                with self._lock:
+                    self._stats['load_failures'] += 1
+    
+    def _refresh(self):
+        """Confere a memória de cada servidor: descarrega sob pressão, recarrega os fixados"""
+        now = time.monotonic()
+        
+        for backend in self.ollama.pool.backends:
+            if backend.is_ejected(now):
+                continue
+            resident = self.ollama.resident_models(backend)
+            if resident is None:
+                continue
+            
+            with self._lock:
+                for entry in resident:
+                    if entry.get("size"):
+                        self._sizes[entry["name"]] = entry["size"]
+            
+            loaded = self._evict(backend, [entry["name"] for entry in resident], now)
+            
+            with self._lock:
+                pinned = list(self._pinned)
+            for model in pinned:
+                if model in loaded or model not in backend.models or not self._fits(loaded, model):
+                    continue
+                self._load(model, backends=[backend])
+                if model in backend.resident:
+                    loaded.append(model)
+                    with self._lock:
+                        self._stats['reloads'] += 1
+    
+    def _evict(self, backend: OllamaBackend, loaded: List[str], now: float) -> List[str]:
+        """Descarrega modelos até sair da pressão de memória. Retorna os que ficaram"""
+        with self._lock:
+            last_used = dict(self._last_used)
+        
+        # Ordem de descarte: frios primeiro, depois o uso mais antigo
+        # (um fixado que ninguém usou sai antes de um modelo em uso)
+        order = sorted(loaded, key=lambda m: (self.is_hot(m, now), last_used.get(m, 0.0)))
+        
+        while order and self._over_pressure(order):
+            victim = order[0]
+            if not self.ollama.load_model(victim, 0, backend):
+                break
+            order.pop(0)
+            with self._lock:
+                self._stats['evictions'] += 1
+            self.logger.info(f"🧊 {victim} descarregado de {backend.url} (pressão de memória)")
+        
+        return order
+    
+    def _memory_mb(self, models: List[str]) -> float:
+        with self._lock:
+            return sum(self._sizes.get(model, 0) for model in models) / (1024 * 1024)
+    
+    def _over_pressure(self, loaded: List[str]) -> bool:
+        if len(loaded) > self.max_resident:
+            return True
+        return bool(self.memory_budget_mb) and self._memory_mb(loaded) > self.memory_budget_mb
+    
+    def _fits(self, loaded: List[str], model: str) -> bool:
+        return not self._over_pressure(loaded + [model])
+    
+    def stats(self) -> Dict:
+        """Modelos fixados, quentes e carregados por servidor"""
+        now = time.monotonic()
+        with self._lock:
+            pinned = list(self._pinned)
+            used = list(self._last_used)
+            counters = dict(self._stats)
+            load_ms = dict(self._load_ms)
+        
+        return {
+            **counters,
+            'ready': self.ready.is_set(),
+            'keep_alive': self.keep_alive,
+            'pinned': pinned,
+            'hot': sorted(m for m in set(pinned) | set(used) if self.is_hot(m, now)),
+            'resident': {b.url: sorted(b.resident) for b in self.ollama.pool.backends},
+            'load_ms': load_ms
+        }
@@ -4,88 +4,510 @@ Integração com IA local usando Ollama Docker container
 """
 
 import requests
+import httpx
 import json
 import asyncio
-from typing import Dict, List, Optional, Any
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple
 import logging
 
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+DEFAULT_OLLAMA_MODEL = "llama3.2:1b"
+DEFAULT_NUM_CTX = 2048  # Contexto limitado para evitar timeout
+DEFAULT_NUM_PREDICT = 512  # Limita resposta para evitar timeout
+
+# Mensagens devolvidas no lugar da resposta quando o Ollama falha
+MSG_EMPTY_RESPONSE = "Desculpe, não consegui gerar uma resposta. Pode reformular sua pergunta?"
+MSG_HTTP_ERROR = "Desculpe, houve um problema na comunicação com a IA. Tente novamente."
+MSG_TIMEOUT = "A IA está demorando para responder. Tente uma pergunta mais simples."
+MSG_CONNECTION_ERROR = "Não consegui conectar com a IA local. Verifique se o serviço está rodando."
+MSG_INTERNAL_ERROR = "Desculpe, houve um erro interno. Tente novamente."
+MSG_STREAM_ERROR = "Erro no streaming de resposta."
+ERROR_RESPONSES = frozenset({
+    MSG_EMPTY_RESPONSE, MSG_HTTP_ERROR, MSG_TIMEOUT,
+    MSG_CONNECTION_ERROR, MSG_INTERNAL_ERROR, MSG_STREAM_ERROR
+})
+
+class OllamaError(Exception):
+    """Falha ao gerar resposta no Ollama"""
+    
+    user_message = MSG_INTERNAL_ERROR
+    health_failure = True  # Indica problema no servidor (conta para o circuit breaker)
+    
+    def __init__(self, detail: str = ""):
+        super().__init__(detail or self.user_message)
+
+class OllamaEmptyResponseError(OllamaError):
+    """O modelo respondeu sem texto"""
+    user_message = MSG_EMPTY_RESPONSE
+    health_failure = False
+
+class OllamaHTTPError(OllamaError):
+    """Status HTTP diferente de 200"""
+    user_message = MSG_HTTP_ERROR
+    
+    def __init__(self, status_code: int, detail: str = ""):
+        super().__init__(f"HTTP {status_code}: {detail[:200]}")
+        self.status_code = status_code
+        self.health_failure = status_code >= 500
+
+class OllamaTimeoutError(OllamaError):
+    """O servidor não respondeu a tempo"""
+    user_message = MSG_TIMEOUT
+
+class OllamaConnectionError(OllamaError):
+    """Não foi possível conectar ao servidor"""
+    user_message = MSG_CONNECTION_ERROR
+
+class OllamaStreamError(OllamaError):
+    """O stream foi interrompido"""
+    user_message = MSG_STREAM_ERROR
+
+def build_generate_payload(model: str, prompt: str, context: Optional[List] = None,
+                           stream: bool = False, keep_alive: Optional[Any] = None,
+                           num_ctx: int = DEFAULT_NUM_CTX, num_predict: int = DEFAULT_NUM_PREDICT) -> Dict:
+    """
+    Monta o payload de /api/generate usado pelos clientes síncrono e assíncrono
+    
+    keep_alive (ex.: "30m", -1) define por quanto tempo o modelo fica na
+    memória após a requisição; None usa o padrão do servidor.
+    """
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "options": {
+            "temperature": 0.8,
+            "top_p": 0.9,
+            "top_k": 40,
+            "num_ctx": num_ctx,
+            "num_predict": num_predict
+        }
+    }
+    
+    # Se há contexto, incluir
+    if context:
+        payload["context"] = context
+    
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    
+    return payload
+
+class ModelRegistry:
+    """
+    Cache de /api/tags e do estado de conexão com o Ollama
+    
+    Os dados ficam válidos por `ttl` segundos. Depois disso continuam sendo
+    servidos enquanto uma thread em segundo plano os atualiza, de modo que
+    consultas de modelo e de saúde nunca esperam pela rede no caminho do chat.
+    Uma invalidação (modelo criado ou baixado) também só agenda a atualização.
+    Apenas a primeira consulta (ou um refresh forçado) é síncrona.
+    """
+    
+    def __init__(self, fetch: Callable[[], Optional[List[Dict]]], ttl: float = 30.0):
+        """
+        Args:
+            fetch: Função que retorna a lista de modelos ou None se o Ollama não respondeu
+            ttl: Validade do cache em segundos
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._models: List[Dict] = []
+        self._index: Dict[str, str] = {}
+        self._healthy = False
+        self._fetched_at: Optional[float] = None  # None = vencido
+        self._loaded = False  # Já houve uma busca (há lista para servir)
+        self._refreshing = False
+        self._generation = 0
+    
+    def refresh(self) -> bool:
+        """Atualiza o cache imediatamente. Retorna o estado de conexão"""
+        generation = self._generation
+        models = self.fetch()
+        
+        with self._lock:
+            self._healthy = models is not None
+            if models is not None:
+                self._models = models
+                self._index = self._build_index(models)
+            # Uma invalidação durante a busca mantém o cache marcado como vencido
+            if generation == self._generation:
+                self._fetched_at = time.monotonic()
+            self._loaded = True
+            self._refreshing = False
+        
+        return self._healthy
+    
+    def invalidate(self):
+        """Marca o cache como vencido e agenda a atualização (a lista antiga segue servida)"""
+        with self._lock:
+            self._generation += 1
+            self._fetched_at = None
+        self._ensure_fresh()
+    
+    def is_healthy(self) -> bool:
+        """Estado de conexão em cache"""
+        self._ensure_fresh()
+        return self._healthy
+    
+    def models(self) -> List[Dict]:
+        """Modelos disponíveis em cache"""
+        self._ensure_fresh()
+        return list(self._models)
+    
+    def model_names(self) -> List[str]:
+        """Nomes dos modelos disponíveis em cache"""
+        return [m["name"] for m in self.models()]
+    
+    def resolve(self, model_name: str) -> Optional[str]:
+        """
+        Resolve um nome de modelo (com ou sem :latest) para o nome instalado
+        
+        Returns:
+            Nome exato do modelo no Ollama ou None se não estiver instalado
+        """
+        self._ensure_fresh()
+        return self._index.get(model_name)
+    
+    def _ensure_fresh(self):
+        """Busca na primeira consulta; depois só agenda atualização em segundo plano"""
+        with self._lock:
+            loaded = self._loaded
+            if loaded:
+                fresh = (self._fetched_at is not None
+                         and time.monotonic() - self._fetched_at < self.ttl)
+                if fresh or self._refreshing:
+                    return
+                self._refreshing = True
+        
+        if not loaded:
+            self.refresh()
+        else:
+            threading.Thread(target=self.refresh, daemon=True).start()
+    
+    @staticmethod
+    def _build_index(models: List[Dict]) -> Dict[str, str]:
+        """Mapeia nomes e aliases :latest para o nome instalado"""
+        index = {}
+        for model in models:
+            name = model["name"]
+            if name.endswith(":latest"):
+                index.setdefault(name[:-7], name)
+            elif ":" not in name:
+                index.setdefault(f"{name}:latest", name)
+        for model in models:
+            index[model["name"]] = model["name"]
+        return index
+
+class OllamaBackend:
+    """Estado de roteamento de um servidor Ollama"""
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None  # segundos por requisição
+        self.models: set = set()  # Instalados (/api/tags)
+        self.resident: set = set()  # Carregados na memória (/api/ps e uso recente)
+        self.failures = 0  # Falhas consecutivas
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+    
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+    
+    def to_dict(self, now: float) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": not self.is_ejected(now),
+            "in_flight": self.in_flight,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "models": sorted(self.models),
+            "resident": sorted(self.resident),
+            "requests": self.requests,
+            "errors": self.errors
+        }
+
+class OllamaBackendPool:
+    """
+    Conjunto de servidores Ollama com roteamento por menor carga
+    
+    Cada requisição vai para o servidor saudável com menos requisições em
+    andamento, preferindo os que já têm o modelo carregado na memória e,
+    no empate, a menor latência média (EWMA). A saúde é passiva: depois de
+    `eject_after` falhas seguidas (conexão, timeout, HTTP 5xx) o servidor
+    sai da rotação por `eject_seconds`; passado esse tempo ele recebe
+    tráfego de novo e volta de vez no primeiro sucesso.
+    """
+    
+    def __init__(self, urls: List[str], eject_after: int = 3, eject_seconds: float = 30.0,
+                 ewma_alpha: float = 0.3):
+        """
+        Args:
+            urls: URLs dos servidores Ollama (o primeiro é o principal)
+            eject_after: Falhas consecutivas até retirar o servidor da rotação
+            eject_seconds: Tempo fora da rotação antes de tentar de novo
+            ewma_alpha: Peso da última medição na latência média
+        """
+        if not urls:
+            urls = [DEFAULT_OLLAMA_URL]
+        self.backends = [OllamaBackend(url) for url in dict.fromkeys(urls)]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.ewma_alpha = ewma_alpha
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+    
+    @property
+    def primary(self) -> OllamaBackend:
+        return self.backends[0]
+    
+    def pick(self, model: Optional[str] = None,
+             exclude: Tuple[OllamaBackend, ...] = ()) -> Optional[OllamaBackend]:
+        """
+        Escolhe o servidor para uma requisição
+        
+        Args:
+            model: Modelo pedido (prioriza servidores que o têm carregado)
+            exclude: Servidores já tentados nesta requisição
+        
+        Returns:
+            Servidor escolhido, ou None se todos já foram tentados
+        """
+        now = time.monotonic()
+        
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+            
+            healthy = [b for b in candidates if not b.is_ejected(now)]
+            if not healthy:
+                # Todos fora da rotação: tenta o que volta primeiro
+                return min(candidates, key=lambda b: b.ejected_until)
+            candidates = healthy
+            
+            if model:
+                resident = [b for b in candidates if model in b.resident]
+                installed = [b for b in candidates if model in b.models]
+                candidates = resident or installed or candidates
+            
+            return min(candidates, key=lambda b: (
+                b.in_flight, b.latency_ewma if b.latency_ewma is not None else 0.0
+            ))
+    
+    def begin(self, backend: OllamaBackend):
+        """Registra o início de uma requisição no servidor"""
+        with self._lock:
+            backend.in_flight += 1
+            backend.requests += 1
+    
+    def end(self, backend: OllamaBackend, ok: Optional[bool], elapsed: float, model: Optional[str] = None):
+        """
+        Registra o fim de uma requisição
+        
+        Args:
+            ok: False para falhas de saúde (conexão, timeout, HTTP 5xx);
+                None para requisições abandonadas pelo cliente (não contam)
+            elapsed: Duração da requisição em segundos
+            model: Modelo usado (fica marcado como carregado se ok)
+        """
+        with self._lock:
+            backend.in_flight -= 1
+            if ok is None:
+                return
+            if ok:
+                self._record_success(backend)
+                if model:
+                    backend.resident.add(model)
+                if backend.latency_ewma is None:
+                    backend.latency_ewma = elapsed
+                else:
+                    backend.latency_ewma += self.ewma_alpha * (elapsed - backend.latency_ewma)
+            else:
+                self._record_failure(backend)
+    
+    def update_models(self, backend: OllamaBackend, models: Optional[List[Dict]],
+                      resident: Optional[List[Dict]] = None):
+        """Atualiza modelos instalados/carregados (None = servidor não respondeu)"""
+        with self._lock:
+            if models is None:
+                self._record_failure(backend)
+                return
+            backend.models = {m["name"] for m in models}
+            if resident is not None:
+                backend.resident = {m["name"] for m in resident}
+            self._record_success(backend)
+    
+    def update_resident(self, backend: OllamaBackend, resident: List[Dict]):
+        """Atualiza os modelos carregados de um servidor (/api/ps)"""
+        with self._lock:
+            backend.resident = {m["name"] for m in resident}
+    
+    def set_resident(self, backend: OllamaBackend, model: str, resident: bool):
+        """Marca um modelo como carregado (ou não) após carregar/descarregar"""
+        with self._lock:
+            if resident:
+                backend.resident.add(model)
+            else:
+                backend.resident.discard(model)
+    
+    def _record_success(self, backend: OllamaBackend):
+        if backend.failures >= self.eject_after:
+            self.logger.info(f"✅ Ollama {backend.url} de volta à rotação")
+        backend.failures = 0
+        backend.ejected_until = 0.0
+    
+    def _record_failure(self, backend: OllamaBackend):
+        backend.errors += 1
+        backend.failures += 1
+        if backend.failures >= self.eject_after:
+            if backend.failures == self.eject_after:
+                self.logger.warning(f"⚠️ Ollama {backend.url} fora da rotação após {backend.failures} falhas")
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+    
+    def stats(self) -> List[Dict]:
+        """Estado de cada servidor"""
+        now = time.monotonic()
+        with self._lock:
+            return [backend.to_dict(now) for backend in self.backends]
+
 class OllamaLocalAI:
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, registry_ttl: float = 30.0,
+                 base_urls: Optional[List[str]] = None, eject_after: int = 3,
+                 eject_seconds: float = 30.0):
         """
         Inicializa conexão com Ollama local
         
         Args:
             base_url: URL do servidor Ollama (padrão: localhost:11434)
+            registry_ttl: Validade do cache de modelos/conexão em segundos
+            base_urls: Vários servidores Ollama (substitui base_url)
+            eject_after: Falhas seguidas até tirar um servidor da rotação
+            eject_seconds: Tempo que o servidor fica fora da rotação
         """
-        self.base_url = base_url
-        self.current_model = "llama3.2:1b"  # Modelo padrão
+        self.pool = OllamaBackendPool(base_urls or [base_url], eject_after=eject_after,
+                                      eject_seconds=eject_seconds)
+        self.base_url = self.pool.primary.url
+        self.current_model = DEFAULT_OLLAMA_MODEL  # Modelo padrão
         self.session = requests.Session()
         self.logger = logging.getLogger(__name__)
+        self.registry = ModelRegistry(self._fetch_models, ttl=registry_ttl)
+        
+        # keep_alive por modelo (ver ModelResidencyManager); None = padrão do servidor
+        self.keep_alive_for: Optional[Callable[[str], Optional[Any]]] = None
+        
+        # Janela de contexto e limite da resposta (mudar num_ctx recarrega o modelo)
+        self.num_ctx = DEFAULT_NUM_CTX
+        self.num_predict = DEFAULT_NUM_PREDICT
+    
+    def _fetch_models(self) -> Optional[List[Dict]]:
+        """
+        Consulta /api/tags (e /api/ps) de todos os servidores
         
-    def check_connection(self) -> bool:
-        """Verifica se Ollama está respondendo"""
+        Returns:
+            União dos modelos, ou None se nenhum servidor respondeu
+        """
+        self.logger.info("🔍 Verificando conexão com Ollama...")
+        merged: Dict[str, Dict] = {}
+        healthy = 0
+        
+        for backend in self.pool.backends:
+            models = self._fetch_backend_models(backend)
+            resident = None
+            if models is not None:
+                healthy += 1
+                resident = self._fetch_backend_resident(backend)
+                for model in models:
+                    merged.setdefault(model["name"], model)
+            self.pool.update_models(backend, models, resident)
+        
+        if not healthy:
+            return None
+        
+        self.logger.info(f"✅ Ollama conectado! {len(merged)} modelos disponíveis "
+                         f"({healthy}/{len(self.pool.backends)} servidores)")
+        return list(merged.values())
+    
+    def _fetch_backend_models(self, backend: OllamaBackend) -> Optional[List[Dict]]:
+        """Consulta /api/tags de um servidor. Retorna None se ele não respondeu"""
         try:
-            self.logger.info("🔍 Verificando conexão com Ollama...")
-            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{backend.url}/api/tags", timeout=5)
             
             if response.status_code == 200:
-                data = response.json()
-                models = data.get("models", [])
-                self.logger.info(f"✅ Ollama conectado! {len(models)} modelos disponíveis")
-                
-                # Verificar se o modelo padrão existe
-                available_models = [m["name"] for m in models]
-                if self.current_model not in available_models:
-                    # Tentar usar o primeiro modelo disponível
-                    if available_models:
-                        self.current_model = available_models[0]
-                        self.logger.info(f"🔄 Modelo padrão alterado para: {self.current_model}")
-                
-                return True
+                return response.json().get("models", [])
             else:
-                self.logger.error(f"❌ Ollama respondeu com status {response.status_code}")
-                return False
-                
+                self.logger.error(f"❌ Ollama {backend.url} respondeu com status {response.status_code}")
+                return None
+        
         except requests.exceptions.Timeout:
-            self.logger.error("⏰ Timeout conectando ao Ollama")
-            return False
+            self.logger.error(f"⏰ Timeout conectando ao Ollama {backend.url}")
+            return None
         except requests.exceptions.ConnectionError:
-            self.logger.error("🔌 Erro de conexão com Ollama")
-            return False
+            self.logger.error(f"🔌 Erro de conexão com Ollama {backend.url}")
+            return None
         except Exception as e:
-            self.logger.error(f"❌ Erro conectando Ollama: {e}")
-            return False
+            self.logger.error(f"❌ Erro conectando Ollama {backend.url}: {e}")
+            return None
     
-    def list_models(self) -> List[Dict]:
-        """Lista modelos disponíveis"""
+    def _keep_alive(self, model: str) -> Optional[Any]:
+        return self.keep_alive_for(model) if self.keep_alive_for else None
+    
+    def _fetch_backend_resident(self, backend: OllamaBackend) -> Optional[List[Dict]]:
+        """Modelos carregados na memória (/api/ps); None se não disponível"""
         try:
-            response = self.session.get(f"{self.base_url}/api/tags")
+            response = self.session.get(f"{backend.url}/api/ps", timeout=5)
             if response.status_code == 200:
                 return response.json().get("models", [])
-            return []
         except Exception as e:
-            self.logger.error(f"Erro listando modelos: {e}")
-            return []
+            self.logger.debug(f"/api/ps indisponível em {backend.url}: {e}")
+        return None
+    
+    def check_connection(self, force: bool = False) -> bool:
+        """
+        Verifica se Ollama está respondendo
+        
+        Args:
+            force: Ignora o cache e consulta o servidor agora
+        """
+        healthy = self.registry.refresh() if force else self.registry.is_healthy()
+        
+        if healthy:
+            # Verificar se o modelo padrão existe
+            available_models = self.registry.model_names()
+            if self.registry.resolve(self.current_model) is None and available_models:
+                # Tentar usar o primeiro modelo disponível
+                self.current_model = available_models[0]
+                self.logger.info(f"🔄 Modelo padrão alterado para: {self.current_model}")
+        
+        return healthy
+    
+    def list_models(self, force: bool = False) -> List[Dict]:
+        """Lista modelos disponíveis (do cache, salvo se force=True)"""
+        if force:
+            self.registry.refresh()
+        return self.registry.models()
+    
+    def resolve_model(self, model_name: str) -> str:
+        """Resolve o nome do modelo pelo cache, ou retorna o modelo ativo"""
+        return self.registry.resolve(model_name) or self.current_model
     
     def set_model(self, model_name: str) -> bool:
         """Define modelo ativo"""
-        models = self.list_models()
-        available_models = [m["name"] for m in models]
-        
-        # Tentar encontrar modelo exato ou com suffix :latest
-        target_model = model_name
-        if model_name not in available_models:
-            if f"{model_name}:latest" in available_models:
-                target_model = f"{model_name}:latest"
-            elif model_name.endswith(":latest") and model_name[:-7] in available_models:
-                target_model = model_name[:-7]
-        
-        if target_model in available_models:
+        target_model = self.registry.resolve(model_name)
+        
+        if target_model:
             self.current_model = target_model
             self.logger.info(f"Modelo ativo: {target_model}")
             return True
         else:
-            self.logger.warning(f"Modelo {model_name} não encontrado. Disponíveis: {available_models}")
+            self.logger.warning(f"Modelo {model_name} não encontrado. Disponíveis: {self.registry.model_names()}")
             return False
     
     def chat(self, message: str, context: Optional[List] = None) -> str:
@@ -95,37 +517,34 @@ class OllamaLocalAI:
         Args:
             message: Mensagem do usuário
             context: Contexto da conversa (opcional)
-            
+        
         Returns:
             Resposta da IA
         """
         try:
             # Preparar payload
-            payload = {
-                "model": self.current_model,
-                "prompt": message,
-                "stream": False,
-                "options": {
-                    "temperature": 0.8,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                    "num_ctx": 2048,  # Contexto limitado para evitar timeout
-                    "num_predict": 512  # Limita resposta para evitar timeout
-                }
-            }
-            
-            # Se há contexto, incluir
-            if context:
-                payload["context"] = context
+            payload = build_generate_payload(self.current_model, message, context,
+                                             keep_alive=self._keep_alive(self.current_model),
+                                             num_ctx=self.num_ctx, num_predict=self.num_predict)
             
             # CORREÇÃO: Fazer requisição com timeout mais conservador
             self.logger.info(f"🤖 Enviando mensagem para {self.current_model}: {message[:50]}...")
             
-            response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=30  # CORREÇÃO: Reduzido para 30 segundos
-            )
+            backend = self.pool.pick(self.current_model)
+            self.pool.begin(backend)
+            started = time.monotonic()
+            ok = False
+            loaded = False
+            try:
+                response = self.session.post(
+                    f"{backend.url}/api/generate",
+                    json=payload,
+                    timeout=30  # CORREÇÃO: Reduzido para 30 segundos
+                )
+                ok = response.status_code < 500
+                loaded = response.status_code == 200
+            finally:
+                self.pool.end(backend, ok, time.monotonic() - started, self.current_model if loaded else None)
             
             if response.status_code == 200:
                 result = response.json()
@@ -134,53 +553,105 @@ class OllamaLocalAI:
                 # CORREÇÃO: Validar se a resposta não está vazia
                 if not ai_response:
                     self.logger.warning("Resposta vazia do Ollama")
-                    return "Desculpe, não consegui gerar uma resposta. Pode reformular sua pergunta?"
+                    return MSG_EMPTY_RESPONSE
                 
                 self.logger.info(f"✅ Resposta gerada com sucesso ({len(ai_response)} caracteres)")
                 return ai_response
             else:
                 self.logger.error(f"Erro HTTP {response.status_code}: {response.text}")
-                return "Desculpe, houve um problema na comunicação com a IA. Tente novamente."
-                
+                return MSG_HTTP_ERROR
+        
         except requests.exceptions.Timeout:
             self.logger.error("Timeout na requisição para Ollama")
-            return "A IA está demorando para responder. Tente uma pergunta mais simples."
+            return MSG_TIMEOUT
         except requests.exceptions.ConnectionError:
             self.logger.error("Erro de conexão com Ollama")
-            return "Não consegui conectar com a IA local. Verifique se o serviço está rodando."
+            return MSG_CONNECTION_ERROR
         except Exception as e:
             self.logger.error(f"Erro inesperado no chat: {e}")
-            return "Desculpe, houve um erro interno. Tente novamente."
+            return MSG_INTERNAL_ERROR
     
     def chat_stream(self, message: str):
         """Chat com streaming (respostas em tempo real)"""
         try:
-            payload = {
-                "model": self.current_model,
-                "prompt": message,
-                "stream": True
-            }
+            payload = build_generate_payload(self.current_model, message, stream=True,
+                                             keep_alive=self._keep_alive(self.current_model),
+                                             num_ctx=self.num_ctx, num_predict=self.num_predict)
             
+            backend = self.pool.pick(self.current_model)
+            self.pool.begin(backend)
+            started = time.monotonic()
+            ok = False
+            loaded = False
+            try:
+                response = self.session.post(
+                    f"{backend.url}/api/generate",
+                    json=payload,
+                    stream=True
+                )
+                
+                for line in response.iter_lines():
+                    if line:
+                        try:
+                            data = json.loads(line.decode('utf-8'))
+                            if 'response' in data:
+                                yield data['response']
+                            if data.get('done', False):
+                                break
+                        except json.JSONDecodeError:
+                            continue
+                ok = response.status_code < 500
+                loaded = response.status_code == 200
+            finally:
+                self.pool.end(backend, ok, time.monotonic() - started, self.current_model if loaded else None)
+        
+        except Exception as e:
+            self.logger.error(f"Erro no streaming: {e}")
+            yield MSG_STREAM_ERROR
+    
+    def resident_models(self, backend: OllamaBackend) -> Optional[List[Dict]]:
+        """
+        Modelos carregados na memória de um servidor (nome, size, size_vram...)
+        
+        Também atualiza o estado de residência usado no roteamento.
+        """
+        resident = self._fetch_backend_resident(backend)
+        if resident is not None:
+            self.pool.update_resident(backend, resident)
+        return resident
+    
+    def load_model(self, model_name: str, keep_alive: Any = "5m",
+                   backend: Optional[OllamaBackend] = None, timeout: float = 300) -> bool:
+        """
+        Carrega (ou descarrega, com keep_alive=0) um modelo sem gerar texto
+        
+        Args:
+            model_name: Modelo já resolvido (ex.: llama3.2:1b)
+            keep_alive: Tempo na memória ("30m", -1 = sempre, 0 = descarregar)
+            backend: Servidor (padrão: o principal)
+            timeout: Espera máxima pelo carregamento em segundos
+        
+        Returns:
+            True se o servidor aceitou a requisição
+        """
+        backend = backend or self.pool.primary
+        try:
             response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                stream=True
+                f"{backend.url}/api/generate",
+                # Mesmo num_ctx das gerações: outro valor faria o Ollama recarregar o modelo
+                json={"model": model_name, "keep_alive": keep_alive, "options": {"num_ctx": self.num_ctx}},
+                timeout=timeout
             )
-            
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line.decode('utf-8'))
-                        if 'response' in data:
-                            yield data['response']
-                        if data.get('done', False):
-                            break
-                    except json.JSONDecodeError:
-                        continue
-                        
         except Exception as e:
-            self.logger.error(f"Erro no streaming: {e}")
-            yield "Erro no streaming de resposta."
+            self.logger.error(f"Erro carregando {model_name} em {backend.url}: {e}")
+            return False
+        
+        if response.status_code != 200:
+            self.logger.warning(f"⚠️ {backend.url} recusou carregar {model_name}: HTTP {response.status_code}")
+            return False
+        
+        self.pool.set_resident(backend, model_name, keep_alive not in (0, "0", "0s"))
+        return True
     
     def create_custom_model(self, model_name: str, modelfile_path: str) -> bool:
         """
@@ -189,7 +660,7 @@ class OllamaLocalAI:
         Args:
             model_name: Nome do novo modelo
             modelfile_path: Caminho para o Modelfile
-            
+        
         Returns:
             True se criado com sucesso
         """
@@ -202,13 +673,18 @@ class OllamaLocalAI:
                 "modelfile": modelfile_content
             }
             
-            response = self.session.post(
-                f"{self.base_url}/api/create",
-                json=payload
-            )
-            
-            return response.status_code == 200
+            # O modelo precisa existir em todos os servidores do pool
+            created = True
+            for backend in self.pool.backends:
+                response = self.session.post(
+                    f"{backend.url}/api/create",
+                    json=payload
+                )
+                created = created and response.status_code == 200
             
+            self.registry.invalidate()
+            return created
+        
         except Exception as e:
             self.logger.error(f"Erro criando modelo: {e}")
             return False
@@ -217,11 +693,16 @@ class OllamaLocalAI:
         """Baixa um modelo do repositório"""
         try:
             payload = {"name": model_name}
-            response = self.session.post(
-                f"{self.base_url}/api/pull",
-                json=payload
-            )
-            return response.status_code == 200
+            pulled = True
+            for backend in self.pool.backends:
+                response = self.session.post(
+                    f"{backend.url}/api/pull",
+                    json=payload
+                )
+                pulled = pulled and response.status_code == 200
+            
+            self.registry.invalidate()
+            return pulled
         except Exception as e:
             self.logger.error(f"Erro baixando modelo: {e}")
             return False
@@ -230,7 +711,7 @@ class OllamaLocalAI:
         """Informações sobre um modelo"""
         if not model_name:
             model_name = self.current_model
-            
+        
         try:
             payload = {"name": model_name}
             response = self.session.post(
@@ -245,6 +726,304 @@ class OllamaLocalAI:
             self.logger.error(f"Erro obtendo info do modelo: {e}")
             return {}
 
+class AsyncOllamaLocalAI:
+    """
+    Variante assíncrona do OllamaLocalAI
+    
+    Mesma interface de conversa (chat, chat_stream, list_models, get_model_info),
+    mas aguardada diretamente no event loop. Cada loop recebe um único
+    httpx.AsyncClient com pool de conexões keep-alive limitado, compartilhado
+    por todas as conversas em andamento - sem uma thread por requisição.
+    Com vários servidores, cada geração é roteada pelo OllamaBackendPool.
+    """
+    
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, max_connections: int = 64,
+                 max_keepalive_connections: int = 16, timeout: float = 30.0,
+                 pool: Optional[OllamaBackendPool] = None):
+        """
+        Args:
+            base_url: URL do servidor Ollama
+            max_connections: Limite de conexões simultâneas no pool
+            max_keepalive_connections: Conexões ociosas mantidas abertas
+            timeout: Timeout de leitura/espera no pool em segundos
+            pool: Servidores compartilhados com o OllamaLocalAI (substitui base_url)
+        """
+        self.pool = pool or OllamaBackendPool([base_url])
+        self.base_url = self.pool.primary.url
+        self.current_model = DEFAULT_OLLAMA_MODEL
+        self.logger = logging.getLogger(__name__)
+        
+        # keep_alive por modelo (ver ModelResidencyManager); None = padrão do servidor
+        self.keep_alive_for: Optional[Callable[[str], Optional[Any]]] = None
+        
+        # Janela de contexto e limite da resposta (mudar num_ctx recarrega o modelo)
+        self.num_ctx = DEFAULT_NUM_CTX
+        self.num_predict = DEFAULT_NUM_PREDICT
+        
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
+        self._timeout = httpx.Timeout(timeout, connect=5.0)
+        
+        # Um cliente por event loop: conexões httpx não podem cruzar loops
+        self._clients = weakref.WeakKeyDictionary()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Retorna o cliente HTTP compartilhado do loop atual"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=self._timeout
+            )
+            self._clients[loop] = client
+        
+        return client
+    
+    async def chat(self, message: str, context: Optional[List] = None,
+                   model: Optional[str] = None) -> str:
+        """
+        Conversa com IA local sem bloquear o event loop
+        
+        Args:
+            message: Mensagem do usuário
+            context: Contexto da conversa (opcional)
+            model: Modelo a usar (padrão: current_model)
+        
+        Returns:
+            Resposta da IA
+        """
+        response, _ = await self.chat_with_context(message, context, model)
+        return response
+    
+    async def chat_with_context(self, message: str, context: Optional[List] = None,
+                                model: Optional[str] = None) -> Tuple[str, Optional[List[int]]]:
+        """
+        Conversa com IA local devolvendo também o contexto (KV) do Ollama
+        
+        Enviar o contexto retornado na próxima chamada faz o Ollama
+        processar apenas os tokens novos em vez de todo o histórico.
+        
+        Returns:
+            Tupla (resposta, contexto) - em caso de erro, a mensagem do erro
+            e contexto None (use generate() para receber exceções)
+        """
+        try:
+            return await self.generate(message, context, model)
+        except OllamaError as e:
+            self.logger.error(f"Erro no Ollama: {e}")
+            return e.user_message, None
+        except Exception as e:
+            self.logger.error(f"Erro inesperado no chat: {e}")
+            return MSG_INTERNAL_ERROR, None
+    
+    async def generate(self, message: str, context: Optional[List] = None,
+                       model: Optional[str] = None, final: Optional[Dict] = None,
+                       num_predict: Optional[int] = None,
+                       backend: Optional[OllamaBackend] = None) -> Tuple[str, Optional[List[int]]]:
+        """
+        Gera uma resposta e o contexto (KV) do Ollama
+        
+        Args:
+            final: Preenchido com a resposta completa do Ollama (contagens de tokens)
+            num_predict: Limite de tokens da resposta (padrão: self.num_predict)
+            backend: Servidor a usar, sem tentar outro (padrão: escolhido pelo pool)
+        
+        Returns:
+            Tupla (resposta, contexto)
+        
+        Raises:
+            OllamaError: Timeout, conexão, HTTP ou resposta vazia
+        """
+        model = model or self.current_model
+        payload = build_generate_payload(model, message, context, keep_alive=self._keep_alive(model),
+                                         num_ctx=self.num_ctx, num_predict=num_predict or self.num_predict)
+        
+        self.logger.info(f"🤖 Enviando mensagem para {model}: {message[:50]}...")
+        
+        try:
+            response = await self._post_generate(payload, model, backend)
+        except httpx.TimeoutException as e:
+            raise OllamaTimeoutError(f"Timeout na requisição para Ollama: {e}") from e
+        except httpx.ConnectError as e:
+            raise OllamaConnectionError(f"Erro de conexão com Ollama: {e}") from e
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Erro HTTP no Ollama: {e}") from e
+        
+        if response.status_code != 200:
+            raise OllamaHTTPError(response.status_code, response.text)
+        
+        result = response.json()
+        ai_response = result.get("response", "").strip()
+        if final is not None:
+            final.update(result)
+        
+        if not ai_response:
+            raise OllamaEmptyResponseError("Resposta vazia do Ollama")
+        
+        self.logger.info(f"✅ Resposta gerada com sucesso ({len(ai_response)} caracteres)")
+        return ai_response, result.get("context")
+    
+    def _keep_alive(self, model: str) -> Optional[Any]:
+        return self.keep_alive_for(model) if self.keep_alive_for else None
+    
+    async def _post_generate(self, payload: Dict, model: str,
+                             backend: Optional[OllamaBackend] = None) -> httpx.Response:
+        """
+        POST /api/generate no servidor indicado ou escolhido pelo pool
+        
+        Sem servidor indicado, falhas de conexão e HTTP 503 (nada foi
+        processado) são tentadas de novo em outro servidor; timeouts e outros
+        erros não, para não duplicar geração.
+        """
+        fixed = backend
+        tried: Tuple[OllamaBackend, ...] = ()
+        
+        while True:
+            backend = fixed or self.pool.pick(model, exclude=tried)
+            tried += (backend,)
+            last = fixed is not None or len(tried) >= len(self.pool.backends)
+            self.pool.begin(backend)
+            started = time.monotonic()
+            ok: Optional[bool] = False
+            loaded = False
+            try:
+                response = await self._get_client().post(f"{backend.url}/api/generate", json=payload)
+                ok = response.status_code < 500
+                loaded = response.status_code == 200
+                if response.status_code != 503 or last:
+                    return response
+                self.logger.warning(f"⚠️ Ollama {backend.url} indisponível (503), tentando outro servidor")
+            except httpx.ConnectError:
+                if last:
+                    raise
+                self.logger.warning(f"🔌 Ollama {backend.url} indisponível, tentando outro servidor")
+            except asyncio.CancelledError:
+                ok = None  # Cliente desistiu: a conexão fechada interrompe a geração
+                raise
+            finally:
+                self.pool.end(backend, ok, time.monotonic() - started, model if loaded else None)
+    
+    async def chat_stream(self, message: str, model: Optional[str] = None,
+                          context: Optional[List] = None,
+                          final: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Chat com streaming assíncrono (respostas em tempo real)
+        
+        Args:
+            message: Mensagem do usuário
+            model: Modelo a usar (padrão: current_model)
+            context: Contexto (KV) retornado por uma chamada anterior
+            final: Dicionário preenchido com a última mensagem do Ollama
+                   (context, contagens de tokens) ao fim do stream
+        
+        Em caso de erro, entrega MSG_STREAM_ERROR como último trecho
+        (use generate_stream() para receber exceções).
+        """
+        try:
+            async for chunk in self.generate_stream(message, model, context, final):
+                yield chunk
+        except OllamaError as e:
+            self.logger.error(f"Erro no streaming: {e}")
+            yield MSG_STREAM_ERROR
+    
+    async def generate_stream(self, message: str, model: Optional[str] = None,
+                              context: Optional[List] = None, final: Optional[Dict] = None,
+                              backend: Optional[OllamaBackend] = None) -> AsyncIterator[str]:
+        """
+        Gera a resposta em trechos (mesmos argumentos de chat_stream)
+        
+        Args:
+            backend: Servidor a usar (padrão: escolhido pelo pool)
+        
+        Raises:
+            OllamaError: Falha antes ou durante o stream
+        """
+        model = model or self.current_model
+        backend = backend or self.pool.pick(model)
+        self.pool.begin(backend)
+        started = time.monotonic()
+        failed = False  # Falha de saúde do servidor (não inclui o consumidor parar antes)
+        abandoned = False  # Consumidor cancelado ou parou antes do fim
+        loaded = False
+        
+        try:
+            payload = build_generate_payload(model, message, context, stream=True,
+                                             keep_alive=self._keep_alive(model),
+                                             num_ctx=self.num_ctx, num_predict=self.num_predict)
+            
+            url = f"{backend.url}/api/generate"
+            async with self._get_client().stream("POST", url, json=payload) as response:
+                if response.status_code != 200:
+                    failed = response.status_code >= 500
+                    await response.aread()
+                    raise OllamaHTTPError(response.status_code, response.text)
+                
+                # Lê até o fim do corpo: o Ollama encerra o stream após "done"
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get('response'):
+                        yield data['response']
+                    if data.get('done') and final is not None:
+                        final.update(data)
+                loaded = True
+        
+        except httpx.TimeoutException as e:
+            failed = True
+            raise OllamaTimeoutError(f"Timeout no streaming do Ollama: {e}") from e
+        except httpx.ConnectError as e:
+            failed = True
+            raise OllamaConnectionError(f"Erro de conexão com Ollama: {e}") from e
+        except httpx.HTTPError as e:
+            failed = True
+            raise OllamaStreamError(f"Erro no streaming do Ollama: {e}") from e
+        except (asyncio.CancelledError, GeneratorExit):
+            abandoned = True
+            raise
+        finally:
+            self.pool.end(backend, None if abandoned else not failed, time.monotonic() - started,
+                          model if loaded else None)
+    
+    async def list_models(self) -> List[Dict]:
+        """Lista modelos disponíveis"""
+        try:
+            response = await self._get_client().get(f"{self.base_url}/api/tags")
+            if response.status_code == 200:
+                return response.json().get("models", [])
+            return []
+        except Exception as e:
+            self.logger.error(f"Erro listando modelos: {e}")
+            return []
+    
+    async def get_model_info(self, model_name: str = None) -> Dict:
+        """Informações sobre um modelo"""
+        if not model_name:
+            model_name = self.current_model
+        
+        try:
+            response = await self._get_client().post(f"{self.base_url}/api/show", json={"name": model_name})
+            if response.status_code == 200:
+                return response.json()
+            return {}
+        except Exception as e:
+            self.logger.error(f"Erro obtendo info do modelo: {e}")
+            return {}
+    
+    async def aclose(self):
+        """Fecha o cliente HTTP do loop atual"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
 # Exemplo de uso
 if __name__ == "__main__":
     # Inicializar IA local
@@ -267,6 +1046,6 @@ if __name__ == "__main__":
         for chunk in ai.chat_stream("Me conte uma curiosidade sobre IA"):
             print(chunk, end='', flush=True)
         print()
-        
+    
     else:
         print("❌ Ollama não conectado. Verifique se o container está rodando.")
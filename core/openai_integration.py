@@ -0,0 +1,147 @@
+"""
+🌐 Integração com a API da OpenAI para Jarvis 3.0
+Cliente assíncrono (openai>=1.0) com pool HTTP reutilizado e streaming
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+
+class OpenAIEmptyResponseError(ValueError):
+    """A API respondeu sem texto"""
+    health_failure = False  # Não conta para o circuit breaker
+
+class AsyncOpenAIChat:
+    """
+    Chat Completions da OpenAI (ou servidor compatível) sem bloquear o event loop
+    
+    Cada event loop recebe um único openai.AsyncOpenAI sobre um
+    httpx.AsyncClient com pool de conexões keep-alive limitado - as
+    conexões não podem cruzar loops, e reaproveitá-las evita um handshake
+    TLS por requisição. Sem novas tentativas por padrão: a cadeia de
+    fallback e o circuit breaker decidem o que fazer com a falha.
+    """
+    
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 30.0,
+                 connect_timeout: float = 5.0, max_retries: int = 0,
+                 max_connections: int = 64, max_keepalive_connections: int = 16):
+        """
+        Args:
+            api_key: Chave da API
+            base_url: Servidor compatível com a OpenAI (padrão: api.openai.com)
+            timeout: Timeout padrão por requisição em segundos
+            connect_timeout: Timeout de conexão em segundos
+            max_retries: Novas tentativas do SDK em erros transitórios
+            max_connections: Limite de conexões simultâneas no pool
+            max_keepalive_connections: Conexões ociosas mantidas abertas
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+        
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        
+        # Um cliente por event loop: conexões httpx não podem cruzar loops
+        self._clients = weakref.WeakKeyDictionary()
+    
+    def _get_client(self) -> openai.AsyncOpenAI:
+        """Retorna o cliente compartilhado do loop atual"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        
+        if client is None or client.is_closed():
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self._timeout,
+                max_retries=self.max_retries,
+                http_client=httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+            )
+            self._clients[loop] = client
+        
+        return client
+    
+    async def complete(self, messages: List[Dict], model: str, max_tokens: int,
+                       temperature: float, timeout: Optional[float] = None) -> str:
+        """
+        Gera a resposta completa
+        
+        Args:
+            messages: Mensagens no formato da Chat Completions
+            timeout: Timeout desta requisição (padrão: o do cliente)
+        
+        Raises:
+            openai.OpenAIError: Timeout, conexão ou HTTP
+            OpenAIEmptyResponseError: Resposta sem texto
+        """
+        response = await self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout or self.timeout
+        )
+        
+        content = (response.choices[0].message.content or "").strip() if response.choices else ""
+        if not content:
+            raise OpenAIEmptyResponseError("Resposta vazia da OpenAI")
+        
+        self.logger.info(f"✅ Resposta da OpenAI ({len(content)} caracteres)")
+        return content
+    
+    async def stream(self, messages: List[Dict], model: str, max_tokens: int,
+                     temperature: float, timeout: Optional[float] = None,
+                     final: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Gera a resposta em trechos (mesmos argumentos de complete)
+        
+        Args:
+            final: Preenchido com model e finish_reason ao fim do stream
+        
+        Raises:
+            openai.OpenAIError: Falha antes ou durante o stream
+            OpenAIEmptyResponseError: Stream terminou sem texto
+        """
+        stream = await self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout or self.timeout,
+            stream=True
+        )
+        
+        produced = False
+        try:
+            async for event in stream:
+                if not event.choices:
+                    continue
+                choice = event.choices[0]
+                if choice.delta and choice.delta.content:
+                    produced = True
+                    yield choice.delta.content
+                if choice.finish_reason and final is not None:
+                    final.update(model=event.model, finish_reason=choice.finish_reason)
+        finally:
+            await stream.close()
+        
+        if not produced:
+            raise OpenAIEmptyResponseError("Resposta vazia da OpenAI")
+    
+    async def aclose(self):
+        """Fecha o cliente do loop atual"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.close()
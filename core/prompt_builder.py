@@ -0,0 +1,162 @@
+"""
+Montagem de prompts do JARVIS 3.0
+Prefixo estável por personalidade para aproveitar o cache de prompt do backend
+"""
+
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Informações fixas do sistema: fazem parte do prefixo estável
+SYSTEM_INFO = """
+
+Informações do sistema:
+- Sistema: Windows
+- Você pode executar comandos do sistema e monitorar recursos
+- Você tem acesso a funcionalidades de automação e controle
+
+Responda sempre em português brasileiro."""
+
+# Chaves do contexto que não afetam a resposta e só quebrariam o cache
+VOLATILE_IGNORED_KEYS = ('timestamp',)
+
+class PromptBuilder:
+    """
+    Monta prompts em duas partes: prefixo e sufixo
+    
+    O prefixo (prompt da personalidade + informações fixas) é compilado uma
+    vez e é idêntico byte a byte em todas as chamadas, então o backend pode
+    reaproveitar o prefill já calculado. Dados voláteis (data/hora, CPU,
+    RAM) ficam num sufixo compacto logo antes da mensagem do usuário.
+    """
+    
+    def __init__(self, personalities: Dict[str, Dict]):
+        """
+        Args:
+            personalities: Dicionário de personalidades do AIEngine
+        """
+        self.personalities = personalities
+        self._prefixes: Dict[str, tuple] = {}
+        
+        # Métricas: último prompt completo por modelo e reaproveitamento do prefixo
+        self._lock = threading.Lock()
+        self._last_prompt: Dict[str, str] = {}
+        self._stats = {'full_prompts': 0, 'prefix_hits': 0, 'turn_prompts': 0,
+                       'prompt_chars': 0, 'reused_chars': 0}
+    
+    def prefix(self, personality: str) -> str:
+        """Prefixo estável (pré-compilado) da personalidade"""
+        base_prompt = self.personalities[personality]["system_prompt"]
+        
+        cached = self._prefixes.get(personality)
+        if cached is None or cached[0] != base_prompt:
+            cached = (base_prompt, base_prompt + SYSTEM_INFO)
+            self._prefixes[personality] = cached
+        
+        return cached[1]
+    
+    @staticmethod
+    def volatile_suffix(context: Optional[Dict] = None) -> str:
+        """Dados que mudam a cada chamada, em formato compacto"""
+        suffix = f"Data/Hora atual: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        
+        if context:
+            compact = {
+                key: round(value, 1) if isinstance(value, float) else value
+                for key, value in context.items()
+                if key not in VOLATILE_IGNORED_KEYS
+            }
+            suffix += f"\nContexto do sistema: {json.dumps(compact, ensure_ascii=False, separators=(',', ':'))}"
+        
+        return suffix
+    
+    @staticmethod
+    def format_summary(summary: str) -> str:
+        """Resumo das mensagens antigas, logo após o prefixo"""
+        return f"\n\nResumo da conversa até aqui: {summary}" if summary else ""
+    
+    @staticmethod
+    def format_memory(memory: str) -> str:
+        """Trechos recuperados da memória (notas, tarefas, conversas anteriores)"""
+        return f"\n\nMemória relevante:\n{memory}" if memory else ""
+    
+    @staticmethod
+    def build_summary_request(previous: str, messages: List[Dict]) -> str:
+        """Prompt que pede o resumo atualizado da conversa"""
+        prompt = ("Resuma a conversa entre o usuário e o assistente JARVIS em no máximo 5 frases, "
+                  "em português. Mantenha nomes, fatos, preferências e pedidos ainda em aberto. "
+                  "Responda apenas com o resumo.")
+        if previous:
+            prompt += f"\n\nResumo anterior: {previous}"
+        return f"{prompt}\n\nNovas mensagens:{PromptBuilder.format_history(messages)}\n\nResumo atualizado:"
+    
+    @staticmethod
+    def format_history(messages: List[Dict]) -> str:
+        """Formata mensagens do histórico como linhas de diálogo"""
+        lines = ""
+        for msg in messages:
+            role = "Usuário" if msg["role"] == "user" else "Jarvis"
+            lines += f"\n{role}: {msg['content']}"
+        return lines
+    
+    def build(self, personality: str, model: str, history: List[Dict],
+              message: str, context: Optional[Dict] = None, summary: str = "",
+              memory: str = "") -> str:
+        """
+        Prompt completo: prefixo estável, resumo, memória, histórico, sufixo volátil e mensagem
+        
+        Args:
+            personality: Personalidade atual
+            model: Modelo de destino (usado na métrica de reaproveitamento)
+            history: Mensagens anteriores a incluir
+            message: Mensagem do usuário
+            context: Dados do sistema (voláteis)
+            summary: Resumo das mensagens que já saíram do histórico
+            memory: Trechos recuperados para esta mensagem (ver format_memory)
+        """
+        prefix = self.prefix(personality)
+        prompt = (f"{prefix}{self.format_summary(summary)}{self.format_memory(memory)}"
+                  f"\n\nHistórico:{self.format_history(history)}"
+                  f"\n\n{self.volatile_suffix(context)}\n\nUsuário: {message}\nJarvis:")
+        
+        self._track_full(model, prefix, prompt)
+        return prompt
+    
+    def build_turn(self, pending: List[Dict], message: str, context: Optional[Dict] = None,
+                   memory: str = "") -> str:
+        """Prompt de continuação (o prefixo já está no contexto do backend)"""
+        with self._lock:
+            self._stats['turn_prompts'] += 1
+        
+        turn = f"{self.format_history(pending)}{self.format_memory(memory)}\n\n{self.volatile_suffix(context)}"
+        return f"{turn}\n\nUsuário: {message}\nJarvis:".lstrip()
+    
+    def _track_full(self, model: str, prefix: str, prompt: str):
+        """Mede quanto do prompt anterior do mesmo modelo é reaproveitável"""
+        with self._lock:
+            previous = self._last_prompt.get(model, "")
+            self._last_prompt[model] = prompt
+            
+            common = 0
+            for a, b in zip(previous, prompt):
+                if a != b:
+                    break
+                common += 1
+            
+            self._stats['full_prompts'] += 1
+            self._stats['prompt_chars'] += len(prompt)
+            self._stats['reused_chars'] += common
+            if common >= len(prefix):
+                self._stats['prefix_hits'] += 1
+    
+    def stats(self) -> Dict:
+        """Métricas de reaproveitamento do prefixo"""
+        with self._lock:
+            full = self._stats['full_prompts']
+            chars = self._stats['prompt_chars']
+            return {
+                **self._stats,
+                'prefix_hit_rate': round(self._stats['prefix_hits'] / full, 3) if full else 0.0,
+                'reused_ratio': round(self._stats['reused_chars'] / chars, 3) if chars else 0.0
+            }
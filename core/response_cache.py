@@ -0,0 +1,233 @@
+"""
+Cache de respostas do JARVIS 3.0
+Camada em memória (LRU + TTL) sobre um armazenamento SQLite persistente
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Chaves do contexto que influenciam a resposta, agrupadas em faixas
+CONTEXT_BUCKET_KEYS = ('cpu_percent', 'memory_percent', 'battery_percent')
+CONTEXT_BUCKET_SIZE = 10  # pontos percentuais por faixa
+
+# Perguntas cuja resposta depende da data/hora do prompt (prompt já normalizado)
+TIME_SENSITIVE_RE = re.compile(
+    r"\b(?:hoje|amanha|ontem|agora|horas?|horario|data|dia|semana|mes|ano|atual|atualmente)\b"
+)
+
+class ResponseCache:
+    """
+    Cache de respostas em duas camadas
+    
+    A camada em memória atende acertos repetidos sem I/O; a camada em disco
+    (SQLite em data/) sobrevive a reinicializações e promove as entradas
+    para a memória quando consultada. As duas camadas têm tamanho limitado
+    e descartam primeiro as entradas usadas há mais tempo.
+    """
+    
+    def __init__(self, db_path: Path = Path("data") / "response_cache.db",
+                 max_memory_entries: int = 256, max_disk_entries: int = 5000,
+                 ttl: float = 3600.0):
+        """
+        Args:
+            db_path: Arquivo SQLite da camada persistente
+            max_memory_entries: Limite de entradas em memória
+            max_disk_entries: Limite de entradas em disco
+            ttl: Validade das respostas em segundos
+        """
+        self.db_path = Path(db_path)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_count = 0
+        self._open_db()
+    
+    def _open_db(self):
+        """Abre o banco SQLite; em caso de erro o cache segue só em memória"""
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error as e:
+            self.logger.error(f"Cache em disco indisponível, usando apenas memória: {e}")
+            self._db = None
+    
+    @staticmethod
+    def normalize_prompt(message: str) -> str:
+        """Normaliza a mensagem: minúsculas, sem acentos, espaços e pontuação final"""
+        text = unicodedata.normalize('NFKD', message.lower())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+        return ' '.join(text.split()).strip(' ?!.,;')
+    
+    @classmethod
+    def is_cacheable(cls, message: str) -> bool:
+        """Indica se a resposta pode ser reaproveitada (não depende da data/hora)"""
+        return not TIME_SENSITIVE_RE.search(cls.normalize_prompt(message))
+    
+    @staticmethod
+    def context_buckets(context: Optional[Dict]) -> Tuple:
+        """Reduz o contexto às faixas que podem mudar a resposta"""
+        if not context:
+            return ()
+        
+        buckets = []
+        for key in CONTEXT_BUCKET_KEYS:
+            value = context.get(key)
+            if isinstance(value, (int, float)):
+                buckets.append((key, int(value // CONTEXT_BUCKET_SIZE) * CONTEXT_BUCKET_SIZE))
+        return tuple(buckets)
+    
+    def make_key(self, model: str, personality: str, message: str,
+                 context: Optional[Dict] = None, history: Optional[List[Dict]] = None,
+                 summary: str = "") -> str:
+        """
+        Gera a chave do cache para (modelo, personalidade, prompt, contexto, conversa)
+        
+        O histórico e o resumo entram na chave: "e depois?" só reaproveita a
+        resposta de uma conversa idêntica até ali.
+        """
+        raw = json.dumps([
+            model,
+            personality,
+            self.normalize_prompt(message),
+            self.context_buckets(context),
+            summary,
+            [[m.get("role"), m.get("content")] for m in history or ()]
+        ], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Busca uma resposta na memória e depois no disco"""
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return response
+                del self._memory[key]
+            
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember_in_memory(key, row[0], row[1])
+                        self._stats['disk_hits'] += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    self.logger.error(f"Erro lendo cache em disco: {e}")
+            
+            self._stats['misses'] += 1
+            return None
+    
+    def put(self, key: str, response: str, ttl: Optional[float] = None):
+        """Armazena uma resposta nas duas camadas"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        
+        with self._lock:
+            self._remember_in_memory(key, response, expires_at)
+            self._stats['stores'] += 1
+            
+            if self._db is None:
+                return
+            
+            try:
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO responses (key, response, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, response, expires_at, now)
+                ).rowcount
+                if not inserted:
+                    self._db.execute(
+                        "UPDATE responses SET response = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                        (response, expires_at, now, key)
+                    )
+                self._disk_count += inserted
+                
+                if self._disk_count > self.max_disk_entries:
+                    self._evict_disk()
+                self._db.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Erro gravando cache em disco: {e}")
+    
+    def _remember_in_memory(self, key: str, response: str, expires_at: float):
+        """Insere na camada LRU, descartando as entradas mais antigas"""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+    
+    def _evict_disk(self):
+        """Remove vencidas e ~10% das entradas menos usadas do disco"""
+        self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        
+        if excess > 0:
+            self._stats['evictions'] += self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess + self.max_disk_entries // 10,)
+            ).rowcount
+        
+        self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    
+    def clear(self):
+        """Remove todas as respostas das duas camadas"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM responses")
+                    self._db.commit()
+                    self._disk_count = 0
+                except sqlite3.Error as e:
+                    self.logger.error(f"Erro limpando cache em disco: {e}")
+    
+    def stats(self) -> Dict:
+        """Contadores de acerto/erro e tamanho das camadas"""
+        with self._lock:
+            hits = self._stats['memory_hits'] + self._stats['disk_hits']
+            lookups = hits + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': self._disk_count,
+                'disk_enabled': self._db is not None
+            }
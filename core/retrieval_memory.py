@@ -0,0 +1,321 @@
+"""
+Memória de recuperação do JARVIS 3.0
+Notas, tarefas, conversas antigas e dados de treino indexados por embeddings
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.embeddings import HashingEmbedder, ModelNotCachedError, SentenceEmbedder, load_sentence_model
+from core.plugins import PluginManager
+from core.vector_index import VectorIndex
+
+# Rótulo de cada fonte no prompt
+SOURCE_LABELS = {
+    "note": "nota",
+    "task": "tarefa",
+    "chat": "conversa anterior",
+    "training": "exemplo"
+}
+
+@dataclass
+class MemorySnippet:
+    """Trecho recuperado para o prompt"""
+    key: str
+    source: str
+    text: str
+    score: float
+
+class RetrievalMemory:
+    """
+    Registros do usuário indexados para entrar no prompt por relevância
+    
+    Fontes: notas e tarefas dos plugins, pares pergunta/resposta de
+    training_data/conversational_data.jsonl e trocas da conversa que já
+    saíram do histórico (cortadas ou resumidas). Tudo roda numa thread
+    de fundo: o embedder é escolhido (sentence-transformers, se instalado,
+    senão HashingEmbedder), os plugins são sincronizados a cada
+    `sync_interval` segundos - só registros novos ou alterados são
+    codificados - e as trocas de conversa chegam por uma fila. A busca
+    (search) codifica a consulta e consulta o VectorIndex, que passa de
+    exato a IVF quando a base cresce.
+    """
+    
+    CANDIDATES_PER_SNIPPET = 4
+    
+    def __init__(self, plugins: PluginManager, training_file: Optional[str] = None,
+                 embedding_model: Optional[str] = None, device: Optional[str] = None,
+                 top_k: int = 4, min_score: float = 0.4, sync_interval: float = 30.0,
+                 exact_below: int = 20000, nprobe: int = 16, allow_download: bool = False):
+        """
+        Args:
+            plugins: Gerenciador de plugins (notas e tarefas)
+            training_file: JSONL com mensagens {"role", "content"} (None = sem dados de treino)
+            embedding_model: Modelo do sentence-transformers (None = HashingEmbedder)
+            device: Dispositivo do modelo ("cpu", "cuda"...)
+            top_k: Trechos devolvidos por busca
+            min_score: Similaridade mínima de um trecho
+            sync_interval: Segundos entre sincronizações dos plugins
+            exact_below: Registros a partir dos quais o índice usa IVF
+            nprobe: Listas do IVF abertas por consulta
+            allow_download: Baixa o modelo de embeddings se não estiver no disco
+        """
+        self.plugins = plugins
+        self.training_file = Path(training_file) if training_file else None
+        self.embedding_model = embedding_model
+        self.device = device
+        self.top_k = top_k
+        self.min_score = min_score
+        self.sync_interval = sync_interval
+        self.exact_below = exact_below
+        self.nprobe = nprobe
+        self.allow_download = allow_download
+        self.logger = logging.getLogger(__name__)
+        
+        # Embedder escolhido e primeira sincronização feita
+        self.ready = threading.Event()
+        
+        self.embedder = None
+        self.index: Optional[VectorIndex] = None
+        self._lock = threading.Lock()
+        self._records: Dict[str, Tuple[str, str]] = {}  # chave -> (fonte, texto)
+        self._owners: Dict[str, str] = {}  # chave de conversa -> sessão dona
+        self._hashes: Dict[str, str] = {}  # chave -> hash do texto indexado
+        self._turns: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._sync_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._chat_sequence = 0
+        self._search_ms: List[float] = []
+        self._stats = {'searches': 0, 'snippets': 0, 'embedded': 0, 'syncs': 0}
+    
+    def start(self):
+        """Inicia a thread de indexação (chamadas repetidas são ignoradas)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retrieval-memory", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Encerra a thread de indexação"""
+        self._stop.set()
+        self._turns.put(None)
+    
+    def _run(self):
+        self.embedder = self._load_embedder()
+        self.index = VectorIndex(self.embedder.dim, exact_below=self.exact_below, nprobe=self.nprobe)
+        self._index_training()
+        self._sync_plugins()
+        self.ready.set()
+        
+        next_sync = time.monotonic() + self.sync_interval
+        while not self._stop.is_set():
+            timeout = max(0.0, next_sync - time.monotonic())
+            try:
+                turn = self._turns.get(timeout=min(timeout, 1.0))
+            except queue.Empty:
+                turn = None
+            if turn is not None:
+                self._index_turns([turn] + self._drain_turns())
+            
+            if self._sync_requested.is_set() or time.monotonic() >= next_sync:
+                self._sync_requested.clear()
+                self._sync_plugins()
+                next_sync = time.monotonic() + self.sync_interval
+    
+    def _load_embedder(self):
+        if self.embedding_model:
+            try:
+                model = load_sentence_model(self.embedding_model, self.device, self.allow_download)
+                self.logger.info(f"🧠 Memória de recuperação com {self.embedding_model}")
+                return SentenceEmbedder(model, self.embedding_model)
+            except ImportError:
+                self.logger.info("ℹ️ sentence-transformers não instalado, memória por termos (hashing)")
+            except ModelNotCachedError as e:
+                self.logger.info(f"ℹ️ {e}, memória por termos (hashing)")
+            except Exception as e:
+                self.logger.warning(f"⚠️ Modelo de embeddings indisponível ({e}), memória por termos (hashing)")
+        return HashingEmbedder()
+    
+    def _drain_turns(self) -> List[Tuple[str, str]]:
+        turns = []
+        while True:
+            try:
+                turn = self._turns.get_nowait()
+            except queue.Empty:
+                return turns
+            if turn is not None:
+                turns.append(turn)
+    
+    def _upsert(self, records: List[Tuple[str, str, str]]):
+        """Codifica e indexa (chave, fonte, texto) novos ou alterados"""
+        changed = []
+        for key, source, text in records:
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+            if self._hashes.get(key) != digest:
+                changed.append((key, source, text, digest))
+        if not changed:
+            return
+        
+        for start in range(0, len(changed), 256):
+            batch = changed[start:start + 256]
+            vectors = self.embedder.encode([text for _, _, text, _ in batch])
+            self.index.add([key for key, _, _, _ in batch], vectors)
+            with self._lock:
+                for key, source, text, digest in batch:
+                    self._records[key] = (source, text)
+                    self._hashes[key] = digest
+                self._stats['embedded'] += len(batch)
+    
+    def _remove(self, keys: List[str]):
+        if not keys:
+            return
+        self.index.remove(keys)
+        with self._lock:
+            for key in keys:
+                self._records.pop(key, None)
+                self._hashes.pop(key, None)
+                self._owners.pop(key, None)
+    
+    def _index_training(self):
+        """Pares pergunta/resposta do arquivo de treino"""
+        if not self.training_file or not self.training_file.exists():
+            return
+        records = []
+        question = None
+        try:
+            with open(self.training_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    message = json.loads(line)
+                    if message.get("role") == "user":
+                        question = message.get("content", "")
+                    elif message.get("role") == "assistant" and question:
+                        records.append((f"training:{len(records)}", "training",
+                                        f"Usuário: {question}\nJarvis: {message.get('content', '')}"))
+                        question = None
+        except Exception as e:
+            self.logger.warning(f"⚠️ Erro lendo {self.training_file}: {e}")
+        self._upsert(records)
+    
+    def _sync_plugins(self):
+        """Notas e tarefas: indexa as novas ou alteradas e tira as removidas"""
+        records = []
+        notes = self.plugins.get_plugin('notes')
+        if notes is not None:
+            for note in list(notes.data.get('notes', [])):
+                records.append((f"note:{note['id']}", "note", f"{note.get('title', '')}: {note.get('content', '')}"))
+        tasks = self.plugins.get_plugin('tasks')
+        if tasks is not None:
+            for task in list(tasks.data.get('tasks', [])):
+                state = "concluída" if task.get('completed') else "pendente"
+                text = f"{task.get('title', '')} ({state})"
+                if task.get('description'):
+                    text += f": {task['description']}"
+                records.append((f"task:{task['id']}", "task", text))
+        
+        try:
+            self._upsert(records)
+            current = {key for key, _, _ in records}
+            with self._lock:
+                stale = [key for key, (source, _) in self._records.items()
+                         if source in ("note", "task") and key not in current]
+                self._stats['syncs'] += 1
+            self._remove(stale)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha sincronizando a memória: {e}")
+    
+    def _index_turns(self, turns: List[Tuple[str, str]]):
+        records = []
+        with self._lock:
+            for session_id, text in turns:
+                self._chat_sequence += 1
+                key = f"chat:{session_id}:{self._chat_sequence}"
+                self._owners[key] = session_id
+                records.append((key, "chat", text))
+        try:
+            self._upsert(records)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha indexando conversa: {e}")
+    
+    def add_messages(self, session_id: str, messages: List[Dict]):
+        """Enfileira mensagens que saíram do histórico (uma entrada por troca)"""
+        turn: List[str] = []
+        for msg in messages:
+            role = "Usuário" if msg.get("role") == "user" else "Jarvis"
+            turn.append(f"{role}: {msg.get('content', '')}")
+            if msg.get("role") != "user":
+                self._turns.put((session_id, "\n".join(turn)))
+                turn = []
+        if turn:
+            self._turns.put((session_id, "\n".join(turn)))
+    
+    def request_sync(self):
+        """Pede uma sincronização dos plugins na próxima volta da thread"""
+        self._sync_requested.set()
+    
+    def search(self, query: str, k: Optional[int] = None,
+               session_id: Optional[str] = None) -> List[MemorySnippet]:
+        """
+        Trechos mais relevantes para a consulta (vazio enquanto não estiver pronta)
+        
+        Conversas antigas são particulares: só voltam para a sessão que as
+        teve. Como o índice é um só, a busca pede CANDIDATES_PER_SNIPPET
+        vezes mais candidatos para sobrar espaço depois do filtro.
+        
+        Args:
+            query: Texto da consulta (a mensagem do usuário)
+            k: Trechos no máximo (padrão: top_k)
+            session_id: Sessão de quem pergunta (None = nenhuma conversa antiga)
+        """
+        if not self.ready.is_set() or not query.strip():
+            return []
+        
+        started = time.perf_counter()
+        k = k or self.top_k
+        vector = self.embedder.encode([query])[0]
+        hits = self.index.search(vector, k * self.CANDIDATES_PER_SNIPPET)
+        
+        snippets = []
+        with self._lock:
+            for key, score in hits:
+                if len(snippets) >= k or score < self.min_score:
+                    break
+                record = self._records.get(key)
+                if record is None:
+                    continue
+                if record[0] == "chat" and (session_id is None or self._owners.get(key) != session_id):
+                    continue
+                snippets.append(MemorySnippet(key, record[0], record[1], round(score, 3)))
+            self._stats['searches'] += 1
+            self._stats['snippets'] += len(snippets)
+            self._search_ms.append((time.perf_counter() - started) * 1000)
+            del self._search_ms[:-100]
+        return snippets
+    
+    def stats(self) -> Dict:
+        """Registros por fonte, índice e custo das buscas"""
+        with self._lock:
+            by_source: Dict[str, int] = {}
+            for source, _ in self._records.values():
+                by_source[source] = by_source.get(source, 0) + 1
+            durations = self._search_ms
+            return {
+                'ready': self.ready.is_set(),
+                'embedder': self.embedder.name if self.embedder else None,
+                'records': by_source,
+                'pending_turns': self._turns.qsize(),
+                'index': self.index.stats() if self.index else None,
+                **self._stats,
+                'avg_search_ms': round(sum(durations) / len(durations), 2) if durations else 0.0
+            }
@@ -0,0 +1,201 @@
+"""
+Runtime assíncrono do JARVIS 3.0
+Um event loop persistente numa thread dedicada, usado por Flask, Socket.IO e CLI
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Iterator, List, Optional
+
+class EngineRuntime:
+    """
+    Event loop único do motor de IA, numa thread de fundo
+    
+    Rotas do Flask, eventos do Socket.IO e o CLI rodam em threads
+    síncronas; em vez de criar e fechar um loop por mensagem, entregam a
+    corrotina a este loop (submit/run) e esperam pelo resultado. Assim
+    pools HTTP (httpx), gerações compartilhadas (SingleFlight) e tarefas
+    de fundo vivem entre requisições. O loop é criado na primeira
+    chamada; stop() cancela o que estiver pendente, executa as rotinas de
+    encerramento (on_shutdown) e fecha o loop. Quem chama run() de uma
+    green thread troca a espera com set_waiter() para não parar o hub.
+    """
+    
+    def __init__(self, name: str = "engine-runtime"):
+        """
+        Args:
+            name: Nome da thread do loop (aparece em logs e depuradores)
+        """
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown: List[Callable[[], Awaitable[Any]]] = []
+        self._wait: Callable[[concurrent.futures.Future, Optional[float]], Any] = self._blocking_wait
+        self._active = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Loop do runtime (iniciado na primeira chamada)"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop, ready),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+    
+    def _run(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+    
+    def in_runtime_thread(self) -> bool:
+        """Indica se o código atual roda na thread do loop"""
+        return self._thread is not None and threading.current_thread() is self._thread
+    
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        Agenda a corrotina no loop (seguro entre threads)
+        
+        Returns:
+            Future de concurrent.futures; cancelá-lo cancela a tarefa no loop
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._active += 1
+        future.add_done_callback(self._finished)
+        return future
+    
+    def _finished(self, future: concurrent.futures.Future):
+        with self._lock:
+            self._active -= 1
+            if future.cancelled():
+                self._stats['cancelled'] += 1
+            elif future.exception() is not None and not isinstance(future.exception(), StopAsyncIteration):
+                self._stats['failed'] += 1
+            else:
+                self._stats['completed'] += 1
+    
+    @staticmethod
+    def _blocking_wait(future: concurrent.futures.Future, timeout: Optional[float]) -> Any:
+        return future.result(timeout)
+    
+    def set_waiter(self, wait: Callable[[concurrent.futures.Future, Optional[float]], Any]):
+        """Troca a espera usada por run() e iterate() (ex.: ServerBridge.wait no servidor eventlet)"""
+        self._wait = wait
+    
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Executa a corrotina no loop e espera o resultado na thread atual
+        
+        Exceções da corrotina são relançadas aqui. Se a espera for
+        interrompida (Ctrl+C no CLI, timeout), a tarefa é cancelada.
+        
+        Raises:
+            RuntimeError: Chamado de dentro do próprio loop (travaria)
+        """
+        if self.in_runtime_thread():
+            coro.close()
+            raise RuntimeError("EngineRuntime.run() chamado dentro do loop do runtime; use await")
+        
+        future = self.submit(coro)
+        try:
+            return self._wait(future, timeout)
+        except BaseException:
+            future.cancel()
+            raise
+    
+    def iterate(self, stream: AsyncIterator) -> Iterator:
+        """
+        Consome um gerador assíncrono do loop a partir de código síncrono
+        
+        Cada item é entregue assim que o gerador o produz. Se o consumidor
+        parar antes do fim (cliente SSE desconectou), o gerador é fechado
+        no loop, encerrando a conexão com o backend.
+        """
+        async def step():
+            return await stream.__anext__()
+        
+        async def close():
+            await stream.aclose()
+        
+        try:
+            while True:
+                try:
+                    yield self.run(step())
+                except StopAsyncIteration:
+                    break
+        finally:
+            try:
+                self.run(close(), timeout=10)
+            except Exception as e:
+                self.logger.debug(f"Falha fechando stream: {e}")
+    
+    def on_shutdown(self, callback: Callable[[], Awaitable[Any]]):
+        """Registra uma corrotina executada no loop antes de fechá-lo (ex.: fechar clientes HTTP)"""
+        with self._lock:
+            self._shutdown.append(callback)
+    
+    def stop(self, timeout: float = 5.0):
+        """Cancela as tarefas pendentes, executa on_shutdown e encerra o loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            callbacks = list(self._shutdown)
+        if loop is None or loop.is_closed():
+            return
+        
+        async def close():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for callback in callbacks:
+                try:
+                    await callback()
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Falha no encerramento do runtime: {e}")
+            await loop.shutdown_asyncgens()
+        
+        if thread is not None and thread.is_alive() and not self.in_runtime_thread():
+            try:
+                asyncio.run_coroutine_threadsafe(close(), loop).result(timeout)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Runtime encerrado com pendências: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+        self.logger.info("🛑 Runtime assíncrono encerrado")
+    
+    def stats(self) -> Dict:
+        """Corrotinas submetidas, em andamento e atraso do loop"""
+        with self._lock:
+            loop = self._loop
+            stats = {**self._stats, 'active': self._active,
+                     'running': loop is not None and loop.is_running()}
+        stats['loop_lag_ms'] = self._lag_ms(loop) if stats['running'] else None
+        return stats
+    
+    def _lag_ms(self, loop: asyncio.AbstractEventLoop) -> Optional[float]:
+        """Tempo até o loop executar um callback agendado agora (loop ocupado = atraso alto)"""
+        if self.in_runtime_thread():
+            return None
+        done = threading.Event()
+        started = time.perf_counter()
+        try:
+            loop.call_soon_threadsafe(done.set)
+        except RuntimeError:
+            return None
+        if not done.wait(1.0):
+            return 1000.0
+        return round((time.perf_counter() - started) * 1000, 2)
@@ -0,0 +1,207 @@
+"""
+Roteamento semântico de intenções do JARVIS 3.0
+Compara a mensagem com frases de exemplo de cada intenção por embeddings
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.embeddings import ModelNotCachedError, load_sentence_model
+from core.intents import INTENT_TABLE, IntentMatch
+
+# Conversa comum: sem estes exemplos toda mensagem cairia na intenção mais próxima
+CHAT_EXAMPLES = [
+    "conte uma piada",
+    "bom dia, tudo bem com você?",
+    "explique como funciona a fotossíntese",
+    "qual a capital da França",
+    "me ajude a escrever um e-mail para o meu chefe",
+    "o que você acha de filmes de ficção científica",
+    "traduza esta frase para o inglês",
+    "obrigado pela ajuda",
+]
+
+CHAT_LABEL = -1
+
+class SemanticIntentRouter:
+    """
+    Roteador de intenções por similaridade de embeddings
+    
+    Os exemplos de cada intenção (chave "examples" da tabela) e os de
+    conversa comum são codificados uma vez pelo sentence-transformers, numa
+    thread de fundo, e guardados como uma matriz NumPy normalizada
+    (exemplos x dimensões). Cada mensagem vira um vetor e é pontuada
+    contra todos os exemplos com um único produto matriz-vetor; várias
+    mensagens juntas são codificadas em lote e pontuadas com um produto
+    matriz-matriz. A nota de cada intenção é a maior similaridade entre
+    seus exemplos. Valem as intenções acima de `threshold` e acima da nota
+    de conversa comum.
+    
+    Enquanto o modelo carrega, se o sentence-transformers não estiver
+    instalado ou se o modelo não estiver no disco (o download só acontece
+    com `allow_download`), route_batch devolve None e quem chama usa as
+    palavras-chave.
+    """
+    
+    def __init__(self, model_name: str, table: Optional[List[Dict]] = None,
+                 threshold: float = 0.6, device: Optional[str] = None, batch_size: int = 32,
+                 allow_download: bool = False):
+        """
+        Args:
+            model_name: Modelo do sentence-transformers (nome ou caminho local)
+            table: Tabela de intenções (padrão: INTENT_TABLE)
+            threshold: Similaridade de cosseno mínima para aceitar uma intenção
+            device: "cpu", "cuda"... (padrão: escolha do sentence-transformers)
+            batch_size: Textos por lote na codificação
+            allow_download: Baixa o modelo da internet se não estiver no disco
+        """
+        self.model_name = model_name
+        self.table = table if table is not None else INTENT_TABLE
+        self.threshold = threshold
+        self.device = device
+        self.batch_size = batch_size
+        self.allow_download = allow_download
+        self.logger = logging.getLogger(__name__)
+        
+        # Modelo carregado e exemplos codificados
+        self.ready = threading.Event()
+        
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._model = None
+        self._matrix: Optional[np.ndarray] = None  # exemplos x dimensões, linhas normalizadas
+        self._group_starts: Optional[np.ndarray] = None  # primeira linha de cada intenção
+        self._group_labels: List[int] = []  # índice na tabela de cada grupo (CHAT_LABEL = conversa)
+        self._unavailable: Optional[str] = None
+        self._encode_ms: List[float] = []
+        self._stats = {'requests': 0, 'batches': 0, 'routed': 0, 'chat': 0}
+    
+    def start(self):
+        """Carrega o modelo em segundo plano (chamadas repetidas são ignoradas)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._load, name="semantic-router", daemon=True)
+        self._thread.start()
+    
+    def _load(self):
+        started = time.monotonic()
+        try:
+            model = load_sentence_model(self.model_name, self.device, self.allow_download)
+            
+            # Exemplos agrupados por intenção: np.maximum.reduceat pega o melhor de cada grupo
+            texts: List[str] = []
+            starts: List[int] = []
+            labels: List[int] = []
+            groups = [(index, intent.get("examples", [])) for index, intent in enumerate(self.table)]
+            groups.append((CHAT_LABEL, CHAT_EXAMPLES))
+            for label, examples in groups:
+                if not examples:
+                    continue
+                starts.append(len(texts))
+                labels.append(label)
+                texts.extend(examples)
+            
+            matrix = self._encode(model, texts)
+        except ImportError:
+            self._unavailable = "sentence-transformers não instalado"
+            self.logger.info("ℹ️ sentence-transformers não instalado, intenções só por palavras-chave")
+            return
+        except ModelNotCachedError as e:
+            self._unavailable = str(e)
+            self.logger.info(f"ℹ️ Roteador semântico desativado: {e}; intenções só por palavras-chave")
+            return
+        except Exception as e:
+            self._unavailable = str(e)
+            self.logger.warning(f"⚠️ Roteador semântico indisponível ({e}), usando palavras-chave")
+            return
+        
+        with self._lock:
+            self._model = model
+            self._matrix = matrix
+            self._group_starts = np.asarray(starts, dtype=np.intp)
+            self._group_labels = labels
+        self.ready.set()
+        self.logger.info(f"🧭 Roteador semântico pronto: {len(texts)} exemplos, "
+                         f"{matrix.shape[1]} dimensões ({time.monotonic() - started:.1f}s)")
+    
+    def _encode(self, model, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings normalizados (textos x dimensões) em float32"""
+        embeddings = model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                  normalize_embeddings=True, show_progress_bar=False)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def route_batch(self, texts: Sequence[str]) -> Optional[List[List[IntentMatch]]]:
+        """
+        Intenções de cada texto, da maior para a menor similaridade
+        
+        Returns:
+            Uma lista por texto (vazia = conversa comum), ou None se o
+            roteador ainda não estiver pronto
+        """
+        if not self.ready.is_set():
+            return None
+        if not texts:
+            return []
+        
+        started = time.perf_counter()
+        embeddings = self._encode(self._model, texts)
+        
+        # (textos x exemplos) -> melhor exemplo de cada intenção (textos x intenções)
+        similarities = embeddings @ self._matrix.T
+        scores = np.maximum.reduceat(similarities, self._group_starts, axis=1)
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        results = []
+        routed = 0
+        for row in scores:
+            results.append(self._matches(row))
+            routed += bool(results[-1])
+        
+        with self._lock:
+            self._stats['requests'] += len(texts)
+            self._stats['batches'] += 1
+            self._stats['routed'] += routed
+            self._stats['chat'] += len(texts) - routed
+            self._encode_ms.append(elapsed)
+            del self._encode_ms[:-100]
+        return results
+    
+    def route(self, text: str) -> Optional[List[IntentMatch]]:
+        """Intenções de um texto (ver route_batch)"""
+        results = self.route_batch([text])
+        return None if results is None else results[0]
+    
+    def _matches(self, scores: np.ndarray) -> List[IntentMatch]:
+        chat_score = -1.0
+        candidates = []
+        for label, score in zip(self._group_labels, scores.tolist()):
+            if label == CHAT_LABEL:
+                chat_score = score
+            elif score >= self.threshold:
+                candidates.append((score, label))
+        
+        matches = []
+        for score, label in sorted(candidates, key=lambda item: (-item[0], item[1])):
+            if score <= chat_score:
+                break
+            intent = self.table[label]
+            matches.append(IntentMatch(intent["type"], intent["action"], round(score, 3), intent.get("plugin")))
+        return matches
+    
+    def stats(self) -> Dict:
+        """Estado do modelo e custo da codificação"""
+        with self._lock:
+            durations = self._encode_ms
+            return {
+                'model': self.model_name,
+                'ready': self.ready.is_set(),
+                'unavailable': self._unavailable,
+                'examples': 0 if self._matrix is None else int(self._matrix.shape[0]),
+                'threshold': self.threshold,
+                **self._stats,
+                'avg_batch_ms': round(sum(durations) / len(durations), 2) if durations else 0.0
+            }
@@ -0,0 +1,168 @@
+"""
+Modo do servidor web do JARVIS 3.0
+Green threads (eventlet) para milhares de conexões WebSocket num só processo
+"""
+
+import concurrent.futures
+import logging
+import queue
+import socket
+import threading
+from typing import Any, Callable, Optional
+
+ASYNC_MODES = ("auto", "eventlet", "threading")
+
+logger = logging.getLogger(__name__)
+
+def resolve_async_mode(requested: str = "auto") -> str:
+    """
+    Modo do Flask-SocketIO a usar
+    
+    "auto" escolhe eventlet quando instalado; "eventlet" sem o pacote cai
+    para threading com um aviso.
+    """
+    requested = (requested or "auto").lower()
+    if requested not in ASYNC_MODES:
+        logger.warning(f"⚠️ async_mode desconhecido ({requested}), usando auto")
+        requested = "auto"
+    if requested == "threading":
+        return "threading"
+    
+    try:
+        import eventlet  # noqa: F401
+        return "eventlet"
+    except ImportError:
+        if requested == "eventlet":
+            logger.warning("⚠️ eventlet não instalado, servidor em modo threading")
+        return "threading"
+
+def raise_fd_limit(wanted: int) -> Optional[int]:
+    """
+    Sobe o limite de arquivos abertos do processo (um por conexão)
+    
+    Returns:
+        Limite em vigor (None onde não há RLIMIT_NOFILE, como no Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError) as e:
+            logger.warning(f"⚠️ Não foi possível subir o limite de arquivos abertos: {e}")
+    return soft
+
+class ServerBridge:
+    """
+    Ponte entre o servidor web e as threads comuns do processo
+    
+    No modo threading tudo vira chamada direta. No eventlet o servidor
+    inteiro (conexões, handlers do Socket.IO, rotas, monitoramento) roda
+    em green threads numa única thread do sistema, sem monkey patching:
+    o runtime asyncio do motor, a memória de recuperação e a residência
+    de modelos continuam em threads reais, com sockets e locks normais.
+    O que atravessa a fronteira passa por aqui:
+    
+    - call(): executa a função no hub do eventlet. As filas das conexões
+      do Socket.IO são green e não podem ser tocadas de outra thread, então
+      os emits do runtime chegam por uma fila e um socketpair que acorda o hub.
+    - wait(): espera um Future do runtime cedendo o hub às outras conexões.
+    - offload(): chamadas bloqueantes (psutil com intervalo, nvidia-smi)
+      rodam no pool de threads reais do eventlet.
+    """
+    
+    def __init__(self, async_mode: str):
+        self.async_mode = async_mode
+        self.cooperative = async_mode == "eventlet"
+        self.logger = logging.getLogger(__name__)
+        
+        self._calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._reader: Optional[socket.socket] = None
+        self._writer: Optional[socket.socket] = None
+        self._hub_thread: Optional[int] = None
+    
+    def start(self, start_background_task: Callable):
+        """
+        Inicia o despacho de chamadas no hub
+        
+        Deve ser chamado na thread que vai rodar o servidor, antes dele.
+        
+        Args:
+            start_background_task: SocketIO.start_background_task
+        """
+        if not self.cooperative or self._reader is not None:
+            return
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._hub_thread = threading.get_ident()
+        start_background_task(self._dispatch)
+    
+    def _dispatch(self):
+        """Green thread que executa as chamadas enfileiradas por outras threads"""
+        from eventlet.hubs import trampoline
+        
+        while True:
+            trampoline(self._reader, read=True)
+            try:
+                while self._reader.recv(4096):
+                    pass
+            except (BlockingIOError, InterruptedError):
+                pass
+            
+            while True:
+                try:
+                    fn, args, kwargs = self._calls.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    self.logger.error(f"Erro em chamada despachada ao servidor: {e}")
+    
+    def call(self, fn: Callable, *args, **kwargs):
+        """Executa `fn` na thread do servidor (direto, se já estiver nela ou no modo threading)"""
+        if not self.cooperative or threading.get_ident() == self._hub_thread:
+            fn(*args, **kwargs)
+            return
+        
+        # Antes de start() a chamada só fica na fila
+        self._calls.put((fn, args, kwargs))
+        if self._writer is not None:
+            try:
+                self._writer.send(b"\0")
+            except (BlockingIOError, InterruptedError):
+                pass  # Buffer cheio: o hub já tem um aviso pendente
+    
+    def wait(self, future: concurrent.futures.Future, timeout: Optional[float] = None) -> Any:
+        """
+        Resultado do Future, sem travar as outras conexões no modo eventlet
+        
+        Raises:
+            concurrent.futures.TimeoutError: Prazo esgotado
+        """
+        if not self.cooperative or threading.get_ident() != self._hub_thread:
+            return future.result(timeout)
+        
+        from eventlet.event import Event
+        from eventlet.timeout import Timeout
+        
+        done = Event()
+        future.add_done_callback(lambda _: self.call(done.send))
+        with Timeout(timeout, concurrent.futures.TimeoutError):
+            done.wait()
+        return future.result(0)
+    
+    def offload(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executa uma chamada bloqueante sem parar o hub (numa thread real no modo eventlet)"""
+        if not self.cooperative or threading.get_ident() != self._hub_thread:
+            return fn(*args, **kwargs)
+        
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
@@ -0,0 +1,160 @@
+"""
+Sessões de conversa do JARVIS 3.0
+Histórico, personalidade e modelo isolados por cliente (Socket.IO / HTTP)
+"""
+
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+DEFAULT_SESSION_ID = "default"
+
+@dataclass
+class OllamaContext:
+    """Contexto (KV) do Ollama acumulado em uma conversa"""
+    model: str
+    personality: str
+    tokens: List[int]
+    pending: List[Dict] = field(default_factory=list)  # Trocas ainda fora de tokens
+
+@dataclass
+class ChatSession:
+    """Estado de conversa de um cliente"""
+    session_id: str
+    personality: str
+    model: Optional[str] = None  # Sobrepõe o modelo da personalidade
+    history: List[Dict] = field(default_factory=list)
+    summary: str = ""  # Resumo das mensagens antigas (ver HistoryCompactor)
+    ollama_context: Optional[OllamaContext] = None
+    last_active: float = field(default_factory=time.monotonic)
+    
+    def to_bytes(self) -> bytes:
+        """Serializa de forma compacta para sessões ociosas"""
+        return zlib.compress(json.dumps(asdict(self), ensure_ascii=False).encode('utf-8'))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ChatSession":
+        """Reconstrói uma sessão serializada com to_bytes"""
+        raw = json.loads(zlib.decompress(data).decode('utf-8'))
+        if raw.get('ollama_context'):
+            raw['ollama_context'] = OllamaContext(**raw['ollama_context'])
+        return cls(**raw)
+
+class SessionStore:
+    """
+    Armazena sessões de conversa com memória limitada
+    
+    Sessões ativas ficam como objetos em uma LRU; depois de `cold_after`
+    segundos sem uso são compactadas (JSON + zlib) e, após `idle_timeout`,
+    descartadas. Acima de `max_sessions`, as menos usadas saem primeiro.
+    """
+    
+    SWEEP_INTERVAL = 30.0  # segundos entre varreduras de sessões ociosas
+    
+    def __init__(self, default_personality: str, max_sessions: int = 1000,
+                 idle_timeout: float = 3600.0, cold_after: float = 300.0):
+        """
+        Args:
+            default_personality: Personalidade das sessões novas
+            max_sessions: Limite total de sessões (ativas + compactadas)
+            idle_timeout: Segundos sem uso até descartar a sessão
+            cold_after: Segundos sem uso até compactar a sessão
+        """
+        self.default_personality = default_personality
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.cold_after = cold_after
+        
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._cold: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (last_active, bytes)
+        self._last_sweep = time.monotonic()
+        self._stats = {'created': 0, 'compacted': 0, 'restored': 0, 'evicted': 0}
+    
+    def get(self, session_id: str) -> ChatSession:
+        """Retorna a sessão (criando ou descompactando se necessário)"""
+        now = time.monotonic()
+        
+        with self._lock:
+            session = self._hot.get(session_id)
+            
+            if session is not None:
+                self._hot.move_to_end(session_id)
+            elif session_id in self._cold:
+                _, data = self._cold.pop(session_id)
+                session = ChatSession.from_bytes(data)
+                self._hot[session_id] = session
+                self._stats['restored'] += 1
+            else:
+                session = ChatSession(session_id, self.default_personality)
+                self._hot[session_id] = session
+                self._stats['created'] += 1
+                self._enforce_limit()
+            
+            session.last_active = now
+            
+            if now - self._last_sweep >= self.SWEEP_INTERVAL:
+                self._sweep(now)
+        
+        return session
+    
+    def drop(self, session_id: str):
+        """Remove uma sessão"""
+        with self._lock:
+            self._hot.pop(session_id, None)
+            self._cold.pop(session_id, None)
+    
+    def sweep(self):
+        """Compacta sessões frias e descarta as ociosas"""
+        with self._lock:
+            self._sweep(time.monotonic())
+    
+    def _sweep(self, now: float):
+        self._last_sweep = now
+        
+        # Sessões ativas estão em ordem de uso: as mais antigas vêm primeiro
+        while self._hot:
+            session_id, session = next(iter(self._hot.items()))
+            idle = now - session.last_active
+            if idle < self.cold_after:
+                break
+            del self._hot[session_id]
+            if idle < self.idle_timeout:
+                self._cold[session_id] = (session.last_active, session.to_bytes())
+                self._stats['compacted'] += 1
+            else:
+                self._stats['evicted'] += 1
+        
+        while self._cold:
+            session_id, (last_active, _) = next(iter(self._cold.items()))
+            if now - last_active < self.idle_timeout:
+                break
+            del self._cold[session_id]
+            self._stats['evicted'] += 1
+    
+    def _enforce_limit(self):
+        """Descarta as sessões menos usadas acima do limite (frias primeiro)"""
+        while len(self._hot) + len(self._cold) > self.max_sessions:
+            if self._cold:
+                self._cold.popitem(last=False)
+            else:
+                self._hot.popitem(last=False)
+            self._stats['evicted'] += 1
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hot) + len(self._cold)
+    
+    def stats(self) -> Dict:
+        """Contadores e ocupação do armazenamento"""
+        with self._lock:
+            return {
+                **self._stats,
+                'active': len(self._hot),
+                'compacted_sessions': len(self._cold),
+                'compacted_bytes': sum(len(data) for _, data in self._cold.values())
+            }
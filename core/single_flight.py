@@ -0,0 +1,236 @@
+"""
+Coalescência de requisições do JARVIS 3.0
+Requisições idênticas em andamento compartilham uma única geração
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Marca o fim de um stream nas filas dos assinantes
+_STREAM_END = object()
+
+class _Flight:
+    """Uma geração em andamento e quem está esperando por ela"""
+    
+    def __init__(self):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.chunks: List[str] = []
+        self.final: Dict = {}
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.waiters = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+
+class SingleFlight:
+    """
+    Executa no máximo uma geração por chave ao mesmo tempo
+    
+    A primeira chamada com uma chave (líder) inicia a geração numa tarefa
+    própria, desvinculada de quem pediu; ela e as chamadas idênticas que
+    chegam enquanto a geração está em andamento (seguidoras) esperam o
+    mesmo resultado ou os mesmos trechos do stream. Quem desiste (cliente
+    cancelou, prazo esgotado) só sai da espera: os demais continuam
+    recebendo, e a geração no backend é cancelada apenas quando não resta
+    ninguém esperando. Funciona entre threads e event loops diferentes,
+    por isso usa concurrent.futures e filas por loop.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'abandoned': 0}
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Chave da requisição a partir de (backend, modelo, prompt, opções...)"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        """Retorna (geração, é líder), registrando uma nova se não houver"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._stats['coalesced'] += 1
+                return flight, False
+            
+            flight = _Flight()
+            flight.waiters = 1
+            self._flights[key] = flight
+            self._stats['leaders'] += 1
+            return flight, True
+    
+    def _start(self, flight: _Flight, coro: Awaitable):
+        """Inicia a geração numa tarefa do loop atual (não é cancelada junto com o líder)"""
+        flight.loop = asyncio.get_running_loop()
+        flight.task = flight.loop.create_task(coro)
+    
+    def _leave(self, key: str, flight: _Flight):
+        """Tira um interessado da geração; sem mais ninguém esperando, ela é cancelada"""
+        with self._lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters <= 0 and not flight.future.done()
+            if abandoned:
+                self._stats['abandoned'] += 1
+                if self._flights.get(key) is flight:
+                    del self._flights[key]  # Chamadas novas com a chave iniciam outra geração
+        
+        if abandoned and flight.task is not None:
+            try:
+                flight.loop.call_soon_threadsafe(flight.task.cancel)
+            except RuntimeError:
+                pass  # Loop da geração já foi fechado
+    
+    def _finish(self, key: str, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+    
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa factory() uma vez para todas as chamadas simultâneas com a chave
+        
+        Args:
+            key: Chave da requisição (ver make_key)
+            factory: Cria a corrotina que produz o resultado
+        """
+        flight, leader = self._join(key)
+        if leader:
+            self._start(flight, self._run(key, flight, factory))
+        
+        # shield: cancelar esta espera não cancela o resultado compartilhado; quem
+        # desistiu não lê o erro que chegar depois, então ele é marcado como lido
+        waiter = asyncio.wrap_future(flight.future)
+        waiter.add_done_callback(self._retrieve)
+        try:
+            return await asyncio.shield(waiter)
+        finally:
+            self._leave(key, flight)
+    
+    async def _run(self, key: str, flight: _Flight, factory: Callable[[], Awaitable[Any]]):
+        """Tarefa da geração de do(): entrega o resultado (ou o erro) a todos que esperam"""
+        try:
+            result = await factory()
+        except Exception as e:
+            self._finish(key, flight)
+            flight.future.set_exception(e)
+        except BaseException as e:
+            self._finish(key, flight)
+            flight.future.set_exception(self._shareable(e))
+            raise
+        else:
+            self._finish(key, flight)
+            flight.future.set_result(result)
+    
+    async def stream(self, key: str, factory: Callable[[Dict], AsyncIterator[str]],
+                     final: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Repassa um stream a todas as chamadas simultâneas com a chave
+        
+        Quem chega no meio recebe primeiro os trechos já gerados. Parar de
+        consumir (cancelamento ou aclose) não interrompe os demais.
+        
+        Args:
+            key: Chave da requisição (ver make_key)
+            factory: Recebe o dicionário do registro final e cria o stream
+            final: Preenchido com o registro final compartilhado ao término
+        """
+        flight, leader = self._join(key)
+        if leader:
+            self._start(flight, self._produce(key, flight, factory))
+        
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            backlog = list(flight.chunks)
+            done = flight.future.done()
+            if not done:
+                flight.subscribers.append(subscriber)
+        
+        try:
+            for chunk in backlog:
+                yield chunk
+            
+            if not done:
+                while True:
+                    item = await subscriber[1].get()
+                    if item is _STREAM_END:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            
+            error = flight.future.exception()
+            if error is not None:
+                raise error
+            if final is not None:
+                final.update(flight.final)
+        finally:
+            with self._lock:
+                if subscriber in flight.subscribers:
+                    flight.subscribers.remove(subscriber)
+            self._leave(key, flight)
+    
+    async def _produce(self, key: str, flight: _Flight, factory: Callable[[Dict], AsyncIterator[str]]):
+        """Tarefa da geração de stream(): publica cada trecho para os assinantes"""
+        try:
+            async for chunk in factory(flight.final):
+                with self._lock:
+                    flight.chunks.append(chunk)
+                    subscribers = list(flight.subscribers)
+                self._publish(subscribers, chunk)
+        except Exception as e:
+            self._close(key, flight, e)
+        except BaseException as e:
+            self._close(key, flight, self._shareable(e))
+            raise
+        else:
+            self._close(key, flight, None)
+    
+    def _close(self, key: str, flight: _Flight, error: Optional[Exception]):
+        """Encerra o stream e avisa os assinantes"""
+        self._finish(key, flight)
+        with self._lock:
+            if error is None:
+                flight.future.set_result(None)
+            else:
+                flight.future.set_exception(error)
+            subscribers = list(flight.subscribers)
+        self._publish(subscribers, _STREAM_END if error is None else error)
+    
+    @staticmethod
+    def _retrieve(future: asyncio.Future):
+        if not future.cancelled():
+            future.exception()
+    
+    @staticmethod
+    def _shareable(error: BaseException) -> Exception:
+        """Geração interrompida por fora (runtime encerrando) vira erro comum para quem ainda espera"""
+        return RuntimeError(f"Geração compartilhada interrompida: {type(error).__name__}")
+    
+    @staticmethod
+    def _publish(subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]], item: Any):
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Loop do assinante já foi fechado
+    
+    def in_flight(self) -> int:
+        """Quantidade de gerações em andamento"""
+        with self._lock:
+            return len(self._flights)
+    
+    def stats(self) -> Dict:
+        """Contadores de líderes, requisições coalescidas e gerações abandonadas"""
+        with self._lock:
+            total = self._stats['leaders'] + self._stats['coalesced']
+            return {
+                **self._stats,
+                'in_flight': len(self._flights),
+                'coalesced_ratio': round(self._stats['coalesced'] / total, 3) if total else 0.0
+            }
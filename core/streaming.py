@@ -0,0 +1,60 @@
+"""
+Utilitários de streaming do JARVIS 3.0
+Ponte entre os geradores assíncronos da IA e o código síncrono do Flask
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from core.runtime import EngineRuntime
+
+def iterate_sync(stream: AsyncIterator[str], runtime: Optional[EngineRuntime] = None) -> Iterator[str]:
+    """
+    Consome um gerador assíncrono a partir de código síncrono
+    
+    Cada item é produzido assim que o gerador o entrega, permitindo
+    repassar tokens em respostas HTTP chunked. Se o consumidor parar antes
+    do fim, o gerador é fechado (encerrando a conexão com o backend).
+    
+    Args:
+        stream: Gerador assíncrono (ex.: AIEngine.chat_stream)
+        runtime: Loop persistente onde o gerador roda (padrão: um loop só para este stream)
+        
+    Yields:
+        Itens do gerador
+    """
+    if runtime is not None:
+        yield from runtime.iterate(stream)
+        return
+    
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(stream.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """
+    Formata um evento Server-Sent Events
+    
+    Args:
+        data: Dados serializados em JSON no campo data
+        event: Nome do evento (opcional)
+    """
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        payload = f"event: {event}\n{payload}"
+    return payload
+
+# Cabeçalhos para respostas SSE sem buffer em proxies
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
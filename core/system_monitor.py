@@ -41,10 +41,15 @@ class SystemMonitor:
         self.last_network = None
         self.last_network_time = None
         
-    def get_cpu_info(self) -> Dict:
-        """Obtém informações da CPU"""
+    def get_cpu_info(self, interval: Optional[float] = 1) -> Dict:
+        """
+        Obtém informações da CPU
+        
+        Args:
+            interval: Segundos de medição (None = desde a última leitura, sem esperar)
+        """
         return {
-            'percent': psutil.cpu_percent(interval=1),
+            'percent': psutil.cpu_percent(interval=interval),
             'count': psutil.cpu_count(),
             'frequency': psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None,
             'per_cpu': psutil.cpu_percent(percpu=True)
@@ -223,6 +228,15 @@ class SystemMonitor:
             gpu_usage=gpu_info
         )
     
+    def get_load_snapshot(self) -> Dict:
+        """CPU, memória e bateria sem esperar o intervalo de medição da CPU (contexto do chat)"""
+        battery = self.get_battery_info()
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': psutil.virtual_memory().percent,
+            'battery_percent': battery['percent'] if battery else None
+        }
+    
     def get_system_overview(self) -> Dict:
         """Obtém uma visão geral do sistema"""
         return {
@@ -0,0 +1,225 @@
+"""
+Índice vetorial do JARVIS 3.0
+Busca de vizinhos mais próximos em NumPy: exata em conjuntos pequenos, IVF nos grandes
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+class VectorIndex:
+    """
+    Vizinhos mais próximos por produto interno (vetores normalizados = cosseno)
+    
+    Até `exact_below` vetores a busca é exata: um produto matriz-vetor
+    com todos. Acima disso o índice passa a IVF (inverted file): um
+    k-means esférico agrupa os vetores em ~sqrt(n) listas; a consulta é
+    comparada com os centróides, abre só as `nprobe` listas mais próximas
+    e pontua os vetores delas. Vetores novos entram na lista do centróide
+    mais próximo; o k-means é refeito quando o total dobra desde o último
+    treino. Chaves repetidas substituem o vetor anterior.
+    """
+    
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLE_PER_LIST = 64  # vetores de treino por lista
+    CHUNK = 65536  # linhas por bloco nas atribuições (limita a memória temporária)
+    
+    def __init__(self, dim: int, exact_below: int = 20000, nprobe: int = 16,
+                 nlist: Optional[int] = None, seed: int = 0):
+        """
+        Args:
+            dim: Dimensão dos vetores
+            exact_below: Tamanho a partir do qual o índice treina o IVF
+            nprobe: Listas abertas por consulta (mais = recall maior, consulta mais lenta)
+            nlist: Número de listas (padrão: ~sqrt(n) no treino)
+            seed: Semente do k-means
+        """
+        self.dim = dim
+        self.exact_below = exact_below
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.RLock()
+        self._rng = np.random.default_rng(seed)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0  # linhas usadas (vivas e removidas)
+        self._keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        
+        # IVF (None = busca exata)
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._pending: Dict[int, List[int]] = {}  # lista -> linhas novas ainda fora do array
+        self._trained_size = 0
+        self._train_seconds = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    @property
+    def is_ivf(self) -> bool:
+        """Indica se as buscas usam o IVF"""
+        return self._centroids is not None
+    
+    def _reserve(self, rows: int):
+        """Amplia as matrizes dobrando a capacidade"""
+        capacity = self._vectors.shape[0]
+        if self._size + rows <= capacity:
+            return
+        capacity = max(1024, capacity * 2, self._size + rows)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - self._alive.shape[0], dtype=bool)])
+        self._assign = np.concatenate([self._assign, np.full(capacity - self._assign.shape[0], -1, dtype=np.int32)])
+    
+    def add(self, keys: Sequence[str], vectors: np.ndarray):
+        """Insere ou substitui vetores (linhas de `vectors`, normalizadas)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        if not len(keys):
+            return
+        
+        with self._lock:
+            self.remove(keys)
+            self._reserve(len(keys))
+            start = self._size
+            end = start + len(keys)
+            self._vectors[start:end] = vectors
+            self._alive[start:end] = True
+            self._size = end
+            for offset, key in enumerate(keys):
+                self._keys.append(key)
+                self._rows[key] = start + offset
+            
+            if self._centroids is not None:
+                assign = self._nearest_centroids(self._vectors[start:end])
+                self._assign[start:end] = assign
+                for row, cluster in zip(range(start, end), assign.tolist()):
+                    self._pending.setdefault(cluster, []).append(row)
+            
+            if len(self._rows) >= self.exact_below and len(self._rows) >= 2 * self._trained_size:
+                self._train()
+    
+    def remove(self, keys: Sequence[str]):
+        """Remove vetores pela chave (chaves inexistentes são ignoradas)"""
+        with self._lock:
+            for key in keys:
+                row = self._rows.pop(key, None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._keys[row] = None
+    
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        assign = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], self.CHUNK):
+            block = vectors[start:start + self.CHUNK]
+            assign[start:start + block.shape[0]] = np.argmax(block @ self._centroids.T, axis=1)
+        return assign
+    
+    def _train(self):
+        """K-means esférico numa amostra e redistribuição de todos os vetores vivos"""
+        started = time.monotonic()
+        rows = np.flatnonzero(self._alive[:self._size])
+        nlist = self.nlist or max(1, int(math.sqrt(len(rows))))
+        sample_size = min(len(rows), nlist * self.KMEANS_SAMPLE_PER_LIST)
+        sample = self._vectors[self._rng.choice(rows, sample_size, replace=False)]
+        
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            self._centroids = centroids
+            assign = self._nearest_centroids(sample)
+            counts = np.bincount(assign, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            filled = counts > 0
+            sums = np.zeros_like(centroids)
+            sums[filled] = np.add.reduceat(sample[np.argsort(assign, kind="stable")], starts[filled], axis=0)
+            norms = np.linalg.norm(sums, axis=1)
+            # Lista vazia recebe um vetor qualquer da amostra
+            empty = norms == 0
+            if empty.any():
+                sums[empty] = sample[self._rng.choice(sample_size, int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / norms[:, None]
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        
+        # Compacta: linhas removidas saem das listas
+        assign = self._nearest_centroids(self._vectors[rows])
+        self._assign[:] = -1
+        self._assign[rows] = assign
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        sorted_rows = rows[order]
+        self._lists = [sorted_rows[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        self._pending = {}
+        self._trained_size = len(rows)
+        self._train_seconds = time.monotonic() - started
+        self.logger.info(f"🗂️ Índice IVF treinado: {len(rows)} vetores em {nlist} listas "
+                         f"({self._train_seconds:.1f}s)")
+    
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Linhas vivas das listas mais próximas da consulta"""
+        scores = self._centroids @ query
+        nprobe = min(nprobe, len(self._lists))
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        parts = []
+        for cluster in probe.tolist():
+            pending = self._pending.pop(cluster, None)
+            if pending:
+                self._lists[cluster] = np.concatenate([self._lists[cluster], np.asarray(pending, dtype=np.int64)])
+            parts.append(self._lists[cluster])
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        return rows[self._alive[rows]]
+    
+    def search(self, query: np.ndarray, k: int = 5, nprobe: Optional[int] = None,
+               exact: bool = False) -> List[Tuple[str, float]]:
+        """
+        Os `k` vetores mais similares à consulta
+        
+        Args:
+            query: Vetor normalizado
+            nprobe: Listas abertas nesta consulta (padrão: self.nprobe)
+            exact: Força a busca exata mesmo com o IVF treinado
+        
+        Returns:
+            Lista de (chave, similaridade), da maior para a menor
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            if not self._rows or k <= 0:
+                return []
+            
+            if self._centroids is None or exact:
+                rows = None
+                scores = self._vectors[:self._size] @ query
+                scores[~self._alive[:self._size]] = -np.inf
+            else:
+                rows = self._candidates(query, nprobe or self.nprobe)
+                scores = self._vectors[rows] @ query
+            
+            k = min(k, int(np.isfinite(scores).sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found = top if rows is None else rows[top]
+            return [(self._keys[row], float(score)) for row, score in zip(found.tolist(), scores[top].tolist())]
+    
+    def stats(self) -> Dict:
+        """Tamanho e modo do índice"""
+        with self._lock:
+            return {
+                'vectors': len(self._rows),
+                'dim': self.dim,
+                'mode': 'ivf' if self._centroids is not None else 'exact',
+                'lists': len(self._lists),
+                'nprobe': self.nprobe,
+                'trained_size': self._trained_size,
+                'train_seconds': round(self._train_seconds, 2)
+            }
@@ -4,8 +4,7 @@
 Serve interface HTML e conecta com Ollama local
 """
 
-from flask import Flask, request, jsonify, render_template_string
-import asyncio
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 import json
 import sys
 import os
@@ -15,9 +14,11 @@ from pathlib import Path
 # Add project path
 sys.path.append('NEW_JARVIS')
 
-from core.ai_engine import AIEngine
+from core.ai_engine import AIEngine, GenerationBusyError
+from core.cancellation import CancelToken, RequestCancelledError
 from core.config import Config
 from core.ollama_integration import OllamaLocalAI
+from core.streaming import iterate_sync, sse_event, SSE_HEADERS
 
 app = Flask(__name__)
 
@@ -38,6 +39,17 @@ def init_ai():
         print(f"❌ Erro inicializando IA: {e}")
         return False
 
+def cancel_token(data):
+    """Token da requisição com o prazo pedido pelo cliente (limitado por request_timeout)"""
+    timeout = ai_engine.config.request_timeout
+    try:
+        requested = float(data.get('timeout') or 0)
+    except (TypeError, ValueError):
+        requested = 0
+    if requested > 0:
+        timeout = min(requested, timeout) if timeout else requested
+    return CancelToken(timeout or None, data.get('request_id'))
+
 @app.route('/')
 def index():
     """Página principal - Interface Avançada JARVIS"""
@@ -71,6 +83,7 @@ def chat_api():
         message = data.get('message', '')
         personality = data.get('personality', 'assistente')
         model = data.get('model', 'jarvis-personal')
+        session_id = data.get('session_id') or request.remote_addr
         
         if not message:
             return jsonify({'error': 'Mensagem vazia'}), 400
@@ -81,27 +94,46 @@ def chat_api():
         if not ai_engine:
             return jsonify({'error': 'IA Engine não disponível'}), 500
         
-        # Set personality
-        ai_engine.set_personality(personality)
+        # Personalidade e modelo valem só para a sessão deste cliente
+        ai_engine.set_personality(personality, session_id)
+        ai_engine.set_model(model if model and model != 'jarvis-personal' else None, session_id)
         
-        # Try to set specific model if provided
-        if model and model != 'jarvis-personal':
-            try:
-                # Update model in ollama integration
-                if ai_engine.ollama:
-                    ai_engine.ollama.set_model(model)
-                    # Update personality mapping
-                    ai_engine.personalities[personality]['ollama_model'] = model
-            except Exception as e:
-                print(f"⚠️ Erro definindo modelo {model}: {e}")
-        
-        # Get response using asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            response = loop.run_until_complete(ai_engine.chat(message))
-        finally:
-            loop.close()
+        # Prazo da requisição: {"timeout": segundos}, limitado por request_timeout
+        cancel = cancel_token(data)
+        
+        # Streaming via SSE: {"stream": true} ou Accept: text/event-stream
+        if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+            if ai_engine.scheduler.is_saturated():
+                raise GenerationBusyError()
+            
+            def generate():
+                chunks = []
+                try:
+                    stream = ai_engine.chat_stream(message, session_id=session_id, cancel=cancel)
+                    for chunk in iterate_sync(stream, ai_engine.runtime):
+                        chunks.append(chunk)
+                        yield sse_event({'chunk': chunk})
+                except GenerationBusyError as e:
+                    yield sse_event({'success': False, 'error': str(e), 'busy': True}, event='error')
+                    return
+                except RequestCancelledError as e:
+                    yield sse_event({'success': False, 'error': str(e), 'timeout': True}, event='error')
+                    return
+                
+                yield sse_event({
+                    'success': True,
+                    'response': ''.join(chunks).strip(),
+                    'personality': personality,
+                    'model': model,
+                    'timestamp': time.time()
+                }, event='done')
+            
+            return Response(stream_with_context(generate()),
+                            mimetype='text/event-stream',
+                            headers=SSE_HEADERS)
+        
+        # Loop persistente do motor de IA (pool HTTP compartilhado entre requisições)
+        response = ai_engine.runtime.run(ai_engine.chat(message, session_id=session_id, cancel=cancel))
         
         return jsonify({
             'success': True,
@@ -111,6 +143,10 @@ def chat_api():
             'timestamp': time.time()
         })
         
+    except GenerationBusyError as e:
+        return jsonify({'error': str(e), 'busy': True}), 429, {'Retry-After': str(int(e.retry_after))}
+    except RequestCancelledError as e:
+        return jsonify({'error': str(e), 'timeout': True}), 504
     except Exception as e:
         print(f"❌ Erro no chat API: {e}")
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+🔌 Teste de carga do WebSocket (Socket.IO) do JARVIS 3.0
+
+Abre N conexões ociosas e M conexões ativas num único processo cliente
+(asyncio, cliente Socket.IO mínimo sobre WebSocket, sem dependências) e
+mede no servidor:
+- memória por conexão ociosa (RSS do processo do servidor, via psutil);
+- latência das respostas de chat das conexões ativas (p50/p95/p99);
+- conexões ociosas que sobrevivem aos pings durante o teste.
+
+A mensagem padrão cai no caminho rápido (sem LLM), então o teste mede o
+servidor e o runtime, não o modelo. Sai com código 1 se alguma conexão
+falhar, cair, ou se a memória por conexão passar do limite.
+
+Uso:
+    python load_test_websocket.py --spawn --async-mode eventlet      # sobe o servidor e testa
+    python load_test_websocket.py --url http://localhost:5000 --pid 1234 --idle 5000 --active 300
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.server_mode import raise_fd_limit
+
+class SocketIOClient:
+    """Cliente Socket.IO (Engine.IO 4, só transporte WebSocket) para teste de carga"""
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.task: Optional[asyncio.Task] = None
+        self.waiters: Dict[str, asyncio.Future] = {}
+        self.events = 0
+    
+    @property
+    def alive(self) -> bool:
+        return self.task is not None and not self.task.done()
+    
+    async def connect(self, timeout: float = 15.0):
+        """Handshake HTTP, abertura do Engine.IO e conexão ao namespace '/'"""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        headers = await asyncio.wait_for(self.reader.readuntil(b"\r\n\r\n"), timeout)
+        if b" 101 " not in headers.split(b"\r\n", 1)[0]:
+            raise ConnectionError(headers.split(b"\r\n", 1)[0].decode(errors="replace"))
+        
+        opened = await asyncio.wait_for(self._read_text(), timeout)
+        if not opened.startswith("0"):
+            raise ConnectionError(f"Abertura inesperada: {opened[:40]}")
+        self._send_text("40")
+        while True:
+            packet = await asyncio.wait_for(self._read_text(), timeout)
+            if packet.startswith("40"):
+                break
+            if packet.startswith("44"):
+                raise ConnectionError(f"Conexão recusada: {packet[2:80]}")
+        self.task = asyncio.create_task(self._listen())
+    
+    def _send_frame(self, opcode: int, payload: bytes):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        # Máscara exigida do cliente: XOR com a chave repetida
+        repeated = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+        self.writer.write(header + mask + masked)
+    
+    def _send_text(self, text: str):
+        self._send_frame(0x1, text.encode())
+    
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return bool(first & 0x80), first & 0x0F, payload
+    
+    async def _read_text(self) -> str:
+        """Próxima mensagem de texto (junta fragmentos, responde pings do WebSocket)"""
+        parts: List[bytes] = []
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == 0x8:
+                raise ConnectionError("Servidor fechou a conexão")
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode in (0x1, 0x0):
+                parts.append(payload)
+                if fin:
+                    return b"".join(parts).decode()
+    
+    async def _listen(self):
+        while True:
+            packet = await self._read_text()
+            if packet == "2":
+                self._send_text("3")  # pong do Engine.IO
+            elif packet.startswith("42"):
+                self.events += 1
+                event, *args = json.loads(packet[2:])
+                data = args[0] if args else {}
+                waiter = self.waiters.get(data.get("request_id")) if isinstance(data, dict) else None
+                if waiter is not None and not waiter.done() and event in ("chat_response", "chat_error", "chat_cancelled"):
+                    waiter.set_result((event, data))
+            elif packet.startswith("1"):
+                return  # Engine.IO close
+    
+    def emit(self, event: str, data: Dict):
+        self._send_text("42" + json.dumps([event, data]))
+    
+    async def chat(self, message: str, stream: bool, timeout: float) -> Tuple[str, float]:
+        """Envia uma mensagem e espera a resposta com o mesmo request_id"""
+        request_id = uuid.uuid4().hex
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[request_id] = waiter
+        started = time.perf_counter()
+        try:
+            self.emit("chat_message", {"message": message, "stream": stream, "request_id": request_id})
+            event, _ = await asyncio.wait_for(waiter, timeout)
+            return event, time.perf_counter() - started
+        finally:
+            self.waiters.pop(request_id, None)
+    
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        if self.writer is not None:
+            try:
+                self._send_frame(0x8, struct.pack("!H", 1000))
+                self.writer.close()
+            except Exception:
+                pass
+
+async def open_clients(count: int, host: str, port: int, concurrency: int) -> Tuple[List[SocketIOClient], int]:
+    """Abre `count` conexões, no máximo `concurrency` handshakes ao mesmo tempo"""
+    semaphore = asyncio.Semaphore(concurrency)
+    clients: List[SocketIOClient] = []
+    failures = 0
+    
+    async def one():
+        nonlocal failures
+        client = SocketIOClient(host, port)
+        async with semaphore:
+            try:
+                await client.connect()
+                clients.append(client)
+            except Exception:
+                failures += 1
+                await client.close()
+    
+    await asyncio.gather(*(one() for _ in range(count)))
+    return clients, failures
+
+def rss_mb(pid: Optional[int]) -> Optional[float]:
+    if pid is None:
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except psutil.Error:
+        return None
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def spawn_server(port: int, async_mode: str) -> subprocess.Popen:
+    """Sobe main.py em modo web e espera a porta responder"""
+    root = Path(__file__).parent
+    process = subprocess.Popen(
+        [sys.executable, str(root / "main.py"), "--mode", "web", "--host", "127.0.0.1",
+         "--port", str(port), "--async-mode", async_mode],
+        cwd=str(root), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 90
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor saiu com código {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Servidor não respondeu em 90 s")
+
+async def run(args) -> int:
+    url = urlparse(args.url)
+    host, port = url.hostname or "localhost", url.port or 80
+    pid = args.pid
+    
+    # Uma conexão de aquecimento: importações preguiçosas e caches do servidor
+    warmup, _ = await open_clients(1, host, port, 1)
+    if warmup:
+        await warmup[0].chat(args.message, args.stream, args.timeout)
+    await asyncio.sleep(1)
+    base_rss = rss_mb(pid)
+    
+    print(f"🔌 Abrindo {args.idle} conexões ociosas...")
+    started = time.perf_counter()
+    idle, idle_failures = await open_clients(args.idle, host, port, args.connect_concurrency)
+    print(f"   {len(idle)} abertas, {idle_failures} falhas em {time.perf_counter() - started:.1f}s")
+    await asyncio.sleep(2)
+    idle_rss = rss_mb(pid)
+    
+    print(f"💬 {args.active} conexões ativas x {args.messages} mensagens...")
+    active, active_failures = await open_clients(args.active, host, port, args.connect_concurrency)
+    latencies: List[float] = []
+    outcomes: Dict[str, int] = {}
+    
+    async def converse(client: SocketIOClient):
+        for _ in range(args.messages):
+            try:
+                event, elapsed = await client.chat(args.message, args.stream, args.timeout)
+            except asyncio.TimeoutError:
+                event, elapsed = "timeout", None
+            except Exception:
+                event, elapsed = "failed", None
+            outcomes[event] = outcomes.get(event, 0) + 1
+            if event == "chat_response":
+                latencies.append(elapsed)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(client) for client in active))
+    active_seconds = time.perf_counter() - started
+    peak_rss = rss_mb(pid)
+    
+    # Conexões ociosas precisam responder aos pings do servidor durante a espera
+    if args.hold > 0:
+        print(f"⏳ Mantendo as conexões por {args.hold:.0f}s (pings do servidor)...")
+        await asyncio.sleep(args.hold)
+    dropped = sum(1 for client in idle if not client.alive)
+    
+    for client in idle + active + warmup:
+        await client.close()
+    
+    print("\n📊 Resultado")
+    print(f"   ociosas: {len(idle) - dropped}/{args.idle} vivas ({idle_failures} falhas ao abrir, {dropped} caíram)")
+    print(f"   ativas: {len(active)}/{args.active} abertas, respostas {outcomes} em {active_seconds:.1f}s")
+    if latencies:
+        print(f"   latência: p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, "
+              f"média {statistics.mean(latencies) * 1000:.0f} ms "
+              f"({len(latencies) / active_seconds:.0f} respostas/s)")
+    
+    per_connection_kb = None
+    if base_rss is not None and idle_rss is not None and idle:
+        per_connection_kb = (idle_rss - base_rss) * 1024 / len(idle)
+        print(f"   memória do servidor: {base_rss:.0f} MB -> {idle_rss:.0f} MB com as ociosas "
+              f"({per_connection_kb:.1f} KB/conexão), pico {peak_rss:.0f} MB com as ativas")
+    
+    ok = (idle_failures == 0 and active_failures == 0 and dropped == 0
+          and outcomes.get("chat_response", 0) == args.active * args.messages)
+    if per_connection_kb is not None and per_connection_kb > args.max_kb_per_connection:
+        print(f"❌ Memória por conexão acima de {args.max_kb_per_connection} KB")
+        ok = False
+    print("✅ OK" if ok else "❌ Falhou")
+    return 0 if ok else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do WebSocket do JARVIS")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Servidor já em execução")
+    parser.add_argument("--pid", type=int, help="PID do servidor (medição de memória)")
+    parser.add_argument("--spawn", action="store_true", help="Sobe main.py numa porta livre e mede o próprio processo")
+    parser.add_argument("--async-mode", default="eventlet", choices=["auto", "eventlet", "threading"],
+                        help="Modo do servidor iniciado por --spawn")
+    parser.add_argument("--idle", type=int, default=2000, help="Conexões ociosas")
+    parser.add_argument("--active", type=int, default=200, help="Conexões que conversam")
+    parser.add_argument("--messages", type=int, default=5, help="Mensagens por conexão ativa")
+    parser.add_argument("--message", default="qual o uso de cpu?", help="Texto enviado (padrão: caminho rápido)")
+    parser.add_argument("--stream", action="store_true", help="Pede a resposta em trechos")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Espera máxima por resposta")
+    parser.add_argument("--hold", type=float, default=30.0, help="Segundos com tudo aberto após as conversas")
+    parser.add_argument("--connect-concurrency", type=int, default=50, help="Handshakes simultâneos")
+    parser.add_argument("--max-kb-per-connection", type=float, default=96.0,
+                        help="Memória máxima do servidor por conexão ociosa")
+    args = parser.parse_args()
+    
+    # O cliente também precisa de um descritor por conexão
+    raise_fd_limit(args.idle + args.active + 256)
+    
+    server = None
+    if args.spawn:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        print(f"🚀 Subindo o servidor ({args.async_mode}) na porta {port}...")
+        server = spawn_server(port, args.async_mode)
+        args.url, args.pid = f"http://127.0.0.1:{port}", server.pid
+    
+    try:
+        code = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
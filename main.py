@@ -30,6 +30,8 @@ def main():
                        help='Porta para o servidor web')
     parser.add_argument('--host', default='localhost', 
                        help='Host para o servidor web')
+    parser.add_argument('--async-mode', choices=['auto', 'eventlet', 'threading'],
+                       help='Servidor web: eventlet (milhares de conexões) ou threading')
     
     args = parser.parse_args()
     
@@ -46,6 +48,8 @@ def main():
     try:
         # Carrega a configuração
         config = Config()
+        if args.async_mode:
+            config.web.async_mode = args.async_mode
         
         # Inicializa a aplicação
         app = JarvisApp(config)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+🧪 Servidores Ollama simulados para testar o pool multi-servidor do JARVIS 3.0
+
+Sobe um servidor HTTP por porta imitando a API do Ollama (/api/tags, /api/ps,
+/api/generate com e sem streaming, /api/chat, /api/show, /api/create, /api/pull).
+Cada servidor pode ter latência própria e ser marcado como falho (responde
+/api/tags normalmente, mas as gerações recebem HTTP 503).
+
+Uso:
+    python ollama_stub_servers.py --ports 11501 11502 11503 --latency 0.05 0.2 0.1
+    OLLAMA_URLS=http://localhost:11501,http://localhost:11502 python main.py
+    
+    # Demonstração do roteamento (sobe os servidores e dispara requisições)
+    python ollama_stub_servers.py --ports 11501 11502 11503 --fail 11503 --demo 60
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+DEFAULT_MODELS = ["llama3.2:1b", "jarvis-personal:latest"]
+RESPONSE_WORDS = ["Olá!", "Sou", "o", "JARVIS", "simulado."]
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """Servidor simulado com latência, modelos e falha configuráveis"""
+    
+    daemon_threads = True
+    request_queue_size = 512
+    
+    def __init__(self, port: int, latency: float, models: list, failing: bool = False):
+        super().__init__(("127.0.0.1", port), StubOllamaHandler)
+        self.latency = latency
+        self.models = list(models)
+        self.loaded = set()  # Modelos "na memória" (aparecem em /api/ps)
+        self.keep_alive = {}  # Último keep_alive recebido por modelo
+        self.failing = failing
+        self.generate_count = 0
+        self.lock = threading.Lock()
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send_json(self, obj: dict, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_chunk(self, obj: dict):
+        line = (json.dumps(obj) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+    
+    def do_GET(self):
+        server = self.server
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": name} for name in server.models]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [{"name": name, "size": 1024 ** 3} for name in sorted(server.loaded)]})
+        else:
+            self._send_json({"error": "não encontrado"}, 404)
+    
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        
+        if server.failing:
+            return self._send_json({"error": "servidor simulado em falha"}, 503)
+        
+        if self.path == "/api/generate":
+            self._generate(body)
+        elif self.path == "/api/chat":
+            time.sleep(server.latency)
+            self._send_json({
+                "model": body.get("model"),
+                "message": {"role": "assistant", "content": " ".join(RESPONSE_WORDS)},
+                "done": True,
+                "prompt_eval_count": 10,
+                "eval_count": len(RESPONSE_WORDS)
+            })
+        elif self.path == "/api/show":
+            self._send_json({"details": {"family": "stub"}, "model_info": {}})
+        elif self.path in ("/api/create", "/api/pull"):
+            name = body.get("name") or body.get("model")
+            if name and name not in server.models:
+                server.models.append(name)
+            self._send_json({"status": "success"})
+        else:
+            self._send_json({"error": "não encontrado"}, 404)
+    
+    def _generate(self, body: dict):
+        server = self.server
+        model = body.get("model")
+        
+        if model not in server.models:
+            return self._send_json({"error": f"model '{model}' not found"}, 404)
+        
+        with server.lock:
+            server.generate_count += 1
+            # Primeiro uso do modelo custa mais (carregamento)
+            cold = model not in server.loaded
+            unload = body.get("keep_alive") in (0, "0", "0s")
+            if unload:
+                server.loaded.discard(model)
+            else:
+                server.loaded.add(model)
+            server.keep_alive[model] = body.get("keep_alive")
+        
+        # keep_alive=0 sem prompt: só descarrega o modelo
+        if unload and not body.get("prompt"):
+            return self._send_json({"model": model, "response": "", "done": True, "done_reason": "unload"})
+        
+        time.sleep(server.latency * (3 if cold else 1))
+        
+        # Requisição de aquecimento: prompt vazio só carrega o modelo
+        if not body.get("prompt"):
+            return self._send_json({"model": model, "response": "", "done": True})
+        
+        final = {
+            "model": model,
+            "response": "",
+            "done": True,
+            "context": [1, 2, 3],
+            "prompt_eval_count": len(body.get("prompt", "").split()),
+            "eval_count": len(RESPONSE_WORDS)
+        }
+        
+        if not body.get("stream", True):
+            final["response"] = " ".join(RESPONSE_WORDS)
+            return self._send_json(final)
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in RESPONSE_WORDS:
+            self._send_chunk({"model": model, "response": word + " ", "done": False})
+            time.sleep(0.01)
+        self._send_chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+
+def start_servers(ports, latencies, models, failing_ports):
+    """Sobe um servidor simulado por porta em threads de fundo"""
+    servers = []
+    for i, port in enumerate(ports):
+        latency = latencies[min(i, len(latencies) - 1)]
+        server = StubOllamaServer(port, latency, models, failing=port in failing_ports)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        state = "❌ falhando" if server.failing else "✅ ativo"
+        print(f"🧪 Ollama simulado em http://localhost:{port} (latência {latency:.3f}s) {state}")
+    return servers
+
+async def run_demo(servers, requests_count: int):
+    """Dispara requisições pelo pool e mostra a distribuição entre servidores"""
+    from core.ollama_integration import OllamaLocalAI, AsyncOllamaLocalAI
+    
+    urls = [f"http://localhost:{server.server_address[1]}" for server in servers]
+    sync_ai = OllamaLocalAI(base_urls=urls)
+    sync_ai.check_connection(force=True)
+    async_ai = AsyncOllamaLocalAI(pool=sync_ai.pool)
+    
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        async_ai.chat(f"pergunta {i}", model="llama3.2:1b") for i in range(requests_count)
+    ])
+    elapsed = time.perf_counter() - started
+    await async_ai.aclose()
+    
+    ok = sum(1 for result in results if result.startswith("Olá"))
+    print(f"\n📊 {ok}/{requests_count} respostas em {elapsed:.2f}s")
+    for server, backend in zip(servers, sync_ai.pool.stats()):
+        print(f"   {backend['url']}: {server.generate_count} gerações, "
+              f"latência média {backend['latency_ewma_ms']} ms, "
+              f"{'saudável' if backend['healthy'] else 'fora da rotação'}, "
+              f"{backend['errors']} erros")
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidores Ollama simulados")
+    parser.add_argument("--ports", type=int, nargs="+", default=[11501, 11502, 11503])
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.05],
+                        help="Latência por servidor em segundos (o último valor se repete)")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--fail", type=int, nargs="*", default=[],
+                        help="Portas cujas gerações respondem HTTP 503")
+    parser.add_argument("--demo", type=int, metavar="N", default=0,
+                        help="Envia N requisições pelo pool e mostra a distribuição")
+    args = parser.parse_args()
+    
+    servers = start_servers(args.ports, args.latency, args.models, set(args.fail))
+    
+    if args.demo:
+        asyncio.run(run_demo(servers, args.demo))
+        return
+    
+    urls = ",".join(f"http://localhost:{port}" for port in args.ports)
+    print(f"\n💡 OLLAMA_URLS={urls}")
+    print("Ctrl+C para encerrar")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n👋 Servidores encerrados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+🧪 Servidor simulado compatível com a API da OpenAI para testar o JARVIS 3.0
+
+Imita /v1/models e /v1/chat/completions (com e sem streaming SSE), com
+latência configurável e modo de falha (HTTP 500), para exercitar o nível
+OpenAI da cadeia de fallback sem chave real nem acesso à internet.
+
+Uso:
+    python openai_stub_server.py --port 11901 --latency 0.1
+    OPENAI_BASE_URL=http://localhost:11901/v1 OPENAI_API_KEY=stub python main.py
+    
+    # Demonstração (sobe o servidor e compara resposta completa e streaming)
+    python openai_stub_server.py --demo 20
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+RESPONSE_WORDS = ["Olá!", "Sou", "o", "JARVIS", "via", "OpenAI", "simulada."]
+
+class StubOpenAIServer(ThreadingHTTPServer):
+    """Servidor simulado com latência e falha configuráveis"""
+    
+    daemon_threads = True
+    request_queue_size = 512
+    
+    def __init__(self, port: int, latency: float, failing: bool = False):
+        super().__init__(("127.0.0.1", port), StubOpenAIHandler)
+        self.latency = latency
+        self.failing = failing
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send_json(self, obj: dict, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_event(self, obj):
+        data = obj if isinstance(obj, str) else json.dumps(obj)
+        event = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+        self.wfile.flush()
+    
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json({"object": "list", "data": [
+                {"id": "gpt-3.5-turbo", "object": "model", "created": 0, "owned_by": "stub"}
+            ]})
+        else:
+            self._send_json({"error": {"message": "não encontrado"}}, 404)
+    
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json({"error": {"message": "não encontrado"}}, 404)
+        
+        with server.lock:
+            server.request_count += 1
+        
+        if server.failing:
+            return self._send_json({"error": {"message": "servidor simulado em falha",
+                                              "type": "server_error"}}, 500)
+        
+        time.sleep(server.latency)
+        
+        model = body.get("model", "gpt-3.5-turbo")
+        created = int(time.time())
+        
+        if not body.get("stream"):
+            return self._send_json({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(RESPONSE_WORDS)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(RESPONSE_WORDS),
+                          "total_tokens": 10 + len(RESPONSE_WORDS)}
+            })
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        
+        def chunk(delta: dict, finish_reason=None) -> dict:
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+        
+        self._send_event(chunk({"role": "assistant", "content": ""}))
+        for i, word in enumerate(RESPONSE_WORDS):
+            self._send_event(chunk({"content": word if i == 0 else " " + word}))
+            time.sleep(0.01)
+        self._send_event(chunk({}, "stop"))
+        self._send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+def start_server(port: int, latency: float, failing: bool = False) -> StubOpenAIServer:
+    """Sobe o servidor simulado em uma thread de fundo"""
+    server = StubOpenAIServer(port, latency, failing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state = "❌ falhando" if failing else "✅ ativo"
+    print(f"🧪 OpenAI simulada em http://localhost:{port}/v1 (latência {latency:.3f}s) {state}")
+    return server
+
+async def run_demo(server: StubOpenAIServer, requests_count: int):
+    """Dispara requisições pelo cliente do JARVIS e mede latência"""
+    from core.openai_integration import AsyncOpenAIChat
+    
+    client = AsyncOpenAIChat("stub", base_url=f"http://localhost:{server.server_address[1]}/v1")
+    messages = [{"role": "user", "content": "Olá"}]
+    
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        client.complete(messages, model="gpt-3.5-turbo", max_tokens=50, temperature=0.7)
+        for _ in range(requests_count)
+    ])
+    elapsed = time.perf_counter() - started
+    print(f"\n📊 Completo: {len(results)} respostas em {elapsed:.2f}s")
+    
+    started = time.perf_counter()
+    first_chunk = None
+    chunks = []
+    async for chunk in client.stream(messages, model="gpt-3.5-turbo", max_tokens=50, temperature=0.7):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        chunks.append(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"📊 Streaming: primeiro trecho em {first_chunk * 1000:.0f} ms, "
+          f"{len(chunks)} trechos em {elapsed * 1000:.0f} ms: {''.join(chunks)}")
+    
+    await client.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor simulado compatível com a OpenAI")
+    parser.add_argument("--port", type=int, default=11901)
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Latência até a resposta em segundos")
+    parser.add_argument("--fail", action="store_true", help="Responde HTTP 500 a todas as gerações")
+    parser.add_argument("--demo", type=int, metavar="N", default=0,
+                        help="Envia N requisições pelo cliente do JARVIS e mostra a latência")
+    args = parser.parse_args()
+    
+    server = start_server(args.port, args.latency, args.fail)
+    
+    if args.demo:
+        asyncio.run(run_demo(server, args.demo))
+        return
+    
+    print(f"\n💡 OPENAI_BASE_URL=http://localhost:{args.port}/v1 OPENAI_API_KEY=stub")
+    print("Ctrl+C para encerrar")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Testes do cancelamento de requisições
+Cancelamento de outra thread e prazo interrompem a espera pelo backend
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.cancellation import CANCEL_CLIENT, CANCEL_DEADLINE, CancelToken, RequestCancelledError
+
+class HangingBackend:
+    """Camadas de fallback do motor trocadas por uma geração que não termina"""
+    
+    def __init__(self):
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+    
+    async def __call__(self, session, message, context=None, memory=None):
+        self.started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+def test_cancel_from_another_thread_interrupts_bind():
+    token = CancelToken(request_id="r1")
+    
+    async def scenario():
+        async with token.bind():
+            threading.Timer(0.02, token.cancel).start()
+            await asyncio.sleep(3600)
+    
+    with pytest.raises(RequestCancelledError) as caught:
+        asyncio.run(scenario())
+    assert caught.value.reason == CANCEL_CLIENT
+    assert token.cancelled
+    assert not token.cancel()  # Segunda vez não faz nada
+
+def test_deadline_interrupts_bind_and_later_entries_fail_at_once():
+    token = CancelToken(timeout=0.02)
+    
+    async def scenario():
+        async with token.bind():
+            await asyncio.sleep(3600)
+    
+    with pytest.raises(RequestCancelledError) as caught:
+        asyncio.run(scenario())
+    assert caught.value.reason == CANCEL_DEADLINE
+    with pytest.raises(RequestCancelledError):
+        token.check()
+
+def test_outside_cancellation_is_not_turned_into_a_request_cancel():
+    async def scenario():
+        token = CancelToken()
+        
+        async def bound():
+            async with token.bind():
+                await asyncio.sleep(3600)
+        
+        task = asyncio.ensure_future(bound())
+        await asyncio.sleep(0)
+        task.cancel()  # Loop encerrando, não o cliente
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return token.cancelled
+    
+    assert asyncio.run(scenario()) is False
+
+def test_guard_interrupts_the_stream_and_closes_it():
+    closed = []
+    token = CancelToken()
+    
+    async def stream():
+        try:
+            yield "a"
+            await asyncio.sleep(3600)
+            yield "b"
+        finally:
+            closed.append(True)
+    
+    async def scenario():
+        chunks = []
+        async for chunk in token.guard(stream()):
+            chunks.append(chunk)
+            threading.Timer(0.02, token.cancel).start()
+        return chunks
+    
+    with pytest.raises(RequestCancelledError):
+        asyncio.run(scenario())
+    assert closed == [True]
+
+def test_engine_releases_the_backend_and_counts_the_cancellation(engine, monkeypatch):
+    backend = HangingBackend()
+    monkeypatch.setattr(engine, "_fallback_chain", backend)
+    token = CancelToken(request_id="r1")
+    
+    future = engine.runtime.submit(engine.chat("Qual a capital da França?", session_id="ana", cancel=token))
+    assert backend.started.wait(5)
+    token.cancel()
+    
+    with pytest.raises(RequestCancelledError):
+        future.result(timeout=5)
+    assert backend.cancelled.wait(5)
+    assert engine.get_ai_status()['cancellations'] == {CANCEL_CLIENT: 1}
+    assert engine.get_session("ana").history == []  # Nada vai para o histórico
@@ -0,0 +1,208 @@
+"""
+Testes do circuit breaker
+Fechado -> aberto -> meio-aberto -> fechado (ou aberto de novo), e um circuito por servidor no motor
+"""
+
+import pytest
+
+from core import ai_engine, circuit_breaker
+from core.ai_engine import PRIORITY_INTERACTIVE
+from core.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, CircuitOpenError
+from core.ollama_integration import OllamaConnectionError
+
+URL_A = "http://127.0.0.1:9"
+URL_B = "http://127.0.0.1:10"
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(circuit_breaker)
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("ollama", failure_rate=0.5, min_calls=4, window=10,
+                          slow_call_seconds=5.0, open_seconds=30.0)
+
+def _open(breaker):
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+def test_stays_closed_until_the_window_has_enough_calls(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
+
+def test_opens_at_the_failure_rate_and_short_circuits(breaker):
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+    assert not breaker.allow()
+    
+    stats = breaker.stats()
+    assert stats['opened'] == 1
+    assert stats['short_circuited'] == 2
+    assert stats['retry_in_seconds'] == 30.0
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(4):
+        breaker.record_success(elapsed=6.0)
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()['slow_calls'] == 4
+
+def test_half_open_allows_one_probe_and_closes_on_success(breaker, clock):
+    _open(breaker)
+    clock.now += 30.0
+    assert breaker.state == STATE_HALF_OPEN
+    
+    assert breaker.allow()
+    assert not breaker.allow()  # Só um teste por vez
+    
+    breaker.record_success(0.1)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['window_calls'] == 0
+    assert breaker.allow()
+
+def test_failed_or_slow_probe_opens_again(breaker, clock):
+    _open(breaker)
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    
+    clock.now += 29.0
+    assert not breaker.allow()
+    clock.now += 1.0
+    assert breaker.allow()
+    breaker.record_success(elapsed=6.0)
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()['opened'] == 3
+
+def test_probe_without_result_expires(breaker, clock):
+    _open(breaker)
+    clock.now += 30.0
+    assert breaker.allow()
+    
+    clock.now += 29.0
+    assert not breaker.allow()
+    clock.now += 1.0
+    assert breaker.allow()
+
+def test_reset_closes_and_clears_the_window(breaker):
+    _open(breaker)
+    breaker.reset()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+def test_available_only_looks_and_abandon_frees_the_probe(breaker, clock):
+    _open(breaker)
+    assert not breaker.available()
+    assert breaker.stats()['short_circuited'] == 0
+    
+    clock.now += 30.0
+    assert breaker.available() and breaker.available()
+    assert breaker.allow()
+    assert not breaker.available()
+    
+    breaker.abandon()  # Chamada de teste cancelada sem resultado
+    assert breaker.available()
+    assert breaker.state == STATE_HALF_OPEN
+
+def test_unmeasured_latency_is_never_slow(breaker):
+    for _ in range(4):
+        breaker.record_success(None)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['slow_calls'] == 0
+
+@pytest.fixture
+def pool_engine(make_engine, monkeypatch, clock):
+    engine = make_engine(ollama_urls=[URL_A, URL_B])
+    monkeypatch.setattr(engine.ollama, "check_connection", lambda force=False: True)
+    engine.use_local_ai = True
+    return engine
+
+class FakeGenerate:
+    """Geração sem streaming que registra o servidor usado e falha nos indicados"""
+    
+    def __init__(self, failing=(), eval_seconds=0.0, clock=None, elapsed=0.0):
+        self.failing = failing
+        self.eval_seconds = eval_seconds
+        self.clock = clock
+        self.elapsed = elapsed
+        self.urls = []
+    
+    def __call__(self, backend, final):
+        async def generate():
+            self.urls.append(backend.url)
+            if backend.url in self.failing:
+                raise OllamaConnectionError("recusada")
+            if self.clock is not None:
+                self.clock.now += self.elapsed
+            final["eval_duration"] = int(self.eval_seconds * 1e9)
+            return "ok", None
+        return generate()
+
+def _scheduled(engine, generate):
+    final = {}
+    return engine.runtime.run(
+        engine._scheduled(PRIORITY_INTERACTIVE, "llama3", lambda backend: generate(backend, final), final),
+        timeout=5
+    )
+
+def test_breakers_are_kept_per_server(pool_engine):
+    assert set(pool_engine.breakers) == {URL_A, URL_B, "openai"}
+    _open(pool_engine.breakers[URL_A])
+    
+    generate = FakeGenerate()
+    assert pool_engine._tier_available("ollama")
+    assert _scheduled(pool_engine, generate) == ("ok", None)
+    assert generate.urls == [URL_B]
+    
+    _open(pool_engine.breakers[URL_B])
+    assert not pool_engine._tier_available("ollama")
+    with pytest.raises(CircuitOpenError):
+        _scheduled(pool_engine, generate)
+    assert generate.urls == [URL_B]
+
+def test_connection_failure_moves_to_the_next_server(pool_engine):
+    generate = FakeGenerate(failing=(URL_A,))
+    pool_engine.ollama.pool.backends[1].in_flight = 1  # O pool escolhe A primeiro
+    
+    assert _scheduled(pool_engine, generate) == ("ok", None)
+    assert generate.urls == [URL_A, URL_B]
+    assert pool_engine.breakers[URL_A].stats()['failures'] == 1
+    assert pool_engine.breakers[URL_B].stats()['successes'] == 1
+
+def test_availability_checks_leave_the_probe_to_the_call(pool_engine, clock):
+    for url in (URL_A, URL_B):
+        _open(pool_engine.breakers[url])
+    clock.now += 30.0
+    
+    # Checagens (fluxo, hedge, seguidores do single-flight) não reservam o teste
+    for _ in range(3):
+        assert pool_engine._tier_available("ollama")
+    assert all(pool_engine.breakers[url].available() for url in (URL_A, URL_B))
+    
+    generate = FakeGenerate()
+    _scheduled(pool_engine, generate)
+    assert pool_engine.breakers[generate.urls[0]].state == STATE_CLOSED
+
+def test_long_generation_is_judged_by_time_to_first_token(pool_engine, fake_clock):
+    engine_clock = fake_clock(ai_engine)
+    slow_config = pool_engine.config.breaker_slow_call_seconds
+    
+    # Resposta longa de um Ollama saudável: o tempo total passa do limite, o primeiro token não
+    healthy = FakeGenerate(clock=engine_clock, elapsed=slow_config * 3, eval_seconds=slow_config * 3 - 1)
+    for _ in range(6):
+        _scheduled(pool_engine, healthy)
+    assert sum(pool_engine.breakers[url].stats()['slow_calls'] for url in (URL_A, URL_B)) == 0
+    
+    stalled = FakeGenerate(clock=engine_clock, elapsed=slow_config * 3, eval_seconds=1)
+    _scheduled(pool_engine, stalled)
+    assert pool_engine.breakers[stalled.urls[0]].stats()['slow_calls'] == 1
@@ -0,0 +1,99 @@
+"""
+Testes do orçamento de contexto
+Contagem estimada com correção e divisão da janela entre as partes do prompt
+"""
+
+import pytest
+
+from core.context_budget import ContextBudgeter, TokenCounter
+
+MODEL = "llama3.2:1b"
+
+@pytest.fixture
+def counter():
+    return TokenCounter()
+
+@pytest.fixture
+def budgeter(counter):
+    # 400 - 100 - 32 de margem = 268 tokens para o prompt
+    return ContextBudgeter(counter, num_ctx=400, num_predict=100, message_share=0.5, context_share=0.15)
+
+def _turns(count, words=10):
+    history = []
+    for n in range(count):
+        history.append({"role": "user", "content": f"pergunta {n} " + "palavra " * words})
+        history.append({"role": "assistant", "content": f"resposta {n} " + "palavra " * words})
+    return history
+
+def test_estimate_counts_words_and_signs():
+    assert TokenCounter.estimate("") == 0
+    assert TokenCounter.estimate("oi, tudo bem?") == 5
+    assert TokenCounter.estimate("paralelepípedo") == 4
+
+def test_calibration_only_raises_the_estimate(counter):
+    text = "uma frase com algumas palavras"
+    counted = counter.count(MODEL, text)
+    
+    counter.calibrate(MODEL, counted, counted // 2)
+    assert counter.count(MODEL, text) == counted
+    
+    counter.calibrate(MODEL, counted, counted * 2)
+    assert counter.count(MODEL, text) == counted * 2
+    counter.calibrate(MODEL, counted, counted * 100)
+    assert counter.count(MODEL, text) == counted * TokenCounter.MAX_CORRECTION
+    assert counter.count("outro", text) == counted
+
+def test_everything_fits_in_a_roomy_window(budgeter):
+    history = _turns(2)
+    budget = budgeter.fit(MODEL, "Você é o JARVIS.", history, "qual o uso da CPU?", {"cpu_percent": 12.0})
+    
+    assert budget.history == history
+    assert budget.message == "qual o uso da CPU?"
+    assert budget.context == {"cpu_percent": 12.0}
+    assert budget.dropped_messages == 0 and not budget.truncated
+    assert budget.tokens['total'] == sum(v for k, v in budget.tokens.items() if k != 'total')
+    assert budget.tokens['total'] <= budgeter.available
+
+def test_oldest_messages_are_dropped_first(budgeter):
+    history = _turns(10)
+    budget = budgeter.fit(MODEL, "Você é o JARVIS.", history, "e agora?")
+    
+    assert 0 < len(budget.history) < len(history)
+    assert budget.history == history[-len(budget.history):]
+    assert budget.dropped_messages == len(history) - len(budget.history)
+    assert budget.tokens['total'] <= budgeter.available
+
+def test_long_message_is_cut_to_its_share(budgeter, counter):
+    message = "texto " * 400
+    budget = budgeter.fit(MODEL, "Você é o JARVIS.", _turns(3), message)
+    
+    free = budgeter.available - counter.count(MODEL, "Você é o JARVIS.")
+    assert budget.truncated
+    assert message.startswith(budget.message)
+    assert budget.tokens['message'] <= int(free * budgeter.message_share)
+    assert budget.tokens['total'] <= budgeter.available
+
+def test_largest_context_keys_go_first(budgeter):
+    context = {"cpu_percent": 12.0, "processes": ["processo-" + str(n) for n in range(60)]}
+    budget = budgeter.fit(MODEL, "Você é o JARVIS.", [], "como está o sistema?", context)
+    
+    assert budget.truncated
+    assert budget.context == {"cpu_percent": 12.0}
+
+def test_summary_and_memory_take_room_from_the_history(budgeter):
+    history = _turns(3)
+    plain = budgeter.fit(MODEL, "Você é o JARVIS.", history, "e agora?")
+    with_extras = budgeter.fit(MODEL, "Você é o JARVIS.", history, "e agora?",
+                               summary="resumo " * 40, memory="nota antiga " * 20)
+    
+    assert with_extras.tokens['summary'] > 0 and with_extras.tokens['memory'] > 0
+    assert len(with_extras.history) < len(plain.history)
+    assert with_extras.tokens['total'] <= budgeter.available
+
+def test_fit_lines_keeps_order_and_cuts_the_last_one(budgeter, counter):
+    lines = ["primeira nota curta", "segunda nota " + "longa " * 50, "terceira nota"]
+    kept = budgeter.fit_lines(MODEL, lines, 20)
+    
+    assert kept[0] == lines[0]
+    assert len(kept) == 2 and lines[1].startswith(kept[1])
+    assert sum(counter.count(MODEL, line + "\n") for line in kept) <= 20
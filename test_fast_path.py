@@ -0,0 +1,105 @@
+"""
+Testes do caminho rápido (comandos respondidos sem o LLM)
+Perguntas abertas que só citam uma palavra-chave precisam seguir para o modelo
+"""
+
+import pytest
+
+from core.fast_path import FastPathExecutor
+from core.intents import IntentClassifier, IntentMatch
+
+class MemoryPlugin:
+    """Plugin de notas e tarefas em memória"""
+    
+    def __init__(self):
+        self.saved = []
+    
+    def add_note(self, content):
+        self.saved.append(("note", content))
+        return True
+    
+    def add_task(self, content):
+        self.saved.append(("task", content))
+        return True
+
+class FakePlugins:
+    """Gerenciador de plugins com um plugin só"""
+    
+    def __init__(self):
+        self.plugin = MemoryPlugin()
+    
+    def get_plugin(self, name):
+        return self.plugin
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+@pytest.fixture
+def executor():
+    return FastPathExecutor(FakePlugins())
+
+def _answer(executor, classifier, message):
+    matches = classifier.classify(message)
+    if not matches:
+        return None
+    return executor.execute(matches[0], message, {'cpu_percent': 12.5, 'memory_percent': 40.0})
+
+@pytest.mark.parametrize("message", [
+    "Como melhorar o desempenho do meu código Python?",
+    "Qual a temperatura em São Paulo?",
+    "energia solar",
+    "Me fale sobre a história da CPU Intel",
+    "a bateria do celular está fraca, o que faço?",
+    "Qual a nota do filme?",
+    "O sistema solar tem quantos planetas?",
+    "Como treinar a memória para provas?",
+])
+def test_open_questions_go_to_the_llm(executor, classifier, message):
+    assert _answer(executor, classifier, message) is None
+    assert executor.stats()['handled'] == 0
+
+@pytest.mark.parametrize("message, expected", [
+    ("Qual o uso da CPU?", "CPU: 12.5%"),
+    ("cpu", "CPU: 12.5%"),
+    ("como está a memória RAM?", "Memória em uso: 40.0%"),
+    ("Qual é o status do sistema?", "Sistema normal"),
+    ("quanto espaço livre no disco?", "Disco:"),
+])
+def test_direct_system_queries_are_answered(executor, classifier, message, expected):
+    assert expected in _answer(executor, classifier, message)
+
+def test_cpu_temperature_is_not_answered_with_cpu_usage(executor, classifier):
+    matches = classifier.classify("temperatura do cpu")
+    assert matches[0].action == "temperature_info"
+    
+    response = executor.execute(matches[0], "temperatura do cpu")
+    assert response.startswith("Temperatura") or "sensores" in response
+
+def test_plugin_commands_need_command_form(executor, classifier):
+    assert _answer(executor, classifier, "anote que a reunião mudou para sexta") == \
+        'Anotado: "a reunião mudou para sexta".'
+    assert _answer(executor, classifier, "minhas notas estão bagunçadas") is None
+    assert executor.plugins.plugin.saved == [("note", "a reunião mudou para sexta")]
+
+@pytest.mark.parametrize("action, text", [
+    ("cpu_info", "qual o uso da CPU?"),
+    ("memory_info", "quanta memória está livre"),
+    ("temperature_info", "temperatura do processador"),
+])
+def test_router_matches_answer_direct_queries(executor, action, text):
+    routed = IntentMatch("system_info", action, 0.91)  # Roteador semântico: sem palavras-chave
+    assert executor.execute(routed, text) is not None
+
+@pytest.mark.parametrize("action, text", [
+    ("temperature_info", "qual a temperatura em São Paulo?"),
+    ("cpu_info", "o computador está lento, quanto da CPU está em uso"),
+    ("memory_info", "como treinar a memória para provas?"),
+])
+def test_router_matches_still_need_the_query_form(executor, action, text):
+    routed = IntentMatch("system_info", action, 0.95)
+    assert executor.execute(routed, text) is None
+
+def test_low_confidence_matches_go_to_the_llm(executor):
+    weak = IntentMatch("system_info", "cpu_info", 0.7, keywords=["cpu"])
+    assert executor.execute(weak, "cpu") is None
@@ -0,0 +1,130 @@
+"""
+Testes do hedge de requisições
+Limiar adaptativo pelo backend principal e corrida entre os dois streams
+"""
+
+import asyncio
+
+import pytest
+
+from core.hedging import HedgePolicy, hedged_stream
+
+class ScriptedStream:
+    """Stream que espera `release` antes do primeiro trecho (ou falha no lugar dele)"""
+    
+    def __init__(self, chunks, error=None, released=True):
+        self.chunks = chunks
+        self.error = error
+        self.release = asyncio.Event()
+        if released:
+            self.release.set()
+        self.started = False
+        self.closed = False
+    
+    async def __call__(self):
+        self.started = True
+        try:
+            await self.release.wait()
+            if self.error is not None:
+                raise self.error
+            for chunk in self.chunks:
+                yield chunk
+        finally:
+            self.closed = True
+
+async def _race(primary, secondary, delay, outcome):
+    return [chunk async for chunk in hedged_stream(primary, secondary, delay, outcome)]
+
+def test_policy_uses_the_default_until_there_are_enough_samples():
+    policy = HedgePolicy(percentile=0.9, min_samples=10, default_delay=3.0, min_delay=0.5)
+    for latency in range(1, 10):
+        policy.record({'winner': 'primary', 'first_chunk': float(latency)})
+    assert policy.delay() == 3.0
+    
+    policy.record({'winner': 'primary', 'first_chunk': 10.0})
+    assert policy.delay() == 10.0
+    assert policy.stats()['first_chunk_percentile_ms'] == 10000.0
+
+def test_policy_never_goes_below_the_minimum_delay():
+    policy = HedgePolicy(min_samples=3, min_delay=0.5)
+    for _ in range(3):
+        policy.record({'winner': 'primary', 'first_chunk': 0.1})
+    assert policy.delay() == 0.5
+
+def test_policy_samples_only_the_primary():
+    policy = HedgePolicy(percentile=0.5, min_samples=2, min_delay=0.0)
+    policy.record({'hedged': True, 'winner': 'secondary', 'first_chunk': 0.3, 'hedged_at': 2.0})
+    policy.record({'hedged': True, 'winner': 'secondary', 'first_chunk': 0.4, 'hedged_at': 2.0})
+    policy.record({'hedged': True, 'winner': None, 'first_chunk': None, 'hedged_at': None})
+    
+    # O vencedor rápido não puxa o limiar para baixo: vale o instante do hedge
+    assert policy.delay() == 2.0
+    stats = policy.stats()
+    assert stats['requests'] == 3
+    assert stats['hedged'] == 3
+    assert stats['secondary_wins'] == 2
+    assert stats['secondary_win_rate'] == round(2 / 3, 3)
+
+def test_fast_primary_wins_without_hedging():
+    async def scenario():
+        primary = ScriptedStream(["a", "b"])
+        secondary = ScriptedStream(["x"])
+        outcome = {}
+        chunks = await _race(primary, secondary, 5.0, outcome)
+        return chunks, outcome, primary, secondary
+    
+    chunks, outcome, primary, secondary = asyncio.run(scenario())
+    assert chunks == ["a", "b"]
+    assert outcome['winner'] == "primary" and not outcome['hedged']
+    assert outcome['hedged_at'] is None
+    assert not secondary.started
+    assert primary.closed
+
+def test_slow_primary_loses_to_the_secondary_and_is_closed():
+    async def scenario():
+        primary = ScriptedStream(["a"], released=False)
+        secondary = ScriptedStream(["x", "y"])
+        outcome = {}
+        chunks = await _race(primary, secondary, 0.01, outcome)
+        return chunks, outcome, primary
+    
+    chunks, outcome, primary = asyncio.run(scenario())
+    assert chunks == ["x", "y"]
+    assert outcome['hedged'] and outcome['winner'] == "secondary"
+    assert outcome['hedged_at'] >= 0.01
+    assert primary.closed
+
+def test_failed_secondary_leaves_the_race_to_the_primary():
+    async def scenario():
+        primary = ScriptedStream(["a"], released=False)
+        secondary = ScriptedStream([], error=ConnectionError("fora"))
+        asyncio.get_running_loop().call_later(0.05, primary.release.set)
+        outcome = {}
+        chunks = await _race(primary, secondary, 0.01, outcome)
+        return chunks, outcome
+    
+    chunks, outcome = asyncio.run(scenario())
+    assert chunks == ["a"]
+    assert outcome['hedged'] and outcome['winner'] == "primary"
+
+def test_without_an_alternative_the_primary_is_awaited():
+    async def scenario():
+        primary = ScriptedStream(["a"], released=False)
+        asyncio.get_running_loop().call_later(0.05, primary.release.set)
+        outcome = {}
+        chunks = await _race(primary, lambda: None, 0.01, outcome)
+        return chunks, outcome
+    
+    chunks, outcome = asyncio.run(scenario())
+    assert chunks == ["a"]
+    assert not outcome['hedged'] and outcome['winner'] == "primary"
+
+def test_when_both_fail_the_primary_error_is_raised():
+    async def scenario():
+        primary = ScriptedStream([], error=TimeoutError("principal"), released=False)
+        secondary = ScriptedStream([], error=ConnectionError("secundário"))
+        asyncio.get_running_loop().call_later(0.05, primary.release.set)
+        await _race(primary, secondary, 0.01, {})
+    
+    with pytest.raises(TimeoutError, match="principal"):
+        asyncio.run(scenario())
@@ -0,0 +1,124 @@
+"""
+Testes da compactação de histórico
+Resumo em segundo plano, descartado se a conversa mudou no meio
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from conftest import eventually
+from core.history_compaction import HistoryCompactor
+from core.runtime import EngineRuntime
+from core.sessions import ChatSession
+
+class Summarizer:
+    """Resume contando as mensagens; com `gate`, espera a liberação antes de responder"""
+    
+    def __init__(self, gated=False, result="resumo"):
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+        self.result = result
+        self.calls = []
+    
+    async def __call__(self, previous, messages):
+        self.calls.append((previous, [msg["content"] for msg in messages]))
+        await asyncio.to_thread(self.gate.wait, 5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return f"{self.result} de {len(messages)}"
+
+@pytest.fixture
+def runtime():
+    runtime = EngineRuntime("test-compaction")
+    yield runtime
+    runtime.stop()
+
+def _session(messages, summary=""):
+    history = [{"role": "user" if n % 2 == 0 else "assistant", "content": f"m{n}"} for n in range(messages)]
+    return ChatSession("ana", "assistente", history=history, summary=summary)
+
+def _compactor(summarizer, runtime, **options):
+    compacted = []
+    compactor = HistoryCompactor(summarizer, trigger_messages=6, keep_recent=2, runtime=runtime,
+                                 on_compacted=lambda session, messages: compacted.append(len(messages)),
+                                 **options)
+    return compactor, compacted
+
+def _settled(compactor):
+    return eventually(lambda: compactor.stats()['pending'] == 0)
+
+def test_short_histories_are_left_alone(runtime):
+    compactor, _ = _compactor(Summarizer(), runtime)
+    assert not compactor.maybe_schedule(_session(5))
+    assert compactor.stats()['scheduled'] == 0
+
+def test_old_messages_are_replaced_by_the_summary(runtime):
+    summarizer = Summarizer()
+    compactor, compacted = _compactor(summarizer, runtime)
+    session = _session(6, summary="antes")
+    
+    assert compactor.maybe_schedule(session)
+    assert _settled(compactor)
+    assert summarizer.calls == [("antes", ["m0", "m1", "m2", "m3"])]
+    assert session.summary == "resumo de 4"
+    assert [msg["content"] for msg in session.history] == ["m4", "m5"]
+    assert eventually(lambda: compacted == [4])  # Avisado depois de gravar o resumo
+    stats = compactor.stats()
+    assert stats['completed'] == 1 and stats['messages_compacted'] == 4
+
+def test_cleared_history_discards_the_summary(runtime):
+    summarizer = Summarizer(gated=True)
+    compactor, compacted = _compactor(summarizer, runtime)
+    session = _session(8)
+    
+    assert compactor.maybe_schedule(session)
+    assert not compactor.maybe_schedule(session)  # Uma compactação por sessão
+    assert eventually(lambda: summarizer.calls)
+    
+    # clear_history troca a lista e o resumo enquanto o resumo é gerado
+    session.history = [{"role": "user", "content": "nova conversa"}]
+    session.summary = ""
+    summarizer.gate.set()
+    
+    assert _settled(compactor)
+    assert session.summary == ""
+    assert session.history == [{"role": "user", "content": "nova conversa"}]
+    assert compacted == []
+    assert compactor.stats()['discarded'] == 1
+
+def test_history_rewritten_in_place_discards_the_summary(runtime):
+    summarizer = Summarizer(gated=True)
+    compactor, _ = _compactor(summarizer, runtime)
+    session = _session(6)
+    
+    compactor.maybe_schedule(session)
+    assert eventually(lambda: summarizer.calls)
+    session.history[0] = {"role": "user", "content": "editada"}
+    summarizer.gate.set()
+    
+    assert _settled(compactor)
+    assert len(session.history) == 6 and session.summary == ""
+    assert compactor.stats()['discarded'] == 1
+
+def test_failed_summary_keeps_the_history(runtime):
+    compactor, _ = _compactor(Summarizer(result=RuntimeError("ollama fora")), runtime)
+    session = _session(6)
+    
+    compactor.maybe_schedule(session)
+    assert _settled(compactor)
+    assert len(session.history) == 6 and session.summary == ""
+    assert compactor.stats()['failed'] == 1
+    assert compactor.maybe_schedule(session)  # Pode tentar de novo depois
+
+def test_queue_limit_skips_new_sessions(runtime):
+    summarizer = Summarizer(gated=True)
+    compactor, _ = _compactor(summarizer, runtime, max_pending=1)
+    
+    assert compactor.maybe_schedule(_session(6))
+    assert not compactor.maybe_schedule(_session(6))
+    assert compactor.stats()['skipped'] == 1
+    summarizer.gate.set()
+    assert _settled(compactor)
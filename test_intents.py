@@ -0,0 +1,73 @@
+"""
+Testes do classificador de intenções
+Palavras inteiras, frases mais longas e nenhum comando em perguntas comuns
+"""
+
+import pytest
+
+from core.intents import IntentClassifier
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+def _actions(classifier, text):
+    return [match.action for match in classifier.classify(text)]
+
+@pytest.mark.parametrize("text", [
+    "Qual o tempo de viagem até Lisboa?",
+    "Me conte uma história",
+    "O sistema solar tem quantos planetas?",
+    "Como treinar a memória para provas?",
+    "energia solar vale a pena?",
+    "Como melhorar o desempenho do meu código?",
+    "Qual a performance do time no campeonato?",
+    "o que você vai fazer hoje?",
+    "tasking e multitarefa",
+    "",
+])
+def test_ordinary_questions_have_no_intent(classifier, text):
+    assert classifier.classify(text) == []
+    assert classifier.best(text) is None
+
+@pytest.mark.parametrize("text, action", [
+    ("Qual o uso da CPU?", "cpu_info"),
+    ("quanta memória RAM está livre", "memory_info"),
+    ("Anote: comprar pão", "add_note"),
+    ("me lembre da reunião", "add_reminder"),
+    ("adicione uma tarefa", "add_task"),
+    ("espaço no SSD", "disk_info"),
+    ("nível da bateria", "battery_info"),
+    ("Qual é o status do sistema?", "system_status"),
+    ("abra o navegador", "open_app"),
+])
+def test_commands_are_recognised(classifier, text, action):
+    assert classifier.best(text).action == action
+
+def test_matches_whole_words_without_case_or_accents(classifier):
+    assert _actions(classifier, "TEMPERATURA") == ["temperature_info"]
+    assert _actions(classifier, "anotação importante") == ["add_note"]
+    assert _actions(classifier, "temporada de chuvas") == []
+    assert _actions(classifier, "processadores antigos") == []
+
+def test_longest_phrase_wins(classifier):
+    assert _actions(classifier, "temperatura da cpu") == ["temperature_info"]
+    assert _actions(classifier, "temp do processador") == ["temperature_info"]
+    match = classifier.best("uso de memória")
+    assert match.action == "memory_info"
+    assert match.keywords == ["uso de memoria"]
+
+def test_more_keywords_raise_the_score(classifier):
+    one = classifier.best("cpu")
+    two = classifier.best("uso da cpu e processador")
+    assert two.action == one.action == "cpu_info"
+    assert two.score > one.score
+
+def test_batch_matches_single_classification(classifier):
+    texts = ["qual o uso da cpu", "uma pergunta qualquer", "anote isso", "bateria e disco", ""]
+    batch = classifier.classify_batch(texts)
+    assert batch == [classifier.classify(text) for text in texts]
+
+def test_batch_keywords_never_span_two_texts(classifier):
+    assert classifier.classify_batch(["uso de", "memoria"]) == [[], []]
+    assert classifier.classify_batch(["status do", "sistema"]) == [[], []]
@@ -0,0 +1,118 @@
+"""
+Testes do amostrador de métricas compartilhado
+Uma tarefa enquanto houver inscritos e uma leitura repartida entre os intervalos
+"""
+
+import pytest
+
+from core import metrics_sampler
+from core.metrics_sampler import MetricsSampler
+
+class Harness:
+    """Tarefas de fundo guardadas para rodar na thread do teste, com o relógio avançando no sleep"""
+    
+    def __init__(self, clock, stop_at=None):
+        self.clock = clock
+        self.stop_at = stop_at
+        self.tasks = []
+        self.samples = 0
+        self.published = []
+        self.sampler = MetricsSampler(self.sample, self.publish, self.start, self.sleep,
+                                      min_interval=3, max_interval=60)
+    
+    def sample(self):
+        self.samples += 1
+        return {"cpu_percent": 10.0}
+    
+    def publish(self, interval, data):
+        self.published.append((interval, self.clock.now))
+    
+    def start(self, target, *args):
+        self.tasks.append((target, args))
+    
+    def sleep(self, seconds):
+        self.clock.now += seconds
+        if self.stop_at is not None and self.clock.now >= self.stop_at:
+            self.sampler.stop()
+    
+    def run_task(self, index=-1):
+        target, args = self.tasks[index]
+        target(*args)
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(metrics_sampler, now=1000.0)
+
+def test_intervals_are_clamped_and_rounded(clock):
+    sampler = Harness(clock).sampler
+    assert sampler.normalize() == 3
+    assert sampler.normalize(1) == 3
+    assert sampler.normalize(9.6) == 10
+    assert sampler.normalize(600) == 60
+    assert sampler.normalize("rápido") == 3
+
+def test_one_task_while_there_are_subscribers(clock):
+    harness = Harness(clock)
+    sampler = harness.sampler
+    
+    assert sampler.subscribe("a") == 3
+    assert sampler.subscribe("b", 10) == 10
+    assert sampler.subscribe("a", 5) == 5  # Troca de intervalo não cria outra tarefa
+    assert len(harness.tasks) == 1
+    assert sampler.stats()['intervals'] == {5: 1, 10: 1}
+    
+    assert sampler.unsubscribe("a") == 5
+    assert sampler.unsubscribe("a") is None
+    assert sampler.stats()['running']
+    assert sampler.unsubscribe("b") == 10
+    
+    # Sem inscritos, a tarefa sai sem ler o sistema
+    harness.run_task()
+    assert harness.samples == 0
+    stats = sampler.stats()
+    assert not stats['running'] and stats['subscribers'] == 0
+
+def test_resubscribing_replaces_a_task_that_has_not_noticed_yet(clock):
+    harness = Harness(clock)
+    sampler = harness.sampler
+    sampler.subscribe("a")
+    sampler.unsubscribe("a")
+    harness.run_task(0)  # Sai e marca a amostragem como parada
+    
+    sampler.subscribe("a")
+    assert len(harness.tasks) == 2
+    harness.stop_at = clock.now + 1
+    harness.run_task(0)  # Geração antiga: sai sem ler
+    assert harness.samples == 0
+    harness.run_task(1)
+    assert harness.samples == 1
+
+def test_one_reading_is_shared_by_every_interval(clock):
+    harness = Harness(clock, stop_at=1030.0)
+    sampler = harness.sampler
+    for name in ("a", "b"):
+        sampler.subscribe(name, 3)
+    sampler.subscribe("c", 10)
+    
+    harness.run_task()
+    fast = [at for interval, at in harness.published if interval == 3]
+    slow = [at for interval, at in harness.published if interval == 10]
+    assert harness.samples == 10  # Uma leitura a cada 3 s, não uma por cliente
+    assert fast == [1000.0 + 3 * n for n in range(10)]
+    assert slow == [1000.0, 1009.0, 1021.0]  # Meio intervalo de tolerância
+    assert sampler.stats()['published'] == 13
+
+def test_sampling_errors_are_counted_and_the_loop_goes_on(clock):
+    harness = Harness(clock, stop_at=1010.0)
+    failures = iter([RuntimeError("psutil")])
+    
+    def flaky():
+        for error in failures:
+            raise error
+        return harness.sample()
+    
+    harness.sampler.sample = flaky
+    harness.sampler.subscribe("a")
+    harness.run_task()
+    assert harness.sampler.stats()['errors'] == 1
+    assert harness.samples >= 1
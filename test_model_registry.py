@@ -0,0 +1,60 @@
+"""
+Testes do cache de modelos do Ollama (ModelRegistry)
+Depois da primeira busca, nenhuma consulta espera pela rede
+"""
+
+import threading
+
+from conftest import eventually
+from core.ollama_integration import ModelRegistry
+
+class SlowTags:
+    """Resposta de /api/tags que só chega quando o teste libera"""
+    
+    def __init__(self, *names):
+        self.models = [{"name": name} for name in names]
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+    
+    def __call__(self):
+        self.calls += 1
+        self.gate.wait(5)
+        return list(self.models)
+
+def test_first_query_fetches_synchronously():
+    tags = SlowTags("llama3:latest")
+    registry = ModelRegistry(tags, ttl=60)
+    
+    assert registry.resolve("llama3") == "llama3:latest"
+    assert registry.is_healthy()
+    assert tags.calls == 1
+
+def test_invalidate_serves_the_stale_list_while_refreshing():
+    tags = SlowTags("llama3:latest")
+    registry = ModelRegistry(tags, ttl=60)
+    registry.models()
+    
+    tags.gate.clear()
+    tags.models.append({"name": "jarvis:latest"})
+    registry.invalidate()
+    
+    # A busca está parada no servidor, mas a consulta responde na hora
+    assert registry.model_names() == ["llama3:latest"]
+    assert registry.resolve("jarvis") is None
+    
+    tags.gate.set()
+    assert eventually(lambda: registry.resolve("jarvis") == "jarvis:latest")
+    assert tags.calls == 2
+
+def test_expired_cache_refreshes_in_background():
+    tags = SlowTags("llama3:latest")
+    registry = ModelRegistry(tags, ttl=0)
+    registry.models()
+    
+    tags.gate.clear()
+    tags.models = []
+    assert registry.model_names() == ["llama3:latest"]
+    
+    tags.gate.set()
+    assert eventually(lambda: registry.model_names() == [])
@@ -0,0 +1,87 @@
+"""
+Testes da residência de modelos
+Pré-carregamento dos fixados, keep_alive dos quentes e descarte sob pressão de memória
+"""
+
+import pytest
+
+from core import model_residency
+from core.model_residency import ModelResidencyManager
+from core.ollama_integration import OllamaLocalAI
+
+PINNED = "jarvis-personal:latest"
+SMALL = "llama3.2:1b"
+LARGE = "llama3.2:3b"
+
+@pytest.fixture
+def stub(ollama_stub):
+    return ollama_stub(models=[PINNED, SMALL, LARGE])
+
+@pytest.fixture
+def ollama(stub):
+    _, url = stub
+    client = OllamaLocalAI(base_url=url)
+    assert client.check_connection(force=True)
+    return client
+
+def _started(ollama, models=("jarvis-personal", "inexistente"), **options):
+    manager = ModelResidencyManager(ollama, refresh_interval=3600, **options)
+    manager.start(models)
+    assert manager.ready.wait(5)
+    manager.stop()
+    manager._thread.join(5)
+    return manager
+
+def test_pinned_models_are_preloaded_with_a_long_keep_alive(stub, ollama):
+    server, _ = stub
+    manager = _started(ollama)
+    
+    stats = manager.stats()
+    assert stats['pinned'] == [PINNED]  # Nome resolvido; o não instalado fica de fora
+    assert stats['loads'] == 1
+    assert server.loaded == {PINNED}
+    assert server.keep_alive[PINNED] == "30m"
+    assert PINNED in ollama.pool.primary.resident
+
+def test_only_hot_models_get_the_long_keep_alive(ollama, fake_clock):
+    clock = fake_clock(model_residency)
+    manager = _started(ollama, hot_seconds=900.0)
+    
+    assert manager.keep_alive_for(PINNED) == "30m"
+    assert manager.keep_alive_for(SMALL) is None
+    manager.touch(SMALL)
+    assert manager.keep_alive_for(SMALL) == "30m"
+    clock.now += 900.0
+    assert manager.keep_alive_for(SMALL) is None
+    assert manager.keep_alive_for(PINNED) == "30m"
+
+def test_cold_models_are_unloaded_first_under_pressure(stub, ollama):
+    server, _ = stub
+    manager = _started(ollama, max_resident=2)
+    server.loaded.update({SMALL, LARGE})
+    manager.touch(LARGE)
+    
+    manager._refresh()
+    assert server.loaded == {PINNED, LARGE}
+    assert server.keep_alive[SMALL] == 0
+    assert manager.stats()['evictions'] == 1
+
+def test_memory_budget_counts_the_sizes_reported_by_the_server(stub, ollama):
+    server, _ = stub
+    # O servidor simulado informa 1 GiB por modelo
+    manager = _started(ollama, max_resident=5, memory_budget_mb=1500)
+    server.loaded.add(SMALL)
+    
+    manager._refresh()
+    assert server.loaded == {PINNED}
+    assert manager.stats()['evictions'] == 1
+
+def test_pinned_model_that_left_memory_is_reloaded(stub, ollama):
+    server, _ = stub
+    manager = _started(ollama)
+    server.loaded.clear()
+    
+    manager._refresh()
+    assert server.loaded == {PINNED}
+    stats = manager.stats()
+    assert stats['reloads'] == 1 and stats['loads'] == 2
@@ -0,0 +1,76 @@
+"""
+Testes do cliente assíncrono do Ollama
+Gerações concorrentes num cliente keep-alive por loop e erros tipados
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from core.ollama_integration import (MSG_CONNECTION_ERROR, AsyncOllamaLocalAI, OllamaConnectionError,
+                                     OllamaHTTPError)
+
+MODEL = "llama3.2:1b"
+ANSWER = "Olá! Sou o JARVIS simulado."
+
+def _run(client, coro_factory):
+    async def scenario():
+        try:
+            return await coro_factory()
+        finally:
+            await client.aclose()
+    return asyncio.run(scenario())
+
+def test_generate_returns_the_answer_context_and_final(ollama_stub):
+    server, url = ollama_stub()
+    client = AsyncOllamaLocalAI(url)
+    client.keep_alive_for = lambda model: "30m"
+    final = {}
+    
+    response, context = _run(client, lambda: client.generate("qual o seu nome", model=MODEL, final=final))
+    assert response == ANSWER
+    assert context == [1, 2, 3]
+    assert final["prompt_eval_count"] == 4
+    assert server.keep_alive[MODEL] == "30m"
+
+def test_concurrent_generations_share_one_client(ollama_stub):
+    server, url = ollama_stub(latency=0.1)
+    client = AsyncOllamaLocalAI(url)
+    
+    async def many():
+        await client.generate("aquecer", model=MODEL)  # Primeiro uso carrega o modelo
+        first = client._get_client()
+        started = time.monotonic()
+        results = await asyncio.gather(*(client.generate(f"pergunta {n}", model=MODEL) for n in range(10)))
+        return results, time.monotonic() - started, first is client._get_client()
+    
+    results, elapsed, same_client = _run(client, many)
+    assert [response for response, _ in results] == [ANSWER] * 10
+    assert same_client
+    assert elapsed < 0.5  # Em paralelo: 10 x 0,1 s em série levaria 1 s
+    assert server.generate_count == 11
+
+def test_errors_are_typed_for_the_fallback_chain(ollama_stub):
+    _, url = ollama_stub()
+    client = AsyncOllamaLocalAI(url)
+    
+    with pytest.raises(OllamaHTTPError) as caught:
+        _run(client, lambda: client.generate("oi", model="inexistente"))
+    assert caught.value.status_code == 404
+    assert not caught.value.health_failure  # Erro do pedido, não do servidor
+    
+    offline = AsyncOllamaLocalAI("http://127.0.0.1:9")
+    with pytest.raises(OllamaConnectionError) as caught:
+        _run(offline, lambda: offline.generate("oi", model=MODEL))
+    assert caught.value.health_failure
+
+def test_chat_returns_a_friendly_message_instead_of_raising():
+    client = AsyncOllamaLocalAI("http://127.0.0.1:9")
+    assert _run(client, lambda: client.chat("oi", model=MODEL)) == MSG_CONNECTION_ERROR
+    assert _run(client, client.list_models) == []
+
+def test_list_models_reads_the_server(ollama_stub):
+    _, url = ollama_stub()
+    client = AsyncOllamaLocalAI(url)
+    assert [m["name"] for m in _run(client, client.list_models)] == [MODEL, "jarvis-personal:latest"]
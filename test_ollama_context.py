@@ -0,0 +1,80 @@
+"""
+Testes do reaproveitamento do contexto (KV) do Ollama
+Turnos seguintes enviam só a mensagem nova sobre os tokens da conversa
+"""
+
+import pytest
+
+from core.sessions import ChatSession, OllamaContext
+
+ANSWER = "Olá! Sou o JARVIS simulado."
+
+@pytest.fixture
+def engine(make_engine, ollama_stub):
+    _, url = ollama_stub()
+    engine = make_engine(ollama_urls=[url], response_cache_enabled=False)
+    calls = []
+    generate = engine.async_ollama.generate
+    
+    async def recording(prompt, context=None, **kwargs):
+        calls.append((prompt, context))
+        return await generate(prompt, context=context, **kwargs)
+    
+    engine.async_ollama.generate = recording
+    engine.calls = calls
+    return engine
+
+def _chat(engine, message, session_id="ana"):
+    return engine.runtime.run(engine.chat(message, session_id=session_id), timeout=10)
+
+def test_follow_up_turns_send_only_the_new_message(engine):
+    prefix = engine.prompt_builder.prefix("assistente")
+    
+    assert _chat(engine, "Qual a capital da França?") == ANSWER
+    assert _chat(engine, "E a da Itália?") == ANSWER
+    
+    (first, first_context), (second, second_context) = engine.calls
+    assert first_context is None and first.startswith(prefix)
+    assert second_context == [1, 2, 3]
+    assert prefix not in second and "Qual a capital da França?" not in second
+    assert second.endswith("Usuário: E a da Itália?\nJarvis:")
+    assert engine.get_session("ana").ollama_context.tokens == [1, 2, 3]
+
+def test_exchanges_answered_elsewhere_are_sent_as_pending_text(engine):
+    session = engine.get_session("ana")
+    session.ollama_context = OllamaContext(engine._session_model(session), "assistente", [7, 8])
+    engine._remember(session, "quem respondeu?", "a nuvem")  # Sem contexto: ex. resposta da OpenAI
+    
+    _, prompt, tokens = engine._build_ollama_prompt(session, "e agora?")
+    assert tokens == [7, 8]
+    assert "quem respondeu?" in prompt and "a nuvem" in prompt
+    assert session.ollama_context.pending == session.history[-2:]
+
+def test_context_is_rebuilt_when_the_conversation_changes(engine):
+    session = engine.get_session("ana")
+    model = engine._session_model(session)
+    
+    session.ollama_context = OllamaContext(model, "tecnico", [7, 8])
+    assert engine._build_ollama_prompt(session, "oi")[2] is None  # Outra personalidade
+    
+    session.ollama_context = OllamaContext("outro-modelo", "assistente", [7, 8])
+    assert engine._build_ollama_prompt(session, "oi")[2] is None
+    
+    pending = [{"role": "user", "content": "pendente"}] * (engine.OLLAMA_CONTEXT_MAX_PENDING + 1)
+    session.ollama_context = OllamaContext(model, "assistente", [7, 8], pending)
+    assert engine._build_ollama_prompt(session, "oi")[2] is None
+    
+    session.ollama_context = OllamaContext(model, "assistente", [0] * engine.config.ollama_num_ctx)
+    assert engine._build_ollama_prompt(session, "oi")[2] is None  # Janela quase cheia
+
+def test_clear_history_drops_the_context(engine):
+    _chat(engine, "Qual a capital da França?")
+    engine.clear_history("ana")
+    _chat(engine, "E a da Itália?")
+    assert [context for _, context in engine.calls] == [None, None]
+
+def test_context_survives_session_compaction():
+    session = ChatSession("ana", "assistente")
+    session.ollama_context = OllamaContext("llama3.2:1b", "assistente", [1, 2, 3],
+                                           [{"role": "user", "content": "pendente"}])
+    assert ChatSession.from_bytes(session.to_bytes()) == session
@@ -0,0 +1,109 @@
+"""
+Testes do pool de servidores Ollama
+Menor carga, modelo carregado primeiro, saída e volta à rotação
+"""
+
+import asyncio
+
+import pytest
+
+from core import ollama_integration
+from core.ollama_integration import AsyncOllamaLocalAI, OllamaBackendPool, OllamaHTTPError
+
+MODEL = "llama3.2:1b"
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(ollama_integration)
+
+@pytest.fixture
+def pool(clock):
+    return OllamaBackendPool(["http://a:11434", "http://b:11434/", "http://a:11434"],
+                             eject_after=2, eject_seconds=30.0)
+
+def _fail(pool, backend, times=1):
+    for _ in range(times):
+        pool.begin(backend)
+        pool.end(backend, False, 1.0)
+
+def test_urls_are_deduplicated_and_the_first_is_primary(pool):
+    assert [backend.url for backend in pool.backends] == ["http://a:11434", "http://b:11434"]
+    assert pool.primary is pool.backends[0]
+
+def test_routes_to_the_least_loaded_then_the_fastest(pool):
+    a, b = pool.backends
+    pool.begin(a)
+    assert pool.pick() is b
+    
+    pool.end(a, True, 0.5)
+    pool.begin(b)
+    pool.end(b, True, 0.1)
+    assert pool.pick() is b  # Empate em carga: menor latência média
+    assert pool.pick(exclude=(b,)) is a
+    assert pool.pick(exclude=(a, b)) is None
+
+def test_prefers_servers_with_the_model_loaded(pool):
+    a, b = pool.backends
+    pool.set_resident(b, MODEL, True)
+    pool.begin(b)
+    assert pool.pick(MODEL) is b
+    assert pool.pick("outro") is a
+
+def test_consecutive_failures_eject_until_a_success(pool, clock):
+    a, b = pool.backends
+    _fail(pool, a)
+    assert not a.is_ejected(clock.now)
+    _fail(pool, a)
+    assert a.is_ejected(clock.now)
+    assert [pool.pick() for _ in range(3)] == [b, b, b]
+    assert pool.stats()[0]['healthy'] is False
+    
+    # Passado o tempo fora, volta a receber tráfego e o sucesso zera as falhas
+    clock.now += 30.0
+    assert not a.is_ejected(clock.now)
+    pool.begin(a)
+    pool.end(a, True, 0.2)
+    assert a.failures == 0 and a.errors == 2
+    
+    # Um erro isolado depois da volta não tira de novo
+    _fail(pool, a)
+    assert not a.is_ejected(clock.now)
+
+def test_with_everyone_ejected_the_first_to_return_is_tried(pool, clock):
+    a, b = pool.backends
+    _fail(pool, b, 2)
+    clock.now += 10.0
+    _fail(pool, a, 2)
+    assert pool.pick() is b
+
+def test_abandoned_requests_do_not_count(pool):
+    a, _ = pool.backends
+    for _ in range(3):
+        pool.begin(a)
+        pool.end(a, None, 5.0)
+    assert a.failures == 0 and a.in_flight == 0
+    assert a.latency_ewma is None
+    assert a.requests == 3
+
+def test_generation_moves_past_a_server_answering_503(ollama_stub):
+    failing, failing_url = ollama_stub(failing=True)
+    healthy, healthy_url = ollama_stub()
+    client = AsyncOllamaLocalAI(pool=OllamaBackendPool([failing_url, healthy_url]))
+    
+    async def scenario():
+        try:
+            first = await client.generate("oi", model=MODEL)
+            with pytest.raises(OllamaHTTPError) as caught:
+                await client.generate("oi", model=MODEL, backend=client.pool.primary)
+            return first, caught.value.status_code
+        finally:
+            await client.aclose()
+    
+    (response, context), status = asyncio.run(scenario())
+    assert response == "Olá! Sou o JARVIS simulado."
+    assert context == [1, 2, 3]
+    assert status == 503  # Servidor fixo: sem tentar outro
+    assert healthy.generate_count == 1
+    stats = {entry['url']: entry for entry in client.pool.stats()}
+    assert stats[failing_url]['errors'] == 2
+    assert stats[healthy_url]['resident'] == [MODEL]
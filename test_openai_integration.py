@@ -0,0 +1,76 @@
+"""
+Testes do nível OpenAI
+Cliente assíncrono com resposta completa e em trechos, e o fallback em streaming do motor
+"""
+
+import asyncio
+
+import openai
+import pytest
+
+from core.openai_integration import AsyncOpenAIChat
+
+MESSAGES = [{"role": "user", "content": "oi"}]
+ANSWER = "Olá! Sou o JARVIS via OpenAI simulada."
+
+def _run(client, coro_factory):
+    async def scenario():
+        try:
+            return await coro_factory()
+        finally:
+            await client.aclose()
+    return asyncio.run(scenario())
+
+def test_complete_returns_the_whole_answer(openai_stub):
+    _, url = openai_stub()
+    client = AsyncOpenAIChat("stub", base_url=url)
+    answer = _run(client, lambda: client.complete(MESSAGES, model="gpt-3.5-turbo",
+                                                  max_tokens=50, temperature=0.7))
+    assert answer == ANSWER
+
+def test_stream_yields_pieces_and_fills_final(openai_stub):
+    server, url = openai_stub()
+    client = AsyncOpenAIChat("stub", base_url=url)
+    final = {}
+    
+    async def collect():
+        return [chunk async for chunk in client.stream(MESSAGES, model="gpt-3.5-turbo", max_tokens=50,
+                                                       temperature=0.7, final=final)]
+    
+    chunks = _run(client, collect)
+    assert len(chunks) == 7
+    assert "".join(chunks) == ANSWER
+    assert final == {"model": "gpt-3.5-turbo", "finish_reason": "stop"}
+    assert server.request_count == 1
+
+def test_one_client_per_event_loop_is_reused(openai_stub):
+    _, url = openai_stub()
+    client = AsyncOpenAIChat("stub", base_url=url)
+    
+    async def twice():
+        first = client._get_client()
+        await client.complete(MESSAGES, model="gpt-3.5-turbo", max_tokens=50, temperature=0.7)
+        return first is client._get_client()
+    
+    assert _run(client, twice)
+
+def test_server_errors_are_not_retried_by_the_sdk(openai_stub):
+    server, url = openai_stub(failing=True)
+    client = AsyncOpenAIChat("stub", base_url=url)
+    
+    with pytest.raises(openai.InternalServerError):
+        _run(client, lambda: client.complete(MESSAGES, model="gpt-3.5-turbo", max_tokens=50, temperature=0.7))
+    assert server.request_count == 1  # O fallback decide, não o SDK
+
+def test_engine_streams_from_openai_when_ollama_is_down(make_engine, openai_stub):
+    _, url = openai_stub()
+    engine = make_engine(api_key="stub", openai_base_url=url)
+    
+    async def collect():
+        return [chunk async for chunk in engine.chat_stream("Qual a capital da França?", session_id="ana")]
+    
+    chunks = engine.runtime.run(collect(), timeout=10)
+    assert "".join(chunks) == ANSWER
+    assert len(chunks) > 1
+    assert engine.breakers["openai"].stats()['successes'] == 1
+    assert engine.get_session("ana").history[-1]["content"] == ANSWER
@@ -0,0 +1,67 @@
+"""
+Testes do montador de prompts
+Prefixo idêntico byte a byte por personalidade; dados voláteis só no sufixo
+"""
+
+import pytest
+
+from core.prompt_builder import SYSTEM_INFO, PromptBuilder
+
+MODEL = "llama3.2:1b"
+
+@pytest.fixture
+def builder():
+    return PromptBuilder({
+        "assistente": {"system_prompt": "Você é JARVIS, direto e útil."},
+        "amigavel": {"system_prompt": "Você é JARVIS, amigável."},
+    })
+
+def _history(count):
+    return [{"role": "user" if n % 2 == 0 else "assistant", "content": f"m{n}"} for n in range(count)]
+
+def test_prefix_is_compiled_once_per_personality(builder):
+    prefix = builder.prefix("assistente")
+    assert prefix == "Você é JARVIS, direto e útil." + SYSTEM_INFO
+    assert builder.prefix("assistente") is prefix
+    assert builder.prefix("amigavel") != prefix
+
+def test_edited_personality_recompiles_the_prefix(builder):
+    builder.prefix("assistente")
+    builder.personalities["assistente"]["system_prompt"] = "Você é JARVIS, formal."
+    assert builder.prefix("assistente").startswith("Você é JARVIS, formal.")
+
+def test_volatile_data_stays_after_the_prefix(builder):
+    context = {"cpu_percent": 12.345, "timestamp": "2026-10-18T10:00:00"}
+    prompt = builder.build("assistente", MODEL, _history(2), "como está a CPU?", context,
+                           summary="falamos de CPU", memory="- nota antiga")
+    
+    assert prompt.startswith(builder.prefix("assistente") + "\n\nResumo da conversa até aqui: falamos de CPU")
+    assert "Memória relevante:\n- nota antiga" in prompt
+    assert "Histórico:\nUsuário: m0\nJarvis: m1" in prompt
+    assert 'Contexto do sistema: {"cpu_percent":12.3}' in prompt  # Sem timestamp, floats arredondados
+    assert prompt.index("Data/Hora atual") > prompt.index("Histórico:")
+    assert prompt.endswith("Usuário: como está a CPU?\nJarvis:")
+
+def test_growing_conversation_reuses_the_previous_prompt(builder):
+    builder.build("assistente", MODEL, _history(2), "primeira", {"cpu_percent": 10.0})
+    builder.build("assistente", MODEL, _history(4), "segunda", {"cpu_percent": 55.0})
+    
+    stats = builder.stats()
+    assert stats['full_prompts'] == 2
+    assert stats['prefix_hits'] == 1  # O primeiro não tinha prompt anterior
+    assert stats['prefix_hit_rate'] == 0.5
+    assert stats['reused_chars'] >= len(builder.prefix("assistente")) + len("\n\nHistórico:\nUsuário: m0\nJarvis: m1")
+
+def test_switching_personality_misses_the_prefix(builder):
+    builder.build("assistente", MODEL, [], "oi")
+    builder.build("amigavel", MODEL, [], "oi")
+    assert builder.stats()['prefix_hits'] == 0
+
+def test_turn_prompt_carries_only_the_new_text(builder):
+    prompt = builder.build_turn(_history(2), "e agora?", {"cpu_percent": 1.0}, "- nota")
+    
+    assert builder.prefix("assistente") not in prompt
+    assert prompt.startswith("Usuário: m0\nJarvis: m1\n\nMemória relevante:\n- nota")
+    assert prompt.endswith("Usuário: e agora?\nJarvis:")
+    assert builder.build_turn([], "oi").startswith("Data/Hora atual")
+    assert builder.stats()['turn_prompts'] == 2 and builder.stats()['full_prompts'] == 0
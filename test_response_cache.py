@@ -0,0 +1,134 @@
+"""
+Testes do cache de respostas
+Chave por (modelo, personalidade, prompt, contexto, conversa) e validade por TTL
+"""
+
+import pytest
+
+from core import response_cache
+from core.response_cache import ResponseCache
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(response_cache)
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return ResponseCache(tmp_path / "cache.db", max_memory_entries=2, ttl=60)
+
+def test_key_ignores_case_accents_spacing_and_final_punctuation(cache):
+    key = cache.make_key("llama3", "assistente", "Qual é a capital da França?")
+    assert cache.make_key("llama3", "assistente", "  qual e a   capital da franca ") == key
+    assert cache.make_key("llama3", "assistente", "Qual é a capital da França!!") == key
+
+def test_key_separates_model_personality_and_prompt(cache):
+    key = cache.make_key("llama3", "assistente", "oi")
+    assert cache.make_key("mistral", "assistente", "oi") != key
+    assert cache.make_key("llama3", "tecnico", "oi") != key
+    assert cache.make_key("llama3", "assistente", "olá") != key
+
+def test_key_uses_context_buckets(cache):
+    def key(**context):
+        return cache.make_key("llama3", "assistente", "como está o sistema", context)
+    
+    assert key(cpu_percent=41.0, timestamp=1) == key(cpu_percent=49.9, timestamp=2)
+    assert key(cpu_percent=41.0) != key(cpu_percent=51.0)
+    assert key(cpu_percent=41.0) != key(cpu_percent=41.0, memory_percent=70.0)
+    assert key() == cache.make_key("llama3", "assistente", "como está o sistema")
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("k", "resposta")
+    cache.put("curta", "resposta", ttl=5)
+    
+    clock.now += 5
+    assert cache.get("curta") is None
+    assert cache.get("k") == "resposta"
+    
+    clock.now += 55
+    assert cache.get("k") is None
+    assert cache.stats()['misses'] == 2
+
+def test_disk_layer_survives_restart_and_keeps_the_ttl(tmp_path, clock):
+    first = ResponseCache(tmp_path / "cache.db", ttl=60)
+    first.put("k", "resposta")
+    
+    clock.now += 30
+    second = ResponseCache(tmp_path / "cache.db", ttl=60)
+    assert second.get("k") == "resposta"
+    assert second.stats()['disk_hits'] == 1
+    assert second.get("k") == "resposta"
+    assert second.stats()['memory_hits'] == 1
+    
+    clock.now += 30
+    assert ResponseCache(tmp_path / "cache.db", ttl=60).get("k") is None
+
+def test_memory_layer_evicts_least_recently_used(cache):
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    
+    stats = cache.stats()
+    assert stats['memory_entries'] == 2
+    assert stats['evictions'] == 1
+    
+    # "b" saiu da memória, mas continua no disco
+    assert cache.get("b") == "2"
+    assert cache.stats()['disk_hits'] == 1
+
+def test_key_includes_the_conversation(cache):
+    question = [{"role": "user", "content": "capital da França?"}, {"role": "assistant", "content": "Paris."}]
+    other = [{"role": "user", "content": "capital da Itália?"}, {"role": "assistant", "content": "Roma."}]
+    key = cache.make_key("llama3", "assistente", "e depois?", history=question)
+    
+    assert cache.make_key("llama3", "assistente", "e depois?", history=list(question)) == key
+    assert cache.make_key("llama3", "assistente", "e depois?", history=other) != key
+    assert cache.make_key("llama3", "assistente", "e depois?", history=question, summary="viagem") != key
+    assert cache.make_key("llama3", "assistente", "e depois?") != key
+
+@pytest.mark.parametrize("message, cacheable", [
+    ("Qual a capital da França?", True),
+    ("Que horas são?", False),
+    ("qual a data de hoje", False),
+    ("o que aconteceu ontem no jogo?", False),
+    ("Qual o ano atual?", False),
+])
+def test_time_sensitive_questions_are_not_cacheable(message, cacheable):
+    assert ResponseCache.is_cacheable(message) is cacheable
+
+class ScriptedBackend:
+    """Camadas de fallback do motor trocadas por respostas numeradas"""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    async def __call__(self, session, message, context=None, memory=None):
+        self.prompts.append((session.session_id, message))
+        return f"resposta {len(self.prompts)}", True
+
+def test_follow_ups_of_different_conversations_get_their_own_answers(engine, monkeypatch):
+    backend = ScriptedBackend()
+    monkeypatch.setattr(engine, "_fallback_chain", backend)
+    
+    def chat(message, session_id):
+        return engine.runtime.run(engine.chat(message, session_id=session_id), timeout=10)
+    
+    france = chat("Qual a capital da França?", "ana")
+    italy = chat("Qual a capital da Itália?", "bia")
+    assert chat("Qual a capital da França?", "caio") == france  # Primeiro turno igual: cache
+    
+    ana = chat("e depois?", "ana")
+    bia = chat("e depois?", "bia")
+    assert ana != bia
+    assert chat("e depois?", "caio") == ana  # Mesma conversa até aqui
+    assert france != italy
+    assert len(backend.prompts) == 4
+
+def test_time_sensitive_answers_are_generated_every_time(engine, monkeypatch):
+    backend = ScriptedBackend()
+    monkeypatch.setattr(engine, "_fallback_chain", backend)
+    
+    for session_id in ("ana", "bia"):
+        engine.runtime.run(engine.chat("Que horas são agora?", session_id=session_id), timeout=10)
+    assert len(backend.prompts) == 2
+    assert engine.response_cache.stats()['stores'] == 0
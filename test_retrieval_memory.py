@@ -0,0 +1,55 @@
+"""
+Testes da memória de recuperação
+Conversas antigas de uma sessão não podem aparecer no prompt de outra
+"""
+
+import time
+
+import pytest
+
+from core.retrieval_memory import RetrievalMemory
+
+class NoPlugins:
+    """Gerenciador sem notas nem tarefas"""
+    
+    def get_plugin(self, name):
+        return None
+
+@pytest.fixture
+def memory():
+    memory = RetrievalMemory(NoPlugins(), embedding_model=None, min_score=0.1, sync_interval=60)
+    memory.start()
+    assert memory.ready.wait(10)
+    yield memory
+    memory.stop()
+
+def _index(memory, session_id, messages):
+    """Indexa uma troca de conversa e espera a thread de fundo processá-la"""
+    expected = memory.stats()['records'].get('chat', 0) + 1
+    memory.add_messages(session_id, messages)
+    deadline = time.monotonic() + 10
+    while memory.stats()['records'].get('chat', 0) < expected:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_chat_turns_only_come_back_to_their_own_session(memory):
+    _index(memory, "alice", [
+        {"role": "user", "content": "a senha do cofre do escritório é girassol azul"},
+        {"role": "assistant", "content": "Anotado, a senha do cofre é girassol azul."},
+    ])
+    
+    own = memory.search("qual a senha do cofre do escritório?", session_id="alice")
+    assert [snippet.source for snippet in own] == ["chat"]
+    assert "girassol" in own[0].text
+    
+    assert memory.search("qual a senha do cofre do escritório?", session_id="bob") == []
+    assert memory.search("qual a senha do cofre do escritório?") == []
+
+def test_session_prefix_does_not_leak_between_similar_ids(memory):
+    _index(memory, "sala:1", [
+        {"role": "user", "content": "o código da garagem é 4471"},
+        {"role": "assistant", "content": "Guardei o código da garagem."},
+    ])
+    
+    assert memory.search("código da garagem", session_id="sala") == []
+    assert memory.search("código da garagem", session_id="sala:1")
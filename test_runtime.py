@@ -0,0 +1,111 @@
+"""
+Testes do runtime assíncrono
+Um loop persistente numa thread, usado por código síncrono
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from conftest import eventually
+from core.runtime import EngineRuntime
+
+@pytest.fixture
+def runtime():
+    runtime = EngineRuntime("test-runtime")
+    yield runtime
+    runtime.stop()
+
+def test_run_returns_results_on_one_persistent_loop(runtime):
+    async def current():
+        return asyncio.get_running_loop(), threading.current_thread().name
+    
+    first_loop, thread = runtime.run(current())
+    second_loop, _ = runtime.run(current())
+    assert first_loop is second_loop is runtime.loop
+    assert thread == "test-runtime"
+
+def test_run_raises_the_coroutine_error(runtime):
+    async def failing():
+        raise ValueError("falhou")
+    
+    with pytest.raises(ValueError, match="falhou"):
+        runtime.run(failing())
+    assert runtime.stats()['failed'] == 1
+
+def test_timeout_cancels_the_task(runtime):
+    cancelled = threading.Event()
+    
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    with pytest.raises(concurrent.futures.TimeoutError):
+        runtime.run(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+    assert eventually(lambda: runtime.stats()['cancelled'] == 1)
+
+def test_run_inside_the_loop_is_refused(runtime):
+    async def nested():
+        coro = asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            runtime.run(coro)
+        return True
+    
+    assert runtime.run(nested())
+
+def test_submit_runs_coroutines_concurrently(runtime):
+    async def sleeper(n):
+        await asyncio.sleep(0.1)
+        return n
+    
+    futures = [runtime.submit(sleeper(n)) for n in range(10)]
+    assert [future.result(1) for future in futures] == list(range(10))
+    stats = runtime.stats()
+    assert stats['submitted'] == 10 and stats['completed'] == 10 and stats['active'] == 0
+
+def test_iterate_yields_items_and_closes_an_abandoned_stream(runtime):
+    closed = threading.Event()
+    
+    async def numbers(count):
+        try:
+            for n in range(count):
+                yield n
+        finally:
+            closed.set()
+    
+    assert list(runtime.iterate(numbers(3))) == [0, 1, 2]
+    
+    closed.clear()
+    for n in runtime.iterate(numbers(10)):
+        if n == 1:
+            break
+    assert closed.is_set()
+    assert runtime.stats()['failed'] == 0  # StopAsyncIteration não é falha
+
+def test_stop_cancels_pending_tasks_and_runs_shutdown_callbacks(runtime):
+    calls = []
+    
+    async def close_clients():
+        calls.append("fechado")
+    
+    runtime.on_shutdown(close_clients)
+    pending = runtime.submit(asyncio.sleep(10))
+    loop = runtime.loop
+    
+    runtime.stop()
+    assert calls == ["fechado"]
+    assert pending.cancelled()
+    assert loop.is_closed() and not runtime.stats()['running']
+    assert runtime.run(asyncio.sleep(0, result="de novo")) == "de novo"  # Recria o loop
+
+def test_stats_reports_loop_lag(runtime):
+    assert runtime.stats()['loop_lag_ms'] is None  # Loop ainda não criado
+    runtime.run(asyncio.sleep(0))
+    stats = runtime.stats()
+    assert stats['running'] and 0 <= stats['loop_lag_ms'] < 1000
@@ -0,0 +1,103 @@
+"""
+Testes do agendador de gerações (GenerationScheduler)
+Chat interativo antes de lotes; quem desiste da fila não prende a vaga
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import settle
+from core.ai_engine import PRIORITY_BATCH, PRIORITY_INTERACTIVE, GenerationBusyError, GenerationScheduler
+
+async def _worker(scheduler, priority, name, order, hold):
+    async with scheduler.slot(priority):
+        order.append(name)
+        await hold.wait()
+
+def test_interactive_requests_jump_ahead_of_batch():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=8)
+        order = []
+        hold = asyncio.Event()
+        tasks = [asyncio.ensure_future(_worker(scheduler, PRIORITY_BATCH, "lote-0", order, hold))]
+        await settle()
+        for name, priority in [("lote-1", PRIORITY_BATCH), ("chat-1", PRIORITY_INTERACTIVE),
+                               ("lote-2", PRIORITY_BATCH), ("chat-2", PRIORITY_INTERACTIVE)]:
+            tasks.append(asyncio.ensure_future(_worker(scheduler, priority, name, order, hold)))
+            await settle()
+        
+        hold.set()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+    
+    order, stats = asyncio.run(scenario())
+    assert order == ["lote-0", "chat-1", "chat-2", "lote-1", "lote-2"]
+    assert stats['admitted'] == 5
+    assert stats['active'] == 0 and stats['queued'] == 0
+
+def test_cancelled_waiter_leaves_the_queue_without_taking_the_slot():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=8)
+        order = []
+        hold = asyncio.Event()
+        running = asyncio.ensure_future(_worker(scheduler, PRIORITY_INTERACTIVE, "a", order, hold))
+        await settle()
+        quitter = asyncio.ensure_future(_worker(scheduler, PRIORITY_INTERACTIVE, "b", order, hold))
+        patient = asyncio.ensure_future(_worker(scheduler, PRIORITY_BATCH, "c", order, hold))
+        await settle()
+        assert scheduler.stats()['queued'] == 2
+        
+        quitter.cancel()
+        await settle()
+        assert scheduler.stats()['queued'] == 1
+        
+        hold.set()
+        await asyncio.gather(running, patient)
+        with pytest.raises(asyncio.CancelledError):
+            await quitter
+        return order, scheduler.stats()
+    
+    order, stats = asyncio.run(scenario())
+    assert order == ["a", "c"]
+    assert stats['active'] == 0 and stats['queued'] == 0
+
+def test_waiter_cancelled_while_the_slot_is_handed_over_gives_it_back():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=8)
+        await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await settle()
+        
+        # O solicitante desiste e, antes de ele acordar, a vaga é concedida
+        waiter.cancel()
+        scheduler.release()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await settle()
+        return scheduler.stats()
+    
+    stats = asyncio.run(scenario())
+    assert stats['active'] == 0 and stats['queued'] == 0
+    assert stats['admitted'] == 1
+
+def test_full_queue_and_queue_timeout_are_refused():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        await scheduler.acquire()
+        queued = asyncio.ensure_future(scheduler.acquire())
+        await settle()
+        assert scheduler.is_saturated()
+        
+        with pytest.raises(GenerationBusyError):
+            await scheduler.acquire()
+        with pytest.raises(GenerationBusyError):
+            await queued
+        
+        scheduler.release()
+        return scheduler.stats()
+    
+    stats = asyncio.run(scenario())
+    assert stats['rejected'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['active'] == 0 and stats['queued'] == 0
@@ -0,0 +1,70 @@
+"""
+Testes do modo do servidor web
+Escolha do async_mode, limite de arquivos abertos e ponte com o runtime
+"""
+
+import concurrent.futures
+import importlib.util
+import threading
+
+import pytest
+
+from core.server_mode import ServerBridge, raise_fd_limit, resolve_async_mode
+
+HAS_EVENTLET = importlib.util.find_spec("eventlet") is not None
+
+async def _answer():
+    return 42
+
+def test_resolve_async_mode():
+    installed = "eventlet" if HAS_EVENTLET else "threading"
+    assert resolve_async_mode("threading") == "threading"
+    assert resolve_async_mode("THREADING") == "threading"
+    assert resolve_async_mode("auto") == installed
+    assert resolve_async_mode("eventlet") == installed  # Sem o pacote, cai para threading
+    assert resolve_async_mode("gevent") == installed  # Desconhecido vira auto
+    assert resolve_async_mode(None) == installed
+
+def test_raise_fd_limit_never_lowers_the_limit():
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    assert raise_fd_limit(1) == soft
+    
+    wanted = soft + 16 if hard == resource.RLIM_INFINITY else min(soft + 16, hard)
+    assert raise_fd_limit(wanted) == wanted
+    assert resource.getrlimit(resource.RLIMIT_NOFILE)[0] == wanted
+
+def test_threading_bridge_calls_directly():
+    bridge = ServerBridge("threading")
+    bridge.start(lambda task: pytest.fail("sem despacho no modo threading"))
+    caller = threading.current_thread()
+    seen = []
+    
+    bridge.call(lambda value: seen.append((value, threading.current_thread())), "emit")
+    assert seen == [("emit", caller)]
+    assert bridge.offload(lambda: threading.current_thread()) is caller
+    
+    future = concurrent.futures.Future()
+    with pytest.raises(concurrent.futures.TimeoutError):
+        bridge.wait(future, 0.01)
+    future.set_result(42)
+    assert bridge.wait(future, 1) == 42
+
+def test_eventlet_bridge_queues_calls_from_other_threads():
+    bridge = ServerBridge("eventlet")  # Fila não depende do eventlet, só o despacho
+    seen = []
+    worker = threading.Thread(target=bridge.call, args=(seen.append, "emit"))
+    worker.start()
+    worker.join()
+    
+    assert seen == []  # Antes de start() fica na fila até o hub despachar
+    fn, args, _ = bridge._calls.get_nowait()
+    fn(*args)
+    assert seen == ["emit"]
+
+def test_app_in_threading_mode_waits_on_the_bridge(make_app):
+    app = make_app()
+    assert app.async_mode == "threading"
+    assert app.ai_engine.runtime._wait == app.bridge.wait
+    assert app._server_options() == {}
+    assert app.ai_engine.runtime.run(_answer(), timeout=5) == 42
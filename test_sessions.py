@@ -0,0 +1,69 @@
+"""
+Testes das sessões de conversa
+Histórico, personalidade e modelo de um cliente não vazam para outro
+"""
+
+from core.sessions import ChatSession, OllamaContext, SessionStore
+
+def _talk(session, message, response):
+    session.history.extend([
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": response},
+    ])
+
+def test_sessions_keep_their_own_history_and_settings():
+    store = SessionStore("padrao")
+    alice = store.get("alice")
+    bob = store.get("bob")
+    
+    _talk(alice, "meu nome é Alice", "Prazer, Alice.")
+    alice.personality = "tecnico"
+    alice.model = "llama3:latest"
+    
+    assert store.get("alice") is alice
+    assert store.get("bob").history == []
+    assert bob.personality == "padrao"
+    assert bob.model is None
+    assert len(store) == 2
+
+def test_compacted_sessions_come_back_with_their_own_state():
+    store = SessionStore("padrao", cold_after=0, idle_timeout=3600)
+    alice = store.get("alice")
+    _talk(alice, "lembre do código 1234", "Lembrarei.")
+    alice.ollama_context = OllamaContext("llama3:latest", "padrao", [1, 2, 3])
+    _talk(store.get("bob"), "qual o clima?", "Ensolarado.")
+    
+    store.sweep()
+    assert store.stats()['compacted_sessions'] == 2
+    
+    restored = store.get("alice")
+    assert restored is not alice
+    assert [m["content"] for m in restored.history] == ["lembre do código 1234", "Lembrarei."]
+    assert restored.ollama_context.tokens == [1, 2, 3]
+    assert [m["content"] for m in store.get("bob").history] == ["qual o clima?", "Ensolarado."]
+
+def test_drop_only_removes_its_own_session():
+    store = SessionStore("padrao")
+    _talk(store.get("alice"), "oi", "Olá!")
+    _talk(store.get("bob"), "tchau", "Até logo!")
+    
+    store.drop("alice")
+    
+    assert store.get("alice").history == []
+    assert store.get("bob").history[0]["content"] == "tchau"
+
+def test_least_recently_used_session_is_evicted_first():
+    store = SessionStore("padrao", max_sessions=2)
+    _talk(store.get("alice"), "oi", "Olá!")
+    _talk(store.get("bob"), "oi", "Olá!")
+    store.get("alice")
+    store.get("carol")
+    
+    assert store.stats()['evicted'] == 1
+    assert store.get("alice").history != []
+    assert store.get("bob").history == []
+
+def test_serialized_session_round_trip():
+    session = ChatSession("alice", "padrao", history=[{"role": "user", "content": "ação"}],
+                          summary="resumo")
+    assert ChatSession.from_bytes(session.to_bytes()) == session
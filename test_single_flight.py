@@ -0,0 +1,248 @@
+"""
+Testes da coalescência de requisições (SingleFlight)
+Cancelar uma espera não pode afetar as demais chamadas com a mesma chave
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import settle
+from core.cancellation import CancelToken, RequestCancelledError
+from core.single_flight import SingleFlight
+
+class FakeBackend:
+    """Geração controlada pelo teste: conta chamadas e registra o cancelamento"""
+    
+    def __init__(self, result="ok"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+    
+    async def generate(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+    
+    async def stream(self, final):
+        self.calls += 1
+        try:
+            for chunk in ("a", "b", "c"):
+                await self.release.wait()
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        final["done"] = True
+
+async def _chat(flight, key, backend, token):
+    """Espera como AIEngine.chat: o corpo inteiro dentro de cancel.bind()"""
+    async with token.bind():
+        return await flight.do(key, backend.generate)
+
+async def _collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+async def _gather_chats(cancel_index):
+    flight = SingleFlight()
+    backend = FakeBackend()
+    tokens = [CancelToken() for _ in range(3)]
+    tasks = []
+    for token in tokens:
+        tasks.append(asyncio.ensure_future(_chat(flight, "k", backend, token)))
+        await settle()
+    
+    tokens[cancel_index].cancel()
+    await settle()
+    backend.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return flight, backend, results
+
+def test_follower_cancel_keeps_leader_and_other_followers():
+    flight, backend, results = asyncio.run(_gather_chats(cancel_index=1))
+    
+    assert results[0] == "ok"
+    assert isinstance(results[1], RequestCancelledError)
+    assert results[2] == "ok"
+    assert backend.calls == 1
+    assert not backend.cancelled
+    assert flight.in_flight() == 0
+
+def test_leader_cancel_keeps_followers_on_the_shared_generation():
+    flight, backend, results = asyncio.run(_gather_chats(cancel_index=0))
+    
+    assert isinstance(results[0], RequestCancelledError)
+    assert results[1:] == ["ok", "ok"]
+    assert backend.calls == 1
+    assert not backend.cancelled
+
+def test_backend_cancelled_only_when_last_waiter_leaves():
+    async def scenario():
+        flight = SingleFlight()
+        backend = FakeBackend()
+        tokens = [CancelToken(), CancelToken()]
+        tasks = [asyncio.ensure_future(_chat(flight, "k", backend, token)) for token in tokens]
+        await settle()
+        
+        tokens[0].cancel()
+        await settle()
+        assert not backend.cancelled
+        
+        tokens[1].cancel()
+        await settle()
+        assert backend.cancelled
+        assert flight.in_flight() == 0
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RequestCancelledError) for result in results)
+        
+        # Chamada nova com a mesma chave inicia outra geração
+        again = FakeBackend("de novo")
+        again.release.set()
+        assert await flight.do("k", again.generate) == "de novo"
+        return flight.stats()
+    
+    stats = asyncio.run(scenario())
+    assert stats['abandoned'] == 1
+    assert stats['leaders'] == 2
+
+def test_deadline_of_one_waiter_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        backend = FakeBackend()
+        short = asyncio.ensure_future(_chat(flight, "k", backend, CancelToken(timeout=0.05)))
+        long = asyncio.ensure_future(_chat(flight, "k", backend, CancelToken(timeout=5)))
+        await asyncio.sleep(0.1)
+        backend.release.set()
+        return await asyncio.gather(short, long, return_exceptions=True), backend
+    
+    (short, long), backend = asyncio.run(scenario())
+    assert isinstance(short, RequestCancelledError) and short.reason == "deadline"
+    assert long == "ok"
+    assert not backend.cancelled
+
+def test_stream_consumer_cancel_keeps_the_others_streaming():
+    async def consume(flight, backend, token, final):
+        chunks = []
+        async for chunk in token.guard(flight.stream("k", backend.stream, final=final)):
+            chunks.append(chunk)
+        return "".join(chunks)
+    
+    async def scenario():
+        flight = SingleFlight()
+        backend = FakeBackend()
+        tokens = [CancelToken() for _ in range(3)]
+        finals = [{} for _ in range(3)]
+        tasks = []
+        for token, final in zip(tokens, finals):
+            tasks.append(asyncio.ensure_future(consume(flight, backend, token, final)))
+            await settle()
+        
+        tokens[0].cancel()
+        await settle()
+        backend.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results, finals, backend, flight
+    
+    results, finals, backend, flight = asyncio.run(scenario())
+    assert isinstance(results[0], RequestCancelledError)
+    assert results[1:] == ["abc", "abc"]
+    assert finals[1] == finals[2] == {"done": True}
+    assert backend.calls == 1
+    assert not backend.cancelled
+    assert flight.in_flight() == 0
+
+def test_stream_closed_by_every_consumer_stops_the_backend():
+    async def scenario():
+        flight = SingleFlight()
+        backend = FakeBackend()
+        stream = flight.stream("k", backend.stream)
+        task = asyncio.ensure_future(stream.__anext__())
+        await settle()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await settle()
+        return backend, flight
+    
+    backend, flight = asyncio.run(scenario())
+    assert backend.cancelled
+    assert flight.in_flight() == 0
+
+def test_identical_calls_share_one_generation():
+    async def scenario():
+        flight = SingleFlight()
+        backend = FakeBackend()
+        other = FakeBackend("outra")
+        tasks = [asyncio.ensure_future(flight.do("k", backend.generate)) for _ in range(3)]
+        tasks.append(asyncio.ensure_future(flight.do("j", other.generate)))
+        await settle()
+        assert flight.in_flight() == 2
+        
+        backend.release.set()
+        other.release.set()
+        return await asyncio.gather(*tasks), backend, other, flight.stats()
+    
+    results, backend, other, stats = asyncio.run(scenario())
+    assert results == ["ok", "ok", "ok", "outra"]
+    assert backend.calls == other.calls == 1
+    assert stats['leaders'] == 2 and stats['coalesced'] == 2
+    assert stats['in_flight'] == 0
+
+def test_errors_reach_every_waiter_and_the_key_is_freed():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("backend caiu")
+    
+    async def scenario():
+        flight = SingleFlight()
+        tasks = [asyncio.ensure_future(flight.do("k", failing)) for _ in range(2)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        backend = FakeBackend()
+        backend.release.set()
+        return results, await flight.do("k", backend.generate)
+    
+    results, again = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert again == "ok"
+
+def test_late_stream_consumer_gets_the_chunks_already_generated():
+    async def scenario():
+        flight = SingleFlight()
+        chunks = asyncio.Queue()
+        calls = []
+        
+        async def backend(final):
+            calls.append(1)
+            while (chunk := await chunks.get()) is not None:
+                yield chunk
+            final["done"] = True
+        
+        first = flight.stream("k", backend)
+        chunks.put_nowait("a")
+        received = [await first.__anext__()]
+        
+        late_final = {}
+        late = asyncio.ensure_future(_collect(flight.stream("k", backend, final=late_final)))
+        await settle()
+        for chunk in ("b", "c", None):
+            chunks.put_nowait(chunk)
+        received += [chunk async for chunk in first]
+        return "".join(received), await late, late_final, len(calls)
+    
+    first, late, late_final, calls = asyncio.run(scenario())
+    assert first == late == "abc"
+    assert late_final == {"done": True}
+    assert calls == 1
+
+def test_make_key_is_stable_and_separates_options():
+    key = SingleFlight.make_key("ollama", "llama3", "oi", {"b": 1, "a": 2})
+    assert SingleFlight.make_key("ollama", "llama3", "oi", {"a": 2, "b": 1}) == key
+    assert SingleFlight.make_key("ollama", "llama3", "oi", {"a": 2, "b": 2}) != key
+    assert SingleFlight.make_key("ollama", "mistral", "oi", {"b": 1, "a": 2}) != key
@@ -0,0 +1,67 @@
+"""
+Testes da entrega por salas do Socket.IO
+Respostas só para as conexões da sessão; monitoramento só para o grupo do intervalo
+"""
+
+import pytest
+
+from conftest import eventually
+
+ANSWER = "Olá! Sou o JARVIS simulado."
+
+@pytest.fixture
+def app(make_app, ollama_stub):
+    _, url = ollama_stub()
+    return make_app(ollama_urls=[url], response_cache_enabled=False)
+
+def _connect(app, flask_client=None):
+    client = app.socketio.test_client(app.app, flask_test_client=flask_client)
+    assert client.get_received()[0]["name"] == "connected"
+    client.log = []
+    return client
+
+def _events(client, name):
+    client.log.extend(client.get_received())
+    return [m["args"][0] for m in client.log if m["name"] == name]
+
+def test_chat_reply_reaches_only_the_sender(app):
+    alice, bruno = _connect(app), _connect(app)
+    
+    alice.emit("chat_message", {"message": "Qual a capital da França?", "request_id": "a1"})
+    assert eventually(lambda: _events(alice, "chat_response"))
+    assert _events(alice, "chat_response")[0]["response"] == ANSWER
+    assert _events(alice, "chat_response")[0]["request_id"] == "a1"
+    assert not bruno.get_received()
+
+def test_tabs_of_the_same_session_share_the_reply(app):
+    browser = app.app.test_client()
+    assert browser.get("/chat").status_code == 200  # A página cria o cookie da sessão de conversa
+    tab, other_tab, stranger = _connect(app, browser), _connect(app, browser), _connect(app)
+    
+    tab.emit("chat_message", {"message": "Qual a capital da França?", "request_id": "t1"})
+    assert eventually(lambda: _events(other_tab, "chat_response"))
+    assert _events(tab, "chat_response")[0]["request_id"] == "t1"
+    assert not stranger.get_received()
+
+def test_metrics_are_published_to_the_interval_room(app):
+    fast, slow, idle = _connect(app), _connect(app), _connect(app)
+    fast.emit("start_monitoring", {"interval": 3})
+    slow.emit("start_monitoring", {"interval": 10})
+    assert _events(fast, "monitoring_started") == [{"status": "started", "interval": 3}]
+    assert _events(slow, "monitoring_started") == [{"status": "started", "interval": 10}]
+    
+    app.metrics.publish(10, {"marker": "10s"})
+    app.metrics.publish(3, {"marker": "3s"})
+    marked = lambda client: [data["marker"] for data in _events(client, "system_update") if "marker" in data]
+    assert marked(fast) == ["3s"] and marked(slow) == ["10s"]
+    assert not _events(idle, "system_update")
+    
+    # Trocar de intervalo sai da sala antiga
+    fast.emit("start_monitoring", {"interval": 10})
+    app.metrics.publish(3, {"marker": "3s de novo"})
+    app.metrics.publish(10, {"marker": "10s de novo"})
+    assert marked(fast)[-1] == "10s de novo" and "3s de novo" not in marked(fast)
+    
+    fast.emit("stop_monitoring")
+    app.metrics.publish(10, {"marker": "depois"})
+    assert "depois" not in marked(fast) and marked(slow)[-1] == "depois"
@@ -0,0 +1,120 @@
+"""
+Testes do streaming de respostas
+Trechos do Ollama repassados pelo motor, por SSE e pelo Socket.IO
+"""
+
+import asyncio
+import json
+
+from conftest import eventually
+from core.ollama_integration import MSG_STREAM_ERROR, AsyncOllamaLocalAI
+from core.streaming import iterate_sync, sse_event
+
+MODEL = "llama3.2:1b"
+ANSWER = "Olá! Sou o JARVIS simulado."
+
+def _collect(stream):
+    async def scenario():
+        return [chunk async for chunk in stream]
+    return asyncio.run(scenario())
+
+def _events(body):
+    """Eventos SSE de uma resposta: lista de (evento, dados)"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+def test_sse_event_format():
+    assert sse_event({"chunk": "olá"}) == 'data: {"chunk": "olá"}\n\n'
+    assert sse_event({"ok": True}, event="done") == 'event: done\ndata: {"ok": true}\n\n'
+
+def test_iterate_sync_closes_the_stream_when_the_consumer_stops():
+    closed = []
+    
+    async def numbers():
+        try:
+            for n in range(10):
+                yield n
+        finally:
+            closed.append(True)
+    
+    for n in iterate_sync(numbers()):
+        if n == 2:
+            break
+    assert closed == [True]
+
+def test_generate_stream_yields_pieces_and_fills_final(ollama_stub):
+    _, url = ollama_stub()
+    client = AsyncOllamaLocalAI(url)
+    final = {}
+    
+    chunks = _collect(client.generate_stream("oi", model=MODEL, final=final))
+    assert len(chunks) == 5
+    assert "".join(chunks).strip() == ANSWER
+    assert final["done"] and final["context"] == [1, 2, 3]
+
+def test_consumer_stopping_early_does_not_count_against_the_server(ollama_stub):
+    _, url = ollama_stub()
+    client = AsyncOllamaLocalAI(url)
+    
+    async def first_two():
+        stream = client.generate_stream("oi", model=MODEL)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return chunks
+    
+    assert len(asyncio.run(first_two())) == 2
+    backend = client.pool.primary
+    assert backend.in_flight == 0 and backend.failures == 0
+    assert backend.latency_ewma is None  # Abandonada: não entra na média
+
+def test_chat_stream_ends_with_a_friendly_error(ollama_stub):
+    _, url = ollama_stub(failing=True)
+    client = AsyncOllamaLocalAI(url)
+    assert _collect(client.chat_stream("oi", model=MODEL)) == [MSG_STREAM_ERROR]
+
+def test_engine_streams_the_ollama_answer_into_the_session(make_engine, ollama_stub):
+    _, url = ollama_stub()
+    engine = make_engine(ollama_urls=[url], response_cache_enabled=False)
+    
+    async def collect():
+        return [chunk async for chunk in engine.chat_stream("Qual a capital da França?", session_id="ana")]
+    
+    chunks = engine.runtime.run(collect(), timeout=10)
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == ANSWER
+    session = engine.get_session("ana")
+    assert session.history[-1] == {"role": "assistant", "content": ANSWER}
+    assert session.ollama_context.tokens == [1, 2, 3]
+
+def test_http_chat_streams_server_sent_events(make_app, ollama_stub):
+    _, url = ollama_stub()
+    app = make_app(ollama_urls=[url], response_cache_enabled=False)
+    
+    response = app.app.test_client().post("/api/chat", json={"message": "Qual a capital da França?",
+                                                             "stream": True})
+    assert response.mimetype == "text/event-stream"
+    events = _events(response.get_data(as_text=True))
+    chunks = [data["chunk"] for name, data in events if name == "message"]
+    assert len(chunks) > 1
+    assert events[-1] == ("done", {"success": True, "response": ANSWER, "personality": "assistente"})
+    assert "".join(chunks).strip() == ANSWER
+
+def test_socket_chat_streams_chunks_before_the_reply(make_app, ollama_stub):
+    _, url = ollama_stub()
+    app = make_app(ollama_urls=[url], response_cache_enabled=False)
+    client = app.socketio.test_client(app.app)
+    client.get_received()
+    received = []
+    
+    client.emit("chat_message", {"message": "Qual a capital da França?", "stream": True, "request_id": "r1"})
+    assert eventually(lambda: received.extend(client.get_received()) or
+                      any(m["name"] == "chat_response" for m in received))
+    names = [m["name"] for m in received]
+    chunks = [m["args"][0] for m in received if m["name"] == "chat_response_chunk"]
+    assert names[-1] == "chat_response" and len(chunks) > 1
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    assert {chunk["request_id"] for chunk in chunks} == {"r1"}
+    assert received[-1]["args"][0]["response"] == ANSWER
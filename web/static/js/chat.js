@@ -7,6 +7,9 @@ class JarvisChat {
         this.currentPersonality = 'assistente';
         this.personalities = [];
         this.currentMessageTimeout = null; // CORREÇÃO: Timeout para mensagens
+        this.streamingMessage = null; // Elemento da resposta sendo transmitida
+        this.currentRequestId = null; // Requisição em andamento (para cancel_chat)
+        this.sentRequests = new Set(); // Requisições enviadas por esta aba ainda sem resposta final
         
         this.init();
     }
@@ -40,25 +43,63 @@ class JarvisChat {
             this.updateConnectionStatus(false);
         });
         
+        // Abas com o mesmo cookie estão na mesma sala: cada uma só trata as próprias respostas
+        this.socket.on('chat_response_chunk', (data) => {
+            if (!this.isOwnReply(data)) return;
+            
+            // Primeiro token: troca o indicador de digitação pela resposta
+            if (this.currentMessageTimeout) {
+                clearTimeout(this.currentMessageTimeout);
+                this.currentMessageTimeout = null;
+            }
+            
+            if (!this.streamingMessage) {
+                this.hideTypingIndicator();
+                this.streamingMessage = this.addMessage('', 'assistant');
+            }
+            
+            this.streamingMessage.textContent += data.chunk;
+            this.scrollToBottom();
+        });
+        
         this.socket.on('chat_response', (data) => {
+            if (!this.finishRequest(data)) return;
+            
             // CORREÇÃO: Limpar timeout se resposta chegou
             if (this.currentMessageTimeout) {
                 clearTimeout(this.currentMessageTimeout);
                 this.currentMessageTimeout = null;
             }
             
-            this.addMessage(data.response, 'assistant');
+            if (this.streamingMessage) {
+                this.streamingMessage.textContent = data.response;
+                this.streamingMessage = null;
+            } else {
+                this.addMessage(data.response, 'assistant');
+            }
             this.hideTypingIndicator();
         });
         
+        this.socket.on('chat_cancelled', (data) => {
+            if (!this.finishRequest(data)) return;
+            
+            if (data.request_id === this.currentRequestId) {
+                this.currentRequestId = null;
+            }
+            console.log('🛑 Requisição cancelada:', data.request_id);
+        });
+        
         this.socket.on('chat_error', (data) => {
+            if (!this.finishRequest(data)) return;
+            
             // CORREÇÃO: Limpar timeout se erro chegou
             if (this.currentMessageTimeout) {
                 clearTimeout(this.currentMessageTimeout);
                 this.currentMessageTimeout = null;
             }
             
-            this.addMessage('❌ Erro: ' + (data.error || 'Erro desconhecido'), 'system');
+            this.streamingMessage = null;
+            this.addMessage((data.busy ? '⏳ ' : '❌ Erro: ') + (data.error || 'Erro desconhecido'), 'system');
             this.hideTypingIndicator();
             console.error('Erro no chat:', data.error);
         });
@@ -68,6 +109,18 @@ class JarvisChat {
         });
     }
     
+    isOwnReply(data) {
+        // Erros sem request_id são enviados só para esta conexão
+        return !data.request_id || this.sentRequests.has(data.request_id);
+    }
+    
+    finishRequest(data) {
+        // Resposta final: a requisição sai da lista desta aba
+        if (!this.isOwnReply(data)) return false;
+        this.sentRequests.delete(data.request_id);
+        return true;
+    }
+    
     setupEventListeners() {
         // Envio de mensagem
         this.sendBtn.addEventListener('click', () => this.sendMessage());
@@ -196,7 +249,7 @@ class JarvisChat {
         if (!message || !this.isConnected) return;
         
         // CORREÇÃO: Validar se não há outra mensagem sendo processada
-        if (document.getElementById('typing-indicator')) {
+        if (document.getElementById('typing-indicator') || this.streamingMessage) {
             this.addMessage('⚠️ Aguarde a resposta anterior antes de enviar nova mensagem.', 'system');
             return;
         }
@@ -211,8 +264,17 @@ class JarvisChat {
         // Mostra indicador de digitação
         this.showTypingIndicator();
         
+        // Identificador para cancelar a requisição no servidor
+        const requestId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+        this.currentRequestId = requestId;
+        this.sentRequests.add(requestId);
+        
         // CORREÇÃO: Adicionar timeout para resposta
         const messageTimeout = setTimeout(() => {
+            // Desistimos da resposta: o servidor para de gerar
+            this.socket.emit('cancel_chat', { request_id: requestId });
+            this.currentRequestId = null;
+            this.streamingMessage = null;
             this.hideTypingIndicator();
             this.addMessage('⏰ Timeout: A IA demorou para responder. Tente novamente.', 'system');
         }, 45000); // 45 segundos timeout
@@ -220,8 +282,8 @@ class JarvisChat {
         // Armazenar timeout para cancelar se necessário
         this.currentMessageTimeout = messageTimeout;
         
-        // Envia via WebSocket
-        this.socket.emit('chat_message', { message });
+        // Envia via WebSocket (o prazo vale também no servidor)
+        this.socket.emit('chat_message', { message, stream: true, request_id: requestId, timeout: 45 });
         
         // Log de atividade
         this.addActivityLog(`Enviou: "${message.substring(0, 30)}..."`);
@@ -264,6 +326,8 @@ class JarvisChat {
         
         this.chatMessages.appendChild(messageDiv);
         this.scrollToBottom();
+        
+        return messageText;
     }
     
     showTypingIndicator() {
@@ -353,8 +417,8 @@ class JarvisChat {
     }
     
     startSystemMonitoring() {
-        // Solicita monitoramento do sistema
-        this.socket.emit('start_monitoring');
+        // Solicita monitoramento do sistema (estatísticas rápidas: basta a cada 10 s)
+        this.socket.emit('start_monitoring', { interval: 10 });
     }
     
     addActivityLog(text) {